@@ -8,16 +8,21 @@ from functools import wraps
 from datetime import datetime, timedelta
 from routes.api_fazendas import criar_api_fazendas  # Módulo de APIs de fazendas
 from routes.api_categorias import api_categorias  # Módulo de APIs de categorias de animais
+import simular_data
 from simular_data import now, get_status  # Suporte a data de teste
 from services.clima_service import obter_clima_com_fallback, get_descricao_clima
+from services import conexao_db, agendador_service
+import migrations
 
 app = Flask(__name__)
 app.secret_key = 'pastagens_secret_key_2024'
+conexao_db.init_app(app)  # Uma conexão SQLite por requisição, devolvida ao pool no teardown
+simular_data.init_app(app)  # "Agora" resolvido uma vez por requisição (data de teste por sessão)
+agendador_service.init_app(app)  # Pré-busca do clima em segundo plano (PASTOFLOW_PREFETCH_CLIMA=0 desliga)
 
-database.init_db()
-database.ensure_operador_permission_columns()
-database.ensure_manager_limit_columns()
-database.ensure_movimentacoes_user_column()
+# Só verifica a versão do schema (uma consulta). DDL roda via "python -m migrations";
+# o servidor de desenvolvimento (python app.py) ou PASTOFLOW_AUTO_MIGRATE=1 migram sozinhos.
+migrations.garantir_schema(auto=True if __name__ == '__main__' else None)
 
 def operador_perm_required(perm_key):
     def decorator(f):
@@ -39,6 +44,23 @@ def operador_perm_required(perm_key):
         return wrapper
     return decorator
 
+def _fazenda_da_consulta():
+    """
+    fazenda_id de ?fazenda_id= (ou da sessão), validado e com acesso do usuário.
+    Retorna (fazenda_id, None) ou (None, resposta de erro).
+    """
+    if request.args.get('fazenda_id'):
+        fazenda_id = request.args.get('fazenda_id', type=int)
+        if fazenda_id is None:
+            return None, (jsonify({'error': 'fazenda_id inválido'}), 400)
+    else:
+        fazenda_id = session.get('fazenda_id')
+    if not fazenda_id:
+        return None, (jsonify({'error': 'Nenhuma fazenda selecionada'}), 400)
+    if not database.usuario_tem_acesso_fazenda(session.get('user_id'), session.get('role'), fazenda_id):
+        return None, (jsonify({'error': 'Acesso negado'}), 403)
+    return int(fazenda_id), None
+
 # Registrar módulos de APIs
 criar_api_fazendas(app)
 app.register_blueprint(api_categorias)  # Registrar API de categorias
@@ -55,6 +77,29 @@ def api_data_teste():
     return jsonify(get_status())
 
 
+@app.route('/api/data-teste', methods=['POST'])
+def api_definir_data_teste():
+    """Define a data de teste só para a sessão atual (data: YYYY-MM-DD ou null para voltar à real)"""
+    if 'user_id' not in session:
+        return jsonify({'error': 'Não autorizado'}), 401
+    # Mesma regra do header X-Data-Teste: a data da sessão move status e alertas gravados
+    if not (app.debug or app.testing):
+        return jsonify({'error': 'Data de teste disponível só em desenvolvimento'}), 403
+
+    data_str = (request.json or {}).get('data')
+    if not data_str:
+        session.pop(simular_data.SESSAO_CHAVE, None)
+        return jsonify({'status': 'ok', 'modo': 'real'})
+
+    try:
+        data = datetime.strptime(data_str, '%Y-%m-%d')
+    except ValueError:
+        return jsonify({'error': f'Formato inválido: {data_str}. Use YYYY-MM-DD'}), 400
+
+    session[simular_data.SESSAO_CHAVE] = data.date().isoformat()
+    return jsonify({'status': 'ok', 'modo': 'teste', 'data': data_str})
+
+
 @app.route('/api/clima/condicao-atual')
 def api_clima_condicao_atual():
     """Retorna a condição climática atual usada pelo sistema para a fazenda da sessão."""
@@ -96,12 +141,22 @@ def api_clima_condicao_atual():
     clima = obter_clima_com_fallback(lat, lon, prefer_cache=True)
     condicao = (clima.get('condicao') or 'normal').lower()
 
-    return jsonify({
+    resposta = {
         'condicao': condicao,
         'descricao': get_descricao_clima(condicao),
         'fator': clima.get('fator', 1.0),
         'fonte': clima.get('fonte', 'api')
-    })
+    }
+    if 'idade_segundos' in clima:
+        resposta['idade_segundos'] = clima['idade_segundos']
+    return jsonify(resposta)
+
+@app.route('/api/clima/metricas')
+@database.role_required('admin')
+def api_clima_metricas():
+    """Taxas de acerto do cache de clima (memória / SQLite) e chamadas à API."""
+    from services.clima_service import metricas_cache
+    return jsonify(metricas_cache(zerar=request.args.get('zerar') == '1'))
 
 # ============ AUTH ============
 @app.route('/login', methods=['GET', 'POST'])
@@ -603,7 +658,7 @@ def fazenda(id):
     if 'user_id' not in session:
         return redirect(url_for('login'))
     
-    from database import get_fazenda, listar_piquetes, verificar_alertas_piquetes
+    from database import get_fazenda, listar_piquetes
     fazenda = get_fazenda(id)
     
     if not fazenda:
@@ -618,10 +673,7 @@ def fazenda(id):
     session['fazenda_id'] = id
     piquetes = listar_piquetes(id)
     
-    # Verificar alertas automaticamente ao carregar a página
-    verificar_alertas_piquetes(id)
-    
-    # Stats básicas
+    # Stats básicas (a página só lê; alertas são gerados pelo agendador e por mover/medir)
     # Alinhar com regras do sistema (animais via lotes, disponíveis via piquetes sem animais)
     stats_base = database.relatorio_estatisticas(fazenda_id=id)
     stats = {
@@ -858,9 +910,9 @@ def api_mover_lote(id):
     if 'error' in result:
         return jsonify(result), 400
     
-    # Atualizar status do lote
-    fazenda_id = request.args.get('fazenda_id') or session.get('fazenda_id')
-    database.atualizar_status_lotes(fazenda_id)
+    # Atualizar status só do lote movido e os alertas da fazenda (mover_lote marcou como pendentes)
+    database.recalcular_status_pendentes()
+    database.gerar_alertas_pendentes()
     
     return jsonify(result)
 
@@ -887,10 +939,10 @@ def api_registrar_saida(id):
     lote = cursor.fetchone()
     piquete_origem_id = lote['piquete_atual_id'] if lote else None
     
-    # Criar movimentação de saída
+    # Criar movimentação de saída (o gatilho atualiza piquetes.ultima_saida/ultima_mov)
     cursor.execute('''
         INSERT INTO movimentacoes (lote_id, piquete_origem_id, usuario_id, data_movimentacao, tipo, created_at)
-        VALUES (?, ?, ?, 'saida', ?)
+        VALUES (?, ?, ?, ?, 'saida', ?)
     ''', (id, piquete_origem_id, session.get('user_id'), datetime.now().isoformat(), datetime.now().isoformat()))
     
     # Atualizar lote - sem piquete = AGUARDANDO_ALOCACAO
@@ -906,6 +958,7 @@ def api_registrar_saida(id):
     
     conn.commit()
     conn.close()
+    database.invalidar_plano(fazenda_id)
     
     return jsonify({'status': 'ok'})
 
@@ -933,7 +986,18 @@ def api_sugerir_piquetes(id):
     if not fazenda_id:
         return jsonify({'error': 'Nenhuma fazenda'}), 400
     
-    sugestoes = database.sugerir_proximo_piquete(fazenda_id, id)
+    # Top-K e filtros opcionais: ?k=5&capim=Marandu&area_min=2&distancia_max=1.5
+    try:
+        k = int(request.args['k']) if request.args.get('k') else None
+        area_min = float(request.args['area_min']) if request.args.get('area_min') else None
+        distancia_max = float(request.args['distancia_max']) if request.args.get('distancia_max') else None
+    except ValueError:
+        return jsonify({'error': 'k, area_min e distancia_max devem ser números'}), 400
+    if k is not None and k < 1:
+        return jsonify({'error': 'k deve ser maior que zero'}), 400
+    
+    sugestoes = database.sugerir_proximo_piquete(fazenda_id, id, k=k, capim=request.args.get('capim') or None,
+                                                 area_min=area_min, distancia_max=distancia_max)
     return jsonify(sugestoes)
 
 @app.route('/api/lotes/atualizar-status', methods=['POST'])
@@ -1009,6 +1073,32 @@ def api_piquetes_disponiveis():
     piquetes = database.listar_piquetes_disponiveis(fazenda_id)
     return jsonify(piquetes)
 
+@app.route('/api/piquetes/capacidade')
+def api_capacidade_piquetes():
+    """Capacidade de suporte (UA e cabeças) de todos os piquetes da fazenda"""
+    if 'user_id' not in session:
+        return jsonify({'error': 'Não autorizado'}), 401
+    
+    fazenda_id, erro = _fazenda_da_consulta()
+    if erro:
+        return erro
+    
+    # ?categoria=Vaca&peso_medio=480&dias=5 (padrão: dias_ocupacao de cada piquete)
+    from services.capacidade_service import capacidade_fazenda
+    from services.manejo_service import CATEGORIAS_BOVINOS
+    categoria = request.args.get('categoria') or None
+    if categoria is not None and categoria not in CATEGORIAS_BOVINOS:
+        return jsonify({'error': 'Categoria inválida'}), 400
+    try:
+        peso_medio = float(request.args['peso_medio']) if request.args.get('peso_medio') else None
+        dias = int(request.args['dias']) if request.args.get('dias') else None
+    except ValueError:
+        return jsonify({'error': 'peso_medio e dias devem ser números'}), 400
+    if (peso_medio is not None and peso_medio <= 0) or (dias is not None and dias < 1):
+        return jsonify({'error': 'peso_medio e dias devem ser maiores que zero'}), 400
+    
+    return jsonify(capacidade_fazenda(fazenda_id, categoria, peso_medio, dias))
+
 @app.route('/api/piquetes', methods=['POST'])
 @operador_perm_required('piquetes')
 def api_criar_piquete():
@@ -1069,6 +1159,24 @@ def api_capins():
     capins = database.listar_capins()
     return jsonify(capins)
 
+@app.route('/api/capins', methods=['POST'])
+@app.route('/api/capins/<int:id>', methods=['PUT'])
+def api_salvar_capim(id=None):
+    """Cadastra ou altera um capim (recarrega o registro usado nos cálculos)"""
+    if 'user_id' not in session:
+        return jsonify({'error': 'Não autorizado'}), 401
+    if session.get('role') not in ['gerente', 'admin']:
+        return jsonify({'error': 'Acesso negado'}), 403
+    
+    data = request.json or {}
+    # PUT altera só os campos enviados; null limpa o campo (volta ao padrão técnico)
+    campos = {k: data[k] for k in database.CAMPOS_CAPIM if k in data}
+    try:
+        capim_id = database.salvar_capim(id=id, **campos)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify({'id': capim_id, 'status': 'ok'})
+
 # ============ ANIMAIS (LEGADO - USA LAGARTOS AGORA) ============
 @app.route('/api/animais', methods=['GET'])
 def api_animais():
@@ -1196,7 +1304,6 @@ def api_alertas():
     if 'user_id' not in session:
         return jsonify({'error': 'Não autorizado'}), 401
     
-    database.criar_tabela_alertas()
     alertas = database.listar_alertas(session.get('fazenda_id'))
     return jsonify(alertas)
 
@@ -1224,7 +1331,6 @@ def api_verificar_alertas():
     if 'user_id' not in session:
         return jsonify({'error': 'Não autorizado'}), 401
     
-    database.criar_tabela_alertas()
     alertas = database.verificar_alertas_piquetes(session.get('fazenda_id'))
     return jsonify({'status': 'ok', 'alertas_criados': alertas})
 
@@ -1288,6 +1394,66 @@ def api_plano_rotacao():
     plano = database.plano_rotacao(fazenda_id)
     return jsonify(plano)
 
+@app.route('/api/rotacao/atribuicao')
+def api_atribuicao_rotacao():
+    """Distribui os lotes entre os piquetes livres de uma vez (custo mínimo, sem repetir piquete)"""
+    if 'user_id' not in session:
+        return jsonify({'error': 'Não autorizado'}), 401
+    
+    fazenda_id, erro = _fazenda_da_consulta()
+    if erro:
+        return erro
+    
+    lote_ids = None
+    if request.args.get('lote_ids'):
+        try:
+            lote_ids = [int(v) for v in request.args['lote_ids'].split(',') if v.strip()]
+        except ValueError:
+            return jsonify({'error': 'lote_ids inválido'}), 400
+    
+    from services.atribuicao_service import atribuir_lotes
+    return jsonify(atribuir_lotes(fazenda_id, lote_ids))
+
+@app.route('/api/rotacao/simular')
+def api_simular_rotacao():
+    """Projeta alturas dos piquetes e saídas dos lotes N dias à frente com o plano atual"""
+    if 'user_id' not in session:
+        return jsonify({'error': 'Não autorizado'}), 401
+    
+    fazenda_id, erro = _fazenda_da_consulta()
+    if erro:
+        return erro
+    
+    from services.simulacao_service import DIAS_MAXIMO, DIAS_PADRAO, simular_fazenda
+    try:
+        dias = int(request.args.get('dias', DIAS_PADRAO))
+    except ValueError:
+        dias = 0
+    if not 1 <= dias <= DIAS_MAXIMO:
+        return jsonify({'error': f'dias deve estar entre 1 e {DIAS_MAXIMO}'}), 400
+    
+    return jsonify(simular_fazenda(fazenda_id, dias))
+
+@app.route('/api/rotacao/calendario')
+def api_calendario_rotacao():
+    """Calendário de pastejo (lote -> piquete -> data) no horizonte móvel"""
+    if 'user_id' not in session:
+        return jsonify({'error': 'Não autorizado'}), 401
+    
+    fazenda_id, erro = _fazenda_da_consulta()
+    if erro:
+        return erro
+    
+    from services.planejamento_service import HORIZONTE_DIAS, HORIZONTE_MAXIMO, obter_plano
+    try:
+        horizonte = int(request.args.get('horizonte', HORIZONTE_DIAS))
+    except ValueError:
+        horizonte = 0
+    if not 1 <= horizonte <= HORIZONTE_MAXIMO:
+        return jsonify({'error': f'horizonte deve estar entre 1 e {HORIZONTE_MAXIMO}'}), 400
+    
+    return jsonify(obter_plano(fazenda_id, horizonte))
+
 @app.route('/api/piquetes/<int:id>/status')
 def api_status_piquete(id):
     """Retorna status detalhado de um piquete"""
@@ -1363,6 +1529,10 @@ def api_put_piquete(id):
     for lote in lotes:
         database.recalcular_dias_tecnicos_lote(lote['id'])
     
+    # Status e alertas dos lotes deste piquete (medição/suplementação marcaram como pendentes)
+    database.recalcular_status_pendentes()
+    database.gerar_alertas_pendentes()
+    
     return jsonify({'status': 'ok'})
 
 @app.route('/api/rotacao/verificar-passou-ponto')
@@ -0,0 +1 @@
+# Benchmarks (scripts avulsos: python -m benchmarks.<nome>)
@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark: estimativa de altura escalar x em lote (NumPy)
+
+Compara, sobre os mesmos dicts de piquete:
+  - escalar: calcular_altura_estimada em loop (como as listagens faziam)
+  - lote: services.altura_service.calcular_alturas_estimadas
+
+Uso:
+    python -m benchmarks.bench_altura_lote [n_piquetes]
+"""
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+_tmp = tempfile.mkdtemp(prefix='pastoflow_bench_')
+os.environ['PASTOFLOW_DB_PATH'] = os.path.join(_tmp, 'bench.db')
+
+import database  # noqa: E402
+from simular_data import relogio_fixo  # noqa: E402
+from services import conexao_db  # noqa: E402
+from services.altura_service import calcular_alturas_estimadas  # noqa: E402
+from benchmarks.dados_sinteticos import popular_fazenda  # noqa: E402
+
+DATA_REF = datetime(2026, 3, 1, 12, 0, 0)
+
+
+def _medir(funcao, repeticoes=3):
+    melhor = None
+    for _ in range(repeticoes):
+        t0 = time.perf_counter()
+        resultado = funcao()
+        ms = (time.perf_counter() - t0) * 1000
+        melhor = ms if melhor is None else min(melhor, ms)
+    return melhor, resultado
+
+
+def main():
+    n_piquetes = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+
+    database.init_db()
+    conn = conexao_db.get_db()
+    fazenda_id = popular_fazenda(conn, n_piquetes=n_piquetes, n_lotes=n_piquetes // 3, data_ref=DATA_REF)
+    # Metade em descanso para passar pelo ramo de crescimento/clima
+    conn.execute("UPDATE piquetes SET estado = 'descanso' WHERE fazenda_id = ? AND id % 2 = 0", (fazenda_id,))
+    conn.commit()
+    conn.close()
+
+    with relogio_fixo(DATA_REF):
+        piquetes = database.listar_piquetes(fazenda_id)
+        ms_escalar, escalar = _medir(lambda: [database.calcular_altura_estimada(p) for p in piquetes])
+        ms_lote, lote = _medir(lambda: calcular_alturas_estimadas(piquetes))
+
+    print("=" * 60)
+    print(f"Estimativa de altura ({len(piquetes)} piquetes)")
+    print("=" * 60)
+    print(f"  escalar (loop)  : {ms_escalar:9.2f} ms")
+    print(f"  lote (NumPy)    : {ms_lote:9.2f} ms  ({ms_escalar / ms_lote:.1f}x)")
+    print(f"  resultados iguais: {escalar == lote}")
+    print("=" * 60)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark: atribuição lote -> piquete na fazenda inteira
+
+Mede atribuir_lotes (consultas + matriz de custos + emparelhamento) e só o
+emparelhamento (resolver_atribuicao), e compara com a sugestão gulosa (cada
+lote pega o piquete mais barato ainda livre, na ordem dos lotes).
+
+Uso:
+    python -m benchmarks.bench_atribuicao [n_piquetes] [n_lotes]
+"""
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+_tmp = tempfile.mkdtemp(prefix='pastoflow_bench_')
+os.environ['PASTOFLOW_DB_PATH'] = os.path.join(_tmp, 'bench.db')
+
+import database  # noqa: E402
+from simular_data import relogio_fixo  # noqa: E402
+from services import conexao_db  # noqa: E402
+from services import atribuicao_service  # noqa: E402
+from benchmarks.dados_sinteticos import popular_fazenda  # noqa: E402
+
+DATA_REF = datetime(2026, 3, 1, 12, 0, 0)
+
+
+def _medir(funcao, repeticoes=3):
+    melhor = None
+    for _ in range(repeticoes):
+        t0 = time.perf_counter()
+        resultado = funcao()
+        ms = (time.perf_counter() - t0) * 1000
+        melhor = ms if melhor is None else min(melhor, ms)
+    return melhor, resultado
+
+
+def _guloso(custos):
+    livres = np.ones(custos.shape[1], dtype=bool)
+    total = 0.0
+    for linha in custos:
+        j = int(np.argmin(np.where(livres, linha, np.inf)))
+        livres[j] = False
+        total += linha[j]
+    return total
+
+
+def main():
+    n_piquetes = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    n_lotes = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+
+    database.init_db()
+    conn = conexao_db.get_db()
+    fazenda_id = popular_fazenda(conn, n_piquetes=n_piquetes, n_lotes=n_lotes, n_movimentacoes=n_piquetes,
+                                 data_ref=DATA_REF)
+    lote_ids = [r[0] for r in conn.execute('SELECT id FROM lotes WHERE fazenda_id = ?', (fazenda_id,))]
+    conn.close()
+
+    with relogio_fixo(DATA_REF):
+        ms_total, resultado = _medir(lambda: atribuicao_service.atribuir_lotes(fazenda_id, lote_ids))
+
+        conn = conexao_db.get_db()
+        cur = conn.cursor()
+        lotes = atribuicao_service._lotes_para_atribuir(cur, fazenda_id, lote_ids)
+        piquetes = atribuicao_service._piquetes_livres(cur, fazenda_id)
+        conn.close()
+        custos, _, _ = atribuicao_service._matriz_custos(lotes, piquetes)
+    viaveis = (custos < atribuicao_service.CUSTO_INVIAVEL).any(axis=1)
+    custos = custos[viaveis]
+
+    ms_solver, colunas = _medir(lambda: atribuicao_service.resolver_atribuicao(custos))
+    otimo = custos[np.arange(len(custos)), colunas].sum()
+    guloso = _guloso(custos)
+
+    print("=" * 60)
+    print(f"Atribuição ({len(custos)} lotes x {len(piquetes)} piquetes livres)")
+    print("=" * 60)
+    print(f"  atribuir_lotes (tudo)  : {ms_total:9.2f} ms")
+    print(f"  resolver_atribuicao    : {ms_solver:9.2f} ms")
+    print(f"  custo ótimo            : {otimo:12.1f}")
+    print(f"  custo guloso           : {guloso:12.1f}  (+{guloso - otimo:.1f})")
+    print(f"  lotes alocados         : {len(resultado['atribuicoes'])}")
+    print("=" * 60)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark: capacidade de suporte (por piquete x vetorizada x leitura)
+
+Compara o cálculo piquete a piquete (o mesmo consumo inline de mover_lote,
+um piquete por vez) com atualizar_capacidade (fazenda inteira em NumPy, um
+executemany) e com capacidade_fazenda, que só lê as colunas gravadas.
+
+Uso:
+    python -m benchmarks.bench_capacidade [n_piquetes]
+"""
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+_tmp = tempfile.mkdtemp(prefix='pastoflow_bench_')
+os.environ['PASTOFLOW_DB_PATH'] = os.path.join(_tmp, 'bench.db')
+
+import database  # noqa: E402
+from services import conexao_db  # noqa: E402
+from services.capacidade_service import atualizar_capacidade, capacidade_fazenda  # noqa: E402
+from services.manejo_service import aplicar_suplementacao, get_consumo_base  # noqa: E402
+from benchmarks.dados_sinteticos import popular_fazenda  # noqa: E402
+
+
+def _medir(funcao, repeticoes=3):
+    melhor = None
+    for _ in range(repeticoes):
+        t0 = time.perf_counter()
+        resultado = funcao()
+        ms = (time.perf_counter() - t0) * 1000
+        melhor = ms if melhor is None else min(melhor, ms)
+    return melhor, resultado
+
+
+def _por_piquete(fazenda_id, ua=10.0, dias=5):
+    """Um SELECT e o consumo inline (como em mover_lote) para cada piquete."""
+    conn = conexao_db.get_db()
+    ids = [r[0] for r in conn.execute('SELECT id FROM piquetes WHERE fazenda_id = ? AND ativo = 1', (fazenda_id,))]
+    suportados = 0
+    for piquete_id in ids:
+        p = conn.execute('SELECT * FROM piquetes WHERE id = ?', (piquete_id,)).fetchone()
+        area = p['area'] or 0
+        if area <= 0:
+            continue
+        altura = p['altura_real_medida'] or p['altura_atual'] or 25
+        consumo = get_consumo_base(p['capim']) * ((ua / area) / 2)
+        if p['possui_cocho'] and (p['percentual_suplementacao'] or 0) > 0:
+            consumo = aplicar_suplementacao(consumo, p['percentual_suplementacao'])
+        suportados += (altura - (p['altura_saida'] or 15)) / consumo >= dias
+    conn.close()
+    return suportados
+
+
+def main():
+    n_piquetes = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+
+    database.init_db()
+    conn = conexao_db.get_db()
+    fazenda_id = popular_fazenda(conn, n_piquetes=n_piquetes, n_lotes=0, n_movimentacoes=0)
+    conn.close()
+
+    ms_loop, _ = _medir(lambda: _por_piquete(fazenda_id))
+    ms_vetor, gravados = _medir(lambda: atualizar_capacidade(fazenda_id))
+    ms_leitura, _ = _medir(lambda: capacidade_fazenda(fazenda_id, categoria='Vaca', dias=5))
+
+    print("=" * 60)
+    print(f"Capacidade de suporte ({n_piquetes} piquetes)")
+    print("=" * 60)
+    print(f"  piquete a piquete        : {ms_loop:9.2f} ms")
+    print(f"  vetorizada + gravação    : {ms_vetor:9.2f} ms  ({gravados} gravados)")
+    print(f"  leitura (categoria/dias) : {ms_leitura:9.2f} ms")
+    print("=" * 60)
+
+
+if __name__ == '__main__':
+    main()
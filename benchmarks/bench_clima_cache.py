@@ -0,0 +1,150 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark: lookup no clima_cache conforme o histórico acumula
+
+Compara, para o mesmo volume de buscas (8 por coordenada por dia):
+  - histórico: modelo antigo, um INSERT por busca com o payload completo e
+    _get_cache com ORDER BY fetched_at DESC LIMIT 1 (índice idx_clima_cache_coord)
+  - upsert: clima_service._save_cache / _get_cache (uma linha por coordenada)
+
+Uso:
+    python -m benchmarks.bench_clima_cache [n_coordenadas]
+"""
+import json
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+_tmp = tempfile.mkdtemp(prefix='pastoflow_bench_')
+os.environ['PASTOFLOW_DB_PATH'] = os.path.join(_tmp, 'bench.db')
+
+import database  # noqa: E402
+from services import clima_service, conexao_db  # noqa: E402
+
+BUSCAS_POR_DIA = 8
+MARCOS_DIAS = (1, 30, 90, 180, 365)
+LOOKUPS = 2000
+
+
+def _payload_completo(i):
+    """Resposta típica do Open-Meteo para a consulta de obter_clima_real."""
+    dias = [(datetime(2026, 3, 1) + timedelta(days=d)).strftime('%Y-%m-%d') for d in range(7)]
+    return {
+        'latitude': -16.0, 'longitude': -48.0, 'generationtime_ms': 0.05, 'utc_offset_seconds': -10800,
+        'timezone': 'America/Sao_Paulo', 'timezone_abbreviation': 'GMT-3', 'elevation': 1100.0,
+        'current_units': {'time': 'iso8601', 'interval': 'seconds', 'temperature_2m': '°C',
+                          'relative_humidity_2m': '%', 'precipitation': 'mm'},
+        'current': {'time': '2026-03-01T12:00', 'interval': 900, 'temperature_2m': 27.5,
+                    'relative_humidity_2m': 60 + i % 30, 'precipitation': 0.0},
+        'daily_units': {'time': 'iso8601', 'precipitation_sum': 'mm',
+                        'temperature_2m_max': '°C', 'temperature_2m_min': '°C'},
+        'daily': {'time': dias, 'precipitation_sum': [1.2 * (i % 9)] * 7,
+                  'temperature_2m_max': [31.4] * 7, 'temperature_2m_min': [18.9] * 7},
+    }
+
+
+def _criar_historico(conn):
+    conn.execute('''
+        CREATE TABLE clima_cache_historico (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            lat REAL NOT NULL, lon REAL NOT NULL, provider TEXT NOT NULL,
+            condicao TEXT NOT NULL, fator REAL NOT NULL, payload_json TEXT,
+            fetched_at TEXT NOT NULL, expires_at TEXT NOT NULL
+        )
+    ''')
+    conn.execute('CREATE INDEX idx_historico_coord ON clima_cache_historico (lat, lon, provider, fetched_at)')
+
+
+def _get_cache_historico(lat, lon):
+    """_get_cache do modelo antigo (mesmo trabalho fora do SQL: conexão, JSON, dict)."""
+    conn = conexao_db.get_db()
+    row = conn.execute('''
+        SELECT * FROM clima_cache_historico
+        WHERE lat = ? AND lon = ? AND provider = 'open-meteo' AND expires_at > ?
+        ORDER BY fetched_at DESC
+        LIMIT 1
+    ''', (lat, lon, datetime.now(timezone.utc).isoformat())).fetchone()
+    conn.close()
+    if not row:
+        return None
+    return {"condicao": row["condicao"], "fator": row["fator"], "fonte": "cache",
+            "fetched_at": row["fetched_at"], "expires_at": row["expires_at"],
+            "payload": json.loads(row["payload_json"])}
+
+
+def _medir(funcao, coordenadas):
+    t0 = time.perf_counter()
+    for i in range(LOOKUPS):
+        lat, lon = coordenadas[i % len(coordenadas)]
+        assert funcao(lat, lon)
+    return (time.perf_counter() - t0) / LOOKUPS * 1e6
+
+
+def main():
+    n_coordenadas = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    coordenadas = [(round(-10.0 - i * 0.05, 3), round(-45.0 - i * 0.05, 3)) for i in range(n_coordenadas)]
+    payloads = [_payload_completo(i) for i in range(n_coordenadas)]
+
+    database.init_db()
+    conn = conexao_db.get_db()
+    _criar_historico(conn)
+    conn.commit()
+
+    linhas = []
+    dia = 0
+    for marco in MARCOS_DIAS:
+        # Histórico: as buscas dos dias até o marco, antigas já expiradas
+        lote = []
+        for d in range(dia, marco):
+            for b in range(BUSCAS_POR_DIA):
+                buscado = datetime.now(timezone.utc) - timedelta(days=marco - d, hours=b * 3)
+                for (lat, lon), payload in zip(coordenadas, payloads):
+                    lote.append((lat, lon, 'open-meteo', 'normal', 1.0, json.dumps(payload),
+                                 buscado.isoformat(), (buscado + timedelta(hours=3)).isoformat()))
+        conn.executemany('''
+            INSERT INTO clima_cache_historico (lat, lon, provider, condicao, fator, payload_json, fetched_at, expires_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        ''', lote)
+        conn.commit()
+        # Upsert: o mesmo número de buscas passa por _save_cache
+        for _ in range((marco - dia) * BUSCAS_POR_DIA):
+            for (lat, lon), payload in zip(coordenadas, payloads):
+                clima_service._save_cache(lat, lon, 'normal', 1.0, payload)
+        dia = marco
+
+        # A busca mais recente de cada coordenada ainda válida no histórico
+        agora = datetime.now(timezone.utc)
+        conn.executemany('''
+            INSERT INTO clima_cache_historico (lat, lon, provider, condicao, fator, payload_json, fetched_at, expires_at)
+            VALUES (?, ?, 'open-meteo', 'normal', 1.0, ?, ?, ?)
+        ''', [(lat, lon, json.dumps(p), agora.isoformat(), (agora + timedelta(hours=3)).isoformat())
+              for (lat, lon), p in zip(coordenadas, payloads)])
+        conn.commit()
+
+        us_hist = _medir(_get_cache_historico, coordenadas)
+        us_upsert = _medir(clima_service._get_cache, coordenadas)
+        tamanho = {
+            tabela: conn.execute(f'SELECT COUNT(*), COALESCE(SUM(LENGTH(payload_json)), 0) FROM {tabela}').fetchone()
+            for tabela in ('clima_cache_historico', 'clima_cache')
+        }
+        linhas.append((marco, us_hist, us_upsert, tamanho))
+
+    conn.close()
+
+    print("=" * 60)
+    print(f"clima_cache: lookup x histórico ({n_coordenadas} coordenadas, {BUSCAS_POR_DIA} buscas/dia)")
+    print("=" * 60)
+    print(f"  {'dias':>5} | {'histórico µs':>12} {'linhas':>8} {'payload':>9} | {'upsert µs':>9} {'linhas':>6} {'payload':>7}")
+    for marco, us_hist, us_upsert, tamanho in linhas:
+        (n_hist, b_hist), (n_up, b_up) = tamanho['clima_cache_historico'], tamanho['clima_cache']
+        print(f"  {marco:>5} | {us_hist:12.1f} {n_hist:8d} {b_hist / 1e6:7.1f}MB | "
+              f"{us_upsert:9.1f} {n_up:6d} {b_up / 1e3:5.1f}kB")
+    print("=" * 60)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark: chamadas à API de clima x tamanho da célula da grade
+
+Gera fazendas agrupadas em polos (municípios), como na base real, e conta
+quantas entradas de cache / coordenadas distintas cada GRADE_GRAUS produz.
+Cada célula é uma chamada no caminho por coordenada e uma posição nos lotes
+de obter_clima_lote. Também mostra a maior distância entre uma sede e o
+ponto da sua célula (o erro espacial aceito).
+
+Uso:
+    python -m benchmarks.bench_clima_grade [n_fazendas] [n_polos]
+"""
+import math
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services import clima_service  # noqa: E402
+
+GRADES = (0.001, 0.01, 0.05, 0.1, 0.25)
+DISPERSAO_KM = 8  # desvio das sedes em torno do polo
+
+
+def _fazendas_agrupadas(n_fazendas, n_polos, seed=7):
+    rnd = random.Random(seed)
+    # Polos no Centro-Oeste / Sudeste
+    polos = [(rnd.uniform(-22.0, -12.0), rnd.uniform(-56.0, -44.0)) for _ in range(n_polos)]
+    fazendas = []
+    for _ in range(n_fazendas):
+        lat, lon = rnd.choice(polos)
+        dlat = rnd.gauss(0, DISPERSAO_KM) / 111.0
+        dlon = rnd.gauss(0, DISPERSAO_KM) / (111.0 * math.cos(math.radians(lat)))
+        fazendas.append((lat + dlat, lon + dlon))
+    return fazendas
+
+
+def _km(a, b):
+    dlat = (a[0] - b[0]) * 111.0
+    dlon = (a[1] - b[1]) * 111.0 * math.cos(math.radians(a[0]))
+    return math.hypot(dlat, dlon)
+
+
+def main():
+    n_fazendas = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    n_polos = int(sys.argv[2]) if len(sys.argv) > 2 else 40
+    fazendas = _fazendas_agrupadas(n_fazendas, n_polos)
+
+    print("=" * 60)
+    print(f"Grade do cache de clima ({n_fazendas} fazendas em {n_polos} polos, ±{DISPERSAO_KM} km)")
+    print("=" * 60)
+    print(f"  {'grade (°)':>9} | {'células':>7} {'redução':>8} {'lotes':>5} | {'erro máx':>8}")
+    original = clima_service.GRADE_GRAUS
+    base = None
+    try:
+        for grade in GRADES:
+            clima_service.GRADE_GRAUS = grade
+            celulas = {clima_service._celula(lat, lon) for lat, lon in fazendas}
+            erro = max(_km(f, clima_service._celula(*f)) for f in fazendas)
+            base = base or len(celulas)
+            lotes = math.ceil(len(celulas) / clima_service.LOTE_MAX_COORDENADAS)
+            print(f"  {grade:>9} | {len(celulas):7d} {base / len(celulas):7.1f}x {lotes:5d} | {erro:6.2f} km")
+    finally:
+        clima_service.GRADE_GRAUS = original
+    print("=" * 60)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark: conexões SQLite por requisição em GET /fazenda/<id>
+
+Compara o modo antigo (uma conexão nova a cada get_db) com a conexão
+compartilhada por requisição (services/conexao_db.py).
+
+Uso:
+    python -m benchmarks.bench_conexoes [n_piquetes] [n_requisicoes]
+"""
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Banco descartável ANTES de importar o app (migrado no import)
+_tmp = tempfile.mkdtemp(prefix='pastoflow_bench_')
+os.environ['PASTOFLOW_DB_PATH'] = os.path.join(_tmp, 'bench.db')
+os.environ['PASTOFLOW_AUTO_MIGRATE'] = '1'
+os.environ['PASTOFLOW_PREFETCH_CLIMA'] = '0'  # sem rede durante a medição
+
+from app import app  # noqa: E402
+from services import conexao_db  # noqa: E402
+from services.clima_service import _save_cache  # noqa: E402
+from benchmarks.dados_sinteticos import popular_fazenda  # noqa: E402
+
+
+def preparar(n_piquetes):
+    conn = conexao_db.get_db()
+    fazenda_id = popular_fazenda(conn, usuario_id=2, n_piquetes=n_piquetes, n_lotes=n_piquetes // 3,
+                                 clima_modo='automatico')
+    conn.close()
+    # Cache de clima válido -> nenhuma chamada de rede durante a medição
+    _save_cache(-15.6, -47.8, 'normal', 1.0, {})
+    conexao_db.liberar_conexao()
+    return fazenda_id
+
+
+def medir(client, fazenda_id, n_requisicoes, reutilizar):
+    conexao_db.configurar(reutilizar=reutilizar)
+    client.get(f'/fazenda/{fazenda_id}')  # aquecimento
+    conexao_db.estatisticas(zerar=True)
+
+    tempos = []
+    for _ in range(n_requisicoes):
+        t0 = time.perf_counter()
+        resp = client.get(f'/fazenda/{fazenda_id}')
+        tempos.append((time.perf_counter() - t0) * 1000)
+        assert resp.status_code == 200, resp.status_code
+
+    stats = conexao_db.estatisticas(zerar=True)
+    return {
+        'conexoes_req': stats['conexoes_abertas'] / n_requisicoes,
+        'get_db_req': stats['emprestimos'] / n_requisicoes,
+        'media_ms': statistics.mean(tempos),
+        'p50_ms': statistics.median(tempos),
+        'p95_ms': sorted(tempos)[int(len(tempos) * 0.95) - 1],
+    }
+
+
+def main():
+    n_piquetes = int(sys.argv[1]) if len(sys.argv) > 1 else 60
+    n_requisicoes = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+
+    fazenda_id = preparar(n_piquetes)
+    client = app.test_client()
+    with client.session_transaction() as sess:
+        sess['user_id'] = 2
+        sess['username'] = 'gerente'
+        sess['role'] = 'gerente'
+
+    print("=" * 60)
+    print(f"GET /fazenda/{fazenda_id}  ({n_piquetes} piquetes, {n_requisicoes} requisições)")
+    print("=" * 60)
+
+    resultados = {
+        'antes (conexão nova por get_db)': medir(client, fazenda_id, n_requisicoes, reutilizar=False),
+        'depois (conexão por requisição)': medir(client, fazenda_id, n_requisicoes, reutilizar=True),
+    }
+    for nome, r in resultados.items():
+        print(f"\n{nome}")
+        print(f"  conexões abertas/req : {r['conexoes_req']:.1f}")
+        print(f"  chamadas get_db/req  : {r['get_db_req']:.1f}")
+        print(f"  latência média       : {r['media_ms']:.2f} ms")
+        print(f"  latência p50 / p95   : {r['p50_ms']:.2f} / {r['p95_ms']:.2f} ms")
+    print("=" * 60)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark: listar_lotes
+
+Compara a versão antiga (get_piquete + config da fazenda + clima por lote)
+com a atual (um JOIN e clima resolvido uma vez por fazenda), contando as
+consultas emitidas.
+
+Uso:
+    python -m benchmarks.bench_listar_lotes [n_lotes]
+"""
+import contextlib
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+_tmp = tempfile.mkdtemp(prefix='pastoflow_bench_')
+os.environ['PASTOFLOW_DB_PATH'] = os.path.join(_tmp, 'bench.db')
+
+import database  # noqa: E402
+from simular_data import relogio_fixo  # noqa: E402
+from services import conexao_db  # noqa: E402
+from services.clima_service import _save_cache  # noqa: E402
+from benchmarks.dados_sinteticos import popular_fazenda  # noqa: E402
+from tests.test_listar_lotes import DATA_REF, _listar_lotes_legado  # noqa: E402
+
+
+def _medir(funcao, fazenda_id, repeticoes=5):
+    conn = conexao_db.get_db()
+    consultas = []
+    conn.set_trace_callback(consultas.append)
+    try:
+        t0 = time.perf_counter()
+        for _ in range(repeticoes):
+            funcao(fazenda_id)
+        ms = (time.perf_counter() - t0) / repeticoes * 1000
+    finally:
+        conn.set_trace_callback(None)
+        conn.close()
+    return ms, len(consultas) // repeticoes
+
+
+def main():
+    n_lotes = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+
+    database.init_db()
+    conn = conexao_db.get_db()
+    fazenda_id = popular_fazenda(conn, n_piquetes=n_lotes, n_lotes=n_lotes, data_ref=DATA_REF,
+                                 clima_modo='automatico')
+    # Metade dos piquetes ocupados em descanso para passar pelo clima
+    conn.execute("UPDATE piquetes SET estado = 'descanso' WHERE fazenda_id = ? AND id % 2 = 0", (fazenda_id,))
+    conn.commit()
+    conn.close()
+    _save_cache(-15.6, -47.8, 'normal', 1.0, {})
+
+    print("=" * 60)
+    print(f"listar_lotes ({n_lotes} lotes, clima automático em cache)")
+    print("=" * 60)
+    silencio = open(os.devnull, 'w')
+    for nome, funcao in (('legado', _listar_lotes_legado), ('atual', database.listar_lotes)):
+        with relogio_fixo(DATA_REF), contextlib.redirect_stdout(silencio):
+            ms, n = _medir(funcao, fazenda_id)
+        print(f"  {nome:8s} : {ms:8.2f} ms  ({n} consultas)")
+    print("=" * 60)
+
+
+if __name__ == '__main__':
+    main()
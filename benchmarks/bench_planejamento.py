@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark: calendário de rotação (horizonte móvel)
+
+Mede o plano completo e o recálculo incremental depois de uma medição de
+altura num piquete e de uma mudança de lote, conferindo que o incremental
+dá o mesmo plano que recalcular tudo.
+
+Uso:
+    python -m benchmarks.bench_planejamento [n_piquetes] [horizonte]
+"""
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+_tmp = tempfile.mkdtemp(prefix='pastoflow_bench_')
+os.environ['PASTOFLOW_DB_PATH'] = os.path.join(_tmp, 'bench.db')
+
+import database  # noqa: E402
+from simular_data import relogio_fixo  # noqa: E402
+from services import conexao_db  # noqa: E402
+from services import planejamento_service  # noqa: E402
+from benchmarks.dados_sinteticos import popular_fazenda  # noqa: E402
+
+DATA_REF = datetime(2026, 3, 1, 12, 0, 0)
+
+
+def _medir(funcao, repeticoes=3):
+    melhor = None
+    for _ in range(repeticoes):
+        t0 = time.perf_counter()
+        resultado = funcao()
+        ms = (time.perf_counter() - t0) * 1000
+        melhor = ms if melhor is None else min(melhor, ms)
+    return melhor, resultado
+
+
+def _alterar(fazenda_id, sql, parametros):
+    conn = conexao_db.get_db()
+    conn.execute(sql, parametros)
+    conn.commit()
+    conn.close()
+    planejamento_service.invalidar_plano(fazenda_id)
+
+
+def _confere(fazenda_id):
+    plano = planejamento_service._planos[fazenda_id]
+    completo = planejamento_service._plano_completo(plano['ctx'])
+    assert plano['eventos'] == completo['eventos']
+    assert all(np.array_equal(plano['registro'][c], v, equal_nan=v.dtype.kind == 'f')
+               for c, v in completo['registro'].items())
+
+
+def main():
+    n_piquetes = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    horizonte = int(sys.argv[2]) if len(sys.argv) > 2 else planejamento_service.HORIZONTE_DIAS
+
+    database.init_db()
+    conn = conexao_db.get_db()
+    fazenda_id = popular_fazenda(conn, n_piquetes=n_piquetes, n_lotes=n_piquetes // 4,
+                                 n_movimentacoes=n_piquetes, data_ref=DATA_REF)
+    piquete_id = conn.execute('SELECT MAX(id) FROM piquetes WHERE fazenda_id = ?', (fazenda_id,)).fetchone()[0]
+    lote_id = conn.execute('SELECT MAX(id) FROM lotes WHERE fazenda_id = ? AND piquete_atual_id IS NOT NULL',
+                           (fazenda_id,)).fetchone()[0]
+    conn.close()
+
+    with relogio_fixo(DATA_REF):
+        def completo():
+            planejamento_service.limpar_planos()
+            return planejamento_service.planejar(fazenda_id, horizonte)
+
+        ms_completo, resultado = _medir(completo)
+        ms_cache, _ = _medir(lambda: planejamento_service.obter_plano(fazenda_id, horizonte))
+
+        _alterar(fazenda_id, 'UPDATE piquetes SET altura_real_medida = 22, data_medicao = ? WHERE id = ?',
+                 ('2026-03-01', piquete_id))
+        ms_medicao, medicao = _medir(lambda: planejamento_service.planejar(fazenda_id), repeticoes=1)
+        _confere(fazenda_id)
+
+        _alterar(fazenda_id, 'UPDATE lotes SET data_saida_prevista = ? WHERE id = ?', ('20/04/2026', lote_id))
+        ms_lote, lote = _medir(lambda: planejamento_service.planejar(fazenda_id), repeticoes=1)
+        _confere(fazenda_id)
+
+    print("=" * 60)
+    print(f"Calendário ({n_piquetes} piquetes, {n_piquetes // 4} lotes, {horizonte} dias)")
+    print("=" * 60)
+    print(f"  plano completo         : {ms_completo:9.2f} ms  ({len(resultado['calendario'])} entradas)")
+    print(f"  plano em memória       : {ms_cache:9.4f} ms")
+    print(f"  após medição           : {ms_medicao:9.2f} ms  (refeito a partir de "
+          f"{medicao['recalculo']['a_partir_de']})")
+    print(f"  após saída de lote     : {ms_lote:9.2f} ms  (refeito a partir de "
+          f"{lote['recalculo']['a_partir_de']})")
+    print("=" * 60)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark: custo de simular_data.now() por linha
+
+Compara:
+  - legado: abre e faz json.load do data_teste_config.json a cada chamada
+  - cache por mtime: os.stat por chamada, parse só quando o arquivo muda
+  - congelado: resolvido uma vez por requisição (init_app / relogio_fixo)
+
+Uso:
+    python -m benchmarks.bench_relogio [n_piquetes]
+"""
+import contextlib
+import json
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+_tmp = tempfile.mkdtemp(prefix='pastoflow_bench_')
+os.environ['PASTOFLOW_DB_PATH'] = os.path.join(_tmp, 'bench.db')
+
+import simular_data  # noqa: E402
+import database  # noqa: E402
+from services import conexao_db, rotacao_service  # noqa: E402
+from benchmarks.dados_sinteticos import popular_fazenda  # noqa: E402
+
+simular_data.CONFIG_FILE = Path(_tmp) / 'data_teste_config.json'
+
+
+def now_legado():
+    """Implementação anterior: lê o arquivo a cada chamada."""
+    if not simular_data.CONFIG_FILE.exists():
+        return datetime.now()
+    with open(simular_data.CONFIG_FILE, 'r') as f:
+        config = json.load(f)
+    data_str = config.get('data')
+    return datetime.fromisoformat(data_str) if data_str else datetime.now()
+
+
+def _por_chamada(funcao, n=20000):
+    t0 = time.perf_counter()
+    for _ in range(n):
+        funcao()
+    return (time.perf_counter() - t0) / n * 1e6
+
+
+def _pagina(fazenda_id, relogio, repeticoes=5):
+    """Tempo de listar_piquetes + listar_lotes com o relógio dado; conta chamadas."""
+    chamadas = [0]
+
+    def contado():
+        chamadas[0] += 1
+        return relogio()
+
+    originais = (database.data_teste_now, rotacao_service.data_teste_now)
+    database.data_teste_now = rotacao_service.data_teste_now = contado
+    try:
+        t0 = time.perf_counter()
+        for _ in range(repeticoes):
+            database.listar_piquetes(fazenda_id)
+            database.listar_lotes(fazenda_id)
+        ms = (time.perf_counter() - t0) / repeticoes * 1000
+    finally:
+        database.data_teste_now, rotacao_service.data_teste_now = originais
+    return ms, chamadas[0] // repeticoes
+
+
+def main():
+    n_piquetes = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+
+    database.init_db()
+    conn = conexao_db.get_db()
+    fazenda_id = popular_fazenda(conn, n_piquetes=n_piquetes, n_lotes=n_piquetes // 2)
+    conn.close()
+    simular_data.setar_data('2026-03-10')
+
+    print("=" * 60)
+    print("Custo por chamada de now() (data de teste ativa)")
+    print("=" * 60)
+    print(f"  legado (lê arquivo)      : {_por_chamada(now_legado):8.2f} µs")
+    print(f"  cache por mtime          : {_por_chamada(simular_data.now):8.2f} µs")
+    with simular_data.relogio_fixo():
+        print(f"  congelado na requisição  : {_por_chamada(simular_data.now):8.2f} µs")
+
+    print("\n" + "=" * 60)
+    print(f"listar_piquetes + listar_lotes ({n_piquetes} piquetes)")
+    print("=" * 60)
+    # listar_lotes imprime [DEBUG] por linha; silencia durante a medição
+    silencio = open(os.devnull, 'w')
+    for nome, relogio in (('legado', now_legado), ('cache por mtime', simular_data.now)):
+        with contextlib.redirect_stdout(silencio):
+            ms, n = _pagina(fazenda_id, relogio)
+        print(f"  {nome:24s} : {ms:8.2f} ms  ({n} chamadas de now()/página)")
+    with simular_data.relogio_fixo(), contextlib.redirect_stdout(silencio):
+        ms, n = _pagina(fazenda_id, simular_data.now)
+    print(f"  {'congelado':24s} : {ms:8.2f} ms  ({n} chamadas de now()/página)")
+    print("=" * 60)
+    simular_data.setar_data(None)
+
+
+if __name__ == '__main__':
+    main()
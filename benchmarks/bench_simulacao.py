@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark: simulação da fazenda N dias à frente
+
+Mede o motor vetorizado (simular) sobre o estado já carregado, o mesmo laço
+em Python puro (piquete a piquete, dia a dia) e simular_fazenda inteiro
+(consultas + estado + motor + resposta).
+
+Uso:
+    python -m benchmarks.bench_simulacao [n_piquetes] [dias]
+"""
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+_tmp = tempfile.mkdtemp(prefix='pastoflow_bench_')
+os.environ['PASTOFLOW_DB_PATH'] = os.path.join(_tmp, 'bench.db')
+
+import database  # noqa: E402
+from simular_data import relogio_fixo  # noqa: E402
+from services import conexao_db  # noqa: E402
+from services import simulacao_service  # noqa: E402
+from benchmarks.dados_sinteticos import popular_fazenda  # noqa: E402
+
+DATA_REF = datetime(2026, 3, 1, 12, 0, 0)
+
+
+def _medir(funcao, repeticoes=3):
+    melhor = None
+    for _ in range(repeticoes):
+        t0 = time.perf_counter()
+        resultado = funcao()
+        ms = (time.perf_counter() - t0) * 1000
+        melhor = ms if melhor is None else min(melhor, ms)
+    return melhor, resultado
+
+
+def _simular_python(h0, saida, limite, crescimento, fatores, consumo, ocupado):
+    dias, n = consumo.shape
+    fatores, consumo, ocupado = fatores.tolist(), consumo.tolist(), ocupado.tolist()
+    alturas = [list(h0)]
+    for d in range(dias):
+        anterior = alturas[-1]
+        linha = []
+        for j in range(n):
+            h = anterior[j]
+            if ocupado[d][j]:
+                h = min(h, max(saida[j], h - consumo[d][j]))
+            elif h < limite[j]:
+                h = min(limite[j], h + crescimento[j] * fatores[d][j])
+            linha.append(h)
+        alturas.append(linha)
+    return np.array(alturas)
+
+
+def main():
+    n_piquetes = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    dias = int(sys.argv[2]) if len(sys.argv) > 2 else 365
+
+    database.init_db()
+    conn = conexao_db.get_db()
+    fazenda_id = popular_fazenda(conn, n_piquetes=n_piquetes, n_lotes=n_piquetes // 4,
+                                 n_movimentacoes=n_piquetes, data_ref=DATA_REF)
+    conn.close()
+
+    with relogio_fixo(DATA_REF):
+        ms_total, resultado = _medir(lambda: simulacao_service.simular_fazenda(fazenda_id, dias))
+        ms_estado, estado = _medir(lambda: simulacao_service.carregar_estado(fazenda_id, dias))
+
+    argumentos = [estado[k] for k in ('altura_inicial', 'altura_saida', 'limite', 'crescimento',
+                                      'fatores', 'consumo', 'ocupado')]
+    ms_motor, alturas = _medir(lambda: simulacao_service.simular(*argumentos))
+    ms_python, referencia = _medir(lambda: _simular_python(*argumentos), repeticoes=1)
+    assert np.allclose(alturas, referencia)
+
+    print("=" * 60)
+    print(f"Simulação ({len(resultado['piquetes'])} piquetes, {len(resultado['lotes'])} lotes, {dias} dias)")
+    print("=" * 60)
+    print(f"  simular_fazenda (tudo) : {ms_total:9.2f} ms")
+    print(f"  carregar_estado        : {ms_estado:9.2f} ms")
+    print(f"  motor NumPy            : {ms_motor:9.2f} ms")
+    print(f"  laço Python puro       : {ms_python:9.2f} ms  ({ms_python / ms_motor:.0f}x)")
+    print("=" * 60)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark: status dos lotes (varredura x recálculo por evento)
+
+Compara a varredura antiga (um UPDATE por lote, mudando ou não) com a
+varredura atual (executemany só do que mudou) e com o caminho por evento:
+mover um lote e recalcular só os pendentes.
+
+Uso:
+    python -m benchmarks.bench_status_lotes [n_lotes]
+"""
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+_tmp = tempfile.mkdtemp(prefix='pastoflow_bench_')
+os.environ['PASTOFLOW_DB_PATH'] = os.path.join(_tmp, 'bench.db')
+
+import database  # noqa: E402
+from simular_data import relogio_fixo  # noqa: E402
+from services import conexao_db  # noqa: E402
+from benchmarks.dados_sinteticos import popular_fazenda  # noqa: E402
+
+DATA_REF = datetime(2026, 3, 1, 12, 0, 0)
+
+
+def _medir(funcao, repeticoes=3):
+    melhor = None
+    for _ in range(repeticoes):
+        t0 = time.perf_counter()
+        resultado = funcao()
+        ms = (time.perf_counter() - t0) * 1000
+        melhor = ms if melhor is None else min(melhor, ms)
+    return melhor, resultado
+
+
+def _varredura_por_linha(fazenda_id):
+    """Versão anterior de atualizar_status_lotes: relê tudo e grava linha a linha."""
+    conn = conexao_db.get_db()
+    cursor = conn.cursor()
+    cursor.execute('''
+        SELECT l.*, p.altura_real_medida, p.altura_estimada, p.altura_entrada,
+               p.altura_saida, p.dias_ocupacao, p.bloqueado
+        FROM lotes l
+        LEFT JOIN piquetes p ON l.piquete_atual_id = p.id
+        WHERE l.fazenda_id = ? AND l.ativo = 1
+    ''', (fazenda_id,))
+    for lote in cursor.fetchall():
+        lote_dict = dict(lote)
+        tem_real = lote_dict.get('altura_real_medida') is not None
+        lote_dict['altura_atual'] = lote_dict['altura_real_medida'] if tem_real else lote_dict.get('altura_estimada')
+        status_info = database.calcular_status_lote(lote_dict)
+        cursor.execute('UPDATE lotes SET status_calculado = ?, updated_at = ? WHERE id = ?',
+                       (status_info['status'], datetime.now().isoformat(), lote['id']))
+    conn.commit()
+    conn.close()
+
+
+def main():
+    n_lotes = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+
+    database.init_db()
+    conn = conexao_db.get_db()
+    fazenda_id = popular_fazenda(conn, n_piquetes=n_lotes * 2, n_lotes=n_lotes,
+                                 n_movimentacoes=n_lotes, data_ref=DATA_REF)
+    livres = [r[0] for r in conn.execute('''
+        SELECT id FROM piquetes WHERE fazenda_id = ? AND ativo = 1
+          AND id NOT IN (SELECT piquete_atual_id FROM lotes WHERE piquete_atual_id IS NOT NULL)
+        ORDER BY id LIMIT 10
+    ''', (fazenda_id,))]
+    lote_ids = [r[0] for r in conn.execute('''
+        SELECT id FROM lotes WHERE fazenda_id = ? AND piquete_atual_id IS NOT NULL ORDER BY id LIMIT 10
+    ''', (fazenda_id,))]
+    conn.close()
+
+    # O print de depuração de calcular_status_lote domina o tempo; fora da medição
+    stdout, sys.stdout = sys.stdout, open(os.devnull, 'w')
+    try:
+        with relogio_fixo(DATA_REF):
+            ms_linha, _ = _medir(lambda: _varredura_por_linha(fazenda_id))
+            ms_varredura, alterados = _medir(lambda: database.atualizar_status_lotes(fazenda_id))
+
+            movimentos = iter(zip(lote_ids, livres))
+
+            def evento():
+                lote_id, destino = next(movimentos)
+                database.mover_lote(lote_id, destino, usuario_id=2)
+                return database.recalcular_status_pendentes()
+
+            ms_evento, _ = _medir(evento)
+            ms_recalculo, _ = _medir(lambda: (database.marcar_status_pendente(lote_ids=lote_ids[:1]),
+                                              database.recalcular_status_pendentes()))
+    finally:
+        sys.stdout.close()
+        sys.stdout = stdout
+
+    print("=" * 60)
+    print(f"Status dos lotes ({n_lotes} lotes)")
+    print("=" * 60)
+    print(f"  varredura, 1 UPDATE/lote : {ms_linha:9.2f} ms")
+    print(f"  varredura, só mudanças   : {ms_varredura:9.2f} ms  ({alterados} gravados)")
+    print(f"  mover + pendentes        : {ms_evento:9.2f} ms")
+    print(f"  só pendentes (1 lote)    : {ms_recalculo:9.2f} ms")
+    print("=" * 60)
+
+
+if __name__ == '__main__':
+    main()
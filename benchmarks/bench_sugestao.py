@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark: sugestão de piquetes (lista completa x índice top-K)
+
+Compara a versão anterior de sugerir_proximo_piquete (lê os piquetes, calcula
+status e descanso linha a linha e ordena tudo a cada chamada) com o índice de
+sugestao_service: montagem (índice frio) e consultas top-K com o índice pronto.
+
+Uso:
+    python -m benchmarks.bench_sugestao [n_piquetes]
+"""
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+_tmp = tempfile.mkdtemp(prefix='pastoflow_bench_')
+os.environ['PASTOFLOW_DB_PATH'] = os.path.join(_tmp, 'bench.db')
+
+import database  # noqa: E402
+from simular_data import relogio_fixo, now as data_teste_now  # noqa: E402
+from services import conexao_db, sugestao_service  # noqa: E402
+from benchmarks.dados_sinteticos import popular_fazenda  # noqa: E402
+
+DATA_REF = datetime(2026, 3, 1, 12, 0, 0)
+
+
+def _medir(funcao, repeticoes=3):
+    melhor = None
+    for _ in range(repeticoes):
+        t0 = time.perf_counter()
+        resultado = funcao()
+        ms = (time.perf_counter() - t0) * 1000
+        melhor = ms if melhor is None else min(melhor, ms)
+    return melhor, resultado
+
+
+def _sugerir_lista_completa(fazenda_id):
+    """Versão anterior: status e descanso por linha, ordenação completa."""
+    conn = conexao_db.get_db()
+    cursor = conn.cursor()
+    cursor.execute('''
+        SELECT DISTINCT piquete_atual_id FROM lotes
+        WHERE ativo = 1 AND piquete_atual_id IN (SELECT id FROM piquetes WHERE fazenda_id = ? AND ativo = 1)
+    ''', (fazenda_id,))
+    ocupados = {r['piquete_atual_id'] for r in cursor.fetchall()}
+    cursor.execute('''
+        SELECT p.*, COALESCE(p.ultima_mov, p.created_at) as ultima_mov FROM piquetes p
+        WHERE p.fazenda_id = ? AND p.bloqueado = 0 AND p.ativo = 1
+          AND (p.altura_real_medida IS NOT NULL OR p.altura_atual IS NOT NULL)
+    ''', (fazenda_id,))
+    piquetes = []
+    for row in cursor.fetchall():
+        p = dict(row)
+        if p['id'] in ocupados:
+            continue
+        altura = p['altura_real_medida'] if p['altura_real_medida'] is not None else p['altura_atual']
+        novo = not (p['ultima_mov'] and p['ultima_mov'] != p['created_at'])
+        try:
+            dias = (data_teste_now() - datetime.fromisoformat(p['ultima_mov'])).days
+        except (TypeError, ValueError):
+            dias = 0
+        if altura >= (p['altura_entrada'] or 25):
+            prioridade = 200 if novo else (100 if dias >= (p['dias_descanso_min'] or 30) else 90)
+        else:
+            prioridade = 10
+        piquetes.append({'id': p['id'], 'prioridade': prioridade, 'dias_descanso': dias})
+    conn.close()
+    piquetes.sort(key=lambda x: (-x['prioridade'], -x['dias_descanso']))
+    return piquetes
+
+
+def main():
+    n_piquetes = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+
+    database.init_db()
+    conn = conexao_db.get_db()
+    fazenda_id = popular_fazenda(conn, n_piquetes=n_piquetes, n_lotes=n_piquetes // 4,
+                                 n_movimentacoes=n_piquetes, data_ref=DATA_REF)
+    lote_id = conn.execute('SELECT id FROM lotes WHERE fazenda_id = ? AND piquete_atual_id IS NOT NULL LIMIT 1',
+                           (fazenda_id,)).fetchone()[0]
+    conn.close()
+
+    def frio():
+        sugestao_service.limpar()
+        return database.sugerir_proximo_piquete(fazenda_id, lote_id, k=10)
+
+    with relogio_fixo(DATA_REF):
+        ms_antigo, todos = _medir(lambda: _sugerir_lista_completa(fazenda_id))
+        ms_frio, _ = _medir(frio)
+        ms_top, _ = _medir(lambda: database.sugerir_proximo_piquete(fazenda_id, lote_id, k=10), repeticoes=20)
+        ms_filtro, _ = _medir(lambda: database.sugerir_proximo_piquete(fazenda_id, lote_id, k=10, capim='Marandu',
+                                                                       area_min=5, distancia_max=2.0),
+                              repeticoes=20)
+        ms_todos, _ = _medir(lambda: database.sugerir_proximo_piquete(fazenda_id, lote_id), repeticoes=20)
+
+    print("=" * 60)
+    print(f"Sugestão de piquetes ({n_piquetes} piquetes, {len(todos)} livres)")
+    print("=" * 60)
+    print(f"  lista completa (anterior) : {ms_antigo:9.2f} ms")
+    print(f"  top-10, índice frio       : {ms_frio:9.2f} ms")
+    print(f"  top-10, índice pronto     : {ms_top:9.2f} ms")
+    print(f"  top-10 com filtros        : {ms_filtro:9.2f} ms")
+    print(f"  lista completa, índice    : {ms_todos:9.2f} ms")
+    print("=" * 60)
+
+
+if __name__ == '__main__':
+    main()
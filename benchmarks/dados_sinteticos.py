@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+"""
+Gerador de dados sintéticos para benchmarks e testes de carga.
+Insere direto via SQL (sem passar pelas regras de database.py) para montar
+fazendas grandes rapidamente.
+"""
+import json
+import random
+from datetime import datetime, timedelta
+
+CAPINS = ['Marandu', 'Mombaça', 'Tifton 85', 'Brachiaria', 'Andropogon', 'Xaraés', 'Piatã', 'Zuri']
+CATEGORIAS = ['Bezerro(a)', 'Garrote / Novilho(a)', 'Boi Magro / Engorda', 'Vaca', 'Touro', 'Personalizado']
+
+
+def _poligono(lat, lon, lado=0.004):
+    coords = [[lon, lat], [lon + lado, lat], [lon + lado, lat + lado], [lon, lat + lado], [lon, lat]]
+    return json.dumps({'type': 'Polygon', 'coordinates': [coords]})
+
+
+def popular_fazenda(conn, usuario_id=2, n_piquetes=50, n_lotes=20, n_movimentacoes=0,
+                    data_ref=None, clima_modo='manual', latitude=-15.6, longitude=-47.8, seed=42):
+    """
+    Cria uma fazenda com piquetes, lotes (ocupando os primeiros piquetes) e histórico.
+
+    Returns:
+        int: id da fazenda criada
+    """
+    rnd = random.Random(seed)
+    data_ref = data_ref or datetime(2026, 3, 1, 12, 0, 0)
+    agora = data_ref.isoformat()
+    cur = conn.cursor()
+
+    cur.execute('''
+        INSERT INTO fazendas (usuario_id, nome, area, latitude_sede, longitude_sede, clima_modo,
+                              condicao_climatica_manual, ativo, created_at, updated_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?, 1, ?, ?)
+    ''', (usuario_id, f'Fazenda Sintética {seed}', n_piquetes * 5.0, latitude, longitude, clima_modo,
+          rnd.choice(['seca', 'normal', 'chuvoso']), agora, agora))
+    fazenda_id = cur.lastrowid
+
+    piquete_ids = []
+    for i in range(n_piquetes):
+        tem_medicao = rnd.random() < 0.8
+        data_medicao = (data_ref - timedelta(days=rnd.randint(0, 40))).strftime('%Y-%m-%d') if tem_medicao else None
+        cur.execute('''
+            INSERT INTO piquetes (fazenda_id, nome, area, capim, geometria, altura_real_medida, data_medicao,
+                                  altura_entrada, altura_saida, dias_ocupacao, dias_descanso_min,
+                                  possui_cocho, percentual_suplementacao, ativo, bloqueado, created_at, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, 1, ?, ?, ?)
+        ''', (fazenda_id, f'P{i:04d}', round(rnd.uniform(1, 15), 2), rnd.choice(CAPINS),
+              _poligono(latitude + (i // 30) * 0.005, longitude + (i % 30) * 0.005),
+              round(rnd.uniform(12, 40), 1) if tem_medicao else None, data_medicao,
+              rnd.choice([20, 25, 30, 35]), rnd.choice([10, 15, 20]), rnd.randint(1, 7), rnd.choice([21, 28, 30, 35]),
+              int(rnd.random() < 0.2), rnd.choice([0, 0.2, 0.4]), int(rnd.random() < 0.05),
+              (data_ref - timedelta(days=200)).isoformat(), agora))
+        piquete_ids.append(cur.lastrowid)
+
+    for i in range(n_lotes):
+        piquete_id = piquete_ids[i] if i < len(piquete_ids) and rnd.random() < 0.85 else None
+        categoria = rnd.choice(CATEGORIAS)
+        entrada = data_ref - timedelta(days=rnd.randint(0, 20))
+        dias_tecnicos = rnd.randint(1, 30)
+        saida = entrada + timedelta(days=dias_tecnicos)
+        cur.execute('''
+            INSERT INTO lotes (fazenda_id, nome, categoria, quantidade, peso_medio, consumo_base,
+                               piquete_atual_id, data_entrada, dias_tecnicos, data_saida_prevista,
+                               ativo, created_at, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, 1, ?, ?)
+        ''', (fazenda_id, f'Lote {i:04d}', categoria, rnd.randint(5, 120),
+              rnd.choice([0, 250, 400, 520]), 1.1 if categoria == 'Personalizado' else None,
+              piquete_id, entrada.isoformat() if piquete_id else None,
+              dias_tecnicos if piquete_id else None,
+              saida.strftime('%d/%m/%Y') if piquete_id else None, agora, agora))
+        if piquete_id:
+            cur.execute("UPDATE piquetes SET estado = 'ocupado' WHERE id = ?", (piquete_id,))
+
+    lote_ids = [r[0] for r in cur.execute('SELECT id FROM lotes WHERE fazenda_id = ?', (fazenda_id,)).fetchall()]
+    movs = []
+    for _ in range(n_movimentacoes):
+        data_mov = (data_ref - timedelta(days=rnd.randint(1, 365), minutes=rnd.randint(0, 1440))).isoformat()
+        origem = rnd.choice(piquete_ids)
+        destino = rnd.choice(piquete_ids)
+        tipo = 'saida' if rnd.random() < 0.3 else 'movimentacao'
+        movs.append((rnd.choice(lote_ids) if lote_ids else None, origem,
+                     None if tipo == 'saida' else destino, usuario_id, data_mov, tipo, data_mov))
+    cur.executemany('''
+        INSERT INTO movimentacoes (lote_id, piquete_origem_id, piquete_destino_id, usuario_id,
+                                   data_movimentacao, tipo, created_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+    ''', movs)
+
+    conn.commit()
+    return fazenda_id
@@ -2,8 +2,7 @@
 Banco de Dados SQLite - PastoFlow com Lotes Completos
 """
 import sqlite3
-import os
-from datetime import datetime
+from datetime import datetime, timedelta
 from werkzeug.security import generate_password_hash, check_password_hash
 from simular_data import now as data_teste_now  # Suporte a data de teste
 from services.manejo_service import (
@@ -13,100 +12,25 @@ from services.manejo_service import (
     aplicar_suplementacao,
     classificar_lotacao,
 )
-from services.clima_service import obter_clima_com_fallback
+from services.clima_service import resolver_clima_piquete, invalidar_clima_fazenda  # Clima por piquete (cache por fazenda)
+from services.altura_service import calcular_alturas_estimadas, dias_descanso_medicao  # Versão em lote (NumPy)
 from services.rotacao_service import (
+    calcular_dias_descanso_necessarios,
     calcular_prioridade_rotacao,
     calcular_status_piquete,
     plano_rotacao,
     verificar_passou_ponto
 )
+from services.planejamento_service import invalidar_plano  # Calendário de rotação em memória
+from services import sugestao_service  # Índice top-K de sugestão de piquetes
+from services import capacidade_service  # Capacidade de suporte gravada em piquetes
 
-DB_PATH = os.path.join(os.path.dirname(__file__), "pastagens.db")
-
-def get_db():
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row
-    return conn
-
-
-def ensure_operador_permission_columns():
-    """Garante que as colunas de permissão de operador existam."""
-    conn = get_db()
-    cursor = conn.cursor()
-
-    cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='usuarios'")
-    if not cursor.fetchone():
-        conn.close()
-        return
-
-    cursor.execute('PRAGMA table_info(usuarios)')
-    cols = {row[1] for row in cursor.fetchall()}
-
-    def add_if_missing(col_name, ddl):
-        if col_name not in cols:
-            cursor.execute(f"ALTER TABLE usuarios ADD COLUMN {ddl}")
-
-    add_if_missing('perm_visualizacao', 'perm_visualizacao INTEGER DEFAULT 0')
-    add_if_missing('perm_piquetes', 'perm_piquetes INTEGER DEFAULT 0')
-    add_if_missing('perm_lotes', 'perm_lotes INTEGER DEFAULT 0')
-    add_if_missing('perm_mover_alocar_sair', 'perm_mover_alocar_sair INTEGER DEFAULT 0')
-
-    conn.commit()
-    conn.close()
-
-
-def ensure_manager_limit_columns():
-    """Garante colunas de limites e expiração para gerentes."""
-    conn = get_db()
-    cursor = conn.cursor()
-
-    cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='usuarios'")
-    if not cursor.fetchone():
-        conn.close()
-        return
-
-    cursor.execute('PRAGMA table_info(usuarios)')
-    cols = {row[1] for row in cursor.fetchall()}
-
-    def add_if_missing(col_name, ddl):
-        if col_name not in cols:
-            cursor.execute(f"ALTER TABLE usuarios ADD COLUMN {ddl}")
-
-    add_if_missing('max_fazendas', 'max_fazendas INTEGER')
-    add_if_missing('max_piquetes_por_fazenda', 'max_piquetes_por_fazenda INTEGER')
-    add_if_missing('expiracao_data', 'expiracao_data TEXT')
-    add_if_missing('expiracao_em_dias', 'expiracao_em_dias INTEGER')
-
-    conn.commit()
-    conn.close()
-
-
-def ensure_movimentacoes_user_column():
-    """Garante que a coluna usuario_id exista na tabela movimentacoes."""
-    conn = get_db()
-    cursor = conn.cursor()
-
-    cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='movimentacoes'")
-    if not cursor.fetchone():
-        conn.close()
-        return
-
-    cursor.execute('PRAGMA table_info(movimentacoes)')
-    cols = {row[1] for row in cursor.fetchall()}
-
-    if 'usuario_id' not in cols:
-        cursor.execute("ALTER TABLE movimentacoes ADD COLUMN usuario_id INTEGER REFERENCES usuarios(id)")
-
-    conn.commit()
-    conn.close()
-
-# Executa na importação para manter schema atualizado
-ensure_operador_permission_columns()
-ensure_manager_limit_columns()
-ensure_movimentacoes_user_column()
+from services.conexao_db import get_db  # Conexão compartilhada por requisição (caminho: conexao_db.DB_PATH)
+import migrations  # Schema versionado (python -m migrations)
 
 from functools import wraps
 from flask import session, redirect, url_for, abort
+import threading
 import time
 
 # Tempo em segundos entre verificações de ativo
@@ -274,230 +198,8 @@ def farm_permission_required(f):
     return decorated_function
 
 def init_db():
-    """Inicializa todas as tabelas."""
-    conn = get_db()
-    cursor = conn.cursor()
-    
-    # Usuários
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS usuarios (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            username TEXT UNIQUE NOT NULL,
-            password_hash TEXT NOT NULL,
-            nome TEXT,
-            role TEXT DEFAULT 'user',
-            ativo INTEGER DEFAULT 1,
-            created_at TEXT,
-            updated_at TEXT
-        )
-    ''')
-    
-    # Fazendas
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS fazendas (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            usuario_id INTEGER,
-            nome TEXT NOT NULL,
-            area REAL DEFAULT 0,
-            localizacao TEXT,
-            descricao TEXT,
-            latitude_sede REAL,
-            longitude_sede REAL,
-            clima_modo TEXT DEFAULT 'automatico',
-            condicao_climatica_manual TEXT DEFAULT 'normal',
-            ativo INTEGER DEFAULT 1,
-            created_at TEXT,
-            updated_at TEXT,
-            FOREIGN KEY (usuario_id) REFERENCES usuarios(id)
-        )
-    ''')
-    
-    # Migração: colunas de clima por fazenda
-    cursor.execute('PRAGMA table_info(fazendas)')
-    colunas_fazendas = [r['name'] for r in cursor.fetchall()]
-    if 'clima_modo' not in colunas_fazendas:
-        cursor.execute("ALTER TABLE fazendas ADD COLUMN clima_modo TEXT DEFAULT 'automatico'")
-    if 'condicao_climatica_manual' not in colunas_fazendas:
-        cursor.execute("ALTER TABLE fazendas ADD COLUMN condicao_climatica_manual TEXT DEFAULT 'normal'")
-    
-    # Migration: adicionar campos de suplementação na tabela piquetes (se não existirem)
-    cursor.execute("PRAGMA table_info(piquetes)")
-    colunas_piquetes = [r[1] for r in cursor.fetchall()]
-    if 'possui_cocho' not in colunas_piquetes:
-        cursor.execute("ALTER TABLE piquetes ADD COLUMN possui_cocho INTEGER DEFAULT 0")
-    if 'percentual_suplementacao' not in colunas_piquetes:
-        cursor.execute("ALTER TABLE piquetes ADD COLUMN percentual_suplementacao REAL DEFAULT 0")
-
-    # Piquetes
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS piquetes (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            fazenda_id INTEGER,
-            nome TEXT NOT NULL,
-            area REAL DEFAULT 0,
-            capim TEXT,
-            geometria TEXT,
-            estado TEXT DEFAULT 'disponivel',
-            -- Campos de status avançado
-            altura_atual REAL,
-            altura_real_medida REAL,
-            data_medicao TEXT,
-            altura_entrada REAL DEFAULT 25,
-            altura_saida REAL DEFAULT 15,
-            dias_ocupacao INTEGER DEFAULT 3,
-            dias_descanso_min INTEGER DEFAULT 30,
-            irrigado INTEGER DEFAULT 0,
-            bloqueado INTEGER DEFAULT 0,
-            motivo_bloqueio TEXT,
-            observacao TEXT,
-            capacidade_animal REAL DEFAULT 0,
-            -- Campo climático para cálculo de crescimento
-            condicao_climatica TEXT DEFAULT 'normal',
-            -- Campos de suplementação (ração via cocho)
-            possui_cocho INTEGER DEFAULT 0,
-            percentual_suplementacao REAL DEFAULT 0,
-            ativo INTEGER DEFAULT 1,
-            created_at TEXT,
-            updated_at TEXT,
-            FOREIGN KEY (fazenda_id) REFERENCES fazendas(id)
-        )
-    ''')
-    
-    # Lotes (NOVO - completo)
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS lotes (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            fazenda_id INTEGER,
-            nome TEXT NOT NULL,
-            categoria TEXT,
-            quantidade INTEGER DEFAULT 0,
-            peso_medio REAL DEFAULT 0,
-            -- Campos técnicos para Personalizado
-            consumo_base REAL DEFAULT NULL,
-            -- Localização atual
-            piquete_atual_id INTEGER,
-            data_entrada TEXT,
-            -- Status calculado
-            status_calculado TEXT DEFAULT 'OK',
-            -- Auditoria
-            ativo INTEGER DEFAULT 1,
-            observacao TEXT,
-            created_at TEXT,
-            updated_at TEXT,
-            FOREIGN KEY (fazenda_id) REFERENCES fazendas(id),
-            FOREIGN KEY (piquete_atual_id) REFERENCES piquetes(id)
-        )
-    ''')
-
-    # Adicionar coluna consumo_base se não existir (migração)
-    cursor.execute('PRAGMA table_info(lotes)')
-    colunas = [r['name'] for r in cursor.fetchall()]
-    if 'consumo_base' not in colunas:
-        cursor.execute('ALTER TABLE lotes ADD COLUMN consumo_base REAL DEFAULT NULL')
-    
-    # Movimentações
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS movimentacoes (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            lote_id INTEGER,
-            piquete_origem_id INTEGER,
-            piquete_destino_id INTEGER,
-            usuario_id INTEGER,
-            data_movimentacao TEXT,
-            quantidade INTEGER DEFAULT 0,
-            tipo TEXT DEFAULT 'movimentacao',
-            motivo TEXT,
-            observacao TEXT,
-            created_at TEXT,
-            FOREIGN KEY (lote_id) REFERENCES lotes(id),
-            FOREIGN KEY (piquete_origem_id) REFERENCES piquetes(id),
-            FOREIGN KEY (piquete_destino_id) REFERENCES piquetes(id),
-            FOREIGN KEY (usuario_id) REFERENCES usuarios(id)
-        )
-    ''')
-
-    # Histórico de lotação
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS lotacao_historico (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            fazenda_id INTEGER NOT NULL,
-            data_ref TEXT NOT NULL,
-            ua_total REAL DEFAULT 0,
-            lotacao_ha REAL DEFAULT 0,
-            created_at TEXT,
-            UNIQUE (fazenda_id, data_ref),
-            FOREIGN KEY (fazenda_id) REFERENCES fazendas(id)
-        )
-    ''')
-    
-    # Capins
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS capins (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            nome TEXT NOT NULL,
-            crescimento_diario REAL DEFAULT 0,
-            altura_entrada REAL DEFAULT 25,
-            altura_saida REAL DEFAULT 15,
-            tempo_descanso INTEGER DEFAULT 35,
-            observacao TEXT,
-            created_at TEXT,
-            updated_at TEXT
-        )
-    ''')
-    
-    # Alertas
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS alertas (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            usuario_id INTEGER,
-            fazenda_id INTEGER,
-            piquete_id INTEGER,
-            tipo TEXT NOT NULL,
-            titulo TEXT,
-            mensagem TEXT,
-            lido INTEGER DEFAULT 0,
-            created_at TEXT,
-            FOREIGN KEY (usuario_id) REFERENCES usuarios(id),
-            FOREIGN KEY (fazenda_id) REFERENCES fazendas(id),
-            FOREIGN KEY (piquete_id) REFERENCES piquetes(id)
-        )
-    ''')
-    
-    # Usuário admin padrão
-    cursor.execute('SELECT id FROM usuarios WHERE username = ?', ('admin',))
-    if not cursor.fetchone():
-        hash = generate_password_hash('admin123')
-        cursor.execute('''
-            INSERT INTO usuarios (username, password_hash, nome, role, email, created_at, updated_at)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-        ''', ('admin', hash, 'Administrador', 'admin', 'admin@pastoflow.com', datetime.now().isoformat(), datetime.now().isoformat()))
-    
-    # Usuário gerente padrão (para migração de dados existentes se houver)
-    cursor.execute('SELECT id FROM usuarios WHERE username = ?', ('gerente',))
-    if not cursor.fetchone():
-        hash = generate_password_hash('gerente123')
-        cursor.execute('''
-            INSERT INTO usuarios (username, password_hash, nome, role, email, created_at, updated_at)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-        ''', ('gerente', hash, 'Gerente Teste', 'gerente', 'gerente@teste.com', datetime.now().isoformat(), datetime.now().isoformat()))
-
-    
-    # Capins padrão
-    cursor.execute('SELECT id FROM capins')
-    if not cursor.fetchone():
-        capins = [
-            ('Brachiaria', 60, 25, 15, 35),
-            ('Mombaça', 80, 35, 20, 45),
-            ('Tifton 85', 70, 20, 10, 30),
-            ('Andropogon', 55, 25, 12, 35),
-        ]
-        cursor.executemany('''
-            INSERT INTO capins (nome, crescimento_diario, altura_entrada, altura_saida, tempo_descanso, created_at)
-            VALUES (?, ?, ?, ?, ?, ?)
-        ''', [(c + (datetime.now().isoformat(),)) for c in capins])
-    
-    conn.commit()
-    conn.close()
+    """Cria/atualiza o schema aplicando as migrações pendentes (ver migrations/)."""
+    migrations.migrar()
     print("Banco inicializado!")
 
 # ============ USUÁRIOS ============
@@ -565,6 +267,8 @@ def atualizar_fazenda(id, nome=None, area=None, localizacao=None, descricao=None
     ''', (nome, area, localizacao, descricao, latitude_sede, longitude_sede, clima_modo, condicao_climatica_manual, datetime.now().isoformat(), id))
     conn.commit()
     conn.close()
+    # Modo, coordenadas ou condição manual podem ter mudado
+    invalidar_clima_fazenda(id)
 
 def excluir_fazenda(id):
     """Exclui (desativa) uma fazenda"""
@@ -581,9 +285,9 @@ def listar_fazendas_usuario(usuario_id):
     
     # Busca fazendas onde o usuário tem permissão explicita OU é o dono (usuario_id na fazenda)
     cursor.execute('''
-        SELECT DISTINCT f.* FROM fazendas f
-        LEFT JOIN user_farm_permissions p ON f.id = p.farm_id
-        WHERE (f.usuario_id = ? OR p.user_id = ?) AND f.ativo = 1 
+        SELECT f.* FROM fazendas f
+        WHERE f.ativo = 1
+          AND (f.usuario_id = ? OR f.id IN (SELECT farm_id FROM user_farm_permissions WHERE user_id = ?))
         ORDER BY f.nome
     ''', (usuario_id, usuario_id))
     
@@ -591,6 +295,21 @@ def listar_fazendas_usuario(usuario_id):
     conn.close()
     return [dict(r) for r in rows]
 
+def usuario_tem_acesso_fazenda(usuario_id, role, fazenda_id):
+    """Admin acessa todas; os demais, as fazendas ativas de listar_fazendas_usuario (dono ou permissão explícita)."""
+    if role == 'admin':
+        return True
+    conn = get_db()
+    cursor = conn.cursor()
+    cursor.execute('''
+        SELECT 1 FROM fazendas f
+        WHERE f.id = ? AND f.ativo = 1
+          AND (f.usuario_id = ? OR f.id IN (SELECT farm_id FROM user_farm_permissions WHERE user_id = ?))
+    ''', (fazenda_id, usuario_id, usuario_id))
+    row = cursor.fetchone()
+    conn.close()
+    return row is not None
+
 def get_permissoes_operador(user_id):
     conn = get_db()
     cursor = conn.cursor()
@@ -850,6 +569,13 @@ def listar_lotes_baixa_lotacao(fazenda_id):
     return resultado
 
 # ============ LOTES ============
+def _invalidar_plano_lote(cursor, lote_id):
+    """Marca como desatualizado o calendário de rotação da fazenda do lote."""
+    cursor.execute('SELECT fazenda_id FROM lotes WHERE id = ?', (lote_id,))
+    row = cursor.fetchone()
+    if row:
+        invalidar_plano(row['fazenda_id'])
+
 def criar_lote(fazenda_id, nome, categoria=None, quantidade=0, peso_medio=0, observacao=None, piquete_id=None, consumo_base=None):
     """
     Cria um novo lote com validações técnicas.
@@ -917,6 +643,7 @@ def criar_lote(fazenda_id, nome, categoria=None, quantidade=0, peso_medio=0, obs
             conn.commit()
     
     conn.close()
+    invalidar_plano(fazenda_id)
     return lote_id
 
 def atualizar_lote(id, nome=None, categoria=None, quantidade=None, peso_medio=None, observacao=None, piquete_atual_id=None, consumo_base=None):
@@ -946,6 +673,7 @@ def atualizar_lote(id, nome=None, categoria=None, quantidade=None, peso_medio=No
         WHERE id=?
     ''', (nome, categoria, quantidade, peso_medio, observacao, piquete_atual_id, consumo_base, datetime.now().isoformat(), id))
     conn.commit()
+    _invalidar_plano_lote(cursor, id)
     conn.close()
 
 def excluir_lote(id):
@@ -955,9 +683,18 @@ def excluir_lote(id):
     cursor.execute('UPDATE lotes SET ativo = 0, updated_at = ? WHERE id = ?', 
                    (datetime.now().isoformat(), id))
     conn.commit()
+    _invalidar_plano_lote(cursor, id)
     conn.close()
 
 def listar_lotes(fazenda_id=None, status_filtro=None, categoria_filtro=None):
+    """
+    Lista lotes ativos com os campos calculados (dias no piquete, altura
+    estimada do piquete atual e status).
+
+    Todos os dados do piquete vêm no mesmo JOIN, o clima é resolvido uma vez
+    por fazenda e as alturas saem de uma chamada em lote, então o custo não
+    cresce com o número de lotes.
+    """
     conn = get_db()
     cursor = conn.cursor()
     
@@ -965,7 +702,9 @@ def listar_lotes(fazenda_id=None, status_filtro=None, categoria_filtro=None):
         SELECT l.*, p.nome as piquete_nome, p.capim, p.area as piquete_area,
                p.altura_real_medida, p.altura_estimada,
                p.altura_entrada, p.altura_saida, p.dias_ocupacao,
-               p.bloqueado as piquete_bloqueado
+               p.bloqueado as piquete_bloqueado,
+               p.id as _piquete_id, p.data_medicao as _piquete_data_medicao,
+               p.estado as _piquete_estado
         FROM lotes l
         LEFT JOIN piquetes p ON l.piquete_atual_id = p.id
         WHERE l.ativo = 1
@@ -994,54 +733,55 @@ def listar_lotes(fazenda_id=None, status_filtro=None, categoria_filtro=None):
     rows = cursor.fetchall()
     conn.close()
     
+    agora = data_teste_now()
+    cache_clima = {}
+    
     # Adicionar campos calculados
     lotes = []
+    com_piquete = []
     for row in rows:
         lote = dict(row)
+        piquete_id = lote.pop('_piquete_id')
+        data_medicao = lote.pop('_piquete_data_medicao')
+        estado = lote.pop('_piquete_estado')
         lote['dias_no_piquete'] = calcular_dias_no_piquete(lote)
         
         # Calcular altura_estimada diretamente (igual listar_piquetes faz)
-        if lote.get('piquete_atual_id'):
-            # Buscar dados do piquete para calcular altura_estimada
-            piquete_info = get_piquete(lote['piquete_atual_id'])
-            if piquete_info:
-                # Usar dados do piquete para calcular
-                lote['data_medicao'] = piquete_info.get('data_medicao')
-                lote['capim'] = piquete_info.get('capim')
-                lote['altura_entrada'] = piquete_info.get('altura_entrada')
-                lote['altura_saida'] = piquete_info.get('altura_saida')
-                lote['estado'] = piquete_info.get('estado')
-                lote['dias_ocupacao'] = piquete_info.get('dias_ocupacao')
-                lote['animais_no_piquete'] = lote.get('quantidade', 0) or 0
-                lote['area'] = piquete_info.get('area')
-                
-                # Calcular dias_descanso desde data_medicao
-                data_medicao = lote.get('data_medicao')
-                if data_medicao:
-                    try:
-                        if 'T' in data_medicao:
-                            medicao_dt = datetime.fromisoformat(data_medicao.replace('Z', '+00:00').replace('+00:00', ''))
-                        else:
-                            medicao_dt = datetime.fromisoformat(data_medicao)
-                        lote['dias_descanso'] = (data_teste_now() - medicao_dt).days
-                    except:
-                        lote['dias_descanso'] = 0
-                else:
+        if lote.get('piquete_atual_id') and piquete_id is not None:
+            lote['data_medicao'] = data_medicao
+            lote['estado'] = estado
+            lote['animais_no_piquete'] = lote.get('quantidade', 0) or 0
+            lote['area'] = lote['piquete_area']
+            
+            # Calcular dias_descanso desde data_medicao
+            if data_medicao:
+                try:
+                    if 'T' in data_medicao:
+                        medicao_dt = datetime.fromisoformat(data_medicao.replace('Z', '+00:00').replace('+00:00', ''))
+                    else:
+                        medicao_dt = datetime.fromisoformat(data_medicao)
+                    lote['dias_descanso'] = (agora - medicao_dt).days
+                except:
                     lote['dias_descanso'] = 0
-                
-                # Calcular altura_estimada
-                altura_est, fonte = calcular_altura_estimada(
-                    lote,
-                    categoria=lote.get('categoria'),
-                    peso_medio=lote.get('peso_medio'),
-                    consumo_base=lote.get('consumo_base')
-                )
-                lote['altura_estimada'] = altura_est
-                # Usar altura_real_medida do piquete
-                lote['altura_real_medida'] = piquete_info.get('altura_real_medida')
+            else:
+                lote['dias_descanso'] = 0
+            com_piquete.append(lote)
         
-        lote['status_info'] = calcular_status_lote(lote)
         lotes.append(lote)
+
+    # Calcular altura_estimada (em lote, com categoria/peso/consumo de cada lote)
+    alturas = calcular_alturas_estimadas(
+        com_piquete,
+        categorias=[lote.get('categoria') for lote in com_piquete],
+        pesos_medios=[lote.get('peso_medio') for lote in com_piquete],
+        consumos_base=[lote.get('consumo_base') for lote in com_piquete],
+        cache_clima=cache_clima
+    )
+    for lote, (altura_est, _fonte) in zip(com_piquete, alturas):
+        lote['altura_estimada'] = altura_est
+
+    for lote in lotes:
+        lote['status_info'] = calcular_status_lote(lote)
     
     return lotes
 
@@ -1270,35 +1010,106 @@ def calcular_status_lote(lote):
             'mensagem': f'{dias_no}/{dias_max} dias (alt: {altura_base}cm)'
         }
 
-def atualizar_status_lotes(fazenda_id):
-    """Atualiza status de todos os lotes da fazenda"""
-    conn = get_db()
-    cursor = conn.cursor()
-    
+# ========== STATUS DOS LOTES (INCREMENTAL) ==========
+# Movimentação, medição e suplementação marcam os lotes/piquetes afetados;
+# recalcular_status_pendentes() relê só esses lotes e grava (executemany) os
+# status que mudaram. Transições só de data (ATENCAO -> RETIRAR) ficam para a
+# varredura diária (agendador_service), que chama atualizar_status_lotes.
+
+_status_pendentes_lotes = set()
+_status_pendentes_piquetes = set()
+_status_pendentes_lock = threading.Lock()
+
+
+def marcar_status_pendente(lote_ids=(), piquete_ids=()):
+    """Marca lotes (e os lotes dos piquetes) para o próximo recalcular_status_pendentes."""
+    with _status_pendentes_lock:
+        _status_pendentes_lotes.update(i for i in lote_ids if i is not None)
+        _status_pendentes_piquetes.update(i for i in piquete_ids if i is not None)
+
+
+def limpar_status_pendentes():
+    """Descarta as marcações (testes trocam de banco entre execuções)."""
+    with _status_pendentes_lock:
+        _status_pendentes_lotes.clear()
+        _status_pendentes_piquetes.clear()
+
+
+def _recalcular_status(cursor, filtro, params):
+    """Recalcula os lotes ativos do filtro e grava só os que mudaram. Retorna quantos mudaram."""
     cursor.execute('''
         SELECT l.*, p.altura_real_medida, p.altura_estimada, p.altura_entrada, 
                p.altura_saida, p.dias_ocupacao, p.bloqueado
         FROM lotes l
         LEFT JOIN piquetes p ON l.piquete_atual_id = p.id
-        WHERE l.fazenda_id = ? AND l.ativo = 1
-    ''', (fazenda_id,))
-    
-    lotes = cursor.fetchall()
-    
-    for lote in lotes:
+        WHERE l.ativo = 1 AND ({})
+    '''.format(filtro), params)
+
+    agora = datetime.now().isoformat()
+    alterados = []
+    for lote in cursor.fetchall():
         lote_dict = dict(lote)
         # Calcular altura_atual e tem_altura_real
         temReal = lote_dict.get('altura_real_medida') is not None
         lote_dict['altura_atual'] = lote_dict.get('altura_real_medida') if temReal else lote_dict.get('altura_estimada')
-        
-        status_info = calcular_status_lote(lote_dict)
-        cursor.execute('''
+
+        status = calcular_status_lote(lote_dict)['status']
+        if status != lote['status_calculado']:
+            alterados.append((status, agora, lote['id']))
+
+    if alterados:
+        cursor.executemany('''
             UPDATE lotes SET status_calculado = ?, updated_at = ?
             WHERE id = ?
-        ''', (status_info['status'], datetime.now().isoformat(), lote['id']))
-    
+        ''', alterados)
+    return len(alterados)
+
+
+def atualizar_status_lotes(fazenda_id):
+    """Atualiza status de todos os lotes da fazenda (varredura completa)"""
+    conn = get_db()
+    cursor = conn.cursor()
+    alterados = _recalcular_status(cursor, 'l.fazenda_id = ?', (fazenda_id,))
+    conn.commit()
+    conn.close()
+    return alterados
+
+
+def recalcular_status_pendentes():
+    """
+    Recalcula só os lotes marcados por marcar_status_pendente (e os lotes
+    dos piquetes marcados). Retorna quantos status mudaram.
+    """
+    with _status_pendentes_lock:
+        lote_ids = sorted(_status_pendentes_lotes)
+        piquete_ids = sorted(_status_pendentes_piquetes)
+        _status_pendentes_lotes.clear()
+        _status_pendentes_piquetes.clear()
+    if not lote_ids and not piquete_ids:
+        return 0
+
+    # UNION em vez de OR: cada lado usa o seu índice (PK e idx_lotes_piquete_ativos)
+    filtro = '''l.id IN (SELECT id FROM lotes WHERE id IN ({})
+                         UNION SELECT id FROM lotes WHERE ativo = 1 AND piquete_atual_id IN ({}))'''.format(
+        ','.join('?' * len(lote_ids)) or 'NULL', ','.join('?' * len(piquete_ids)) or 'NULL')
+    conn = get_db()
+    cursor = conn.cursor()
+    alterados = _recalcular_status(cursor, filtro, lote_ids + piquete_ids)
+    conn.commit()
+    conn.close()
+    return alterados
+
+
+def varrer_status_lotes():
+    """Varredura diária: transições por data em todas as fazendas ativas."""
+    conn = get_db()
+    cursor = conn.cursor()
+    cursor.execute('SELECT id FROM fazendas WHERE ativo = 1')
+    fazendas = [r['id'] for r in cursor.fetchall()]
+    alterados = sum(_recalcular_status(cursor, 'l.fazenda_id = ?', (f,)) for f in fazendas)
     conn.commit()
     conn.close()
+    return {'fazendas': len(fazendas), 'alterados': alterados}
 
 def mover_lote(lote_id, piquete_destino_id, usuario_id, quantidade=None, motivo=None):
     """
@@ -1332,33 +1143,27 @@ def mover_lote(lote_id, piquete_destino_id, usuario_id, quantidade=None, motivo=
     # Calcular dias técnicos se tiver dados necessários
     dias_tecnicos = None
     data_saida_prevista = None
+    capacidade = None
     
     if piquete:
         altura_atual = piquete['altura_real_medida'] or piquete['altura_atual'] or 25
         altura_saida = piquete['altura_saida'] or 15
-        capim = piquete['capim']
         area = piquete['area'] or 0
         qtd_animais = lote['quantidade'] or 0
         peso_medio = lote['peso_medio'] or 0
         
-        # Calcular consumo diário
+        # Calcular consumo diário (com suplementação via cocho)
         if area > 0 and qtd_animais > 0 and peso_medio > 0:
-            consumo_base = get_consumo_base(capim) if capim else 0.8
             ua_total = (qtd_animais * peso_medio) / 450
-            ua_ha = ua_total / area
-            consumo_diario = consumo_base * (ua_ha / 2)
+            consumo_diario = capacidade_service.consumo_diario_piquete(piquete, ua_total)
             
-            # Aplicar suplementação (ração via cocho) - ajuste pós-processamento
-            try:
-                percentual_sup = piquete['percentual_suplementacao']
-            except Exception:
-                percentual_sup = 0
-            try:
-                possui_cocho = piquete['possui_cocho']
-            except Exception:
-                possui_cocho = 0
-            if possui_cocho and percentual_sup > 0:
-                consumo_diario = aplicar_suplementacao(consumo_diario, percentual_sup)
+            # Validação pela capacidade gravada (UA sustentável nos dias_ocupacao do piquete)
+            if piquete['capacidade_animal'] is not None and piquete['capacidade_ua_dias'] is not None:
+                capacidade = {
+                    'ua_lote': round(ua_total, 2),
+                    'ua_sustentavel': piquete['capacidade_animal'],
+                    'excede': ua_total > piquete['capacidade_animal'],
+                }
             
             # Calcular dias técnicos
             resultado = calcular_dias_tecnicos(
@@ -1386,8 +1191,12 @@ def mover_lote(lote_id, piquete_destino_id, usuario_id, quantidade=None, motivo=
     
     conn.commit()
     conn.close()
+    invalidar_plano(lote['fazenda_id'])
+    marcar_status_pendente(lote_ids=[lote_id])
+    marcar_alertas_pendentes(lote['fazenda_id'])
     
-    return {'status': 'ok', 'dias_tecnicos': dias_tecnicos, 'data_saida_prevista': data_saida_prevista}
+    return {'status': 'ok', 'dias_tecnicos': dias_tecnicos, 'data_saida_prevista': data_saida_prevista,
+            'capacidade': capacidade}
 
 
 def recalcular_dias_tecnicos_lote(lote_id):
@@ -1427,23 +1236,14 @@ def recalcular_dias_tecnicos_lote(lote_id):
     # Obter dados necessários
     altura_atual = piquete['altura_real_medida'] or piquete['altura_atual'] or 25
     altura_saida = piquete['altura_saida'] or 15
-    capim = piquete['capim']
     area = piquete['area'] or 0
     qtd_animais = lote['quantidade'] or 0
     peso_medio = lote['peso_medio'] or 0
     
-    # Calcular consumo diário
+    # Calcular consumo diário (com suplementação via cocho)
     if area > 0 and qtd_animais > 0 and peso_medio > 0:
-        consumo_base = get_consumo_base(capim) if capim else 0.8
         ua_total = (qtd_animais * peso_medio) / 450
-        ua_ha = ua_total / area
-        consumo_diario = consumo_base * (ua_ha / 2)
-        
-        # Aplicar suplementação
-        percentual_sup = piquete.get('percentual_suplementacao') or 0
-        possui_cocho = piquete.get('possui_cocho') or 0
-        if possui_cocho and percentual_sup > 0:
-            consumo_diario = aplicar_suplementacao(consumo_diario, percentual_sup)
+        consumo_diario = capacidade_service.consumo_diario_piquete(piquete, ua_total)
         
         # Recalcular dias técnicos
         resultado = calcular_dias_tecnicos(
@@ -1461,6 +1261,9 @@ def recalcular_dias_tecnicos_lote(lote_id):
             WHERE id = ?
         ''', (dias_tecnicos, data_saida_prevista, datetime.now().isoformat(), lote_id))
         conn.commit()
+        invalidar_plano(lote['fazenda_id'])
+        marcar_status_pendente(lote_ids=[lote_id])
+        marcar_alertas_pendentes(lote['fazenda_id'])
     
     conn.close()
     return True
@@ -1515,126 +1318,17 @@ def get_estatisticas_lotes(fazenda_id):
         'por_categoria': por_categoria
     }
 
-def sugerir_proximo_piquete(fazenda_id, lote_id):
-    """Sugere os melhores piquetes para um lote"""
-    conn = get_db()
-    cursor = conn.cursor()
-    
-    from datetime import datetime
-    
-    # Buscar piquetes ocupados
-    cursor.execute('''
-        SELECT DISTINCT piquete_atual_id 
-        FROM lotes 
-        WHERE ativo = 1 AND piquete_atual_id IS NOT NULL
-    ''')
-    piquetes_ocupados = set(r['piquete_atual_id'] for r in cursor.fetchall())
-    
-    # Buscar piquetes disponíveis (não ocupados)
-    # Considerar ultima mov do piquete (saida OU entrada)
-    if piquetes_ocupados:
-        query = '''
-            SELECT p.*, 
-                   COALESCE(m_saida.data_movimentacao, m_entrada.data_movimentacao, p.created_at) as ultima_mov
-            FROM piquetes p
-            LEFT JOIN movimentacoes m_saida ON p.id = m_saida.piquete_origem_id AND m_saida.tipo = 'saida'
-            LEFT JOIN movimentacoes m_entrada ON p.id = m_entrada.piquete_destino_id
-            WHERE p.fazenda_id = ? 
-              AND p.bloqueado = 0 
-              AND p.ativo = 1
-              AND (p.altura_real_medida IS NOT NULL OR p.altura_atual IS NOT NULL)
-              AND p.id NOT IN ({})
-            GROUP BY p.id
-        '''.format(','.join(map(str, piquetes_ocupados)))
-        cursor.execute(query, (fazenda_id,))
-    else:
-        query = '''
-            SELECT p.*, 
-                   COALESCE(m_saida.data_movimentacao, m_entrada.data_movimentacao, p.created_at) as ultima_mov
-            FROM piquetes p
-            LEFT JOIN movimentacoes m_saida ON p.id = m_saida.piquete_origem_id AND m_saida.tipo = 'saida'
-            LEFT JOIN movimentacoes m_entrada ON p.id = m_entrada.piquete_destino_id
-            WHERE p.fazenda_id = ? 
-              AND p.bloqueado = 0 
-              AND p.ativo = 1
-              AND (p.altura_real_medida IS NOT NULL OR p.altura_atual IS NOT NULL)
-            GROUP BY p.id
-        '''
-        cursor.execute(query, (fazenda_id,))
-    
-    piquetes = []
-    
-    for row in cursor.fetchall():
-        p = dict(row)
-        
-        # Calcular altura e fonte
-        temReal = p.get('altura_real_medida') is not None
-        altura_atual = p.get('altura_real_medida') if temReal else p.get('altura_atual')
-        
-        # Verificar se o piquete já foi ocupado antes
-        piquete_ja_ocupado = p['ultima_mov'] and p['ultima_mov'] != p['created_at']
-        
-        # Calcular dias desde última movimentação
-        try:
-            if p['ultima_mov']:
-                mov_dt = datetime.fromisoformat(p['ultima_mov'].replace('Z', '+00:00').replace('+00:00', ''))
-                dias_descanso = (data_teste_now() - mov_dt).days
-            else:
-                dias_descanso = 0
-        except:
-            dias_descanso = 0
-        
-        dias_ideais = p.get('dias_descanso_min', 30) or 30
-        altura_entrada = p.get('altura_entrada', 25) or 25
-        
-        # Regra: 
-        # - RECUPERANDO: altura_atual < altura_entrada OU dias_descanso < dias_min
-        # - APTO: altura_atual >= altura_entrada E dias_descanso >= dias_min
-        # Se altura atingiu ideal, já pode entrar mesmo sem completar dias_min
-        
-        # Verificar se piquete é novo (nunca foi ocupado)
-        piquete_novo = not piquete_ja_ocupado
-        
-        if altura_atual >= altura_entrada:
-            # Altura atingiu o ideal!
-            if piquete_novo:
-                status = 'APTO'
-                prioridade = 200
-            else:
-                # Já foi ocupado antes
-                if dias_descanso >= dias_ideais:
-                    status = 'APTO'
-                    prioridade = 100
-                else:
-                    status = 'APTO_ALCANCADA'
-                    prioridade = 90  # Prioridade menor que APTO completo
-        else:
-            # Altura ainda não atingiu
-            status = 'RECUPERANDO'
-            prioridade = 10
-        
-        piquetes.append({
-            'id': p['id'],
-            'nome': p['nome'],
-            'capim': p['capim'],
-            'area': p['area'] or 0,
-            'dias_descanso': dias_descanso,
-            'dias_ideais': dias_ideais,
-            'altura_atual': altura_atual,
-            'altura_real_medida': p.get('altura_real_medida'),
-            'fonte_altura': 'real' if temReal else 'estimada',
-            'altura_entrada': altura_entrada,
-            'status': status,
-            'prioridade': prioridade,
-            'piquete_novo': not piquete_ja_ocupado
-        })
-    
-    conn.close()
-    
-    # Ordenar: novos primeiro, depois aptos, depois em recuperação
-    piquetes.sort(key=lambda x: (-x['prioridade'], -x.get('dias_descanso', 0)))
-    
-    return piquetes
+def sugerir_proximo_piquete(fazenda_id, lote_id, k=None, capim=None, area_min=None, distancia_max=None):
+    """
+    Sugere os melhores piquetes livres para um lote (novos, depois aptos,
+    depois em recuperação), lidos do índice por fazenda de sugestao_service.
+
+    Args:
+        k: Quantos devolver (padrão: todos)
+        capim, area_min, distancia_max: Filtros opcionais (ver sugestao_service.sugerir)
+    """
+    return sugestao_service.sugerir(fazenda_id, lote_id, k=k, capim=capim, area_min=area_min,
+                                    distancia_max=distancia_max)
 
 # ============ PIQUETES ============
 def criar_piquete(fazenda_id, nome, area=None, capim=None, geometria=None, 
@@ -1675,6 +1369,8 @@ def criar_piquete(fazenda_id, nome, area=None, capim=None, geometria=None,
     conn.commit()
     piquete_id = cursor.lastrowid
     conn.close()
+    capacidade_service.atualizar_capacidade(piquete_ids=[piquete_id])
+    invalidar_plano(fazenda_id)
     return piquete_id
 
 def listar_piquetes(fazenda_id=None):
@@ -1687,14 +1383,21 @@ def listar_piquetes(fazenda_id=None):
     rows = cursor.fetchall()
     
     # Buscar contagem de animais e dados do lote por piquete
-    cursor.execute('''
+    # (com fazenda: só os lotes dos piquetes dela, via idx_lotes_piquete_ativos)
+    query_lotes = '''
         SELECT l.piquete_atual_id, COUNT(*) as total_lotes, SUM(l.quantidade) as total_animais,
                l.id as lote_id, l.nome as lote_nome, l.data_entrada, l.dias_tecnicos, l.data_saida_prevista,
                l.categoria, l.peso_medio, l.consumo_base
         FROM lotes l
-        WHERE l.ativo = 1 AND l.piquete_atual_id IS NOT NULL
+        WHERE l.ativo = 1 AND l.piquete_atual_id IS NOT NULL {}
         GROUP BY l.piquete_atual_id
-    ''')
+    '''
+    if fazenda_id:
+        cursor.execute(query_lotes.format(
+            'AND l.piquete_atual_id IN (SELECT id FROM piquetes WHERE fazenda_id = ? AND ativo = 1)'
+        ), (fazenda_id,))
+    else:
+        cursor.execute(query_lotes.format(''))
     lotes_por_piquete = {r['piquete_atual_id']: r for r in cursor.fetchall()}
     
     conn.close()
@@ -1747,32 +1450,22 @@ def listar_piquetes(fazenda_id=None):
             row_dict['data_saida_prevista'] = None
             row_dict['dias_ate_saida'] = None
         
-        # Calcular dias_descanso desde data_medicao
-        data_medicao = row_dict.get('data_medicao')
-        if data_medicao:
-            try:
-                if 'T' in data_medicao:
-                    medicao_dt = datetime.fromisoformat(data_medicao.replace('Z', '+00:00').replace('+00:00', ''))
-                else:
-                    medicao_dt = datetime.fromisoformat(data_medicao)
-                row_dict['dias_descanso'] = (data_teste_now() - medicao_dt).days
-            except:
-                row_dict['dias_descanso'] = 0
-        else:
-            row_dict['dias_descanso'] = 0
-        
-        # Calcular altura_estimada e determinar fonte
-        if piquete_id in lotes_por_piquete:
-            lote_info = lotes_por_piquete[piquete_id]
-            altura_estimada, fonte = calcular_altura_estimada(
-                row_dict, 
-                categoria=lote_info['categoria'],
-                peso_medio=lote_info['peso_medio'],
-                consumo_base=lote_info['consumo_base']
-            )
-        else:
-            altura_estimada, fonte = calcular_altura_estimada(row_dict)
-            
+        result.append(row_dict)
+    
+    # Calcular dias_descanso desde data_medicao (mesma regra da simulação)
+    for row_dict, dias in zip(result, dias_descanso_medicao(result)):
+        row_dict['dias_descanso'] = int(dias)
+    
+    # Calcular altura_estimada e determinar fonte (todos os piquetes de uma vez)
+    lotes_info = [lotes_por_piquete.get(row_dict['id']) for row_dict in result]
+    alturas = calcular_alturas_estimadas(
+        result,
+        categorias=[info['categoria'] if info is not None else None for info in lotes_info],
+        pesos_medios=[info['peso_medio'] if info is not None else None for info in lotes_info],
+        consumos_base=[info['consumo_base'] if info is not None else None for info in lotes_info]
+    )
+    
+    for row_dict, (altura_estimada, fonte) in zip(result, alturas):
         row_dict['altura_estimada'] = altura_estimada
         row_dict['fonte_altura'] = fonte  # 'real' ou 'estimada'
         
@@ -1794,8 +1487,6 @@ def listar_piquetes(fazenda_id=None):
         
         # Adicionar dias_ideais
         row_dict['dias_ideais'] = row_dict.get('dias_descanso_min', 30) or 30
-        
-        result.append(row_dict)
     
     return result
 
@@ -1805,14 +1496,6 @@ def get_piquete(id):
     cursor.execute('SELECT * FROM piquetes WHERE id = ?', (id,))
     row = cursor.fetchone()
     
-    # Buscar ultima movimentacao do piquete
-    cursor.execute('''
-        SELECT MAX(data_movimentacao) as ultima_mov
-        FROM movimentacoes
-        WHERE piquete_destino_id = ? OR piquete_origem_id = ?
-    ''', (id, id))
-    mov_row = cursor.fetchone()
-    
     # Buscar dados do lote no piquete
     cursor.execute('''
         SELECT id, data_entrada, dias_tecnicos, data_saida_prevista
@@ -1866,7 +1549,7 @@ def get_piquete(id):
                 row_dict['dias_descanso'] = 0
         else:
             # Usar ultima_mov como fallback
-            ultima_mov = mov_row['ultima_mov'] if mov_row else None
+            ultima_mov = row['ultima_mov']
             try:
                 if ultima_mov:
                     mov_dt = datetime.fromisoformat(ultima_mov.replace('Z', '+00:00').replace('+00:00', ''))
@@ -1902,7 +1585,7 @@ def atualizar_piquete(id, nome=None, area=None, capim=None,
     cursor = conn.cursor()
     
     # Buscar valores atuais para manter se não informados
-    cursor.execute('SELECT nome FROM piquetes WHERE id = ?', (id,))
+    cursor.execute('SELECT nome, fazenda_id FROM piquetes WHERE id = ?', (id,))
     atual = cursor.fetchone()
     if atual:
         nome_atual = atual['nome']
@@ -1965,6 +1648,11 @@ def atualizar_piquete(id, nome=None, area=None, capim=None,
                   datetime.now().isoformat(), id))
     conn.commit()
     conn.close()
+    if atual:
+        capacidade_service.atualizar_capacidade(piquete_ids=[id])
+        invalidar_plano(atual['fazenda_id'])
+        marcar_status_pendente(piquete_ids=[id])
+        marcar_alertas_pendentes(atual['fazenda_id'])
 
 def deletar_piquete(id):
     """Exclui (desativa) um piquete e desvincula os lotes vinculados."""
@@ -1989,7 +1677,11 @@ def deletar_piquete(id):
                    (datetime.now().isoformat(), id))
     
     conn.commit()
+    cursor.execute('SELECT fazenda_id FROM piquetes WHERE id = ?', (id,))
+    row = cursor.fetchone()
     conn.close()
+    if row:
+        invalidar_plano(row['fazenda_id'])
 
 def listar_movimentacoes(fazenda_id=None):
     """Lista movimentações"""
@@ -2033,23 +1725,21 @@ def listar_piquetes_apto(fazenda_id):
     
     # Busca piquetes ATIVOS, NÃO BLOQUEADOS E NÃO OCUPADOS
     cursor.execute('''
-        SELECT p.*, 
-               COALESCE(MAX(m.data_movimentacao), p.created_at) as ultima_mov
+        SELECT p.*,
+               COALESCE(p.ultima_entrada, p.created_at) as ultima_mov
         FROM piquetes p
-        LEFT JOIN movimentacoes m ON p.id = m.piquete_destino_id
         WHERE p.fazenda_id = ? 
           AND p.bloqueado = 0 
           AND p.ativo = 1
           AND (p.estado != 'ocupado' OR p.estado IS NULL)
-        GROUP BY p.id
     ''', (fazenda_id,))
     
+    rows = [dict(row) for row in cursor.fetchall()]
+    alturas = calcular_alturas_estimadas(rows)
+    
     piquetes = []
-    for row in cursor.fetchall():
-        p = dict(row)
-        
+    for p, (altura_estimada, fonte) in zip(rows, alturas):
         # Calcular altura_estimada e fonte
-        altura_estimada, fonte = calcular_altura_estimada(p)
         p['altura_estimada'] = altura_estimada
         p['fonte_altura'] = fonte
         
@@ -2112,41 +1802,119 @@ def listar_capins():
     conn.close()
     return [dict(r) for r in rows]
 
-# ============ ALERTAS ============
-def criar_tabela_alertas():
-    """Cria a tabela de alertas se não existir."""
+_NAO_INFORMADO = object()  # salvar_capim: campo não enviado (na atualização mantém o gravado)
+CAMPOS_CAPIM = ('nome', 'crescimento_diario', 'consumo_base', 'dias_tecnicos',
+                 'altura_entrada', 'altura_saida', 'tempo_descanso', 'observacao')
+
+
+def _numero_capim(valor, campo, tipo=float):
+    """Converte um campo numérico do capim ('' e None ficam NULL); ValueError se não for número."""
+    if valor is None or valor == '':
+        return None
+    try:
+        return tipo(valor)
+    except (TypeError, ValueError):
+        raise ValueError(f"{campo} deve ser numérico")
+
+
+def salvar_capim(nome=_NAO_INFORMADO, crescimento_diario=_NAO_INFORMADO, consumo_base=_NAO_INFORMADO,
+                 dias_tecnicos=_NAO_INFORMADO, altura_entrada=_NAO_INFORMADO, altura_saida=_NAO_INFORMADO,
+                 tempo_descanso=_NAO_INFORMADO, observacao=_NAO_INFORMADO, id=None):
+    """
+    Cria (ou atualiza, com id) um capim e recarrega o registro de capins.
+    Valores vazios ficam NULL e o cálculo usa o padrão técnico do capim; na
+    atualização, campos não informados mantêm o valor gravado.
+    """
+    from services import capim_service
+
+    informados = dict(zip(CAMPOS_CAPIM, (nome, crescimento_diario, consumo_base, dias_tecnicos,
+                                          altura_entrada, altura_saida, tempo_descanso, observacao)))
     conn = get_db()
     cursor = conn.cursor()
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS alertas (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            usuario_id INTEGER,
-            fazenda_id INTEGER,
-            piquete_id INTEGER,
-            tipo TEXT NOT NULL,
-            titulo TEXT,
-            mensagem TEXT,
-            lido INTEGER DEFAULT 0,
-            created_at TEXT,
-            FOREIGN KEY (usuario_id) REFERENCES usuarios(id),
-            FOREIGN KEY (fazenda_id) REFERENCES fazendas(id),
-            FOREIGN KEY (piquete_id) REFERENCES piquetes(id)
-        )
-    ''')
-    conn.commit()
-    conn.close()
+    atual = {}
+    if id is not None:
+        cursor.execute('SELECT {} FROM capins WHERE id = ?'.format(', '.join(CAMPOS_CAPIM)), (id,))
+        row = cursor.fetchone()
+        if row is None:
+            conn.close()
+            raise ValueError("Capim não encontrado")
+        atual = dict(row)
+    campos = {k: atual.get(k) if v is _NAO_INFORMADO else v for k, v in informados.items()}
+    # Limites só para o que veio agora (sementes antigas gravaram crescimento em kg MS/ha)
+    novo = {k for k, v in informados.items() if v is not _NAO_INFORMADO}
+
+    # ========== VALIDAÇÕES ==========
+    try:
+        if not campos['nome'] or not str(campos['nome']).strip():
+            raise ValueError("Nome do capim é obrigatório")
+        crescimento_diario = _numero_capim(campos['crescimento_diario'], "Crescimento diário")
+        consumo_base = _numero_capim(campos['consumo_base'], "Consumo base")
+        dias_tecnicos = _numero_capim(campos['dias_tecnicos'], "Dias técnicos", int)
+        altura_entrada = _numero_capim(campos['altura_entrada'], "Altura de entrada")
+        altura_saida = _numero_capim(campos['altura_saida'], "Altura de saída")
+        tempo_descanso = _numero_capim(campos['tempo_descanso'], "Tempo de descanso", int)
+        if 'crescimento_diario' in novo and crescimento_diario is not None \
+                and not 0 < crescimento_diario <= capim_service.CRESCIMENTO_MAXIMO:
+            raise ValueError(f"Crescimento diário deve estar entre 0 e {capim_service.CRESCIMENTO_MAXIMO} cm/dia")
+        if 'consumo_base' in novo and consumo_base is not None and consumo_base <= 0:
+            raise ValueError("Consumo base deve ser maior que zero")
+        if 'dias_tecnicos' in novo and dias_tecnicos is not None and dias_tecnicos <= 0:
+            raise ValueError("Dias técnicos deve ser maior que zero")
+    except ValueError:
+        conn.close()
+        raise
+
+    nome = str(campos['nome']).strip()
+    agora = datetime.now().isoformat()
+    valores = (nome, crescimento_diario, consumo_base, dias_tecnicos,
+               altura_entrada, altura_saida, tempo_descanso, campos['observacao'])
+    try:
+        if id is None:
+            cursor.execute('''
+                INSERT INTO capins (nome, crescimento_diario, consumo_base, dias_tecnicos,
+                                    altura_entrada, altura_saida, tempo_descanso, observacao, created_at, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', valores + (agora, agora))
+            id = cursor.lastrowid
+        else:
+            cursor.execute('''
+                UPDATE capins SET nome = ?, crescimento_diario = ?, consumo_base = ?, dias_tecnicos = ?,
+                                  altura_entrada = ?, altura_saida = ?, tempo_descanso = ?, observacao = ?,
+                                  updated_at = ?
+                WHERE id = ?
+            ''', valores + (agora, id))
+        conn.commit()
+    except sqlite3.IntegrityError:
+        raise ValueError(f"Já existe um capim chamado {nome}")
+    finally:
+        conn.close()
 
+    # Crescimento/consumo mudam estimativas e calendários de todas as fazendas
+    capim_service.recarregar()
+    capacidade_service.atualizar_capacidade()  # consumo base do capim mudou
+    invalidar_plano()
+    return id
+
+# ============ ALERTAS ============
 def listar_piquetes_disponiveis(fazenda_id):
     """Lista piquetes disponíveis (sem animais) para criação/edição de lotes"""
     conn = get_db()
     cursor = conn.cursor()
     
     # Buscar piquetes com animais (que estão ocupados)
-    cursor.execute('''
-        SELECT DISTINCT piquete_atual_id 
-        FROM lotes 
-        WHERE ativo = 1 AND piquete_atual_id IS NOT NULL
-    ''')
+    if fazenda_id:
+        cursor.execute('''
+            SELECT DISTINCT piquete_atual_id 
+            FROM lotes 
+            WHERE ativo = 1
+              AND piquete_atual_id IN (SELECT id FROM piquetes WHERE fazenda_id = ? AND ativo = 1)
+        ''', (fazenda_id,))
+    else:
+        cursor.execute('''
+            SELECT DISTINCT piquete_atual_id 
+            FROM lotes 
+            WHERE ativo = 1 AND piquete_atual_id IS NOT NULL
+        ''')
     piquetes_ocupados = set(r['piquete_atual_id'] for r in cursor.fetchall())
     
     # Construir a query
@@ -2197,17 +1965,13 @@ def listar_piquetes_disponiveis(fazenda_id):
     conn.close()
     
     # Filtrar apenas piquetes sem animais e calcular altura_estimada
-    result = []
-    for r in rows:
-        row_dict = dict(r)
-        if row_dict['id'] not in piquetes_ocupados:
-            # Calcular altura_estimada e fonte
-            altura_estimada, fonte = calcular_altura_estimada(row_dict)
-            row_dict['altura_estimada'] = altura_estimada
-            row_dict['fonte_altura'] = fonte
-            row_dict['lotes_no_piquete'] = 0
-            row_dict['animais_no_piquete'] = 0
-            result.append(row_dict)
+    result = [dict(r) for r in rows if r['id'] not in piquetes_ocupados]
+    alturas = calcular_alturas_estimadas(result)
+    for row_dict, (altura_estimada, fonte) in zip(result, alturas):
+        row_dict['altura_estimada'] = altura_estimada
+        row_dict['fonte_altura'] = fonte
+        row_dict['lotes_no_piquete'] = 0
+        row_dict['animais_no_piquete'] = 0
     
     return result
 
@@ -2274,201 +2038,147 @@ def contar_alertas_nao_lidos(fazenda_id=None):
     conn.close()
     return resultado['total'] if resultado else 0
 
+# ========== ALERTAS (VARREDURA E EVENTOS) ==========
+# A página da fazenda só lê alertas. Quem grava: a varredura do agendador
+# (varrer_alertas, todas as fazendas) e, depois de movimentação ou medição,
+# gerar_alertas_pendentes() para as fazendas marcadas. Nos dois casos é um
+# único INSERT OR IGNORE ... SELECT: o índice único parcial da migração 011
+# (um alerta não lido por fazenda, lote e tipo) descarta o que já existe.
+
+_alertas_pendentes = set()
+_alertas_pendentes_lock = threading.Lock()
+
+# data_saida_prevista pode ser BR (17/03/2026, calcular_dias_tecnicos) ou ISO
+# (2026-03-17, 2026-03-17T10:00:00); datetime() do SQLite normaliza as duas
+_SAIDA_PREVISTA_SQL = '''datetime(CASE WHEN instr(l.data_saida_prevista, '/') > 0
+                       THEN substr(l.data_saida_prevista, 7, 4) || '-' || substr(l.data_saida_prevista, 4, 2)
+                            || '-' || substr(l.data_saida_prevista, 1, 2)
+                       ELSE l.data_saida_prevista END)'''
+
+
+def marcar_alertas_pendentes(fazenda_id):
+    """Marca a fazenda para o próximo gerar_alertas_pendentes."""
+    if fazenda_id is not None:
+        with _alertas_pendentes_lock:
+            _alertas_pendentes.add(int(fazenda_id))
+
+
+def limpar_alertas_pendentes():
+    """Descarta as marcações (testes trocam de banco entre execuções)."""
+    with _alertas_pendentes_lock:
+        _alertas_pendentes.clear()
+
+
+def _gerar_alertas(cursor, fazenda_ids, data_teste):
+    """
+    Cria os alertas de ocupação técnica (data de saída prevista já passou)
+    num único INSERT OR IGNORE ... SELECT, sem commit.
+
+    Args:
+        fazenda_ids: Fazendas a verificar (None: todas as fazendas ativas)
+        data_teste: Data de referência (simular_data)
+
+    Returns:
+        "Alerta criado para {piquete}: tempo técnico atingido" por alerta
+        criado (os já pendentes são ignorados pelo banco)
+    """
+    if fazenda_ids is None:
+        filtro, params = 'p.fazenda_id IN (SELECT id FROM fazendas WHERE ativo = 1)', []
+    else:
+        params = [int(f) for f in fazenda_ids]
+        if not params:
+            return []
+        filtro = 'p.fazenda_id IN ({})'.format(','.join('?' * len(params)))
+
+    cursor.execute('''
+        INSERT OR IGNORE INTO alertas (usuario_id, fazenda_id, piquete_id, lote_id, tipo, titulo, mensagem, created_at)
+        SELECT 1, p.fazenda_id, p.id, l.id, 'ocupacao_tecnica', 'Tempo técnico de ocupação atingido',
+               'O lote ' || l.nome || ' no piquete ' || p.nome
+                   || ' atingiu a data de saída prevista (' || l.data_saida_prevista || ')',
+               ?
+        FROM piquetes p
+        JOIN lotes l ON l.piquete_atual_id = p.id AND l.ativo = 1
+        WHERE {} AND p.ativo = 1 AND p.estado = 'ocupado'
+          AND l.data_saida_prevista IS NOT NULL
+          AND {} <= ?
+        ORDER BY p.fazenda_id, p.nome, l.nome
+        RETURNING (SELECT nome FROM piquetes WHERE id = alertas.piquete_id) AS piquete_nome
+    '''.format(filtro, _SAIDA_PREVISTA_SQL),
+        [datetime.now().isoformat(), *params, data_teste.strftime('%Y-%m-%d %H:%M:%S')])
+    return [f"Alerta criado para {row['piquete_nome']}: tempo técnico atingido" for row in cursor.fetchall()]
+
+
 def verificar_alertas_piquetes(fazenda_id):
     """Verifica piquetes e gera alertas baseados em dias técnicos dos lotes."""
-    import json
-    from pathlib import Path
-    
     conn = get_db()
     cursor = conn.cursor()
-    
-    # Ler data de teste do arquivo JSON (para funcionar sem restart do Flask)
-    CONFIG_FILE = Path(__file__).parent / "data_teste_config.json"
-    data_teste = datetime.now()
-    
-    if CONFIG_FILE.exists():
-        try:
-            with open(CONFIG_FILE, 'r') as f:
-                config = json.load(f)
-            data_str = config.get('data')
-            if data_str:
-                data_teste = datetime.fromisoformat(data_str)
-        except Exception as e:
-            print(f"Erro ao ler data_teste: {e}")
-    
-    # Buscar alertas não lidos de ocupacao_tecnica já existentes (por lote)
-    cursor.execute('''
-        SELECT lote_id, COUNT(*) as total
-        FROM alertas
-        WHERE fazenda_id = ? AND tipo = 'ocupacao_tecnica' AND lido = 0 AND lote_id IS NOT NULL
-        GROUP BY lote_id
-    ''', (fazenda_id,))
-    alertas_existentes = {row['lote_id']: row['total'] for row in cursor.fetchall()}
-    
-    # Buscar piquetes ocupados com seus lotes e dias técnicos
-    cursor.execute('''
-        SELECT p.id as piquete_id, p.nome as piquete_nome, 
-               l.id as lote_id, l.nome as lote_nome, l.dias_tecnicos, l.data_entrada, l.data_saida_prevista
-        FROM piquetes p
-        LEFT JOIN lotes l ON p.id = l.piquete_atual_id AND l.ativo = 1
-        WHERE p.fazenda_id = ? AND p.estado = 'ocupado'
-        ORDER BY p.nome, l.nome
-    ''', (fazenda_id,))
-    resultados = cursor.fetchall()
-    
-    # Agrupar por piquete
-    piquetes_dict = {}
-    for row in resultados:
-        piquete_id = row['piquete_id']
-        if piquete_id not in piquetes_dict:
-            piquetes_dict[piquete_id] = {
-                'nome': row['piquete_nome'],
-                'lotes': []
-            }
-        if row['lote_id']:
-            piquetes_dict[piquete_id]['lotes'].append({
-                'id': row['lote_id'],
-                'nome': row['lote_nome'],
-                'dias_tecnicos': row['dias_tecnicos'],
-                'data_entrada': row['data_entrada'],
-                'data_saida_prevista': row['data_saida_prevista']
-            })
-    
-    alertas_criados = []
-    
-    for piquete_id, p in piquetes_dict.items():
-        for lote in p['lotes']:
-            data_saida_prevista = lote.get('data_saida_prevista')
-            
-            if data_saida_prevista:
-                try:
-                    # Parse da data - pode ser ISO (2026-03-17) ou BR (17/03/2026)
-                    if '/' in data_saida_prevista:
-                        # Formato brasileiro: dd/mm/YYYY
-                        saida_dt = datetime.strptime(data_saida_prevista, '%d/%m/%Y')
-                    else:
-                        # Formato ISO: YYYY-MM-DD
-                        saida_dt = datetime.fromisoformat(data_saida_prevista.replace('Z', '+00:00').replace('+00:00', ''))
-                    
-                    # Alertar se data de teste já passou da data de saída prevista
-                    if data_teste >= saida_dt:
-                        # Verificar se já existe alerta não lido para este lote
-                        lote_id = lote.get('id')
-                        if lote_id and lote_id in alertas_existentes:
-                            # Já existe alerta para este lote, não criar duplicado
-                            continue
-                        
-                        cursor.execute('''
-                            INSERT INTO alertas (usuario_id, fazenda_id, piquete_id, lote_id, tipo, titulo, mensagem, created_at)
-                            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-                        ''', (1, fazenda_id, piquete_id, lote.get('id'), 'ocupacao_tecnica', 
-                              'Tempo técnico de ocupação atingido',
-                              f'O lote {lote["nome"]} no piquete {p["nome"]} atingiu a data de saída prevista ({data_saida_prevista})',
-                              datetime.now().isoformat()))
-                        alertas_criados.append(f"Alerta criado para {p['nome']}: tempo técnico atingido")
-                except Exception as e:
-                    print(f"Erro ao verificar ocupação: {e}")
-    
+    # Data de teste (arquivo relido só quando muda; congelada por requisição)
+    alertas_criados = _gerar_alertas(cursor, [fazenda_id], data_teste_now())
     conn.commit()
     conn.close()
     return alertas_criados
 
-def calcular_dias_descanso(capim, altura_entrada=25, altura_saida=15):
-    """
-    Retorna dias de descanso necessários baseado no capim e alturas.
-    Usa cálculo dinâmico: (altura_entrada - altura_saida) / crescimento_diario
-    """
-    from services.rotacao_service import DADOS_CAPINS
-    
-    if not capim or capim not in DADOS_CAPINS:
-        return 30  # Fallback genérico
-    
-    crescimento = DADOS_CAPINS[capim]['crescimento_diario']
-    altura_necessaria = altura_entrada - altura_saida
-    
-    if crescimento <= 0:
-        return 30
-    
-    dias_necessarios = altura_necessaria / crescimento
-    return max(1, int(dias_necessarios))  # Mínimo 1 dia
-
-def calcular_consumo_diario(capim):
-    """Retorna consumo diário estimado do capim em cm/dia"""
-    # Estimativa baseada em crescimento típico
-    consumo = {
-        'Brachiaria': 0.8,
-        'Mombaça': 1.0,
-        'Tifton 85': 0.7,
-        'Andropogon': 0.8,
-        'Capim Aruana': 0.75,
-        'Natalino': 0.85,
-        'MG-5': 0.9,
-    }
-    return consumo.get(capim, 0.8)
 
-def _get_fazenda_clima_config(fazenda_id):
-    """Retorna config de clima da fazenda."""
-    if not fazenda_id:
-        return None
+def gerar_alertas_pendentes():
+    """Gera os alertas das fazendas marcadas por marcar_alertas_pendentes. Retorna quantos criou."""
+    with _alertas_pendentes_lock:
+        fazendas = sorted(_alertas_pendentes)
+        _alertas_pendentes.clear()
+    if not fazendas:
+        return 0
     conn = get_db()
     cursor = conn.cursor()
-    cursor.execute('''
-        SELECT latitude_sede, longitude_sede, clima_modo, condicao_climatica_manual
-        FROM fazendas
-        WHERE id = ?
-    ''', (fazenda_id,))
-    row = cursor.fetchone()
+    criados = len(_gerar_alertas(cursor, fazendas, data_teste_now()))
+    conn.commit()
     conn.close()
-    return dict(row) if row else None
+    return criados
 
 
-def _resolver_condicao_climatica_piquete(piquete):
+def varrer_alertas(tamanho_lote=None):
     """
-    Resolve condição climática com prioridade:
-    1) Se piquete tem condicao_climatica explícita E não for 'normal', usar ela
-    2) config da fazenda (se modo manual)
-    3) clima automático por coordenada da fazenda
-    4) normal
+    Varredura do agendador: alertas de todas as fazendas ativas num único
+    INSERT (ou um INSERT e um commit por lote de `tamanho_lote` fazendas).
     """
-    # Primeiro, verificar se o piquete tem uma condição climática específica (não padrão 'normal')
-    cond_manual = (piquete.get('condicao_climatica') or '').strip().lower()
-    
-    # Se o piquete tem uma condição explícita (não 'normal'), usar ela
-    if cond_manual and cond_manual != 'normal' and cond_manual in ('seca', 'normal', 'chuvoso'):
-        return cond_manual, 'manual'
-
-    # Caso contrário, buscar da fazenda
-    fazenda_id = piquete.get('fazenda_id')
-    lat = piquete.get('fazenda_latitude')
-    lon = piquete.get('fazenda_longitude')
-
-    if fazenda_id:
-        cfg = _get_fazenda_clima_config(fazenda_id)
-        if cfg:
-            clima_modo = (cfg.get('clima_modo') or 'automatico').lower()
-            cond_fazenda_manual = (cfg.get('condicao_climatica_manual') or 'normal').lower()
+    conn = get_db()
+    cursor = conn.cursor()
+    cursor.execute('SELECT id FROM fazendas WHERE ativo = 1 ORDER BY id')
+    fazendas = [r['id'] for r in cursor.fetchall()]
+    data_teste = data_teste_now()
+    if tamanho_lote:
+        lotes = [fazendas[i:i + tamanho_lote] for i in range(0, len(fazendas), tamanho_lote)]
+    else:
+        lotes = [None]
+    criados = 0
+    for lote in lotes:
+        criados += len(_gerar_alertas(cursor, lote, data_teste))
+        conn.commit()
+    conn.close()
+    return {'fazendas': len(fazendas), 'alertas': criados}
 
-            if clima_modo == 'manual' and cond_fazenda_manual in ('seca', 'normal', 'chuvoso'):
-                return cond_fazenda_manual, 'manual_fazenda'
 
-            if lat is None:
-                lat = cfg.get('latitude_sede')
-            if lon is None:
-                lon = cfg.get('longitude_sede')
+def calcular_dias_descanso(capim, altura_entrada=25, altura_saida=15):
+    """
+    Retorna dias de descanso necessários baseado no capim e alturas.
+    Usa cálculo dinâmico: (altura_entrada - altura_saida) / crescimento_diario
+    """
+    return calcular_dias_descanso_necessarios(capim, altura_entrada, altura_saida)
 
-    if lat is not None and lon is not None:
-        try:
-            clima = obter_clima_com_fallback(lat, lon, prefer_cache=True)
-            cond = (clima.get('condicao') or 'normal').lower()
-            if cond in ('seca', 'normal', 'chuvoso'):
-                return cond, clima.get('fonte', 'api')
-        except Exception:
-            pass
+def calcular_consumo_diario(capim):
+    """Retorna consumo diário estimado do capim em cm/dia (consumo base do registro de capins)"""
+    return get_consumo_base(capim)
 
-    return 'normal', 'fallback'
+def _serie_diaria_descanso(celula, dias):
+    """Argumentos de calcular_altura_descanso para integrar a série diária até hoje."""
+    if celula is None or dias <= 0:
+        return {}
+    return {
+        'data_inicio': (data_teste_now() - timedelta(days=dias)).date(),
+        'latitude': celula[0],
+        'longitude': celula[1],
+    }
 
 
-def calcular_altura_estimada(piquete, categoria=None, peso_medio=None, consumo_base=None):
+def calcular_altura_estimada(piquete, categoria=None, peso_medio=None, consumo_base=None, cache_clima=None):
     """
     Calcula a altura do piquete baseada em medição real ou estimativa.
     Returns: (altura, fonte) onde fonte é 'real' ou 'estimada'
@@ -2478,6 +2188,8 @@ def calcular_altura_estimada(piquete, categoria=None, peso_medio=None, consumo_b
         categoria: Categoria do lote (para cálculo de degradação)
         peso_medio: Peso médio do lote (para cálculo de UA)
         consumo_base: Consumo base personalizado (para categoria Personalizado)
+        cache_clima: Dict compartilhado entre chamadas de uma mesma listagem
+            para resolver o clima da fazenda uma vez só
 
     Se houver medição real E dias_passados > 0:
     - Em ocupação: calcular degradação a partir da medição real
@@ -2561,7 +2273,7 @@ def calcular_altura_estimada(piquete, categoria=None, peso_medio=None, consumo_b
             from services.clima_service import calcular_fator_climatico
             from services.manejo_service import calcular_altura_descanso
 
-            condicao_climatica, _fonte_clima = _resolver_condicao_climatica_piquete(piquete)
+            condicao_climatica, _fonte_clima, celula = resolver_clima_piquete(piquete, cache_clima)
 
             # Usar a altura_real como ponto de partida
             resultado = calcular_altura_descanso(
@@ -2570,7 +2282,8 @@ def calcular_altura_estimada(piquete, categoria=None, peso_medio=None, consumo_b
                 capim=capim,
                 condicao_climatica=condicao_climatica,
                 altura_entrada=altura_entrada,
-                detalhar=False
+                detalhar=False,
+                **_serie_diaria_descanso(celula, dias_desde_medicao)
             )
             return round(resultado, 1), 'estimada'
 
@@ -2621,7 +2334,7 @@ def calcular_altura_estimada(piquete, categoria=None, peso_medio=None, consumo_b
         from services.clima_service import calcular_fator_climatico
         from services.manejo_service import calcular_altura_descanso
 
-        condicao_climatica, _fonte_clima = _resolver_condicao_climatica_piquete(piquete)
+        condicao_climatica, _fonte_clima, celula = resolver_clima_piquete(piquete, cache_clima)
 
         resultado = calcular_altura_descanso(
             altura_saida=altura_saida,
@@ -2629,7 +2342,8 @@ def calcular_altura_estimada(piquete, categoria=None, peso_medio=None, consumo_b
             capim=capim,
             condicao_climatica=condicao_climatica,
             altura_entrada=altura_entrada,
-            detalhar=False
+            detalhar=False,
+            **_serie_diaria_descanso(celula, dias_descanso)
         )
         return round(resultado, 1), 'estimada'
 
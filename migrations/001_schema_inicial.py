@@ -0,0 +1,185 @@
+"""
+001 - Tabelas base (o que init_db criava).
+"""
+
+
+def upgrade(conn):
+    cursor = conn.cursor()
+
+    # Usuários
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS usuarios (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            username TEXT UNIQUE NOT NULL,
+            password_hash TEXT NOT NULL,
+            nome TEXT,
+            role TEXT DEFAULT 'user',
+            ativo INTEGER DEFAULT 1,
+            created_at TEXT,
+            updated_at TEXT
+        )
+    ''')
+
+    # Fazendas
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS fazendas (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            usuario_id INTEGER,
+            nome TEXT NOT NULL,
+            area REAL DEFAULT 0,
+            localizacao TEXT,
+            descricao TEXT,
+            latitude_sede REAL,
+            longitude_sede REAL,
+            clima_modo TEXT DEFAULT 'automatico',
+            condicao_climatica_manual TEXT DEFAULT 'normal',
+            ativo INTEGER DEFAULT 1,
+            created_at TEXT,
+            updated_at TEXT,
+            FOREIGN KEY (usuario_id) REFERENCES usuarios(id)
+        )
+    ''')
+
+    # Piquetes
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS piquetes (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            fazenda_id INTEGER,
+            nome TEXT NOT NULL,
+            area REAL DEFAULT 0,
+            capim TEXT,
+            geometria TEXT,
+            estado TEXT DEFAULT 'disponivel',
+            -- Campos de status avançado
+            altura_atual REAL,
+            altura_real_medida REAL,
+            data_medicao TEXT,
+            altura_entrada REAL DEFAULT 25,
+            altura_saida REAL DEFAULT 15,
+            dias_ocupacao INTEGER DEFAULT 3,
+            dias_descanso_min INTEGER DEFAULT 30,
+            irrigado INTEGER DEFAULT 0,
+            bloqueado INTEGER DEFAULT 0,
+            motivo_bloqueio TEXT,
+            observacao TEXT,
+            capacidade_animal REAL DEFAULT 0,
+            -- Campo climático para cálculo de crescimento
+            condicao_climatica TEXT DEFAULT 'normal',
+            -- Campos de suplementação (ração via cocho)
+            possui_cocho INTEGER DEFAULT 0,
+            percentual_suplementacao REAL DEFAULT 0,
+            ativo INTEGER DEFAULT 1,
+            created_at TEXT,
+            updated_at TEXT,
+            FOREIGN KEY (fazenda_id) REFERENCES fazendas(id)
+        )
+    ''')
+
+    # Lotes
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS lotes (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            fazenda_id INTEGER,
+            nome TEXT NOT NULL,
+            categoria TEXT,
+            quantidade INTEGER DEFAULT 0,
+            peso_medio REAL DEFAULT 0,
+            -- Campos técnicos para Personalizado
+            consumo_base REAL DEFAULT NULL,
+            -- Localização atual
+            piquete_atual_id INTEGER,
+            data_entrada TEXT,
+            -- Status calculado
+            status_calculado TEXT DEFAULT 'OK',
+            -- Auditoria
+            ativo INTEGER DEFAULT 1,
+            observacao TEXT,
+            created_at TEXT,
+            updated_at TEXT,
+            FOREIGN KEY (fazenda_id) REFERENCES fazendas(id),
+            FOREIGN KEY (piquete_atual_id) REFERENCES piquetes(id)
+        )
+    ''')
+
+    # Movimentações
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS movimentacoes (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            lote_id INTEGER,
+            piquete_origem_id INTEGER,
+            piquete_destino_id INTEGER,
+            usuario_id INTEGER,
+            data_movimentacao TEXT,
+            quantidade INTEGER DEFAULT 0,
+            tipo TEXT DEFAULT 'movimentacao',
+            motivo TEXT,
+            observacao TEXT,
+            created_at TEXT,
+            FOREIGN KEY (lote_id) REFERENCES lotes(id),
+            FOREIGN KEY (piquete_origem_id) REFERENCES piquetes(id),
+            FOREIGN KEY (piquete_destino_id) REFERENCES piquetes(id),
+            FOREIGN KEY (usuario_id) REFERENCES usuarios(id)
+        )
+    ''')
+
+    # Histórico de lotação
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS lotacao_historico (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            fazenda_id INTEGER NOT NULL,
+            data_ref TEXT NOT NULL,
+            ua_total REAL DEFAULT 0,
+            lotacao_ha REAL DEFAULT 0,
+            created_at TEXT,
+            UNIQUE (fazenda_id, data_ref),
+            FOREIGN KEY (fazenda_id) REFERENCES fazendas(id)
+        )
+    ''')
+
+    # Capins
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS capins (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            nome TEXT NOT NULL,
+            crescimento_diario REAL DEFAULT 0,
+            altura_entrada REAL DEFAULT 25,
+            altura_saida REAL DEFAULT 15,
+            tempo_descanso INTEGER DEFAULT 35,
+            observacao TEXT,
+            created_at TEXT,
+            updated_at TEXT
+        )
+    ''')
+
+    # Alertas
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS alertas (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            usuario_id INTEGER,
+            fazenda_id INTEGER,
+            piquete_id INTEGER,
+            tipo TEXT NOT NULL,
+            titulo TEXT,
+            mensagem TEXT,
+            lido INTEGER DEFAULT 0,
+            created_at TEXT,
+            FOREIGN KEY (usuario_id) REFERENCES usuarios(id),
+            FOREIGN KEY (fazenda_id) REFERENCES fazendas(id),
+            FOREIGN KEY (piquete_id) REFERENCES piquetes(id)
+        )
+    ''')
+
+    # Cache de clima (antes criada sob demanda pelo clima_service)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS clima_cache (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            lat REAL NOT NULL,
+            lon REAL NOT NULL,
+            provider TEXT NOT NULL,
+            condicao TEXT NOT NULL,
+            fator REAL NOT NULL,
+            payload_json TEXT,
+            fetched_at TEXT NOT NULL,
+            expires_at TEXT NOT NULL
+        )
+    ''')
@@ -0,0 +1,22 @@
+"""
+002 - Permissões de usuário por fazenda (RBAC) e e-mail do usuário.
+
+O acesso do dono continua vindo de fazendas.usuario_id; a tabela guarda só
+as permissões concedidas a operadores.
+"""
+from migrations import adicionar_coluna
+
+
+def upgrade(conn):
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS user_farm_permissions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            farm_id INTEGER NOT NULL,
+            created_at TEXT,
+            FOREIGN KEY (user_id) REFERENCES usuarios(id),
+            FOREIGN KEY (farm_id) REFERENCES fazendas(id)
+        )
+    ''')
+
+    adicionar_coluna(conn, 'usuarios', 'email', 'email TEXT')
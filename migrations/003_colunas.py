@@ -0,0 +1,40 @@
+"""
+003 - Colunas adicionadas ao longo do tempo (antes: ensure_* na importação
+de database.py e blocos PRAGMA table_info dentro de init_db).
+"""
+from migrations import adicionar_coluna
+
+
+def upgrade(conn):
+    # Clima por fazenda
+    adicionar_coluna(conn, 'fazendas', 'clima_modo', "clima_modo TEXT DEFAULT 'automatico'")
+    adicionar_coluna(conn, 'fazendas', 'condicao_climatica_manual', "condicao_climatica_manual TEXT DEFAULT 'normal'")
+
+    # Piquetes: suplementação e estimativa
+    adicionar_coluna(conn, 'piquetes', 'possui_cocho', 'possui_cocho INTEGER DEFAULT 0')
+    adicionar_coluna(conn, 'piquetes', 'percentual_suplementacao', 'percentual_suplementacao REAL DEFAULT 0')
+    adicionar_coluna(conn, 'piquetes', 'altura_estimada', 'altura_estimada REAL')
+    adicionar_coluna(conn, 'piquetes', 'dias_descanso', 'dias_descanso INTEGER DEFAULT 0')
+
+    # Lotes: consumo personalizado e ocupação técnica
+    adicionar_coluna(conn, 'lotes', 'consumo_base', 'consumo_base REAL DEFAULT NULL')
+    adicionar_coluna(conn, 'lotes', 'dias_tecnicos', 'dias_tecnicos INTEGER')
+    adicionar_coluna(conn, 'lotes', 'data_saida_prevista', 'data_saida_prevista TEXT')
+
+    # Alertas por lote
+    adicionar_coluna(conn, 'alertas', 'lote_id', 'lote_id INTEGER REFERENCES lotes(id)')
+
+    # Permissões de operador
+    adicionar_coluna(conn, 'usuarios', 'perm_visualizacao', 'perm_visualizacao INTEGER DEFAULT 0')
+    adicionar_coluna(conn, 'usuarios', 'perm_piquetes', 'perm_piquetes INTEGER DEFAULT 0')
+    adicionar_coluna(conn, 'usuarios', 'perm_lotes', 'perm_lotes INTEGER DEFAULT 0')
+    adicionar_coluna(conn, 'usuarios', 'perm_mover_alocar_sair', 'perm_mover_alocar_sair INTEGER DEFAULT 0')
+
+    # Limites e expiração de gerentes
+    adicionar_coluna(conn, 'usuarios', 'max_fazendas', 'max_fazendas INTEGER')
+    adicionar_coluna(conn, 'usuarios', 'max_piquetes_por_fazenda', 'max_piquetes_por_fazenda INTEGER')
+    adicionar_coluna(conn, 'usuarios', 'expiracao_data', 'expiracao_data TEXT')
+    adicionar_coluna(conn, 'usuarios', 'expiracao_em_dias', 'expiracao_em_dias INTEGER')
+
+    # Autor da movimentação
+    adicionar_coluna(conn, 'movimentacoes', 'usuario_id', 'usuario_id INTEGER REFERENCES usuarios(id)')
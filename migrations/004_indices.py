@@ -0,0 +1,30 @@
+"""
+004 - Índices das consultas quentes (listagens por fazenda, joins de
+lotes/movimentações, alertas e cache de clima).
+
+Os parciais (WHERE ativo = 1 / lido = 0) só entram no plano quando a
+consulta repete o filtro literal. tests/test_indices.py garante que as
+consultas continuam usando índice.
+"""
+
+INDICES = (
+    ('idx_piquetes_fazenda_ativos', 'piquetes', '(fazenda_id) WHERE ativo = 1'),
+    ('idx_lotes_fazenda', 'lotes', '(fazenda_id, ativo)'),
+    ('idx_lotes_piquete_ativos', 'lotes', '(piquete_atual_id, quantidade) WHERE ativo = 1'),
+    ('idx_movimentacoes_destino', 'movimentacoes', '(piquete_destino_id, data_movimentacao)'),
+    ('idx_movimentacoes_origem', 'movimentacoes', '(piquete_origem_id, tipo, data_movimentacao)'),
+    ('idx_movimentacoes_lote', 'movimentacoes', '(lote_id, data_movimentacao)'),
+    ('idx_alertas_fazenda', 'alertas', '(fazenda_id, created_at)'),
+    ('idx_alertas_pendentes', 'alertas', '(fazenda_id, tipo, lote_id) WHERE lido = 0'),
+    ('idx_fazendas_usuario_ativas', 'fazendas', '(usuario_id) WHERE ativo = 1'),
+    ('idx_user_farm_permissions_user', 'user_farm_permissions', '(user_id, farm_id)'),
+    ('idx_clima_cache_coord', 'clima_cache', '(lat, lon, provider, fetched_at)'),
+)
+
+
+def upgrade(conn):
+    for nome, tabela, definicao in INDICES:
+        conn.execute(f'CREATE INDEX IF NOT EXISTS {nome} ON {tabela} {definicao}')
+
+    # Estatísticas para o planner escolher entre os índices
+    conn.execute('PRAGMA optimize')
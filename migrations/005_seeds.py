@@ -0,0 +1,41 @@
+"""
+005 - Dados iniciais: usuários padrão e capins.
+"""
+from datetime import datetime
+
+from werkzeug.security import generate_password_hash
+
+
+def upgrade(conn):
+    cursor = conn.cursor()
+    agora = datetime.now().isoformat()
+
+    # Usuário admin padrão
+    cursor.execute('SELECT id FROM usuarios WHERE username = ?', ('admin',))
+    if not cursor.fetchone():
+        cursor.execute('''
+            INSERT INTO usuarios (username, password_hash, nome, role, email, created_at, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        ''', ('admin', generate_password_hash('admin123'), 'Administrador', 'admin', 'admin@pastoflow.com', agora, agora))
+
+    # Usuário gerente padrão (para migração de dados existentes se houver)
+    cursor.execute('SELECT id FROM usuarios WHERE username = ?', ('gerente',))
+    if not cursor.fetchone():
+        cursor.execute('''
+            INSERT INTO usuarios (username, password_hash, nome, role, email, created_at, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        ''', ('gerente', generate_password_hash('gerente123'), 'Gerente Teste', 'gerente', 'gerente@teste.com', agora, agora))
+
+    # Capins padrão
+    cursor.execute('SELECT id FROM capins')
+    if not cursor.fetchone():
+        capins = [
+            ('Brachiaria', 60, 25, 15, 35),
+            ('Mombaça', 80, 35, 20, 45),
+            ('Tifton 85', 70, 20, 10, 30),
+            ('Andropogon', 55, 25, 12, 35),
+        ]
+        cursor.executemany('''
+            INSERT INTO capins (nome, crescimento_diario, altura_entrada, altura_saida, tempo_descanso, created_at)
+            VALUES (?, ?, ?, ?, ?, ?)
+        ''', [c + (agora,) for c in capins])
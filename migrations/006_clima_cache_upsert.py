@@ -0,0 +1,46 @@
+"""
+006 - clima_cache com uma linha por coordenada (lat, lon, provider).
+
+Mantém só a busca mais recente de cada coordenada, reduz os payloads já
+gravados aos campos usados na classificação e troca o índice de histórico
+(idx_clima_cache_coord) por um UNIQUE, que permite o upsert do clima_service.
+"""
+import json
+
+
+def _resumir(payload_json):
+    # Mesmos campos de clima_service._resumir_payload (cópia congelada)
+    try:
+        payload = json.loads(payload_json) if payload_json else {}
+    except ValueError:
+        payload = {}
+    current = payload.get('current') or {}
+    daily = payload.get('daily') or {}
+    return json.dumps({
+        'current': {'relative_humidity_2m': current.get('relative_humidity_2m')},
+        'daily': {'precipitation_sum': (daily.get('precipitation_sum') or [])[:7]},
+    }, ensure_ascii=False)
+
+
+def upgrade(conn):
+    conn.execute('''
+        DELETE FROM clima_cache
+        WHERE id NOT IN (
+            SELECT id FROM (
+                SELECT id, ROW_NUMBER() OVER (
+                    PARTITION BY lat, lon, provider ORDER BY fetched_at DESC, id DESC
+                ) AS ordem
+                FROM clima_cache
+            )
+            WHERE ordem = 1
+        )
+    ''')
+
+    linhas = conn.execute('SELECT id, payload_json FROM clima_cache').fetchall()
+    conn.executemany(
+        'UPDATE clima_cache SET payload_json = ? WHERE id = ?',
+        [(_resumir(payload_json), id_) for id_, payload_json in linhas]
+    )
+
+    conn.execute('DROP INDEX IF EXISTS idx_clima_cache_coord')
+    conn.execute('CREATE UNIQUE INDEX IF NOT EXISTS idx_clima_cache_chave ON clima_cache (lat, lon, provider)')
@@ -0,0 +1,26 @@
+"""
+007 - Série diária de clima por célula da grade (clima_diario).
+
+Uma linha por (lat, lon, data) com chuva, temperaturas, o fator de
+crescimento do dia e as somas acumuladas (fator_acumulado, dias_acumulados)
+até aquele dia, que tornam a integral do fator em qualquer intervalo uma
+diferença de duas linhas. WITHOUT ROWID: a chave primária já é o índice.
+"""
+
+
+def upgrade(conn):
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS clima_diario (
+            lat REAL NOT NULL,
+            lon REAL NOT NULL,
+            data TEXT NOT NULL,
+            precipitacao REAL,
+            temp_min REAL,
+            temp_max REAL,
+            fator REAL NOT NULL,
+            fator_acumulado REAL NOT NULL,
+            dias_acumulados INTEGER NOT NULL,
+            atualizado_em TEXT NOT NULL,
+            PRIMARY KEY (lat, lon, data)
+        ) WITHOUT ROWID
+    ''')
@@ -0,0 +1,61 @@
+"""
+008 - Última movimentação materializada em piquetes.
+
+ultima_entrada (lote chegou: piquete_destino_id), ultima_saida (lote saiu:
+piquete_origem_id, por saída ou por mudança de piquete) e ultima_mov (a
+maior das duas). Os gatilhos mantêm as colunas a cada INSERT/DELETE em
+movimentacoes, então mover_lote e /sair só precisam registrar a
+movimentação; as consultas de sugestão e de aptos leem as colunas em vez de
+agregar o histórico. O backfill usa os índices de origem e de destino.
+"""
+from migrations import adicionar_coluna
+
+
+def upgrade(conn):
+    adicionar_coluna(conn, 'piquetes', 'ultima_entrada', 'ultima_entrada TEXT')
+    adicionar_coluna(conn, 'piquetes', 'ultima_saida', 'ultima_saida TEXT')
+    adicionar_coluna(conn, 'piquetes', 'ultima_mov', 'ultima_mov TEXT')
+
+    conn.execute('''
+        UPDATE piquetes SET
+            ultima_entrada = (SELECT MAX(data_movimentacao) FROM movimentacoes
+                              WHERE piquete_destino_id = piquetes.id),
+            ultima_saida = (SELECT MAX(data_movimentacao) FROM movimentacoes
+                            WHERE piquete_origem_id = piquetes.id)
+    ''')
+    conn.execute('''
+        UPDATE piquetes
+        SET ultima_mov = MAX(COALESCE(ultima_entrada, ultima_saida), COALESCE(ultima_saida, ultima_entrada))
+    ''')
+
+    # MAX(coluna, nova) com COALESCE: MAX escalar do SQLite devolve NULL se algum argumento for NULL
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_movimentacoes_ultima_insert
+        AFTER INSERT ON movimentacoes
+        WHEN NEW.data_movimentacao IS NOT NULL
+        BEGIN
+            UPDATE piquetes SET
+                ultima_saida = MAX(COALESCE(ultima_saida, NEW.data_movimentacao), NEW.data_movimentacao),
+                ultima_mov = MAX(COALESCE(ultima_mov, NEW.data_movimentacao), NEW.data_movimentacao)
+            WHERE id = NEW.piquete_origem_id;
+            UPDATE piquetes SET
+                ultima_entrada = MAX(COALESCE(ultima_entrada, NEW.data_movimentacao), NEW.data_movimentacao),
+                ultima_mov = MAX(COALESCE(ultima_mov, NEW.data_movimentacao), NEW.data_movimentacao)
+            WHERE id = NEW.piquete_destino_id;
+        END
+    ''')
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_movimentacoes_ultima_delete
+        AFTER DELETE ON movimentacoes
+        BEGIN
+            UPDATE piquetes SET
+                ultima_entrada = (SELECT MAX(data_movimentacao) FROM movimentacoes
+                                  WHERE piquete_destino_id = piquetes.id),
+                ultima_saida = (SELECT MAX(data_movimentacao) FROM movimentacoes
+                                WHERE piquete_origem_id = piquetes.id)
+            WHERE id IN (OLD.piquete_origem_id, OLD.piquete_destino_id);
+            UPDATE piquetes
+            SET ultima_mov = MAX(COALESCE(ultima_entrada, ultima_saida), COALESCE(ultima_saida, ultima_entrada))
+            WHERE id IN (OLD.piquete_origem_id, OLD.piquete_destino_id);
+        END
+    ''')
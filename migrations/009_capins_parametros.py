@@ -0,0 +1,20 @@
+"""
+009 - Parâmetros de cálculo na tabela capins.
+
+consumo_base (cm/animal/dia em 2 UA/ha) e dias_tecnicos passam a poder ser
+cadastrados por capim, ao lado de crescimento_diario; NULL = padrão técnico
+de services/capim_service.py. nome ganha índice único (o registro de capins
+é por nome).
+"""
+from migrations import adicionar_coluna
+
+
+def upgrade(conn):
+    adicionar_coluna(conn, 'capins', 'consumo_base', 'consumo_base REAL')
+    adicionar_coluna(conn, 'capins', 'dias_tecnicos', 'dias_tecnicos INTEGER')
+    # Duplicados por nome (se houver) ficam só com o mais recente
+    conn.execute('''
+        DELETE FROM capins
+        WHERE id NOT IN (SELECT MAX(id) FROM capins GROUP BY nome)
+    ''')
+    conn.execute('CREATE UNIQUE INDEX IF NOT EXISTS idx_capins_nome ON capins (nome)')
@@ -0,0 +1,17 @@
+"""
+010 - Capacidade de suporte materializada em piquetes.
+
+capacidade_ua_dias é o estoque de pasto acima da altura de saída em UA·dia
+(quantos dias 1 UA fica no piquete; 2 UA ficam a metade), calculado por
+services/capacidade_service.py a partir da altura atual, altura_saida, área,
+consumo base do capim e suplementação. capacidade_animal (coluna antiga, até
+aqui sempre 0) passa a guardar a UA sustentável nos dias_ocupacao do piquete.
+As linhas ficam NULL até o primeiro cálculo: o serviço preenche na primeira
+consulta da fazenda e a cada medição ou cadastro.
+"""
+from migrations import adicionar_coluna
+
+
+def upgrade(conn):
+    adicionar_coluna(conn, 'piquetes', 'capacidade_ua_dias', 'capacidade_ua_dias REAL')
+    adicionar_coluna(conn, 'piquetes', 'capacidade_atualizada_em', 'capacidade_atualizada_em TEXT')
@@ -0,0 +1,25 @@
+"""
+011 - Um alerta não lido por (fazenda, lote, tipo), garantido pelo banco.
+
+Índice único parcial (WHERE lido = 0): a geração de alertas vira um único
+INSERT OR IGNORE ... SELECT (database._gerar_alertas) e o banco descarta o
+que já está pendente, sem pré-consulta. Substitui idx_alertas_pendentes
+(004), que cobria as mesmas colunas. Duplicados antigos ficam só com o mais
+recente pendente; os demais são marcados como lidos (o histórico fica).
+alertas.lote_id vem de 003; alertas sem lote (NULL) não conflitam entre si.
+"""
+
+
+def upgrade(conn):
+    conn.execute('''
+        UPDATE alertas SET lido = 1
+        WHERE lido = 0 AND lote_id IS NOT NULL
+          AND id NOT IN (SELECT MAX(id) FROM alertas
+                         WHERE lido = 0 AND lote_id IS NOT NULL
+                         GROUP BY fazenda_id, lote_id, tipo)
+    ''')
+    conn.execute('DROP INDEX IF EXISTS idx_alertas_pendentes')
+    conn.execute('''
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_alertas_pendentes_unico
+        ON alertas (fazenda_id, lote_id, tipo) WHERE lido = 0
+    ''')
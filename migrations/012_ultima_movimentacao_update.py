@@ -0,0 +1,41 @@
+"""
+012 - Gatilho de UPDATE para as colunas de última movimentação (008).
+
+Os gatilhos de 008 só cobrem INSERT e DELETE em movimentacoes; corrigir a
+data ou os piquetes de uma movimentação deixava ultima_entrada/ultima_saida/
+ultima_mov desatualizadas. Este gatilho recalcula os piquetes de antes e de
+depois da alteração (como o de DELETE) e as colunas são refeitas do histórico,
+para desfazer o que já tenha ficado para trás.
+"""
+
+
+def upgrade(conn):
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_movimentacoes_ultima_update
+        AFTER UPDATE OF data_movimentacao, piquete_origem_id, piquete_destino_id ON movimentacoes
+        BEGIN
+            UPDATE piquetes SET
+                ultima_entrada = (SELECT MAX(data_movimentacao) FROM movimentacoes
+                                  WHERE piquete_destino_id = piquetes.id),
+                ultima_saida = (SELECT MAX(data_movimentacao) FROM movimentacoes
+                                WHERE piquete_origem_id = piquetes.id)
+            WHERE id IN (OLD.piquete_origem_id, OLD.piquete_destino_id,
+                         NEW.piquete_origem_id, NEW.piquete_destino_id);
+            UPDATE piquetes
+            SET ultima_mov = MAX(COALESCE(ultima_entrada, ultima_saida), COALESCE(ultima_saida, ultima_entrada))
+            WHERE id IN (OLD.piquete_origem_id, OLD.piquete_destino_id,
+                         NEW.piquete_origem_id, NEW.piquete_destino_id);
+        END
+    ''')
+
+    conn.execute('''
+        UPDATE piquetes SET
+            ultima_entrada = (SELECT MAX(data_movimentacao) FROM movimentacoes
+                              WHERE piquete_destino_id = piquetes.id),
+            ultima_saida = (SELECT MAX(data_movimentacao) FROM movimentacoes
+                            WHERE piquete_origem_id = piquetes.id)
+    ''')
+    conn.execute('''
+        UPDATE piquetes
+        SET ultima_mov = MAX(COALESCE(ultima_entrada, ultima_saida), COALESCE(ultima_saida, ultima_entrada))
+    ''')
@@ -0,0 +1,63 @@
+"""
+013 - Geração por fazenda mantida pelo banco (fazenda_geracoes).
+
+O plano de rotação (planejamento_service) e o índice de sugestão
+(sugestao_service) ficam em memória por fazenda; invalidar_plano só avisa o
+próprio processo. Com vários workers (ou SQL direto, fora de database.py),
+os outros seguiam com o cache velho. Estes gatilhos somam 1 em
+fazenda_geracoes a cada alteração que muda o plano ou a sugestão:
+  - piquetes e lotes: INSERT, DELETE e UPDATE das colunas que os dois leem
+    (status_calculado, capacidade_*, updated_at e afins ficam de fora);
+  - movimentacoes entram pelos gatilhos de 008/012, que gravam piquetes.ultima_mov;
+  - fazendas: coordenadas da sede, modo de clima e ativo;
+  - capins: a linha fazenda_id = 0 vale para todas as fazendas.
+Quem usa o cache confere a geração (uma leitura pela chave primária).
+"""
+
+COLUNAS_PIQUETES = (
+    'fazenda_id', 'nome', 'area', 'capim', 'geometria', 'estado', 'altura_atual', 'altura_real_medida',
+    'data_medicao', 'altura_entrada', 'altura_saida', 'dias_descanso_min', 'bloqueado', 'condicao_climatica',
+    'possui_cocho', 'percentual_suplementacao', 'ativo', 'ultima_mov',
+)
+COLUNAS_LOTES = (
+    'fazenda_id', 'nome', 'categoria', 'quantidade', 'peso_medio', 'consumo_base', 'piquete_atual_id',
+    'data_entrada', 'ativo', 'dias_tecnicos', 'data_saida_prevista',
+)
+COLUNAS_FAZENDAS = ('latitude_sede', 'longitude_sede', 'clima_modo', 'condicao_climatica_manual', 'ativo')
+
+_SOMAR = '''
+            INSERT INTO fazenda_geracoes (fazenda_id, geracao) SELECT {0}, 1 WHERE {0} IS NOT NULL{1}
+            ON CONFLICT(fazenda_id) DO UPDATE SET geracao = geracao + 1;'''
+
+
+def _gatilho(conn, nome, evento, tabela, fazenda, mudou_de_fazenda=False):
+    corpo = _SOMAR.format(fazenda, '')
+    if mudou_de_fazenda:
+        # Registro trocado de fazenda: a antiga também muda
+        corpo += _SOMAR.format('OLD.fazenda_id', ' AND OLD.fazenda_id IS NOT NEW.fazenda_id')
+    conn.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS {nome}
+        AFTER {evento} ON {tabela}
+        BEGIN{corpo}
+        END
+    ''')
+
+
+def upgrade(conn):
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS fazenda_geracoes (
+            fazenda_id INTEGER PRIMARY KEY,
+            geracao INTEGER NOT NULL DEFAULT 0
+        )
+    ''')
+
+    for tabela, colunas in (('piquetes', COLUNAS_PIQUETES), ('lotes', COLUNAS_LOTES)):
+        _gatilho(conn, f'trg_{tabela}_geracao_insert', 'INSERT', tabela, 'NEW.fazenda_id')
+        _gatilho(conn, f'trg_{tabela}_geracao_delete', 'DELETE', tabela, 'OLD.fazenda_id')
+        _gatilho(conn, f'trg_{tabela}_geracao_update', f'UPDATE OF {", ".join(colunas)}', tabela,
+                 'NEW.fazenda_id', mudou_de_fazenda=True)
+
+    _gatilho(conn, 'trg_fazendas_geracao_update', f'UPDATE OF {", ".join(COLUNAS_FAZENDAS)}', 'fazendas',
+             'NEW.id')
+    for evento in ('INSERT', 'UPDATE', 'DELETE'):
+        _gatilho(conn, f'trg_capins_geracao_{evento.lower()}', evento, 'capins', '0')
@@ -0,0 +1,157 @@
+"""
+Migrações de Schema - PastoFlow
+
+Cada arquivo NNN_nome.py desta pasta é uma migração com uma função
+upgrade(conn). As aplicadas ficam registradas na tabela schema_version;
+só as pendentes rodam, em ordem, cada uma em sua própria transação.
+
+Uso:
+    python -m migrations            # aplica as pendentes
+    python -m migrations status     # mostra versão atual x alvo
+
+No boot do app só garantir_schema() roda: uma consulta quando o schema já
+está em dia, nenhum DDL (a não ser com PASTOFLOW_AUTO_MIGRATE=1).
+"""
+import importlib
+import os
+import re
+import sqlite3
+from datetime import datetime
+
+
+# ========== CONFIG ==========
+PASTA = os.path.dirname(os.path.abspath(__file__))
+PADRAO_ARQUIVO = re.compile(r'^(\d{3})_(\w+)\.py$')
+
+
+class SchemaDesatualizado(RuntimeError):
+    """Banco com migrações pendentes e auto-migração desligada."""
+
+
+# ========== DESCOBERTA ==========
+def listar_migracoes():
+    """
+    Lista as migrações da pasta, em ordem de versão.
+
+    Returns:
+        list[tuple]: (versao, nome, modulo)
+    """
+    migracoes = []
+    for arquivo in sorted(os.listdir(PASTA)):
+        m = PADRAO_ARQUIVO.match(arquivo)
+        if m:
+            modulo = importlib.import_module(f'{__name__}.{arquivo[:-3]}')
+            migracoes.append((int(m.group(1)), m.group(2), modulo))
+    return migracoes
+
+
+def versao_alvo():
+    """Maior versão disponível (só olha os nomes dos arquivos)."""
+    versoes = [int(m.group(1)) for m in map(PADRAO_ARQUIVO.match, os.listdir(PASTA)) if m]
+    return max(versoes, default=0)
+
+
+def versao_atual(conn):
+    """Versão aplicada no banco (0 se nunca migrado). Uma única consulta."""
+    try:
+        row = conn.execute('SELECT MAX(versao) FROM schema_version').fetchone()
+    except sqlite3.OperationalError:
+        return 0
+    return row[0] or 0
+
+
+# ========== HELPERS PARA AS MIGRAÇÕES ==========
+def colunas(conn, tabela):
+    """Nomes das colunas de uma tabela."""
+    return {row[1] for row in conn.execute(f'PRAGMA table_info({tabela})')}
+
+
+def adicionar_coluna(conn, tabela, nome, ddl):
+    """ALTER TABLE ... ADD COLUMN só se a coluna ainda não existir."""
+    if nome not in colunas(conn, tabela):
+        conn.execute(f'ALTER TABLE {tabela} ADD COLUMN {ddl}')
+
+
+# ========== EXECUÇÃO ==========
+def migrar(conn=None, ate=None, verbose=False):
+    """
+    Aplica as migrações pendentes.
+
+    Args:
+        conn: Conexão (None usa services.conexao_db.get_db)
+        ate: Versão máxima a aplicar (None = todas)
+        verbose: Imprime cada migração aplicada
+
+    Returns:
+        list[int]: versões aplicadas
+    """
+    propria = conn is None
+    if propria:
+        from services.conexao_db import get_db
+        conn = get_db()
+
+    try:
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS schema_version (
+                versao INTEGER PRIMARY KEY,
+                nome TEXT NOT NULL,
+                aplicada_em TEXT NOT NULL
+            )
+        ''')
+        atual = versao_atual(conn)
+        aplicadas = []
+        for versao, nome, modulo in listar_migracoes():
+            if versao <= atual or (ate is not None and versao > ate):
+                continue
+            if conn.in_transaction:
+                conn.commit()
+            conn.execute('BEGIN')
+            try:
+                modulo.upgrade(conn)
+                conn.execute(
+                    'INSERT INTO schema_version (versao, nome, aplicada_em) VALUES (?, ?, ?)',
+                    (versao, nome, datetime.now().isoformat())
+                )
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+            aplicadas.append(versao)
+            if verbose:
+                print(f"  {versao:03d}_{nome} aplicada")
+        return aplicadas
+    finally:
+        if propria:
+            conn.close()
+
+
+def garantir_schema(auto=None):
+    """
+    Verificação de boot: uma consulta se o schema estiver em dia.
+
+    Args:
+        auto: Aplica as pendentes em vez de falhar
+              (None = variável de ambiente PASTOFLOW_AUTO_MIGRATE=1)
+
+    Raises:
+        SchemaDesatualizado: há migrações pendentes e auto está desligado
+    """
+    from services.conexao_db import get_db
+
+    conn = get_db()
+    try:
+        atual = versao_atual(conn)
+    finally:
+        conn.close()
+    alvo = versao_alvo()
+    if atual >= alvo:
+        return atual
+
+    if auto is None:
+        auto = os.environ.get('PASTOFLOW_AUTO_MIGRATE') == '1'
+    if not auto:
+        raise SchemaDesatualizado(
+            f"Banco na versão {atual}, código espera {alvo}. Rode: python -m migrations"
+        )
+    migrar()
+    return alvo
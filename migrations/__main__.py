@@ -0,0 +1,49 @@
+"""
+CLI de migrações.
+
+    python -m migrations [upgrade|status] [--db caminho] [--ate N]
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import migrations  # noqa: E402
+from services import conexao_db  # noqa: E402
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m migrations', description='Migrações do banco PastoFlow')
+    parser.add_argument('comando', nargs='?', default='upgrade', choices=['upgrade', 'status'])
+    parser.add_argument('--db', help='Caminho do banco (padrão: PASTOFLOW_DB_PATH ou pastagens.db)')
+    parser.add_argument('--ate', type=int, help='Aplica somente até esta versão')
+    args = parser.parse_args(argv)
+
+    if args.db:
+        conexao_db.configurar(db_path=args.db)
+
+    print(f"Banco: {conexao_db.DB_PATH}")
+    conn = conexao_db.get_db()
+    atual = migrations.versao_atual(conn)
+    conn.close()
+    alvo = migrations.versao_alvo()
+
+    if args.comando == 'status':
+        print(f"Versão atual: {atual} | alvo: {alvo}")
+        for versao, nome, _ in migrations.listar_migracoes():
+            marca = 'x' if versao <= atual else ' '
+            print(f"  [{marca}] {versao:03d}_{nome}")
+        return 0 if atual >= alvo else 1
+
+    aplicadas = migrations.migrar(ate=args.ate, verbose=True)
+    if not aplicadas:
+        print(f"Nada a fazer (versão {atual}).")
+    else:
+        print(f"Migrado para a versão {aplicadas[-1]}.")
+    conexao_db.liberar_conexao()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,391 @@
+"""
+Agendador em Segundo Plano (APScheduler)
+Renova o clima_cache das fazendas em modo automático antes de expirar, para
+que as requisições só leiam o cache e nunca esperem a API. Também recalcula,
+fora da requisição, o calendário de rotação das fazendas alteradas, os
+alertas de ocupação técnica de todas as fazendas e, logo após a meia-noite,
+o status dos lotes que muda só com a data.
+
+As varreduras rodam num processo só (trava de arquivo); com vários workers,
+PASTOFLOW_AGENDADOR=0 nos workers e o executor dedicado em paralelo:
+
+    python -m services.agendador_service
+"""
+import logging
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+
+from apscheduler.schedulers.background import BackgroundScheduler
+
+try:
+    import fcntl
+except ImportError:  # Windows: sem flock, processo único
+    fcntl = None
+
+from services import clima_service, conexao_db, planejamento_service
+from services.conexao_db import get_db, liberar_conexao
+
+logger = logging.getLogger(__name__)
+
+
+# ========== CONFIG ==========
+INTERVALO_MINUTOS = 30   # frequência da varredura
+MARGEM_MINUTOS = 60      # renova o que expira dentro desta janela (> INTERVALO: nunca expira)
+MAX_WORKERS = 4          # requisições simultâneas na API
+PURGA_INTERVALO_HORAS = 24  # retenção/compactação do clima_cache
+STATUS_HORA, STATUS_MINUTO = 0, 5  # varredura diária do status dos lotes
+ALERTAS_INTERVALO_MINUTOS = 60     # varredura de alertas (a página da fazenda só lê)
+TRAVA_INTERVALO_MINUTOS = 5        # processos sem a trava tentam assumir as varreduras
+
+_scheduler = None
+_executor = None
+_pendentes = set()  # coordenadas (arredondadas) já na fila do executor
+_planos_pendentes = set()  # fazendas com recálculo do plano na fila
+_lock = threading.Lock()
+_trava = None  # arquivo com flock: este processo roda as varreduras
+
+
+# ========== COORDENADAS ==========
+def coordenadas_fazendas_automaticas() -> list:
+    """
+    Coordenadas distintas (latitude_sede, longitude_sede) das fazendas ativas
+    em modo automático. Duas fazendas na mesma célula do cache contam uma vez.
+    """
+    conn = get_db()
+    cursor = conn.cursor()
+    cursor.execute('''
+        SELECT DISTINCT latitude_sede, longitude_sede
+        FROM fazendas
+        WHERE ativo = 1
+          AND latitude_sede IS NOT NULL AND longitude_sede IS NOT NULL
+          AND LOWER(COALESCE(clima_modo, 'automatico')) != 'manual'
+        ORDER BY latitude_sede, longitude_sede
+    ''')
+    rows = cursor.fetchall()
+    conn.close()
+
+    vistas = set()
+    coordenadas = []
+    for row in rows:
+        chave = clima_service._celula(row['latitude_sede'], row['longitude_sede'])
+        if chave not in vistas:
+            vistas.add(chave)
+            coordenadas.append((row['latitude_sede'], row['longitude_sede']))
+    return coordenadas
+
+
+def _precisa_atualizar(lat: float, lon: float, limite: datetime) -> bool:
+    """True se não há cache válido ou se ele expira antes de `limite`."""
+    cache = clima_service._get_cache(lat, lon)
+    if not cache:
+        return True
+    try:
+        return datetime.fromisoformat(cache['expires_at']) <= limite
+    except Exception:
+        return True
+
+
+def _atualizar_coordenada(lat: float, lon: float) -> bool:
+    """Busca avulsa na API (single-flight com as requisições) e grava no cache."""
+    try:
+        return clima_service._buscar_api_single_flight(lat, lon) is not None
+    finally:
+        with _lock:
+            _pendentes.discard(clima_service._chave(lat, lon))
+        liberar_conexao()
+
+
+def _atualizar_lote(coords: list) -> list:
+    """Uma requisição ao Open-Meteo para o lote inteiro (obter_clima_lote)."""
+    try:
+        return clima_service.obter_clima_lote(coords, tamanho_lote=len(coords))
+    finally:
+        liberar_conexao()
+
+
+# ========== VARREDURA ==========
+def atualizar_clima_fazendas(max_workers: int = None, margem_minutos: int = None,
+                             tamanho_lote: int = None) -> dict:
+    """
+    Renova o cache de todas as coordenadas de fazendas automáticas que estão
+    sem cache ou perto de expirar, em requisições de várias coordenadas.
+
+    Args:
+        max_workers: Requisições simultâneas (padrão MAX_WORKERS)
+        margem_minutos: Janela antes da expiração (padrão MARGEM_MINUTOS)
+        tamanho_lote: Coordenadas por requisição (padrão clima_service.LOTE_MAX_COORDENADAS)
+
+    Returns:
+        Dict com total de coordenadas, atualizadas, falhas e em_dia
+    """
+    margem = MARGEM_MINUTOS if margem_minutos is None else margem_minutos
+    limite = datetime.now(timezone.utc) + timedelta(minutes=margem)
+
+    coordenadas = coordenadas_fazendas_automaticas()
+    vencendo = [c for c in coordenadas if _precisa_atualizar(c[0], c[1], limite)]
+    liberar_conexao()
+
+    resumo = {'coordenadas': len(coordenadas), 'atualizadas': 0, 'falhas': 0,
+              'em_dia': len(coordenadas) - len(vencendo)}
+    if not vencendo:
+        return resumo
+
+    tamanho = tamanho_lote or clima_service.LOTE_MAX_COORDENADAS
+    lotes = [vencendo[i:i + tamanho] for i in range(0, len(vencendo), tamanho)]
+    with ThreadPoolExecutor(max_workers=max_workers or MAX_WORKERS, thread_name_prefix='clima') as pool:
+        for resultados in pool.map(_atualizar_lote, lotes):
+            for real in resultados:
+                resumo['atualizadas' if real else 'falhas'] += 1
+
+    logger.info("Clima pré-buscado: %s", resumo)
+    return resumo
+
+
+def purgar_clima_cache() -> dict:
+    """Job diário: remove coordenadas abandonadas do clima_cache e compacta."""
+    try:
+        resumo = clima_service.purgar_cache()
+    finally:
+        liberar_conexao()
+    logger.info("clima_cache purgado: %s", resumo)
+    return resumo
+
+
+def agendar_coordenada(lat: float, lon: float) -> None:
+    """Enfileira uma busca avulsa (miss em requisição) sem bloquear quem chamou."""
+    chave = clima_service._chave(lat, lon)
+    with _lock:
+        if _executor is None or chave in _pendentes:
+            return
+        _pendentes.add(chave)
+        _executor.submit(_atualizar_coordenada, lat, lon)
+
+
+# ========== STATUS DOS LOTES ==========
+def atualizar_status_diario() -> dict:
+    """Job diário: transições de status por data (ATENCAO -> RETIRAR) em todas as fazendas."""
+    import database
+    try:
+        resumo = database.varrer_status_lotes()
+    finally:
+        liberar_conexao()
+    logger.info("Status dos lotes recalculado: %s", resumo)
+    return resumo
+
+
+# ========== ALERTAS ==========
+def gerar_alertas() -> dict:
+    """Job periódico: alertas de ocupação técnica de todas as fazendas, em lotes."""
+    import database
+    try:
+        resumo = database.varrer_alertas()
+    finally:
+        liberar_conexao()
+    logger.info("Alertas gerados: %s", resumo)
+    return resumo
+
+
+# ========== PLANO DE ROTAÇÃO ==========
+def _replanejar(fazenda_id) -> None:
+    with _lock:
+        _planos_pendentes.discard(fazenda_id)
+    try:
+        planejamento_service.planejar(fazenda_id)
+    except Exception:
+        logger.exception("Falha ao recalcular o plano da fazenda %s", fazenda_id)
+    finally:
+        liberar_conexao()
+
+
+def agendar_replanejamento(fazenda_id) -> None:
+    """Enfileira o recálculo (incremental) do plano de uma fazenda alterada."""
+    with _lock:
+        if _executor is None or fazenda_id in _planos_pendentes:
+            return
+        _planos_pendentes.add(fazenda_id)
+        _executor.submit(_replanejar, fazenda_id)
+
+
+# ========== EXECUÇÃO ÚNICA ==========
+# Clima, purga, alertas e status gravam no mesmo SQLite: com vários workers só
+# o processo que segura a trava (flock num arquivo ao lado do banco) agenda as
+# varreduras; os demais tentam assumir a cada TRAVA_INTERVALO_MINUTOS, caso ele
+# morra. PASTOFLOW_AGENDADOR=0 tira as varreduras dos workers, para rodá-las no
+# executor dedicado (python -m services.agendador_service), que também não
+# depende de chegar a primeira requisição.
+def _caminho_trava() -> str:
+    return conexao_db.DB_PATH + '.agendador.lock'
+
+
+def adquirir_trava() -> bool:
+    """Tenta (sem bloquear) ser o processo das varreduras. Sem fcntl (Windows): processo único."""
+    global _trava
+    if _trava is not None or fcntl is None:
+        return True
+    arquivo = open(_caminho_trava(), 'a')
+    try:
+        fcntl.flock(arquivo, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        arquivo.close()
+        return False
+    _trava = arquivo
+    return True
+
+
+def liberar_trava() -> None:
+    global _trava
+    arquivo, _trava = _trava, None
+    if arquivo is not None:
+        fcntl.flock(arquivo, fcntl.LOCK_UN)
+        arquivo.close()
+
+
+def _varreduras_nos_workers() -> bool:
+    return os.environ.get('PASTOFLOW_AGENDADOR', '1') != '0'
+
+
+# ========== CICLO DE VIDA ==========
+def _agendar_varreduras(scheduler, intervalo_minutos: int = None) -> None:
+    scheduler.add_job(
+        atualizar_clima_fazendas,
+        'interval',
+        minutes=intervalo_minutos or INTERVALO_MINUTOS,
+        id='prefetch_clima',
+        next_run_time=datetime.now(),
+        max_instances=1,
+        coalesce=True,
+    )
+    scheduler.add_job(
+        purgar_clima_cache,
+        'interval',
+        hours=PURGA_INTERVALO_HORAS,
+        id='purga_clima_cache',
+        max_instances=1,
+        coalesce=True,
+    )
+    scheduler.add_job(
+        gerar_alertas,
+        'interval',
+        minutes=ALERTAS_INTERVALO_MINUTOS,
+        id='alertas',
+        next_run_time=datetime.now(),
+        max_instances=1,
+        coalesce=True,
+    )
+    scheduler.add_job(
+        atualizar_status_diario,
+        'cron',
+        hour=STATUS_HORA,
+        minute=STATUS_MINUTO,
+        id='status_lotes_diario',
+        max_instances=1,
+        coalesce=True,
+    )
+
+
+def _assumir_varreduras(intervalo_minutos: int = None) -> None:
+    """Job dos processos sem a trava: agenda as varreduras se o dono dela saiu."""
+    with _lock:
+        scheduler = _scheduler
+    if scheduler is None or not adquirir_trava():
+        return
+    scheduler.remove_job('assumir_varreduras')
+    _agendar_varreduras(scheduler, intervalo_minutos)
+    logger.info("Varreduras assumidas pelo processo %s", os.getpid())
+
+
+def iniciar(intervalo_minutos: int = None, varreduras: bool = None) -> None:
+    """
+    Inicia o agendador (idempotente). A busca avulsa de clima e o recálculo do
+    plano rodam em todo processo; as varreduras só no que tem a trava (a
+    primeira roda imediatamente e daí em diante as requisições só leem o cache).
+
+    Args:
+        intervalo_minutos: Frequência da pré-busca de clima (padrão INTERVALO_MINUTOS)
+        varreduras: True agenda sem disputar a trava (executor dedicado, que já a tem);
+            None segue PASTOFLOW_AGENDADOR e a trava
+    """
+    global _scheduler, _executor
+    with _lock:
+        if _scheduler is not None:
+            return
+        _executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix='clima-avulso')
+        _scheduler = BackgroundScheduler(daemon=True)
+        if varreduras is None:
+            varreduras = _varreduras_nos_workers() and adquirir_trava()
+            if not varreduras and _varreduras_nos_workers():
+                _scheduler.add_job(
+                    _assumir_varreduras,
+                    'interval',
+                    minutes=TRAVA_INTERVALO_MINUTOS,
+                    args=(intervalo_minutos,),
+                    id='assumir_varreduras',
+                    max_instances=1,
+                    coalesce=True,
+                )
+        if varreduras:
+            _agendar_varreduras(_scheduler, intervalo_minutos)
+        _scheduler.start()
+    clima_service.definir_busca_em_segundo_plano(agendar_coordenada)
+    planejamento_service.definir_replanejamento_em_segundo_plano(agendar_replanejamento)
+
+
+def parar() -> None:
+    """Para o agendador e volta as requisições a buscar na API quando falta cache."""
+    global _scheduler, _executor
+    clima_service.definir_busca_em_segundo_plano(None)
+    planejamento_service.definir_replanejamento_em_segundo_plano(None)
+    with _lock:
+        scheduler, executor = _scheduler, _executor
+        _scheduler = _executor = None
+        _pendentes.clear()
+        _planos_pendentes.clear()
+    if scheduler is not None:
+        scheduler.shutdown(wait=False)
+    if executor is not None:
+        executor.shutdown(wait=True)
+    liberar_trava()
+
+
+def em_execucao() -> bool:
+    return _scheduler is not None
+
+
+def init_app(app):
+    """
+    Inicia o agendador na primeira requisição do processo (o processo pai do
+    reloader do Flask nunca atende requisições, então não duplica a varredura).
+    Desligado com PASTOFLOW_PREFETCH_CLIMA=0.
+    """
+    if os.environ.get('PASTOFLOW_PREFETCH_CLIMA', '1') == '0':
+        return
+
+    @app.before_request
+    def _iniciar_agendador():
+        if _scheduler is None:
+            iniciar()
+
+
+def main() -> int:
+    """Executor dedicado das varreduras (workers com PASTOFLOW_AGENDADOR=0)."""
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(name)s %(message)s')
+    if not adquirir_trava():
+        print(f"Outro processo já roda as varreduras (trava em {_caminho_trava()})")
+        return 1
+    iniciar(varreduras=True)
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        parar()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
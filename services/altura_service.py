@@ -0,0 +1,237 @@
+"""
+Estimativa de Altura em Lote
+Mesmo resultado de database.calcular_altura_estimada, piquete a piquete, mas
+calculado por colunas (NumPy) para todos os piquetes de uma ou mais fazendas.
+"""
+from datetime import datetime
+
+import numpy as np
+
+from simular_data import now as data_teste_now
+from services import capim_service
+from services.clima_service import calcular_fator_climatico, resolver_clima_piquete
+from services.clima_diario_service import fator_integrado_lote
+from services.manejo_service import (
+    CATEGORIAS_BOVINOS,
+    FATOR_CONVERSAO_UA,
+    TAXA_MAXIMA_LOTACAO,
+    ManejoError,
+)
+
+
+# ========== ORIGEM DO VALOR ==========
+# calcular_altura_estimada às vezes devolve o próprio valor de entrada (via
+# max/min ou round de um int), preservando o tipo; o lote faz o mesmo.
+_CALCULADO = 0
+_SAIDA = 1           # round(altura_saida, 1)
+_BASE = 2            # round(altura_base, 1)
+_SAIDA_CRUA = 3      # altura_saida sem arredondar (max do modelo linear)
+_REAL = 4            # altura_real_medida sem alteração
+
+
+# ========== HELPERS ==========
+def _arredondar(valores, casas):
+    """np.round com o mesmo desempate do round() do Python usado no caminho escalar."""
+    resultado = np.round(valores, casas)
+    escala = valores * 10.0 ** casas
+    suspeitos = np.flatnonzero(np.abs(escala - np.floor(escala) - 0.5) < 1e-6)
+    for i in suspeitos:
+        resultado[i] = round(float(valores[i]), casas)
+    return resultado
+
+
+def _dias_desde(datas, agora):
+    """(agora - data).days por linha; 0 se vazia ou inválida (igual ao escalar)."""
+    memo = {}
+    dias = np.zeros(len(datas), dtype=np.int64)
+    for i, data in enumerate(datas):
+        if not data:
+            continue
+        if data not in memo:
+            try:
+                data_dt = datetime.fromisoformat(data.replace('Z', '+00:00').replace('+00:00', ''))
+                memo[data] = (agora - data_dt).days
+            except Exception:
+                memo[data] = 0
+        dias[i] = memo[data]
+    return dias
+
+
+def _por_chave(valores, funcao):
+    """Aplica funcao uma vez por valor distinto (capim, condição climática...)."""
+    memo = {}
+    saida = np.empty(len(valores), dtype=np.float64)
+    for i, valor in enumerate(valores):
+        if valor not in memo:
+            memo[valor] = funcao(valor)
+        saida[i] = memo[valor]
+    return saida
+
+
+# ========== API ==========
+def dias_descanso_medicao(piquetes, agora=None) -> np.ndarray:
+    """
+    dias_descanso das estimativas: dias desde data_medicao (0 sem medição ou
+    data inválida), não a coluna gravada. Listagens e simulação usam a mesma regra.
+    """
+    return _dias_desde([p.get('data_medicao') for p in piquetes], agora or data_teste_now())
+
+
+def calcular_alturas_estimadas(piquetes, categorias=None, pesos_medios=None, consumos_base=None,
+                               cache_clima=None):
+    """
+    Versão em lote de calcular_altura_estimada.
+
+    Args:
+        piquetes: Lista de dicts de piquete (mesmas chaves do caminho escalar)
+        categorias: Lista opcional, alinhada com piquetes, de categorias do lote
+        pesos_medios: Lista opcional de pesos médios do lote
+        consumos_base: Lista opcional de consumos base personalizados
+        cache_clima: Dict compartilhado para resolver o clima de cada fazenda uma vez
+
+    Returns:
+        list[tuple]: (altura, fonte) por piquete, na mesma ordem da entrada
+
+    Raises:
+        ManejoError: Piquete em descanso com dias de descanso negativos
+            (mesmo erro do caminho escalar)
+    """
+    n = len(piquetes)
+    if n == 0:
+        return []
+    categorias = categorias or [None] * n
+    pesos_medios = pesos_medios or [None] * n
+    consumos_base = consumos_base or [None] * n
+    if cache_clima is None:
+        cache_clima = {}
+    agora = data_teste_now()
+
+    # ========== COLUNAS ==========
+    real_obj = [p.get('altura_real_medida') for p in piquetes]
+    saida_obj = [p.get('altura_saida', 15) or 15 for p in piquetes]
+    entrada_obj = [p.get('altura_entrada', 25) or 25 for p in piquetes]
+    registro_capins = capim_service.registro()
+    capim_id = registro_capins.indices([p.get('capim') for p in piquetes])
+
+    tem_real = np.array([v is not None for v in real_obj])
+    real = np.array([np.nan if v is None else v for v in real_obj], dtype=np.float64)
+    saida = np.array(saida_obj, dtype=np.float64)
+    entrada = np.array(entrada_obj, dtype=np.float64)
+    ocupado = np.array([p.get('estado') == 'ocupado' for p in piquetes])
+    dias_descanso = np.array([p.get('dias_descanso', 0) or 0 for p in piquetes], dtype=np.int64)
+    dias_ocupacao = np.array([p.get('dias_ocupacao', 0) or 0 for p in piquetes], dtype=np.int64)
+    quantidade = np.array([p.get('animais_no_piquete', 0) or 0 for p in piquetes], dtype=np.float64)
+    area = np.array([p.get('area', 0) or 0 for p in piquetes], dtype=np.float64)
+    percentual = np.array([p.get('percentual_suplementacao') or 0 for p in piquetes], dtype=np.float64)
+    cocho = np.array([bool(p.get('possui_cocho') or 0) for p in piquetes])
+    dias_medicao = _dias_desde([p.get('data_medicao') for p in piquetes], agora)
+
+    recalcular = tem_real & (dias_medicao > 0)
+    em_descanso = ~tem_real | recalcular
+    em_descanso &= ~ocupado
+    em_ocupacao = (~tem_real | recalcular) & ocupado
+
+    valores = np.full(n, np.nan)
+    origem = np.full(n, _CALCULADO, dtype=np.int8)
+    origem[tem_real & ~recalcular] = _REAL
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        # ========== OCUPAÇÃO ==========
+        if em_ocupacao.any():
+            idx = np.flatnonzero(em_ocupacao)
+            base = np.where(recalcular, real, entrada)[idx]
+            dias = np.where(recalcular, dias_medicao, dias_ocupacao)[idx]
+            s = saida[idx]
+
+            consumo = registro_capins.consumo[capim_id[idx]]
+            for k, i in enumerate(idx):
+                if consumos_base[i] is not None:
+                    consumo[k] = consumos_base[i]
+            suplementa = cocho[idx] & (percentual[idx] > 0)
+            consumo = np.where(suplementa, consumo * (1 - np.minimum(percentual[idx], 0.7)), consumo)
+
+            # Modelo com lotação e categoria (calcular_altura_ocupacao)
+            qtd = quantidade[idx]
+            a = area[idx]
+            modelo = (qtd > 0) & (a > 0) & (base >= s) & (dias >= 0)
+
+            peso_medio = []
+            fator_categoria = []
+            for i in idx:
+                categoria = categorias[i]
+                peso_manual = pesos_medios[i]
+                dados = CATEGORIAS_BOVINOS.get(categoria)
+                peso = peso_manual if peso_manual else (dados['peso_medio'] if dados else None)
+                peso_medio.append(np.nan if peso is None else peso)
+                if not peso_manual and categoria:
+                    fator_categoria.append(dados['consumo_relativo'] if dados else 1.0)
+                else:
+                    fator_categoria.append(1.0)
+            peso_total = qtd * np.array(peso_medio, dtype=np.float64)
+            peso_total = np.where(np.isnan(peso_total), 0, peso_total)
+            ua_total = np.where(peso_total > 0, _arredondar(peso_total / FATOR_CONVERSAO_UA, 2), 0)
+            ua_ha = np.minimum(ua_total / a, TAXA_MAXIMA_LOTACAO)
+            consumo_real = consumo * (ua_ha / 2) * np.array(fator_categoria)
+            estimada = base - consumo_real * dias
+
+            usa_saida = s > estimada
+            candidata = np.where(usa_saida, s, estimada)
+            usa_base = base < candidata
+            origem_modelo = np.where(usa_base, _BASE, np.where(usa_saida, _SAIDA, _CALCULADO))
+            valor_modelo = _arredondar(np.where(usa_base, base, candidata), 1)
+
+            # Fallback linear
+            linear = _arredondar(base - dias * consumo, 1)
+            usa_saida_linear = ~(linear > s)
+            origem_linear = np.where(usa_saida_linear, _SAIDA_CRUA, _CALCULADO)
+
+            valores[idx] = np.where(modelo, valor_modelo, linear)
+            origem[idx] = np.where(modelo, origem_modelo, origem_linear)
+
+        # ========== DESCANSO ==========
+        if em_descanso.any():
+            idx = np.flatnonzero(em_descanso)
+            base = np.where(recalcular, real, saida)[idx]
+            dias = np.where(recalcular, dias_medicao, dias_descanso)[idx]
+            if (dias < 0).any():
+                negativo = int(dias[dias < 0][0])
+                raise ManejoError(f"Dias de descanso não pode ser negativo: {negativo}")
+
+            climas = [resolver_clima_piquete(piquetes[i], cache_clima) for i in idx]
+            crescimento = registro_capins.crescimento[capim_id[idx]]
+            fator = _por_chave([c[0] for c in climas], calcular_fator_climatico)
+            crescimento_real = crescimento * fator
+            estimada = base + dias * crescimento_real
+
+            # Série diária (clima automático): soma dos fatores reais até hoje
+            com_celula = np.array([k for k, c in enumerate(climas) if c[2] is not None and dias[k] > 0],
+                                  dtype=np.int64)
+            if len(com_celula):
+                hoje = agora.date()
+                soma, com_dado = fator_integrado_lote(
+                    [climas[k][2] for k in com_celula],
+                    hoje.toordinal() - dias[com_celula],
+                    dias[com_celula],
+                    fator[com_celula],
+                    hoje,
+                )
+                usa = com_celula[com_dado > 0]
+                estimada[usa] = base[usa] + crescimento[usa] * soma[com_dado > 0]
+            e = entrada[idx]
+            limite = np.where(e != 0, e * 1.5, base * 2.5)
+            valores[idx] = _arredondar(np.where(limite < estimada, limite, estimada), 1)
+            origem[idx] = np.where(dias == 0, _SAIDA, _CALCULADO)
+
+    # ========== MONTAGEM ==========
+    alturas = valores.tolist()
+    for i in np.flatnonzero(origem != _CALCULADO).tolist():
+        tipo = origem[i]
+        if tipo == _REAL:
+            alturas[i] = real_obj[i]
+        elif tipo == _SAIDA_CRUA:
+            alturas[i] = saida_obj[i]
+        elif tipo == _SAIDA:
+            alturas[i] = round(saida_obj[i], 1)
+        else:
+            alturas[i] = round(real_obj[i] if recalcular[i] else entrada_obj[i], 1)
+    return [(altura, 'real' if tipo == _REAL else 'estimada') for altura, tipo in zip(alturas, origem.tolist())]
@@ -0,0 +1,330 @@
+# -*- coding: utf-8 -*-
+"""
+Atribuição Lote -> Piquete (fazenda inteira)
+Em vez de sugerir piquetes para um lote por vez (sugerir_proximo_piquete),
+resolve de uma vez o emparelhamento de custo mínimo entre os lotes que vão
+mudar e os piquetes livres: nenhum piquete recebe dois lotes.
+
+O custo de cada par soma altura (falta/sobra em relação à altura de entrada),
+descanso (dias que faltam para o mínimo), capacidade (UA do lote x UA
+suportada pela área) e distância da origem do lote até o piquete.
+"""
+import json
+from datetime import datetime
+
+import numpy as np
+
+from simular_data import now as data_teste_now
+from services.conexao_db import get_db
+from services.altura_service import calcular_alturas_estimadas
+from services.manejo_service import (
+    TAXA_MAXIMA_LOTACAO,
+    calcular_peso_total_categoria,
+    calcular_ua_total,
+)
+
+
+# ========== CONFIG ==========
+# Pesos do custo (unidade comum: pontos; menor é melhor)
+PESO_FALTA_ALTURA = 10.0      # por cm abaixo da altura de entrada
+PESO_SOBRA_ALTURA = 1.0       # desconto por cm acima da entrada...
+SOBRA_MAXIMA_CM = 15.0        # ...até este limite
+PESO_FALTA_DESCANSO = 2.0     # por dia que falta para dias_descanso_min
+PESO_EXCESSO_LOTACAO = 100.0  # por 100% de UA acima da capacidade
+PESO_OCIOSIDADE = 10.0        # por 100% de capacidade sem uso
+PESO_DISTANCIA_KM = 5.0       # por km da origem do lote até o piquete
+UA_HA_REFERENCIA = 2.0        # lotação de referência (mesma do consumo base por capim)
+DIAS_DESCANSO_PADRAO = 30
+ALTURA_ENTRADA_PADRAO = 25
+CUSTO_INVIAVEL = 1e9          # par proibido (UA/ha acima de TAXA_MAXIMA_LOTACAO)
+RAIO_TERRA_KM = 6371.0
+
+
+# ========== GEOMETRIA ==========
+def _centroide(geometria):
+    """(lat, lon) médio do anel externo do polígono GeoJSON; None se não der para ler."""
+    if not geometria:
+        return None
+    try:
+        geo = json.loads(geometria) if isinstance(geometria, str) else geometria
+        geo = geo.get('geometry') or geo
+        anel = geo['coordinates'][0]
+        if len(anel) > 1 and anel[0] == anel[-1]:
+            anel = anel[:-1]
+        lons = [float(c[0]) for c in anel]
+        lats = [float(c[1]) for c in anel]
+        return sum(lats) / len(lats), sum(lons) / len(lons)
+    except (ValueError, TypeError, KeyError, IndexError, AttributeError, ZeroDivisionError):
+        return None
+
+
+def _distancias_km(lat1, lon1, lat2, lon2):
+    """Haversine entre cada origem (n) e cada destino (m): matriz n x m; NaN vira 0."""
+    lat1, lon1 = np.radians(lat1)[:, None], np.radians(lon1)[:, None]
+    lat2, lon2 = np.radians(lat2)[None, :], np.radians(lon2)[None, :]
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    distancias = 2 * RAIO_TERRA_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+    return np.nan_to_num(distancias, nan=0.0)
+
+
+# ========== EMPARELHAMENTO ==========
+def resolver_atribuicao(custos) -> np.ndarray:
+    """
+    Emparelhamento de custo mínimo (algoritmo húngaro por caminhos mínimos
+    aumentantes, O(n² m) com as m colunas vetorizadas).
+
+    Args:
+        custos: Matriz n x m (linhas = lotes, colunas = piquetes)
+
+    Returns:
+        np.ndarray: coluna atribuída a cada linha (-1 quando há mais linhas que colunas)
+    """
+    custos = np.asarray(custos, dtype=np.float64)
+    n, m = custos.shape
+    if n == 0 or m == 0:
+        return np.full(n, -1, dtype=np.int64)
+    if n > m:
+        linha_da_coluna = resolver_atribuicao(custos.T)
+        coluna_da_linha = np.full(n, -1, dtype=np.int64)
+        coluna_da_linha[linha_da_coluna] = np.arange(m)
+        return coluna_da_linha
+
+    # Existe solução ótima usando só as n colunas mais baratas de cada linha
+    colunas = np.arange(m)
+    if m > n:
+        colunas = np.unique(np.argpartition(custos, n - 1, axis=1)[:, :n])
+        custos = custos[:, colunas]
+        m = len(colunas)
+
+    # Índices 1-based; coluna 0 é a fictícia que inicia cada caminho
+    a = np.zeros((n + 1, m + 1))
+    a[1:, 1:] = custos
+    u = np.zeros(n + 1)
+    v = np.zeros(m + 1)
+    dono = np.zeros(m + 1, dtype=np.int64)     # linha na coluna j (0 = livre)
+    caminho = np.zeros(m + 1, dtype=np.int64)
+    for i in range(1, n + 1):
+        dono[0] = i
+        j0 = 0
+        minimo = np.full(m + 1, np.inf)
+        usada = np.zeros(m + 1, dtype=bool)
+        while True:
+            usada[j0] = True
+            i0 = dono[j0]
+            reduzido = a[i0] - u[i0] - v
+            livres = ~usada
+            melhora = livres & (reduzido < minimo)
+            minimo[melhora] = reduzido[melhora]
+            caminho[melhora] = j0
+            candidatos = np.where(livres, minimo, np.inf)
+            j1 = int(np.argmin(candidatos))
+            delta = candidatos[j1]
+            u[dono[usada]] += delta
+            v[usada] -= delta
+            minimo[livres] -= delta
+            j0 = j1
+            if dono[j0] == 0:
+                break
+        while j0:
+            j1 = caminho[j0]
+            dono[j0] = dono[j1]
+            j0 = j1
+
+    coluna_da_linha = np.full(n, -1, dtype=np.int64)
+    ocupadas = np.nonzero(dono[1:])[0]
+    coluna_da_linha[dono[1:][ocupadas] - 1] = colunas[ocupadas]
+    return coluna_da_linha
+
+
+# ========== DADOS ==========
+def _lotes_para_atribuir(cursor, fazenda_id, lote_ids=None):
+    """Lotes informados, ou os sem piquete / com status RETIRAR."""
+    cursor.execute('''
+        SELECT l.id, l.nome, l.categoria, l.quantidade, l.peso_medio, l.piquete_atual_id,
+               l.status_calculado, p.geometria AS origem_geometria
+        FROM lotes l
+        LEFT JOIN piquetes p ON p.id = l.piquete_atual_id
+        WHERE l.fazenda_id = ? AND l.ativo = 1
+        ORDER BY l.nome, l.id
+    ''', (fazenda_id,))
+    lotes = [dict(r) for r in cursor.fetchall()]
+    if lote_ids is not None:
+        ids = set(lote_ids)
+        return [l for l in lotes if l['id'] in ids]
+    return [l for l in lotes if l['piquete_atual_id'] is None or l['status_calculado'] == 'RETIRAR']
+
+
+def _piquetes_livres(cursor, fazenda_id):
+    """Piquetes ativos, desbloqueados, com altura e sem lote, com a última movimentação."""
+    cursor.execute('''
+        SELECT DISTINCT piquete_atual_id
+        FROM lotes
+        WHERE ativo = 1
+          AND piquete_atual_id IN (SELECT id FROM piquetes WHERE fazenda_id = ? AND ativo = 1)
+    ''', (fazenda_id,))
+    ocupados = {r['piquete_atual_id'] for r in cursor.fetchall()}
+
+    cursor.execute('''
+        SELECT p.*
+        FROM piquetes p
+        WHERE p.fazenda_id = ? AND p.ativo = 1 AND p.bloqueado = 0
+          AND (p.altura_real_medida IS NOT NULL OR p.altura_atual IS NOT NULL)
+        ORDER BY p.nome, p.id
+    ''', (fazenda_id,))
+    return [dict(r) for r in cursor.fetchall() if r['id'] not in ocupados]
+
+
+def _dias_desde(data_iso, agora):
+    """Dias inteiros desde data_iso (mesma leitura de sugerir_proximo_piquete); None se inválida."""
+    try:
+        data = datetime.fromisoformat(data_iso.replace('Z', '+00:00').replace('+00:00', ''))
+    except (AttributeError, ValueError):
+        return None
+    return (agora - data).days
+
+
+# ========== CUSTOS ==========
+def _matriz_custos(lotes, piquetes, sede=None):
+    """
+    Componentes do custo, vetorizados.
+
+    Returns:
+        tuple: (custo total n x m, dict de componentes, dict de atributos por piquete/lote)
+    """
+    agora = data_teste_now()
+    n, m = len(lotes), len(piquetes)
+
+    # Piquetes (m)
+    estimadas = calcular_alturas_estimadas(piquetes)
+    altura = np.array([
+        est if est is not None else (p.get('altura_real_medida') if p.get('altura_real_medida') is not None
+                                     else p.get('altura_atual'))
+        for p, (est, _) in zip(piquetes, estimadas)
+    ], dtype=np.float64)
+    entrada = np.array([p.get('altura_entrada') or ALTURA_ENTRADA_PADRAO for p in piquetes], dtype=np.float64)
+    dias_min = np.array([p.get('dias_descanso_min') or DIAS_DESCANSO_PADRAO for p in piquetes], dtype=np.float64)
+    dias_descanso = np.zeros(m)
+    novo = np.zeros(m, dtype=bool)
+    for j, p in enumerate(piquetes):
+        ultima = p.get('ultima_mov')
+        dias = _dias_desde(ultima, agora)
+        novo[j] = dias is None
+        dias_descanso[j] = dias or 0
+    area = np.array([p.get('area') or 0 for p in piquetes], dtype=np.float64)
+    centros = [_centroide(p.get('geometria')) or (np.nan, np.nan) for p in piquetes]
+
+    # Lotes (n)
+    ua = np.array([
+        calcular_ua_total(calcular_peso_total_categoria(l.get('quantidade') or 0, l.get('categoria'),
+                                                        l.get('peso_medio')))
+        for l in lotes
+    ], dtype=np.float64)
+    origens = [_centroide(l.get('origem_geometria')) or sede or (np.nan, np.nan) for l in lotes]
+
+    # Altura e descanso só dependem do piquete
+    falta_altura = np.maximum(0.0, entrada - altura)
+    sobra_altura = np.clip(altura - entrada, 0.0, SOBRA_MAXIMA_CM)
+    custo_altura = PESO_FALTA_ALTURA * falta_altura - PESO_SOBRA_ALTURA * sobra_altura
+    custo_descanso = np.where(novo, 0.0, PESO_FALTA_DESCANSO * np.maximum(0.0, dias_min - dias_descanso))
+
+    # Capacidade: UA do lote x UA que a área suporta
+    capacidade = area * UA_HA_REFERENCIA
+    with np.errstate(divide='ignore', invalid='ignore'):
+        razao = np.where(capacidade[None, :] > 0, ua[:, None] / capacidade[None, :], np.inf)
+        lotacao = np.where(area[None, :] > 0, ua[:, None] / area[None, :], np.inf)
+    sem_peso = (ua == 0)[:, None]
+    custo_capacidade = np.where(
+        sem_peso, 0.0,
+        PESO_EXCESSO_LOTACAO * np.maximum(0.0, razao - 1) + PESO_OCIOSIDADE * np.maximum(0.0, 1 - razao)
+    )
+    inviavel = ~sem_peso & (lotacao > TAXA_MAXIMA_LOTACAO)
+    custo_capacidade = np.where(inviavel, 0.0, custo_capacidade)
+
+    distancia = _distancias_km(
+        np.array([o[0] for o in origens], dtype=np.float64), np.array([o[1] for o in origens], dtype=np.float64),
+        np.array([c[0] for c in centros], dtype=np.float64), np.array([c[1] for c in centros], dtype=np.float64),
+    ) if n and m else np.zeros((n, m))
+    custo_distancia = PESO_DISTANCIA_KM * distancia
+
+    total = custo_altura[None, :] + custo_descanso[None, :] + custo_capacidade + custo_distancia
+    total = np.where(inviavel, CUSTO_INVIAVEL, total)
+
+    componentes = {
+        'altura': np.broadcast_to(custo_altura, (n, m)),
+        'descanso': np.broadcast_to(custo_descanso, (n, m)),
+        'capacidade': custo_capacidade,
+        'distancia': custo_distancia,
+    }
+    atributos = {'altura': altura, 'entrada': entrada, 'dias_descanso': dias_descanso, 'novo': novo,
+                 'capacidade': capacidade, 'ua': ua, 'distancia': distancia}
+    return total, componentes, atributos
+
+
+# ========== API ==========
+def atribuir_lotes(fazenda_id, lote_ids=None):
+    """
+    Distribui os lotes entre os piquetes livres da fazenda pelo menor custo total.
+
+    Args:
+        fazenda_id: Fazenda
+        lote_ids: Lotes a alocar (padrão: sem piquete ou com status RETIRAR)
+
+    Returns:
+        Dict com atribuicoes (uma por lote alocado, com custo por componente),
+        sem_piquete (lotes que sobraram ou só tinham pares inviáveis),
+        piquetes_livres e custo_total
+    """
+    conn = get_db()
+    cursor = conn.cursor()
+    lotes = _lotes_para_atribuir(cursor, fazenda_id, lote_ids)
+    piquetes = _piquetes_livres(cursor, fazenda_id) if lotes else []
+    cursor.execute('SELECT latitude_sede, longitude_sede FROM fazendas WHERE id = ?', (fazenda_id,))
+    row = cursor.fetchone()
+    conn.close()
+
+    sede = None
+    if row and row['latitude_sede'] is not None and row['longitude_sede'] is not None:
+        sede = (row['latitude_sede'], row['longitude_sede'])
+
+    resultado = {'atribuicoes': [], 'sem_piquete': [], 'piquetes_livres': len(piquetes), 'custo_total': 0.0}
+    if not lotes:
+        return resultado
+
+    total, componentes, atributos = _matriz_custos(lotes, piquetes, sede)
+    # Lote sem nenhum par viável não disputa piquete no emparelhamento
+    viavel = (total < CUSTO_INVIAVEL).any(axis=1)
+    colunas = np.full(len(lotes), -1, dtype=np.int64)
+    colunas[viavel] = resolver_atribuicao(total[viavel])
+
+    for i, lote in enumerate(lotes):
+        j = int(colunas[i])
+        if j < 0 or total[i, j] >= CUSTO_INVIAVEL:
+            resultado['sem_piquete'].append({
+                'lote_id': lote['id'],
+                'lote_nome': lote['nome'],
+                'motivo': 'Sem piquete livre' if viavel[i] or not piquetes
+                          else 'Lotação acima do limite em todos os piquetes livres',
+            })
+            continue
+        piquete = piquetes[j]
+        custo = float(total[i, j])
+        resultado['custo_total'] += custo
+        resultado['atribuicoes'].append({
+            'lote_id': lote['id'],
+            'lote_nome': lote['nome'],
+            'ua': float(atributos['ua'][i]),
+            'piquete_id': piquete['id'],
+            'piquete_nome': piquete['nome'],
+            'capim': piquete.get('capim'),
+            'altura': round(float(atributos['altura'][j]), 1),
+            'altura_entrada': float(atributos['entrada'][j]),
+            'dias_descanso': int(atributos['dias_descanso'][j]),
+            'piquete_novo': bool(atributos['novo'][j]),
+            'capacidade_ua': round(float(atributos['capacidade'][j]), 2),
+            'distancia_km': round(float(atributos['distancia'][i, j]), 2),
+            'custo': round(custo, 2),
+            'custos': {nome: round(float(valores[i, j]), 2) for nome, valores in componentes.items()},
+        })
+
+    resultado['custo_total'] = round(resultado['custo_total'], 2)
+    return resultado
@@ -0,0 +1,196 @@
+# -*- coding: utf-8 -*-
+"""
+Capacidade de Suporte dos Piquetes (vetorizada)
+Quanto cada piquete aguenta até a altura de saída, para a fazenda inteira de
+uma vez: o estoque de pasto em UA·dia (capacidade_ua_dias) vem da altura
+atual, altura_saida, área, consumo base do capim e suplementação, com o mesmo
+consumo de mover_lote (consumo base em 2 UA/ha, proporcional à lotação).
+
+Para D dias de ocupação a UA sustentável é capacidade_ua_dias / D (limitada a
+TAXA_MAXIMA_LOTACAO por hectare) e as cabeças saem do peso da categoria. O
+estoque fica gravado em piquetes (migração 010) e é refeito a cada medição ou
+cadastro, então validar uma movimentação é só ler a coluna.
+"""
+from datetime import datetime
+
+import numpy as np
+
+from services import capim_service
+from services.conexao_db import get_db
+from services.manejo_service import FATOR_CONVERSAO_UA, TAXA_MAXIMA_LOTACAO, get_peso_medio_categoria
+
+
+# ========== CONFIG ==========
+UA_HA_REFERENCIA = 2.0        # lotação em que vale o consumo base do capim
+ALTURA_PADRAO = 25            # sem medição nem estimativa (mesmo padrão de mover_lote)
+ALTURA_SAIDA_PADRAO = 15
+DIAS_OCUPACAO_PADRAO = 3
+SUPLEMENTACAO_MAXIMA = 0.7    # mesmo limite de aplicar_suplementacao
+
+
+# ========== CÁLCULO ==========
+def fator_suplementacao(possui_cocho, percentual):
+    """Fração do consumo que vem do pasto (1 - ração via cocho); escalar ou array."""
+    cocho = np.asarray(possui_cocho, dtype=bool)
+    percentual = np.nan_to_num(np.asarray(percentual, dtype=np.float64))
+    fator = np.where(cocho & (percentual > 0), 1 - np.clip(percentual, 0, SUPLEMENTACAO_MAXIMA), 1.0)
+    return fator if fator.ndim else float(fator)
+
+
+def consumo_diario(consumo_base, ua, area, fator=1.0):
+    """
+    Rebaixamento diário (cm/dia) de um lote de `ua` UA numa área de `area` ha:
+    consumo base (2 UA/ha) proporcional à lotação, vezes o fator de suplementação.
+    """
+    return consumo_base * ((ua / area) / UA_HA_REFERENCIA) * fator
+
+
+def consumo_diario_piquete(piquete, ua) -> float:
+    """consumo_diario com capim, área e suplementação de um piquete (dict ou Row)."""
+    chaves = piquete.keys()
+    fator = fator_suplementacao(piquete['possui_cocho'] if 'possui_cocho' in chaves else 0,
+                                piquete['percentual_suplementacao'] if 'percentual_suplementacao' in chaves else 0)
+    return consumo_diario(capim_service.consumo_base(piquete['capim']), ua, piquete['area'], fator)
+
+
+def calcular_capacidade(piquetes) -> np.ndarray:
+    """
+    Estoque de pasto acima da altura de saída, em UA·dia, de cada piquete.
+
+    dias_tecnicos = (altura - saida) / consumo_diario e consumo_diario é
+    proporcional à UA, então UA x dias é constante por piquete:
+    (altura - saida) x area x UA_HA_REFERENCIA / (consumo_base x fator).
+    """
+    registro = capim_service.registro()
+    altura = np.array([p['altura_real_medida'] or p['altura_atual'] or ALTURA_PADRAO for p in piquetes],
+                      dtype=np.float64)
+    saida = np.array([p['altura_saida'] or ALTURA_SAIDA_PADRAO for p in piquetes], dtype=np.float64)
+    area = np.array([p['area'] or 0 for p in piquetes], dtype=np.float64)
+    consumo = registro.consumo[registro.indices([p['capim'] for p in piquetes])]
+    fator = fator_suplementacao([p['possui_cocho'] or 0 for p in piquetes],
+                                [p['percentual_suplementacao'] or 0 for p in piquetes])
+    fator = np.asarray(fator, dtype=np.float64).reshape(len(piquetes))
+    pasto = np.maximum(altura - saida, 0.0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ua_dias = pasto * area * UA_HA_REFERENCIA / (consumo * fator)
+    return np.where((area > 0) & (consumo * fator > 0), ua_dias, 0.0)
+
+
+def ua_sustentavel(ua_dias, area, dias):
+    """UA que o piquete suporta por `dias` dias, até TAXA_MAXIMA_LOTACAO por hectare."""
+    ua_dias = np.asarray(ua_dias, dtype=np.float64)
+    dias = np.maximum(np.asarray(dias, dtype=np.float64), 1.0)
+    return np.minimum(ua_dias / dias, TAXA_MAXIMA_LOTACAO * np.asarray(area, dtype=np.float64))
+
+
+def cabecas(ua, categoria=None, peso_medio=None):
+    """Animais da categoria (ou do peso médio informado) que cabem em `ua` UA; None sem peso."""
+    peso = peso_medio or get_peso_medio_categoria(categoria)
+    if not peso:
+        return None
+    return np.floor(np.asarray(ua, dtype=np.float64) * FATOR_CONVERSAO_UA / peso).astype(np.int64)
+
+
+# ========== PERSISTÊNCIA ==========
+def atualizar_capacidade(fazenda_id=None, piquete_ids=None, apenas_pendentes=False) -> int:
+    """
+    Recalcula e grava capacidade_ua_dias e capacidade_animal (UA nos
+    dias_ocupacao do piquete) de uma vez.
+
+    Args:
+        fazenda_id: Só os piquetes desta fazenda
+        piquete_ids: Só estes piquetes
+        apenas_pendentes: Só os que ainda não têm capacidade calculada
+
+    Returns:
+        Quantidade de piquetes gravados
+    """
+    filtros, params = ['ativo = 1'], []
+    if fazenda_id is not None:
+        filtros.append('fazenda_id = ?')
+        params.append(fazenda_id)
+    if piquete_ids is not None:
+        ids = [int(i) for i in piquete_ids]
+        if not ids:
+            return 0
+        filtros.append('id IN ({})'.format(','.join('?' * len(ids))))
+        params.extend(ids)
+    if apenas_pendentes:
+        filtros.append('capacidade_ua_dias IS NULL')
+
+    conn = get_db()
+    cursor = conn.cursor()
+    cursor.execute('''
+        SELECT id, capim, area, altura_real_medida, altura_atual, altura_saida, dias_ocupacao,
+               possui_cocho, percentual_suplementacao
+        FROM piquetes
+        WHERE {}
+    '''.format(' AND '.join(filtros)), params)
+    piquetes = cursor.fetchall()
+    if not piquetes:
+        conn.close()
+        return 0
+
+    ua_dias = calcular_capacidade(piquetes)
+    area = np.array([p['area'] or 0 for p in piquetes], dtype=np.float64)
+    dias = np.array([p['dias_ocupacao'] or DIAS_OCUPACAO_PADRAO for p in piquetes], dtype=np.float64)
+    ua = ua_sustentavel(ua_dias, area, dias)
+    agora = datetime.now().isoformat()
+    cursor.executemany('''
+        UPDATE piquetes SET capacidade_ua_dias = ?, capacidade_animal = ?, capacidade_atualizada_em = ?
+        WHERE id = ?
+    ''', [(round(float(c), 3), round(float(u), 2), agora, p['id']) for p, c, u in zip(piquetes, ua_dias, ua)])
+    conn.commit()
+    conn.close()
+    return len(piquetes)
+
+
+# ========== CONSULTA ==========
+def capacidade_fazenda(fazenda_id, categoria=None, peso_medio=None, dias=None) -> list:
+    """
+    Capacidade de todos os piquetes ativos da fazenda, lida das colunas
+    gravadas (piquetes ainda sem cálculo são calculados antes).
+
+    Args:
+        fazenda_id: Fazenda
+        categoria: Categoria para converter UA em cabeças (CATEGORIAS_BOVINOS)
+        peso_medio: Peso médio (kg) no lugar do padrão da categoria
+        dias: Dias de ocupação (padrão: dias_ocupacao de cada piquete)
+
+    Returns:
+        Lista de dicts por piquete com ua_dias, ua_sustentavel, ua_ha e cabecas
+    """
+    atualizar_capacidade(fazenda_id, apenas_pendentes=True)
+
+    conn = get_db()
+    cursor = conn.cursor()
+    cursor.execute('''
+        SELECT id, nome, capim, area, dias_ocupacao, capacidade_ua_dias, capacidade_animal
+        FROM piquetes
+        WHERE fazenda_id = ? AND ativo = 1
+        ORDER BY nome, id
+    ''', (fazenda_id,))
+    piquetes = cursor.fetchall()
+    conn.close()
+
+    area = np.array([p['area'] or 0 for p in piquetes], dtype=np.float64)
+    ua_dias = np.array([p['capacidade_ua_dias'] or 0 for p in piquetes], dtype=np.float64)
+    if dias is None:
+        dias_ocupacao = np.array([p['dias_ocupacao'] or DIAS_OCUPACAO_PADRAO for p in piquetes], dtype=np.int64)
+        ua = np.array([p['capacidade_animal'] or 0 for p in piquetes], dtype=np.float64)
+    else:
+        dias_ocupacao = np.full(len(piquetes), int(dias), dtype=np.int64)
+        ua = ua_sustentavel(ua_dias, area, dias_ocupacao)
+    n_cabecas = cabecas(ua, categoria, peso_medio)
+
+    return [{
+        'id': p['id'],
+        'nome': p['nome'],
+        'capim': p['capim'],
+        'area': float(area[j]),
+        'dias': int(dias_ocupacao[j]),
+        'ua_dias': round(float(ua_dias[j]), 1),
+        'ua_sustentavel': round(float(ua[j]), 2),
+        'ua_ha': round(float(ua[j] / area[j]), 2) if area[j] > 0 else 0.0,
+        'cabecas': None if n_cabecas is None else int(n_cabecas[j]),
+    } for j, p in enumerate(piquetes)]
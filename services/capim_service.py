@@ -0,0 +1,226 @@
+# -*- coding: utf-8 -*-
+"""
+Cadastro de Capins (registro único)
+Crescimento (cm/dia), consumo base (cm/animal/dia em 2 UA/ha) e dias técnicos
+de cada capim, montados uma vez a partir dos padrões técnicos abaixo e da
+tabela capins (que sobrescreve e acrescenta). O registro é imutável: cada
+capim tem um id (posição nos arrays) e recarregar() troca o registro inteiro
+quando a tabela muda, sem travar quem está lendo o anterior.
+
+Com vários workers só quem gravou chama recarregar(); os demais conferem a
+versão da tabela (COUNT, MAX(id), MAX(updated_at)) no máximo a cada
+VERIFICACAO_SEGUNDOS e remontam se ela mudou.
+"""
+import sqlite3
+import threading
+import time
+
+import numpy as np
+
+from services.conexao_db import get_db
+
+
+# ========== PADRÕES ==========
+CRESCIMENTO_PADRAO = 1.2   # cm/dia
+CONSUMO_PADRAO = 0.8       # cm/animal/dia em 2 UA/ha
+DIAS_TECNICOS_PADRAO = 30
+CRESCIMENTO_MAXIMO = 10.0  # acima disso o valor da tabela não é cm/dia (sementes antigas em kg MS/ha)
+VERIFICACAO_SEGUNDOS = 5.0  # intervalo entre conferências da versão da tabela (gravações de outro worker)
+
+# nome: (crescimento_diario, consumo_base, dias_tecnicos)
+CAPINS_PADRAO = {
+    'Marandu': (1.2, 0.85, 28),
+    'Piatã': (1.3, 0.90, 28),
+    'Xaraés': (1.6, 0.95, 35),
+    'Paiaguás': (1.2, 0.85, 28),
+    'Decumbens': (1.0, 0.75, 24),
+    'Humidicola': (0.8, 0.70, 24),
+    'MG-5': (1.6, 0.95, 35),
+    'Mombaça': (2.5, 1.00, 35),
+    'Tanzânia': (2.3, 0.95, 32),
+    'Zuri': (2.6, 1.05, 35),
+    'Massai': (1.8, 0.90, 28),
+    'Aruana': (1.7, 0.85, 28),
+    'Tifton 85': (2.0, 0.70, 21),
+    'Tifton 68': (2.0, 0.70, 21),
+    'Coastcross': (1.6, 0.75, 24),
+    'Jiggs': (1.9, 0.72, 22),
+    'Andropogon': (1.8, 0.80, 28),
+    'Capim Elefante': (3.5, 1.10, 40),
+    'Capiaçu': (4.0, 1.15, 42),
+    # compatibilidade
+    'Brachiaria': (1.2, 0.85, 28),
+    'Capim Aruana': (1.7, 0.85, 28),
+    'Natalino': (1.8, 0.80, 28),
+}
+
+
+# ========== REGISTRO ==========
+class Capim:
+    """Parâmetros de um capim (somente leitura)."""
+
+    __slots__ = ('id', 'nome', 'crescimento_diario', 'consumo_base', 'dias_tecnicos',
+                 'altura_entrada', 'altura_saida', 'tempo_descanso')
+
+    def __init__(self, id, nome, crescimento_diario, consumo_base, dias_tecnicos,
+                 altura_entrada=None, altura_saida=None, tempo_descanso=None):
+        for campo, valor in zip(self.__slots__, (id, nome, crescimento_diario, consumo_base, dias_tecnicos,
+                                                 altura_entrada, altura_saida, tempo_descanso)):
+            object.__setattr__(self, campo, valor)
+
+    def __setattr__(self, campo, valor):
+        raise AttributeError('Capim é imutável; use recarregar()')
+
+    def __repr__(self):
+        return f'Capim({self.id}, {self.nome!r}, crescimento={self.crescimento_diario}, ' \
+               f'consumo={self.consumo_base}, dias_tecnicos={self.dias_tecnicos})'
+
+
+class Registro:
+    """
+    Capins indexados por id. O id 0 é o capim desconhecido (valores padrão);
+    crescimento, consumo e dias_tecnicos são arrays por id para uso vetorizado.
+    """
+
+    __slots__ = ('capins', 'ids', 'crescimento', 'consumo', 'dias_tecnicos')
+
+    def __init__(self, capins):
+        object.__setattr__(self, 'capins', tuple(capins))
+        object.__setattr__(self, 'ids', {c.nome: c.id for c in self.capins if c.nome is not None})
+        for campo, atributo, tipo in (('crescimento', 'crescimento_diario', np.float64),
+                                      ('consumo', 'consumo_base', np.float64),
+                                      ('dias_tecnicos', 'dias_tecnicos', np.int64)):
+            array = np.array([getattr(c, atributo) for c in self.capins], dtype=tipo)
+            array.flags.writeable = False
+            object.__setattr__(self, campo, array)
+
+    def __setattr__(self, campo, valor):
+        raise AttributeError('Registro é imutável; use recarregar()')
+
+    def id(self, nome) -> int:
+        """Id do capim (0 = desconhecido ou vazio)."""
+        return self.ids.get(nome, 0)
+
+    def obter(self, nome):
+        """Capim pelo nome; None se não cadastrado."""
+        i = self.ids.get(nome)
+        return None if i is None else self.capins[i]
+
+    def indices(self, nomes) -> np.ndarray:
+        """Ids de vários capins, para indexar crescimento/consumo/dias_tecnicos."""
+        return np.fromiter((self.ids.get(n, 0) for n in nomes), dtype=np.int64, count=len(nomes))
+
+
+DESCONHECIDO = Capim(0, None, CRESCIMENTO_PADRAO, CONSUMO_PADRAO, DIAS_TECNICOS_PADRAO)
+
+_registro = [None]
+_conferido = [None, 0.0]  # versão da tabela do registro atual, quando foi conferida (monotonic)
+_lock = threading.Lock()
+
+
+def _positivo(valor, padrao, maximo=None):
+    if valor is None or valor <= 0 or (maximo is not None and valor > maximo):
+        return padrao
+    return valor
+
+
+def _montar(linhas) -> Registro:
+    """Padrões técnicos + linhas da tabela capins (a tabela vence quando o valor é válido)."""
+    dados = {nome: {'crescimento_diario': c, 'consumo_base': k, 'dias_tecnicos': d}
+             for nome, (c, k, d) in CAPINS_PADRAO.items()}
+    for linha in linhas:
+        nome = linha.get('nome')
+        if not nome:
+            continue
+        atual = dados.setdefault(nome, {'crescimento_diario': CRESCIMENTO_PADRAO, 'consumo_base': CONSUMO_PADRAO,
+                                        'dias_tecnicos': DIAS_TECNICOS_PADRAO})
+        atual['crescimento_diario'] = _positivo(linha.get('crescimento_diario'), atual['crescimento_diario'],
+                                                CRESCIMENTO_MAXIMO)
+        atual['consumo_base'] = _positivo(linha.get('consumo_base'), atual['consumo_base'])
+        atual['dias_tecnicos'] = _positivo(linha.get('dias_tecnicos'), atual['dias_tecnicos'])
+        for campo in ('altura_entrada', 'altura_saida', 'tempo_descanso'):
+            atual[campo] = linha.get(campo)
+
+    capins = [DESCONHECIDO]
+    for nome, valores in dados.items():
+        capins.append(Capim(len(capins), nome, **valores))
+    return Registro(capins)
+
+
+def _ler_tabela() -> list:
+    conn = get_db()
+    cursor = conn.cursor()
+    try:
+        cursor.execute('SELECT * FROM capins ORDER BY id')
+        linhas = [dict(r) for r in cursor.fetchall()]
+    except sqlite3.OperationalError:
+        linhas = []  # banco ainda sem a tabela: só os padrões
+    conn.close()
+    return linhas
+
+
+def _versao_tabela():
+    """Muda a cada INSERT, DELETE ou UPDATE (salvar_capim grava updated_at) em capins."""
+    conn = get_db()
+    cursor = conn.cursor()
+    try:
+        cursor.execute('SELECT COUNT(*), MAX(id), MAX(updated_at) FROM capins')
+        versao = tuple(cursor.fetchone())
+    except sqlite3.OperationalError:
+        versao = None
+    conn.close()
+    return versao
+
+
+# ========== API ==========
+def registro() -> Registro:
+    """Registro atual (carregado do banco na primeira chamada, remontado se a tabela mudou)."""
+    atual = _registro[0]
+    if atual is not None and time.monotonic() - _conferido[1] < VERIFICACAO_SEGUNDOS:
+        return atual
+    with _lock:
+        versao = _versao_tabela()
+        if _registro[0] is None or versao != _conferido[0]:
+            _registro[0] = _montar(_ler_tabela())
+        _conferido[:] = [versao, time.monotonic()]
+        return _registro[0]
+
+
+def recarregar() -> Registro:
+    """Relê a tabela capins e troca o registro (chamar depois de gravar nela)."""
+    versao = _versao_tabela()
+    novo = _montar(_ler_tabela())
+    with _lock:
+        _registro[0] = novo
+        _conferido[:] = [versao, time.monotonic()]
+    return novo
+
+
+def limpar() -> None:
+    """Descarta o registro; a próxima leitura carrega do banco atual (testes trocam de banco)."""
+    with _lock:
+        _registro[0] = None
+        _conferido[:] = [None, 0.0]
+
+
+def obter(nome):
+    """Capim pelo nome; None se não cadastrado."""
+    return registro().obter(nome)
+
+
+def crescimento_diario(nome) -> float:
+    """cm/dia do capim (CRESCIMENTO_PADRAO se desconhecido)."""
+    r = registro()
+    return r.capins[r.ids.get(nome, 0)].crescimento_diario
+
+
+def consumo_base(nome) -> float:
+    """cm/animal/dia em 2 UA/ha (CONSUMO_PADRAO se desconhecido)."""
+    r = registro()
+    return r.capins[r.ids.get(nome, 0)].consumo_base
+
+
+def dias_tecnicos(nome) -> int:
+    """Dias técnicos de referência do capim (DIAS_TECNICOS_PADRAO se desconhecido)."""
+    r = registro()
+    return r.capins[r.ids.get(nome, 0)].dias_tecnicos
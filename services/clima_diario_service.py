@@ -0,0 +1,276 @@
+"""
+Série Diária de Clima
+Chuva, temperaturas e fator de crescimento por dia e por célula da grade
+(clima_service._celula), gravados a partir dos payloads do Open-Meteo que o
+cache já baixa. Cada linha guarda as somas acumuladas até o dia, então o
+fator integrado em qualquer intervalo sai de duas linhas, sem laço por dia.
+"""
+from collections import deque
+from datetime import date, datetime, timedelta, timezone
+
+import numpy as np
+
+from services.clima_service import _celula, calcular_fator_climatico, condicao_por_chuva_7d
+from services.conexao_db import get_db
+
+
+# ========== CONFIG ==========
+JANELA_CHUVA_DIAS = 7  # fator do dia = classificação da chuva dos últimos 7 dias (inclusive)
+
+
+# ========== FATOR DO DIA ==========
+def _fator_do_dia(chuvas: list) -> float:
+    """
+    Fator de crescimento pela chuva da janela (mesmos limiares de
+    condicao_por_chuva_7d). Janela incompleta é extrapolada para 7 dias.
+    """
+    chuva_7d = sum(chuvas) * JANELA_CHUVA_DIAS / len(chuvas)
+    return calcular_fator_climatico(condicao_por_chuva_7d(chuva_7d))
+
+
+def _dias_do_payload(payload: dict) -> list:
+    """(data, chuva, tmin, tmax) de daily.*; dias sem chuva informada ficam de fora."""
+    daily = (payload or {}).get("daily") or {}
+    datas = daily.get("time") or []
+    chuva = daily.get("precipitation_sum") or []
+    tmin = daily.get("temperature_2m_min") or []
+    tmax = daily.get("temperature_2m_max") or []
+
+    dias = []
+    for i, data in enumerate(datas):
+        try:
+            data = date.fromisoformat(data).isoformat()
+        except (TypeError, ValueError):
+            continue
+        if i >= len(chuva) or chuva[i] is None:
+            continue
+        dias.append((
+            data,
+            float(chuva[i]),
+            tmin[i] if i < len(tmin) else None,
+            tmax[i] if i < len(tmax) else None,
+        ))
+    return dias
+
+
+# ========== GRAVAÇÃO ==========
+def salvar_series(itens: list, cur=None) -> int:
+    """
+    Grava (upsert por célula e dia) os dias de cada payload e recalcula fator
+    e somas acumuladas da célula a partir do primeiro dia alterado.
+
+    Args:
+        itens: Lista de (lat, lon, payload do Open-Meteo)
+        cur: Cursor de quem já abriu a transação; o commit fica com ele
+
+    Returns:
+        Número de dias gravados
+    """
+    por_celula = {}
+    for lat, lon, payload in itens:
+        dias = _dias_do_payload(payload)
+        if dias:
+            por_celula.setdefault(_celula(lat, lon), {}).update((d[0], d) for d in dias)
+    if not por_celula:
+        return 0
+
+    agora = datetime.now(timezone.utc).isoformat()
+    conn = None
+    if cur is None:
+        conn = get_db()
+        cur = conn.cursor()
+    cur.executemany(
+        '''
+        INSERT INTO clima_diario (lat, lon, data, precipitacao, temp_min, temp_max,
+                                  fator, fator_acumulado, dias_acumulados, atualizado_em)
+        VALUES (?, ?, ?, ?, ?, ?, 1.0, 0, 0, ?)
+        ON CONFLICT (lat, lon, data) DO UPDATE SET
+            precipitacao = excluded.precipitacao,
+            temp_min = excluded.temp_min,
+            temp_max = excluded.temp_max,
+            atualizado_em = excluded.atualizado_em
+        ''',
+        [
+            (lat, lon, data, chuva, tmin, tmax, agora)
+            for (lat, lon), dias in por_celula.items()
+            for data, chuva, tmin, tmax in dias.values()
+        ]
+    )
+    for celula, dias in por_celula.items():
+        _recalcular(cur, celula, min(dias))
+    if conn is not None:
+        conn.commit()
+        conn.close()
+
+    return sum(len(dias) for dias in por_celula.values())
+
+
+def _recalcular(cur, celula: tuple, desde: str) -> None:
+    """Fator e acumulados dos dias >= desde (os anteriores não mudam)."""
+    lat, lon = celula
+    inicio_janela = (date.fromisoformat(desde) - timedelta(days=JANELA_CHUVA_DIAS - 1)).isoformat()
+
+    acumulado, dias_acumulados = _acumulado_antes(cur, lat, lon, desde)
+    cur.execute(
+        '''
+        SELECT data, precipitacao
+        FROM clima_diario
+        WHERE lat = ? AND lon = ? AND data >= ?
+        ORDER BY data
+        ''',
+        (lat, lon, inicio_janela)
+    )
+    janela = deque()  # (ordinal, chuva) dos últimos JANELA_CHUVA_DIAS dias
+    atualizacoes = []
+    for data, chuva in cur.fetchall():
+        ordinal = date.fromisoformat(data).toordinal()
+        janela.append((ordinal, chuva))
+        while janela[0][0] <= ordinal - JANELA_CHUVA_DIAS:
+            janela.popleft()
+        if data < desde:
+            continue
+        fator = _fator_do_dia([c for _, c in janela])
+        acumulado += fator
+        dias_acumulados += 1
+        atualizacoes.append((fator, acumulado, dias_acumulados, lat, lon, data))
+
+    cur.executemany(
+        '''
+        UPDATE clima_diario
+        SET fator = ?, fator_acumulado = ?, dias_acumulados = ?
+        WHERE lat = ? AND lon = ? AND data = ?
+        ''',
+        atualizacoes
+    )
+
+
+# ========== CONSULTA ==========
+def _acumulado_antes(cur, lat: float, lon: float, data: str) -> tuple:
+    """(fator_acumulado, dias_acumulados) do último dia < data; (0.0, 0) se não houver."""
+    cur.execute(
+        '''
+        SELECT fator_acumulado, dias_acumulados
+        FROM clima_diario
+        WHERE lat = ? AND lon = ? AND data < ?
+        ORDER BY data DESC
+        LIMIT 1
+        ''',
+        (lat, lon, data)
+    )
+    row = cur.fetchone()
+    return (row[0], row[1]) if row else (0.0, 0)
+
+
+def fator_integrado(lat: float, lon: float, inicio: date, dias: int, fator_padrao: float) -> tuple:
+    """
+    Soma do fator de crescimento nos dias [inicio, inicio + dias), com duas
+    consultas pela chave primária.
+
+    Args:
+        lat, lon: Coordenada (qualquer ponto da célula)
+        inicio: Primeiro dia
+        dias: Quantidade de dias
+        fator_padrao: Fator dos dias sem série (condição atual)
+
+    Returns:
+        tuple: (soma dos fatores, dias com dado na série)
+    """
+    lat, lon = _celula(lat, lon)
+    fim = inicio + timedelta(days=dias)
+
+    conn = get_db()
+    cur = conn.cursor()
+    acumulado_inicio, dias_inicio = _acumulado_antes(cur, lat, lon, inicio.isoformat())
+    acumulado_fim, dias_fim = _acumulado_antes(cur, lat, lon, fim.isoformat())
+    conn.close()
+
+    com_dado = dias_fim - dias_inicio
+    return (acumulado_fim - acumulado_inicio) + (dias - com_dado) * fator_padrao, com_dado
+
+
+def fator_integrado_lote(celulas: list, inicios: np.ndarray, dias: np.ndarray,
+                         fatores_padrao: np.ndarray, ate: date) -> tuple:
+    """
+    Versão em lote de fator_integrado (mesma aritmética, elemento a elemento):
+    uma consulta por célula distinta e busca binária nas somas acumuladas.
+
+    Args:
+        celulas: (lat, lon) de cada item
+        inicios: Ordinal (date.toordinal) do primeiro dia de cada item
+        dias: Dias de cada item
+        fatores_padrao: Fator dos dias sem série, por item
+        ate: Nenhum intervalo passa deste dia (exclusivo); limita a leitura
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: somas e dias com dado, por item
+    """
+    n = len(celulas)
+    somas = np.zeros(n, dtype=np.float64)
+    com_dado = np.zeros(n, dtype=np.int64)
+    if n == 0:
+        return somas, com_dado
+
+    grupos = {}
+    for i, celula in enumerate(celulas):
+        grupos.setdefault(_celula(*celula), []).append(i)
+
+    conn = get_db()
+    cur = conn.cursor()
+    for (lat, lon), indices in grupos.items():
+        cur.execute(
+            '''
+            SELECT data, fator_acumulado, dias_acumulados
+            FROM clima_diario
+            WHERE lat = ? AND lon = ? AND data < ?
+            ORDER BY data
+            ''',
+            (lat, lon, ate.isoformat())
+        )
+        rows = cur.fetchall()
+        ordinais = np.array([date.fromisoformat(r[0]).toordinal() for r in rows], dtype=np.int64)
+        acumulados = np.array([r[1] for r in rows], dtype=np.float64)
+        contagens = np.array([r[2] for r in rows], dtype=np.int64)
+
+        idx = np.array(indices)
+        ini = inicios[idx]
+        fim = ini + dias[idx]
+
+        def antes(ordinal):
+            pos = np.searchsorted(ordinais, ordinal, side='left') - 1
+            existe = pos >= 0
+            pos = np.maximum(pos, 0)
+            if not len(ordinais):
+                return np.zeros(len(ordinal)), np.zeros(len(ordinal), dtype=np.int64)
+            return np.where(existe, acumulados[pos], 0.0), np.where(existe, contagens[pos], 0)
+
+        acumulado_inicio, dias_inicio = antes(ini)
+        acumulado_fim, dias_fim = antes(fim)
+        com_dado[idx] = dias_fim - dias_inicio
+        somas[idx] = (acumulado_fim - acumulado_inicio) + (dias[idx] - com_dado[idx]) * fatores_padrao[idx]
+    conn.close()
+
+    return somas, com_dado
+
+
+def fatores_por_dia(lat: float, lon: float, inicio: date, dias: int) -> np.ndarray:
+    """
+    Fator de cada dia em [inicio, inicio + dias) para a célula (inclui a
+    previsão já gravada); NaN nos dias sem série.
+    """
+    lat, lon = _celula(lat, lon)
+    fatores = np.full(dias, np.nan)
+    conn = get_db()
+    cur = conn.cursor()
+    cur.execute(
+        '''
+        SELECT data, fator
+        FROM clima_diario
+        WHERE lat = ? AND lon = ? AND data >= ? AND data < ?
+        ''',
+        (lat, lon, inicio.isoformat(), (inicio + timedelta(days=dias)).isoformat())
+    )
+    base = inicio.toordinal()
+    for data, fator in cur.fetchall():
+        fatores[date.fromisoformat(data).toordinal() - base] = fator
+    conn.close()
+    return fatores
@@ -3,20 +3,45 @@ Serviços de Clima para Manejo de Pastagens
 Fase 1: clima real (Open-Meteo) + cache local + fallback seguro.
 """
 
+from collections import OrderedDict
 from enum import Enum
 from typing import Optional
 from datetime import datetime, timedelta, timezone
-import sqlite3
-import os
 import json
+import os
+import threading
+import time
 from urllib.parse import urlencode
 from urllib.request import urlopen
 
+from services.conexao_db import get_db as _get_db, liberar_conexao as _liberar_conexao
+
 
 # ========== CONFIG ==========
-DB_PATH = os.path.join(os.path.dirname(__file__), "..", "pastagens.db")
 CACHE_TTL_HOURS = 3
-OPEN_METEO_URL = "https://api.open-meteo.com/v1/forecast"
+OPEN_METEO_URL = os.environ.get("PASTOFLOW_OPEN_METEO_URL", "https://api.open-meteo.com/v1/forecast")
+MEMORIA_MAX_ENTRADAS = 2048   # nível 1 (LRU em memória) na frente do clima_cache
+SINGLE_FLIGHT_TIMEOUT = 15    # segundos que uma requisição espera a busca de outra
+# Stale-while-revalidate: entrada expirada há menos de STALE_MAX_HORAS (contadas
+# do fetched_at) é devolvida na hora com fonte='stale' enquanto renova em segundo plano
+SERVIR_EXPIRADO = os.environ.get("PASTOFLOW_CLIMA_SERVIR_EXPIRADO", "1") != "0"
+STALE_MAX_HORAS = float(os.environ.get("PASTOFLOW_CLIMA_STALE_MAX_HORAS", "24"))
+# Grade do cache: coordenadas na mesma célula (GRADE_GRAUS de lado, 0.1° ~ 11 km,
+# a ordem da resolução dos modelos do Open-Meteo) compartilham entrada e busca
+GRADE_GRAUS = float(os.environ.get("PASTOFLOW_CLIMA_GRADE_GRAUS", "0.1"))
+LOTE_MAX_COORDENADAS = 100    # coordenadas por requisição em obter_clima_lote
+VACUUM_FRACAO_LIVRE = 0.25    # purgar_cache só roda VACUUM com >= 25% de páginas livres
+# Chamadas ao Open-Meteo: buscas em segundo plano (agendador, revalidação) usam
+# TIMEOUT_API_SEGUNDOS; dentro de uma requisição o limite é o orçamento, bem menor.
+# Os dois são prazos de relógio (conexão + leitura inteira), não timeouts por socket
+TIMEOUT_API_SEGUNDOS = 12
+LEITURA_BLOCO_BYTES = 64 * 1024
+ORCAMENTO_REQUISICAO_SEGUNDOS = float(os.environ.get("PASTOFLOW_CLIMA_ORCAMENTO_SEGUNDOS", "3"))
+# Disjuntor: DISJUNTOR_FALHAS falhas seguidas abrem o circuito; aberto, ninguém
+# chama a API por DISJUNTOR_ABERTO_SEGUNDOS, depois uma única sonda decide se fecha
+DISJUNTOR_FALHAS = 5
+DISJUNTOR_ABERTO_SEGUNDOS = 60
+LATENCIA_FAIXAS_MS = (50, 100, 250, 500, 1000, 2500, 5000, 10000)  # histograma das chamadas
 
 
 # ========== ENUM DE CONDIÇÃO CLIMÁTICA ==========
@@ -36,41 +61,17 @@ FATORES_CLIMATICOS = {
 }
 
 
-def _get_db():
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row
-    return conn
-
-
-def _init_clima_cache_table() -> None:
-    conn = _get_db()
-    cur = conn.cursor()
-    cur.execute(
-        '''
-        CREATE TABLE IF NOT EXISTS clima_cache (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            lat REAL NOT NULL,
-            lon REAL NOT NULL,
-            provider TEXT NOT NULL,
-            condicao TEXT NOT NULL,
-            fator REAL NOT NULL,
-            payload_json TEXT,
-            fetched_at TEXT NOT NULL,
-            expires_at TEXT NOT NULL
-        )
-        '''
-    )
-    conn.commit()
-    conn.close()
+def _round_coord(value: float) -> float:
+    # Ponto da grade mais próximo (GRADE_GRAUS); round final tira o ruído do float
+    return round(round(float(value) / GRADE_GRAUS) * GRADE_GRAUS, 6)
 
 
-def _round_coord(value: float) -> float:
-    # 3 casas ~ 100m, evita spam de cache por pequena variação
-    return round(float(value), 3)
+def _celula(lat: float, lon: float) -> tuple:
+    """Ponto da grade que representa (lat, lon): é a chave no clima_cache e o que vai para a API."""
+    return _round_coord(lat), _round_coord(lon)
 
 
 def _get_cache(lat: float, lon: float, provider: str = "open-meteo") -> Optional[dict]:
-    _init_clima_cache_table()
     now_iso = datetime.now(timezone.utc).isoformat()
     lat_r = _round_coord(lat)
     lon_r = _round_coord(lon)
@@ -82,8 +83,6 @@ def _get_cache(lat: float, lon: float, provider: str = "open-meteo") -> Optional
         SELECT *
         FROM clima_cache
         WHERE lat = ? AND lon = ? AND provider = ? AND expires_at > ?
-        ORDER BY fetched_at DESC
-        LIMIT 1
         ''',
         (lat_r, lon_r, provider, now_iso)
     )
@@ -113,34 +112,477 @@ def _get_cache(lat: float, lon: float, provider: str = "open-meteo") -> Optional
     }
 
 
-def _save_cache(lat: float, lon: float, condicao: str, fator: float, payload: dict, provider: str = "open-meteo") -> None:
-    _init_clima_cache_table()
-    now = datetime.now(timezone.utc)
-    expires = now + timedelta(hours=CACHE_TTL_HOURS)
-    lat_r = _round_coord(lat)
-    lon_r = _round_coord(lon)
+def _get_cache_expirado(lat: float, lon: float, max_horas: float, provider: str = "open-meteo") -> Optional[dict]:
+    """
+    Linha da coordenada já expirada, se buscada há no máximo max_horas.
+
+    Returns:
+        Dict no formato de _get_cache com fonte='stale' e idade_segundos
+        (tempo desde o fetched_at), ou None
+    """
+    agora = datetime.now(timezone.utc)
 
     conn = _get_db()
     cur = conn.cursor()
     cur.execute(
         '''
-        INSERT INTO clima_cache (lat, lon, provider, condicao, fator, payload_json, fetched_at, expires_at)
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        SELECT condicao, fator, provider, lat, lon, fetched_at, expires_at
+        FROM clima_cache
+        WHERE lat = ? AND lon = ? AND provider = ? AND fetched_at >= ?
         ''',
-        (
-            lat_r,
-            lon_r,
+        (_round_coord(lat), _round_coord(lon), provider, (agora - timedelta(hours=max_horas)).isoformat())
+    )
+    row = cur.fetchone()
+    conn.close()
+
+    if not row:
+        return None
+    try:
+        idade = (agora - datetime.fromisoformat(row["fetched_at"])).total_seconds()
+    except Exception:
+        return None
+
+    return {
+        "condicao": row["condicao"],
+        "fator": row["fator"],
+        "fonte": "stale",
+        "provider": row["provider"],
+        "latitude": row["lat"],
+        "longitude": row["lon"],
+        "fetched_at": row["fetched_at"],
+        "expires_at": row["expires_at"],
+        "idade_segundos": int(idade),
+    }
+
+
+def _resumir_payload(payload: dict) -> dict:
+    """Só os campos usados por _inferir_condicao_por_open_meteo (o resto não vai para o cache)."""
+    payload = payload or {}
+    current = payload.get("current") or {}
+    daily = payload.get("daily") or {}
+    return {
+        "current": {"relative_humidity_2m": current.get("relative_humidity_2m")},
+        "daily": {"precipitation_sum": (daily.get("precipitation_sum") or [])[:7]},
+    }
+
+
+def _save_cache(lat: float, lon: float, condicao: str, fator: float, payload: dict, provider: str = "open-meteo") -> dict:
+    """
+    Grava (upsert: uma linha por coordenada) no clima_cache e devolve a
+    entrada no mesmo formato de _get_cache. O payload é reduzido com
+    _resumir_payload.
+    """
+    return _salvar_cache_lote([(lat, lon, condicao, fator, payload)], provider=provider)[0]
+
+
+def _salvar_cache_lote(itens: list, provider: str = "open-meteo") -> list:
+    """
+    Versão em lote de _save_cache: um executemany e um commit (série diária
+    incluída, na mesma transação).
+
+    Args:
+        itens: Lista de (lat, lon, condicao, fator, payload)
+
+    Returns:
+        Entradas no formato de _get_cache, na ordem de itens
+    """
+    from services.clima_diario_service import salvar_series
+
+    now = datetime.now(timezone.utc)
+    expires = now + timedelta(hours=CACHE_TTL_HOURS)
+    entradas = []
+    linhas = []
+    for lat, lon, condicao, fator, payload in itens:
+        payload = _resumir_payload(payload)
+        entrada = {
+            "condicao": condicao,
+            "fator": float(fator),
+            "fonte": "cache",
+            "provider": provider,
+            "latitude": _round_coord(lat),
+            "longitude": _round_coord(lon),
+            "fetched_at": now.isoformat(),
+            "expires_at": expires.isoformat(),
+            "payload": payload,
+        }
+        entradas.append(entrada)
+        linhas.append((
+            entrada["latitude"],
+            entrada["longitude"],
             provider,
             condicao,
-            float(fator),
+            entrada["fator"],
             json.dumps(payload, ensure_ascii=False),
-            now.isoformat(),
-            expires.isoformat(),
-        )
+            entrada["fetched_at"],
+            entrada["expires_at"],
+        ))
+
+    conn = _get_db()
+    cur = conn.cursor()
+    # Série diária da célula sai do payload completo (linhas guardam o resumido)
+    if provider == "open-meteo":
+        salvar_series([(lat, lon, payload) for lat, lon, _, _, payload in itens], cur)
+    cur.executemany(
+        '''
+        INSERT INTO clima_cache (lat, lon, provider, condicao, fator, payload_json, fetched_at, expires_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT (lat, lon, provider) DO UPDATE SET
+            condicao = excluded.condicao,
+            fator = excluded.fator,
+            payload_json = excluded.payload_json,
+            fetched_at = excluded.fetched_at,
+            expires_at = excluded.expires_at
+        ''',
+        linhas
     )
     conn.commit()
     conn.close()
 
+    for (lat, lon, *_), entrada in zip(itens, entradas):
+        _memoria_set(_chave(lat, lon, provider), entrada)
+    return entradas
+
+
+def purgar_cache(max_horas: Optional[float] = None, vacuum: bool = True) -> dict:
+    """
+    Remove coordenadas buscadas há mais de max_horas (nem como stale servem
+    mais: fazendas removidas ou com sede movida) e compacta o arquivo.
+
+    Args:
+        max_horas: Idade máxima pelo fetched_at (padrão STALE_MAX_HORAS)
+        vacuum: Roda VACUUM se as páginas livres passarem de VACUUM_FRACAO_LIVRE
+
+    Returns:
+        Dict com removidas e vacuum (se o VACUUM rodou)
+    """
+    horas = STALE_MAX_HORAS if max_horas is None else max_horas
+    limite = (datetime.now(timezone.utc) - timedelta(hours=horas)).isoformat()
+
+    conn = _get_db()
+    cur = conn.cursor()
+    cur.execute("DELETE FROM clima_cache WHERE fetched_at < ?", (limite,))
+    removidas = cur.rowcount
+    conn.commit()
+
+    compactou = False
+    if vacuum:
+        paginas = cur.execute("PRAGMA page_count").fetchone()[0]
+        livres = cur.execute("PRAGMA freelist_count").fetchone()[0]
+        if paginas and livres / paginas >= VACUUM_FRACAO_LIVRE:
+            cur.execute("VACUUM")
+            compactou = True
+    conn.close()
+
+    return {"removidas": removidas, "vacuum": compactou}
+
+
+# ========== CACHE EM MEMÓRIA + SINGLE-FLIGHT ==========
+# Nível 1: LRU em memória com a mesma validade (expires_at) da linha do clima_cache.
+# Nível 2: tabela clima_cache (SQLite).
+# Em miss nos dois, só uma thread por coordenada arredondada chama a API;
+# as demais esperam o resultado dela.
+_memoria = OrderedDict()  # (lat_r, lon_r, provider) -> (expira_monotonic, entrada)
+_em_voo = {}  # (lat_r, lon_r, provider) -> _Voo
+_revalidando = set()  # chaves com renovação em segundo plano (stale-while-revalidate)
+_lock = threading.Lock()
+_metricas = {
+    "memoria_hits": 0,
+    "memoria_misses": 0,
+    "sqlite_hits": 0,
+    "sqlite_misses": 0,
+    "api_chamadas": 0,
+    "api_erros": 0,
+    "coalescidas": 0,
+    "stale_servidos": 0,
+    "disjuntor_rejeitadas": 0,
+}
+
+
+# Com o agendador ativo (services/agendador_service.py), um miss na requisição
+# não chama a API: enfileira a busca aqui e responde com o fallback.
+_busca_em_segundo_plano = None
+
+
+def definir_busca_em_segundo_plano(funcao) -> None:
+    """Registra funcao(lat, lon) para buscas fora da requisição (None desliga)."""
+    global _busca_em_segundo_plano
+    _busca_em_segundo_plano = funcao
+
+
+class _Voo:
+    """Busca em andamento para uma coordenada."""
+
+    def __init__(self):
+        self.evento = threading.Event()
+        self.resultado = None
+
+
+def _chave(lat: float, lon: float, provider: str = "open-meteo") -> tuple:
+    return _celula(lat, lon) + (provider,)
+
+
+def _contar(nome: str) -> None:
+    with _lock:
+        _metricas[nome] += 1
+
+
+def _memoria_get(chave: tuple) -> Optional[dict]:
+    with _lock:
+        item = _memoria.get(chave)
+        if item and item[0] > time.monotonic():
+            _memoria.move_to_end(chave)
+            _metricas["memoria_hits"] += 1
+            return dict(item[1])
+        if item:
+            del _memoria[chave]
+        _metricas["memoria_misses"] += 1
+    return None
+
+
+def _memoria_set(chave: tuple, entrada: dict) -> None:
+    try:
+        expira = datetime.fromisoformat(entrada["expires_at"])
+        restante = (expira - datetime.now(timezone.utc)).total_seconds()
+    except Exception:
+        return
+    if restante <= 0:
+        return
+    with _lock:
+        _memoria[chave] = (time.monotonic() + restante, dict(entrada))
+        _memoria.move_to_end(chave)
+        while len(_memoria) > MEMORIA_MAX_ENTRADAS:
+            _memoria.popitem(last=False)
+
+
+def limpar_cache_memoria() -> None:
+    """Esvazia o nível em memória (o clima_cache no SQLite não é tocado)."""
+    with _lock:
+        _memoria.clear()
+
+
+def metricas_cache(zerar: bool = False) -> dict:
+    """
+    Contadores e taxas de acerto por nível.
+
+    Returns:
+        Dict com hits/misses de memória e SQLite, chamadas e erros da API,
+        requisições coalescidas (esperaram a busca de outra), entradas
+        expiradas servidas (stale), taxas de acerto, estado do disjuntor e
+        histograma de latência das chamadas à API (contagem por faixa, em ms).
+    """
+    with _lock:
+        dados = dict(_metricas)
+        dados["memoria_entradas"] = len(_memoria)
+        latencias = dict(_latencias)
+        if zerar:
+            for nome in _metricas:
+                _metricas[nome] = 0
+            _zerar_latencias()
+
+    rotulos = [str(limite) for limite in LATENCIA_FAIXAS_MS] + ["+inf"]
+    dados["disjuntor"] = _disjuntor.resumo()
+    dados["latencia_api"] = {
+        "faixas_ms": dict(zip(rotulos, latencias["faixas"])),
+        "total": latencias["total"],
+        "erros": latencias["erros"],
+        "media_ms": round(latencias["soma_ms"] / latencias["total"], 1) if latencias["total"] else None,
+        "max_ms": round(latencias["max_ms"], 1),
+    }
+
+    def taxa(hits, misses):
+        total = hits + misses
+        return round(hits / total, 4) if total else None
+
+    dados["memoria_taxa_acerto"] = taxa(dados["memoria_hits"], dados["memoria_misses"])
+    dados["sqlite_taxa_acerto"] = taxa(dados["sqlite_hits"], dados["sqlite_misses"])
+    return dados
+
+
+# ========== DISJUNTOR (API) ==========
+class _Disjuntor:
+    """
+    Circuit breaker das chamadas ao Open-Meteo.
+
+    fechado: chamadas liberadas; DISJUNTOR_FALHAS falhas seguidas abrem.
+    aberto: nenhuma chamada até passar DISJUNTOR_ABERTO_SEGUNDOS.
+    meio_aberto: uma sonda por vez; sucesso fecha, falha reabre.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reiniciar()
+
+    def reiniciar(self) -> None:
+        with self._lock:
+            self.estado = "fechado"
+            self.falhas = 0
+            self.aberturas = 0
+            self.aberto_ate = 0.0
+            self.sonda = False
+
+    def permitir(self) -> bool:
+        with self._lock:
+            if self.estado == "fechado":
+                return True
+            if self.estado == "aberto" and time.monotonic() >= self.aberto_ate:
+                self.estado = "meio_aberto"
+                self.sonda = False
+            if self.estado == "meio_aberto" and not self.sonda:
+                self.sonda = True
+                return True
+            return False
+
+    def sucesso(self) -> None:
+        with self._lock:
+            self.estado = "fechado"
+            self.falhas = 0
+            self.sonda = False
+
+    def falha(self) -> None:
+        with self._lock:
+            self.falhas += 1
+            if self.estado == "meio_aberto" or self.falhas >= DISJUNTOR_FALHAS:
+                if self.estado != "aberto":
+                    self.aberturas += 1
+                self.estado = "aberto"
+                self.aberto_ate = time.monotonic() + DISJUNTOR_ABERTO_SEGUNDOS
+                self.sonda = False
+
+    def resumo(self) -> dict:
+        with self._lock:
+            reabre = max(0.0, self.aberto_ate - time.monotonic()) if self.estado == "aberto" else 0.0
+            return {
+                "estado": self.estado,
+                "falhas_seguidas": self.falhas,
+                "aberturas": self.aberturas,
+                "reabre_em_segundos": round(reabre, 1),
+            }
+
+
+_disjuntor = _Disjuntor()
+_latencias = {"faixas": [0] * (len(LATENCIA_FAIXAS_MS) + 1), "total": 0, "erros": 0, "soma_ms": 0.0, "max_ms": 0.0}
+
+
+def _registrar_chamada(inicio: float, ok: bool) -> None:
+    """Latência (desde perf_counter() = inicio) no histograma e resultado no disjuntor."""
+    ms = (time.perf_counter() - inicio) * 1000
+    faixa = next((i for i, limite in enumerate(LATENCIA_FAIXAS_MS) if ms <= limite), len(LATENCIA_FAIXAS_MS))
+    with _lock:
+        _latencias["faixas"][faixa] += 1
+        _latencias["total"] += 1
+        _latencias["soma_ms"] += ms
+        _latencias["max_ms"] = max(_latencias["max_ms"], ms)
+        if not ok:
+            _latencias["erros"] += 1
+    if ok:
+        _disjuntor.sucesso()
+    else:
+        _disjuntor.falha()
+
+
+def _zerar_latencias() -> None:
+    # Chamar com _lock
+    _latencias["faixas"] = [0] * (len(LATENCIA_FAIXAS_MS) + 1)
+    _latencias.update(total=0, erros=0, soma_ms=0.0, max_ms=0.0)
+
+
+def reiniciar_disjuntor() -> None:
+    """Fecha o disjuntor e zera o histograma de latência."""
+    _disjuntor.reiniciar()
+    with _lock:
+        _zerar_latencias()
+
+
+def _buscar_api_single_flight(lat: float, lon: float, renovar: bool = False,
+                              timeout: Optional[float] = None) -> Optional[dict]:
+    """
+    Busca na API com coalescência por coordenada arredondada.
+
+    Args:
+        renovar: Busca mesmo com entrada válida na memória
+        timeout: Segundos de espera pela API, própria ou de outra thread
+            (padrão TIMEOUT_API_SEGUNDOS)
+
+    Returns:
+        Dict do clima real, ou None se a busca (própria ou de outra thread)
+        falhou ou se o disjuntor está aberto
+    """
+    timeout = timeout or TIMEOUT_API_SEGUNDOS
+    prazo = time.monotonic() + timeout
+    chave = _chave(lat, lon)
+    with _lock:
+        # Outra thread pode ter acabado de preencher a memória
+        item = None if renovar else _memoria.get(chave)
+        if item and item[0] > time.monotonic():
+            return dict(item[1])
+        voo = _em_voo.get(chave)
+        lider = voo is None
+        if lider:
+            voo = _em_voo[chave] = _Voo()
+        else:
+            _metricas["coalescidas"] += 1
+
+    if not lider:
+        voo.evento.wait(min(SINGLE_FLIGHT_TIMEOUT, max(0.0, prazo - time.monotonic())))
+        return dict(voo.resultado) if voo.resultado else None
+
+    try:
+        if not _disjuntor.permitir():
+            _contar("disjuntor_rejeitadas")
+            return None
+        _contar("api_chamadas")
+        inicio = time.perf_counter()
+        try:
+            real = obter_clima_real(*_celula(lat, lon), prazo=prazo)
+        except Exception:
+            _registrar_chamada(inicio, ok=False)
+            raise
+        _registrar_chamada(inicio, ok=True)
+        _save_cache(
+            lat=lat,
+            lon=lon,
+            condicao=real["condicao"],
+            fator=real["fator"],
+            payload=real.get("payload", {}),
+            provider="open-meteo",
+        )
+        voo.resultado = real
+        return real
+    except Exception:
+        _contar("api_erros")
+        return None
+    finally:
+        with _lock:
+            _em_voo.pop(chave, None)
+        voo.evento.set()
+
+
+def _revalidar_em_segundo_plano(lat: float, lon: float) -> None:
+    """
+    Renova a coordenada sem bloquear quem chamou: pelo agendador, se ativo,
+    senão numa thread própria (uma por coordenada).
+    """
+    busca = _busca_em_segundo_plano
+    if busca is not None:
+        busca(lat, lon)
+        return
+
+    chave = _chave(lat, lon)
+    with _lock:
+        if chave in _revalidando or chave in _em_voo:
+            return
+        _revalidando.add(chave)
+
+    def renovar():
+        try:
+            _buscar_api_single_flight(lat, lon, renovar=True)
+        finally:
+            with _lock:
+                _revalidando.discard(chave)
+            _liberar_conexao()
+
+    threading.Thread(target=renovar, name="clima-revalidar", daemon=True).start()
+
 
 def calcular_fator_climatico(condicao: str) -> float:
     """
@@ -159,6 +601,20 @@ def calcular_fator_climatico(condicao: str) -> float:
     return FATORES_CLIMATICOS.get(condicao_lower, FATORES_CLIMATICOS[CondicaoClimatica.NORMAL.value])
 
 
+# Limiares de chuva acumulada em 7 dias (mm)
+CHUVA_7D_CHUVOSO = 35
+CHUVA_7D_SECA = 10
+
+
+def condicao_por_chuva_7d(chuva_7d: float) -> str:
+    """Classificação só pela chuva de 7 dias (também usada na série diária)."""
+    if chuva_7d >= CHUVA_7D_CHUVOSO:
+        return CondicaoClimatica.CHUVIDOSO.value
+    if chuva_7d <= CHUVA_7D_SECA:
+        return CondicaoClimatica.SECA.value
+    return CondicaoClimatica.NORMAL.value
+
+
 def _inferir_condicao_por_open_meteo(payload: dict) -> str:
     """
     Regras simples para classificar condição climática com base em previsão Open-Meteo.
@@ -171,10 +627,10 @@ def _inferir_condicao_por_open_meteo(payload: dict) -> str:
     umidade = current.get("relative_humidity_2m")
 
     # Regras iniciais (Fase 1) - simples e estáveis
-    if chuva_7d >= 35:
+    if chuva_7d >= CHUVA_7D_CHUVOSO:
         return CondicaoClimatica.CHUVIDOSO.value
 
-    if chuva_7d <= 10:
+    if chuva_7d <= CHUVA_7D_SECA:
         # Se pouca chuva e umidade baixa, seca
         if umidade is not None and float(umidade) < 55:
             return CondicaoClimatica.SECA.value
@@ -184,42 +640,28 @@ def _inferir_condicao_por_open_meteo(payload: dict) -> str:
     return CondicaoClimatica.NORMAL.value
 
 
-def obter_clima_real(lat: float, lon: float) -> dict:
-    """
-    Busca clima real no Open-Meteo e retorna condição + fator + payload resumido.
-
-    Args:
-        lat: Latitude
-        lon: Longitude
-
-    Returns:
-        Dict com dados climáticos processados
-
-    Raises:
-        Exception em erro de rede/parsing
-    """
+def _consulta_open_meteo(latitudes: list, longitudes: list) -> str:
+    """URL da previsão para uma ou várias coordenadas (listas separadas por vírgula)."""
     query = urlencode({
-        "latitude": lat,
-        "longitude": lon,
+        "latitude": ",".join(str(v) for v in latitudes),
+        "longitude": ",".join(str(v) for v in longitudes),
         "current": "temperature_2m,relative_humidity_2m,precipitation",
         "daily": "precipitation_sum,temperature_2m_max,temperature_2m_min",
         "forecast_days": 7,
         "timezone": "auto",
     })
+    return f"{OPEN_METEO_URL}?{query}"
 
-    url = f"{OPEN_METEO_URL}?{query}"
-
-    with urlopen(url, timeout=12) as resp:
-        raw = resp.read().decode("utf-8")
-        payload = json.loads(raw)
 
+def _resumir_open_meteo(lat: float, lon: float, payload: dict) -> dict:
+    """Condição + fator + campos de exibição a partir da resposta de uma coordenada."""
     condicao = _inferir_condicao_por_open_meteo(payload)
     fator = calcular_fator_climatico(condicao)
 
     current = payload.get("current", {}) or {}
     daily = payload.get("daily", {}) or {}
 
-    resumo = {
+    return {
         "condicao": condicao,
         "fator": fator,
         "fonte": "api",
@@ -234,7 +676,121 @@ def obter_clima_real(lat: float, lon: float) -> dict:
         "payload": payload,
     }
 
-    return resumo
+
+def _ler_json(url: str, prazo: float):
+    """
+    GET + json.loads com prazo de relógio (time.monotonic()): o timeout de
+    urlopen vale por operação de socket, então uma resposta que chega aos
+    poucos passaria dele. Aqui cada leitura só espera o que resta do prazo.
+
+    Raises:
+        TimeoutError se o prazo passar antes do fim da resposta
+    """
+    def restante():
+        segundos = prazo - time.monotonic()
+        if segundos <= 0:
+            raise TimeoutError("prazo da chamada ao Open-Meteo esgotado")
+        return segundos
+
+    with urlopen(url, timeout=restante()) as resp:
+        sock = getattr(getattr(getattr(resp, "fp", None), "raw", None), "_sock", None)
+        blocos = []
+        while True:
+            segundos = restante()
+            if sock is not None:
+                sock.settimeout(segundos)
+            bloco = resp.read1(LEITURA_BLOCO_BYTES)
+            if not bloco:
+                break
+            blocos.append(bloco)
+    return json.loads(b"".join(blocos).decode("utf-8"))
+
+
+def obter_clima_real(lat: float, lon: float, timeout: Optional[float] = None,
+                     prazo: Optional[float] = None) -> dict:
+    """
+    Busca clima real no Open-Meteo e retorna condição + fator + payload resumido.
+
+    Args:
+        lat: Latitude
+        lon: Longitude
+        timeout: Segundos para a chamada inteira (padrão TIMEOUT_API_SEGUNDOS)
+        prazo: Instante limite em time.monotonic() (tem precedência sobre timeout)
+
+    Returns:
+        Dict com dados climáticos processados
+
+    Raises:
+        Exception em erro de rede/parsing (TimeoutError se o prazo passar)
+    """
+    if prazo is None:
+        prazo = time.monotonic() + (timeout or TIMEOUT_API_SEGUNDOS)
+    payload = _ler_json(_consulta_open_meteo([lat], [lon]), prazo)
+
+    return _resumir_open_meteo(lat, lon, payload)
+
+
+def obter_clima_lote(coords: list, tamanho_lote: Optional[int] = None,
+                     prazo: Optional[float] = None) -> list:
+    """
+    Busca várias coordenadas no Open-Meteo com poucas requisições (listas de
+    latitude/longitude separadas por vírgula) e grava tudo no clima_cache.
+
+    Args:
+        coords: Lista de (lat, lon); as da mesma célula da grade são
+            buscadas uma vez (pelo ponto da célula)
+        tamanho_lote: Coordenadas por requisição (padrão LOTE_MAX_COORDENADAS)
+        prazo: Instante limite em time.monotonic() para o conjunto; passado,
+            os lotes restantes não são pedidos (cada lote também para em
+            TIMEOUT_API_SEGUNDOS)
+
+    Returns:
+        Lista alinhada com coords: dict de obter_clima_real, ou None se a
+        requisição do lote daquela coordenada falhou, foi barrada pelo
+        disjuntor ou ficou para depois do prazo
+    """
+    tamanho = tamanho_lote or LOTE_MAX_COORDENADAS
+    unicas = {}
+    for lat, lon in coords:
+        unicas.setdefault(_chave(lat, lon), (lat, lon))
+    pendentes = list(unicas.items())
+
+    resultados = {}
+    for inicio in range(0, len(pendentes), tamanho):
+        lote = pendentes[inicio:inicio + tamanho]
+        latitudes = [chave[0] for chave, _ in lote]
+        longitudes = [chave[1] for chave, _ in lote]
+        agora = time.monotonic()
+        if prazo is not None and agora >= prazo:
+            break
+        if not _disjuntor.permitir():
+            _contar("disjuntor_rejeitadas")
+            continue
+        _contar("api_chamadas")
+        t0 = time.perf_counter()
+        limite = agora + TIMEOUT_API_SEGUNDOS if prazo is None else min(prazo, agora + TIMEOUT_API_SEGUNDOS)
+        try:
+            payloads = _ler_json(_consulta_open_meteo(latitudes, longitudes), limite)
+            # Uma coordenada: objeto; várias: lista na mesma ordem da consulta
+            if isinstance(payloads, dict):
+                payloads = [payloads]
+            if len(payloads) != len(lote):
+                raise ValueError(f"Open-Meteo devolveu {len(payloads)} locais para {len(lote)} coordenadas")
+        except Exception:
+            _registrar_chamada(t0, ok=False)
+            _contar("api_erros")
+            continue
+        _registrar_chamada(t0, ok=True)
+
+        reais = [_resumir_open_meteo(lat, lon, payload) for (_, (lat, lon)), payload in zip(lote, payloads)]
+        _salvar_cache_lote([
+            (lat, lon, real["condicao"], real["fator"], real["payload"])
+            for (_, (lat, lon)), real in zip(lote, reais)
+        ])
+        for (chave, _), real in zip(lote, reais):
+            resultados[chave] = real
+
+    return [resultados.get(_chave(lat, lon)) for lat, lon in coords]
 
 
 def obter_clima_simulado(lat: float, lon: float) -> dict:
@@ -260,35 +816,59 @@ def obter_clima_simulado(lat: float, lon: float) -> dict:
     }
 
 
-def obter_clima_com_fallback(lat: float, lon: float, prefer_cache: bool = True) -> dict:
+def obter_clima_com_fallback(lat: float, lon: float, prefer_cache: bool = True,
+                             servir_expirado: Optional[bool] = None) -> dict:
     """
     Estratégia Fase 1:
-    1) cache válido
-    2) API real
+    1) cache válido (memória, depois SQLite)
+    1b) cache expirado há menos de STALE_MAX_HORAS: devolvido na hora
+        (fonte='stale', idade_segundos) e renovado em segundo plano
+    2) API real (single-flight por coordenada), esperando no máximo
+       ORCAMENTO_REQUISICAO_SEGUNDOS; com o agendador ativo a busca vai para
+       segundo plano, e com o disjuntor aberto não há busca: a requisição
+       segue direto para o passo 3
     3) simulado
     4) normal seguro
+
+    servir_expirado: liga/desliga o passo 1b (padrão SERVIR_EXPIRADO)
     """
-    # 1) cache
+    # 1) cache (memória, depois clima_cache)
     if prefer_cache:
+        chave = _chave(lat, lon)
+        cache = _memoria_get(chave)
+        if cache:
+            return cache
         cache = _get_cache(lat, lon)
         if cache:
+            _contar("sqlite_hits")
+            _memoria_set(chave, cache)
             return cache
+        _contar("sqlite_misses")
 
-    # 2) API real
-    try:
-        real = obter_clima_real(lat, lon)
-        _save_cache(
-            lat=lat,
-            lon=lon,
-            condicao=real["condicao"],
-            fator=real["fator"],
-            payload=real.get("payload", {}),
-            provider="open-meteo",
-        )
+        # 1b) expirado recente: responde já e renova fora da requisição
+        if SERVIR_EXPIRADO if servir_expirado is None else servir_expirado:
+            expirado = _get_cache_expirado(lat, lon, STALE_MAX_HORAS)
+            if expirado:
+                _contar("stale_servidos")
+                _revalidar_em_segundo_plano(lat, lon)
+                return expirado
+
+        # Agendador ativo: a requisição só lê o cache
+        busca = _busca_em_segundo_plano
+        if busca is not None:
+            busca(lat, lon)
+            return _fallback_sem_api(lat, lon)
+
+    # 2) API real (uma busca por coordenada, as demais esperam), dentro do orçamento
+    real = _buscar_api_single_flight(lat, lon, timeout=ORCAMENTO_REQUISICAO_SEGUNDOS)
+    if real:
         return real
-    except Exception:
-        pass
 
+    return _fallback_sem_api(lat, lon)
+
+
+def _fallback_sem_api(lat: float, lon: float) -> dict:
+    """Passos 3 e 4 de obter_clima_com_fallback."""
     # 3) simulado
     try:
         return obter_clima_simulado(lat, lon)
@@ -306,6 +886,134 @@ def obter_clima_com_fallback(lat: float, lon: float, prefer_cache: bool = True)
     }
 
 
+# ========== CLIMA POR PIQUETE (CACHE POR FAZENDA) ==========
+# Todos os piquetes de uma fazenda resolvem para a mesma condição climática;
+# o resultado fica em memória por fazenda_id durante CLIMA_FAZENDA_TTL segundos
+# (LRU limitado a CLIMA_FAZENDA_MAX fazendas). atualizar_fazenda invalida.
+CLIMA_FAZENDA_TTL = 15 * 60
+CLIMA_FAZENDA_MAX = 1000
+_clima_fazenda = OrderedDict()  # fazenda_id -> (expira_em, (condicao, fonte, celula))
+_clima_fazenda_lock = threading.Lock()
+_clima_fazenda_geracao = [0]  # muda a cada invalidação; descarta resoluções em andamento
+
+
+def invalidar_clima_fazenda(fazenda_id: Optional[int] = None) -> None:
+    """Descarta a condição em cache da fazenda (ou de todas, sem argumento)."""
+    with _clima_fazenda_lock:
+        if fazenda_id is None:
+            _clima_fazenda.clear()
+        else:
+            _clima_fazenda.pop(fazenda_id, None)
+        _clima_fazenda_geracao[0] += 1
+
+
+def _get_fazenda_clima_config(fazenda_id: Optional[int]) -> Optional[dict]:
+    """Retorna config de clima da fazenda."""
+    if not fazenda_id:
+        return None
+    conn = _get_db()
+    cursor = conn.cursor()
+    cursor.execute('''
+        SELECT latitude_sede, longitude_sede, clima_modo, condicao_climatica_manual
+        FROM fazendas
+        WHERE id = ?
+    ''', (fazenda_id,))
+    row = cursor.fetchone()
+    conn.close()
+    return dict(row) if row else None
+
+
+def resolver_clima_piquete(piquete: dict, cache: Optional[dict] = None) -> tuple:
+    """
+    Resolve a condição climática do piquete com prioridade:
+    1) Se piquete tem condicao_climatica explícita E não for 'normal', usar ela
+    2) config da fazenda (se modo manual)
+    3) clima automático por coordenada da fazenda
+    4) normal
+
+    Args:
+        piquete: Dict com condicao_climatica, fazenda_id e, opcionalmente,
+            fazenda_latitude/fazenda_longitude
+        cache: Dict opcional para reaproveitar o resultado da fazenda
+            (passos 2-4) entre vários piquetes da mesma listagem
+
+    Returns:
+        (condicao, fonte, celula): celula é a célula do clima automático
+        (lat, lon) para a série diária; None quando a condição é manual ou
+        não veio de coordenada
+    """
+    # Primeiro, verificar se o piquete tem uma condição climática específica (não padrão 'normal')
+    cond_manual = (piquete.get('condicao_climatica') or '').strip().lower()
+
+    # Se o piquete tem uma condição explícita (não 'normal'), usar ela
+    if cond_manual and cond_manual != 'normal' and cond_manual in ('seca', 'normal', 'chuvoso'):
+        return cond_manual, 'manual', None
+
+    # Caso contrário, buscar da fazenda
+    fazenda_id = piquete.get('fazenda_id')
+    lat = piquete.get('fazenda_latitude')
+    lon = piquete.get('fazenda_longitude')
+
+    if cache is None:
+        return _resolver_condicao_climatica_fazenda(fazenda_id, lat, lon)
+    chave = (fazenda_id, lat, lon)
+    if chave not in cache:
+        cache[chave] = _resolver_condicao_climatica_fazenda(fazenda_id, lat, lon)
+    return cache[chave]
+
+
+def _resolver_condicao_climatica_fazenda(fazenda_id, lat, lon) -> tuple:
+    """Passos 2-4 de resolver_clima_piquete (só dependem da fazenda)."""
+    # Coordenadas vindas do piquete não são cacheadas (a chave é só a fazenda)
+    if not fazenda_id or lat is not None or lon is not None:
+        return _calcular_condicao_climatica_fazenda(fazenda_id, lat, lon)
+
+    with _clima_fazenda_lock:
+        item = _clima_fazenda.get(fazenda_id)
+        if item and item[0] > time.monotonic():
+            _clima_fazenda.move_to_end(fazenda_id)
+            return item[1]
+        geracao = _clima_fazenda_geracao[0]
+
+    resultado = _calcular_condicao_climatica_fazenda(fazenda_id, lat, lon)
+
+    with _clima_fazenda_lock:
+        if geracao == _clima_fazenda_geracao[0]:
+            _clima_fazenda[fazenda_id] = (time.monotonic() + CLIMA_FAZENDA_TTL, resultado)
+            _clima_fazenda.move_to_end(fazenda_id)
+            while len(_clima_fazenda) > CLIMA_FAZENDA_MAX:
+                _clima_fazenda.popitem(last=False)
+    return resultado
+
+
+def _calcular_condicao_climatica_fazenda(fazenda_id, lat, lon) -> tuple:
+    """Resolução sem cache: config da fazenda e, se automático, clima por coordenada."""
+    if fazenda_id:
+        cfg = _get_fazenda_clima_config(fazenda_id)
+        if cfg:
+            clima_modo = (cfg.get('clima_modo') or 'automatico').lower()
+            cond_fazenda_manual = (cfg.get('condicao_climatica_manual') or 'normal').lower()
+
+            if clima_modo == 'manual' and cond_fazenda_manual in ('seca', 'normal', 'chuvoso'):
+                return cond_fazenda_manual, 'manual_fazenda', None
+
+            if lat is None:
+                lat = cfg.get('latitude_sede')
+            if lon is None:
+                lon = cfg.get('longitude_sede')
+
+    if lat is not None and lon is not None:
+        try:
+            clima = obter_clima_com_fallback(lat, lon, prefer_cache=True)
+            cond = (clima.get('condicao') or 'normal').lower()
+            if cond in ('seca', 'normal', 'chuvoso'):
+                return cond, clima.get('fonte', 'api'), _celula(lat, lon)
+        except Exception:
+            pass
+
+    return 'normal', 'fallback', None
+
+
 # ========== HELPERS ==========
 def get_descricao_clima(condicao: str) -> str:
     """
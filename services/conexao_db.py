@@ -0,0 +1,190 @@
+"""
+Camada de Conexão SQLite - PastoFlow
+Uma conexão por requisição Flask (ou por thread fora de requisição),
+reaproveitada de um pool e configurada uma única vez com o perfil de PRAGMAs.
+
+Uso:
+    from services.conexao_db import get_db
+
+    conn = get_db()
+    cursor = conn.cursor()
+    ...
+    conn.close()  # devolve o "empréstimo"; a conexão física continua aberta
+
+Regras:
+    - Dentro de uma requisição todas as chamadas a get_db() recebem a MESMA conexão.
+      Ela volta ao pool no teardown do app context (ver init_app).
+    - Fora de requisição (scripts, jobs, testes) a conexão fica presa à thread
+      até liberar_conexao() ser chamado.
+    - close() não fecha a conexão física: desfaz transação pendente quando o
+      último "empréstimo" é devolvido, como aconteceria ao fechar uma conexão nova.
+    - sqlite3 mantém cache de prepared statements por conexão (cached_statements),
+      então reaproveitar a conexão também reaproveita os statements já compilados.
+    - commit() vale para a conexão inteira, inclusive o que o chamador ainda não
+      terminou. Helper chamado no meio de uma gravação não commita: recebe o
+      cursor de quem abriu a transação (ex.: clima_diario_service.salvar_series)
+      e o commit fica com o chamador mais externo.
+    - O caminho do banco muda com configurar(): leia conexao_db.DB_PATH pelo
+      módulo, nunca com "from services.conexao_db import DB_PATH".
+"""
+import os
+import queue
+import sqlite3
+import threading
+
+from flask import g, has_app_context
+
+
+# ========== CONFIG ==========
+DB_PATH = os.environ.get('PASTOFLOW_DB_PATH') or os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "pastagens.db"
+)
+POOL_TAMANHO = 8          # conexões ociosas mantidas entre requisições
+CACHE_STATEMENTS = 256    # prepared statements em cache por conexão
+
+# Perfil aplicado uma vez por conexão física
+PRAGMAS = (
+    ('journal_mode', 'WAL'),       # leitores não bloqueiam o escritor
+    ('synchronous', 'NORMAL'),     # seguro com WAL, bem menos fsync
+    ('cache_size', -16000),        # ~16 MB de page cache
+    ('mmap_size', 268435456),      # 256 MB mapeados em memória
+    ('temp_store', 'MEMORY'),      # ORDER BY/GROUP BY temporários em RAM
+    ('busy_timeout', 5000),        # espera até 5 s por lock em vez de falhar
+)
+
+_config = {'reutilizar': True}
+_pool = queue.LifoQueue(maxsize=POOL_TAMANHO)
+_local = threading.local()
+_lock_stats = threading.Lock()
+_stats = {'conexoes_abertas': 0, 'emprestimos': 0}
+
+
+class ConexaoCompartilhada(sqlite3.Connection):
+    """Conexão sqlite3 cujo close() devolve o empréstimo em vez de fechar."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.emprestimos = 0
+        self.compartilhada = True
+
+    def close(self):
+        if not self.compartilhada:
+            super().close()
+            return
+        self.emprestimos = max(0, self.emprestimos - 1)
+        if self.emprestimos == 0 and self.in_transaction:
+            # Mesmo efeito de fechar uma conexão com transação não commitada
+            self.rollback()
+
+    def fechar(self):
+        """Fecha a conexão física."""
+        super().close()
+
+
+def _contar(chave):
+    with _lock_stats:
+        _stats[chave] += 1
+
+
+def _nova_conexao(compartilhada=True):
+    conn = sqlite3.connect(
+        DB_PATH,
+        factory=ConexaoCompartilhada,
+        check_same_thread=False,
+        cached_statements=CACHE_STATEMENTS,
+    )
+    conn.row_factory = sqlite3.Row
+    conn.compartilhada = compartilhada
+    conn.caminho = DB_PATH
+    if compartilhada:
+        for nome, valor in PRAGMAS:
+            conn.execute(f'PRAGMA {nome} = {valor}')
+    _contar('conexoes_abertas')
+    return conn
+
+
+def _holder():
+    """Onde a conexão atual fica guardada: g (requisição) ou thread-local."""
+    return g if has_app_context() else _local
+
+
+def get_db():
+    """
+    Retorna a conexão da requisição/thread atual.
+
+    Returns:
+        sqlite3.Connection: Conexão com row_factory = sqlite3.Row.
+    """
+    _contar('emprestimos')
+    if not _config['reutilizar']:
+        return _nova_conexao(compartilhada=False)
+
+    holder = _holder()
+    conn = getattr(holder, '_pastoflow_conn', None)
+    if conn is None or conn.caminho != DB_PATH:
+        try:
+            conn = _pool.get_nowait()
+            if conn.caminho != DB_PATH:
+                conn.fechar()
+                conn = _nova_conexao()
+        except queue.Empty:
+            conn = _nova_conexao()
+        holder._pastoflow_conn = conn
+    conn.emprestimos += 1
+    return conn
+
+
+def liberar_conexao(exc=None):
+    """Devolve a conexão da requisição/thread atual ao pool."""
+    holder = _holder()
+    conn = getattr(holder, '_pastoflow_conn', None)
+    if conn is None:
+        return
+    holder._pastoflow_conn = None
+    conn.emprestimos = 0
+    try:
+        if conn.in_transaction:
+            conn.rollback()
+        if conn.caminho == DB_PATH:
+            _pool.put_nowait(conn)
+            return
+    except (queue.Full, sqlite3.Error):
+        pass
+    conn.fechar()
+
+
+def init_app(app):
+    """Registra a devolução da conexão ao pool no fim de cada app context."""
+    app.teardown_appcontext(liberar_conexao)
+
+
+def configurar(db_path=None, reutilizar=None):
+    """
+    Troca o banco e/ou o modo de conexão (usado por testes e benchmarks).
+
+    Args:
+        db_path: Novo caminho do banco (None mantém o atual)
+        reutilizar: False volta ao modo antigo (uma conexão nova por get_db)
+    """
+    global DB_PATH
+    liberar_conexao()
+    if db_path is not None:
+        DB_PATH = db_path
+    if reutilizar is not None:
+        _config['reutilizar'] = reutilizar
+    # Conexões ociosas de outro banco/modo não servem mais
+    while True:
+        try:
+            _pool.get_nowait().fechar()
+        except queue.Empty:
+            break
+
+
+def estatisticas(zerar=False):
+    """Contadores de conexões físicas abertas e de chamadas a get_db()."""
+    with _lock_stats:
+        atual = dict(_stats)
+        if zerar:
+            for chave in _stats:
+                _stats[chave] = 0
+    return atual
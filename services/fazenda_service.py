@@ -15,26 +15,9 @@ Testes:
     - test_fazenda_service.py
     - Coverage: Empty state, Normal state, Extreme (100+), Edge cases
 """
-import sqlite3
-import os
 from datetime import datetime
 from simular_data import now as data_teste_now  # Suporte a data de teste
-
-
-# ========== CONSTANTES ==========
-DB_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "pastagens.db")
-
-
-def get_db():
-    """
-    Retorna conexao com o banco de dados.
-    
-    Returns:
-        sqlite3.Connection: Conexao SQLite configurada com row_factory.
-    """
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row
-    return conn
+from services.conexao_db import get_db  # Conexao compartilhada por requisicao
 
 
 def gerar_resumo_geral(fazenda_id: int) -> dict:
@@ -128,18 +111,18 @@ def gerar_resumo_geral(fazenda_id: int) -> dict:
     # Área de descanso = SOMENTE status EM_DESCANSO (alinhado com a lógica da IA Rotação)
     # Contagem de "prontos" e "críticos" também segue o status da IA Rotação.
     from services.rotacao_service import calcular_status_piquete
-    from database import calcular_altura_estimada
+    from services.altura_service import calcular_alturas_estimadas
 
     area_descanso = 0
     piquetes_prontos = 0
     piquetes_criticos = 0
 
-    for p in piquetes:
-        # Calcular altura_estimada consistente com a IA Rotação, quando houver medição
-        if p.get('altura_estimada') is None and p.get('data_medicao'):
-            altura_calc, _fonte = calcular_altura_estimada(p)
-            p['altura_estimada'] = altura_calc
+    # Calcular altura_estimada consistente com a IA Rotação, quando houver medição
+    sem_estimativa = [p for p in piquetes if p.get('altura_estimada') is None and p.get('data_medicao')]
+    for p, (altura_calc, _fonte) in zip(sem_estimativa, calcular_alturas_estimadas(sem_estimativa)):
+        p['altura_estimada'] = altura_calc
 
+    for p in piquetes:
         status = calcular_status_piquete(p).get('status')
 
         # Considerar como "desocupado":
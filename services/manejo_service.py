@@ -2,7 +2,9 @@
 Serviços de Manejo de Pastagens
 Funções isoladas para regras de negócio relacionadas a manejo de piquetes e lotes.
 """
+from services import capim_service
 from services.clima_service import calcular_fator_climatico
+from services.clima_diario_service import fator_integrado
 
 
 # ========== CONSTANTES ==========
@@ -292,16 +294,8 @@ def classificar_lotacao(taxa_animais_ha: float) -> str:
 
 
 # ========== CONSUMO BASE POR CAPIM ==========
-# Valores base de consumo (cm/animal/dia) em lotação de 2 UA/ha
-CONSUMO_BASE_CAPIM = {
-    'Marandu': 0.85, 'Piatã': 0.90, 'Xaraés': 0.95, 'Paiaguás': 0.85,
-    'Decumbens': 0.75, 'Humidicola': 0.70, 'MG-5': 0.95,
-    'Mombaça': 1.00, 'Tanzânia': 0.95, 'Zuri': 1.05, 'Massai': 0.90, 'Aruana': 0.85,
-    'Tifton 85': 0.70, 'Tifton 68': 0.70, 'Coastcross': 0.75, 'Jiggs': 0.72,
-    'Andropogon': 0.80, 'Capim Elefante': 1.10, 'Capiaçu': 1.15,
-    # compatibilidade
-    'Brachiaria': 0.85, 'Capim Aruana': 0.85, 'Natalino': 0.80,
-}
+# Valores base de consumo (cm/animal/dia) em lotação de 2 UA/ha: registro de
+# capins (services/capim_service.py), com os padrões técnicos e a tabela capins.
 
 
 def get_consumo_base(capim: str) -> float:
@@ -314,7 +308,7 @@ def get_consumo_base(capim: str) -> float:
     Returns:
         Consumo base (cm/animal/dia em 2 UA/ha) ou valor padrão
     """
-    return CONSUMO_BASE_CAPIM.get(capim, 0.8)
+    return capim_service.consumo_base(capim)
 
 
 # ========== MODELO FUTURO (NÍVEL 3) - PREPARADO ==========
@@ -416,16 +410,7 @@ def calcular_crescimento_diario(capim: str) -> float:
     Returns:
         Crescimento base (cm/dia)
     """
-    crescimento = {
-        'Marandu': 1.2, 'Piatã': 1.3, 'Xaraés': 1.6, 'Paiaguás': 1.2,
-        'Decumbens': 1.0, 'Humidicola': 0.8, 'MG-5': 1.6,
-        'Mombaça': 2.5, 'Tanzânia': 2.3, 'Zuri': 2.6, 'Massai': 1.8, 'Aruana': 1.7,
-        'Tifton 85': 2.0, 'Tifton 68': 2.0, 'Coastcross': 1.6, 'Jiggs': 1.9,
-        'Andropogon': 1.8, 'Capim Elefante': 3.5, 'Capiaçu': 4.0,
-        # compatibilidade
-        'Brachiaria': 1.2, 'Capim Aruana': 1.7, 'Natalino': 1.8,
-    }
-    return crescimento.get(capim, 1.2)
+    return capim_service.crescimento_diario(capim)
 
 
 def calcular_altura_descanso(
@@ -434,10 +419,16 @@ def calcular_altura_descanso(
     capim: str,
     condicao_climatica: str = "normal",
     altura_entrada: float = None,
-    detalhar: bool = False
+    detalhar: bool = False,
+    data_inicio=None,
+    latitude: float = None,
+    longitude: float = None
 ) -> float | dict:
     """
     Calcula a altura estimada do pasto durante descanso considerando fator climático.
+
+    Com data_inicio e coordenadas, o fator de cada dia do descanso vem da série
+    diária (clima_diario, integral em O(1)); dias sem série usam a condição atual.
     
     Args:
         altura_saida: Altura mínima de saída (cm)
@@ -446,6 +437,9 @@ def calcular_altura_descanso(
         condicao_climatica: Condição climática ('seca', 'normal', 'chuvoso')
         altura_entrada: Altura de entrada para cálculo do limite máximo (opcional)
         detalhar: Se True, retorna dict com detalhes
+        data_inicio: Primeiro dia do descanso (date, opcional)
+        latitude: Latitude da fazenda para a série diária (opcional)
+        longitude: Longitude da fazenda para a série diária (opcional)
     
     Returns:
         Se detalhar=False: altura_estimada (float)
@@ -479,9 +473,21 @@ def calcular_altura_descanso(
     
     # Crescimento real com ajuste climático
     crescimento_real = crescimento_base * fator_climatico
-    
+
+    # Série diária: soma dos fatores reais do período
+    dias_com_serie = 0
+    if data_inicio is not None and latitude is not None and longitude is not None:
+        soma_fatores, dias_com_serie = fator_integrado(
+            latitude, longitude, data_inicio, dias_descanso, fator_climatico
+        )
+
     # Altura estimada
-    altura_estimada = altura_saida + (dias_descanso * crescimento_real)
+    if dias_com_serie:
+        altura_estimada = altura_saida + crescimento_base * soma_fatores
+        fator_climatico = soma_fatores / dias_descanso
+        crescimento_real = crescimento_base * fator_climatico
+    else:
+        altura_estimada = altura_saida + (dias_descanso * crescimento_real)
     
     # ========== LIMITE MÁXIMO ==========
     # Limite: altura máxima é 1.5x a altura de entrada (evita crescimento infinito)
@@ -497,6 +503,7 @@ def calcular_altura_descanso(
             "fator_climatico": round(fator_climatico, 2),
             "crescimento_real": round(crescimento_real, 2),
             "dias_descanso": dias_descanso,
+            "dias_com_serie": dias_com_serie,
             "altura_saida": altura_saida,
             "limite_maximo": round(limite_maximo, 1),
             "foi_limitada": altura_estimada >= limite_maximo,
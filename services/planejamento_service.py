@@ -0,0 +1,472 @@
+# -*- coding: utf-8 -*-
+"""
+Planejamento da Rotação (calendário de pastejo)
+Monta o calendário da temporada num horizonte móvel (HORIZONTE_DIAS a partir
+de hoje): qual lote entra em qual piquete e em que data. Parte do estado da
+simulação (simulacao_service.carregar_estado) e avança dia a dia: os lotes
+saem na data prevista e cada lote sem piquete, do maior para o menor em UA,
+entra no piquete apto com mais capim acima da altura de entrada (sem lote,
+desbloqueado, dias_descanso_min cumpridos e lotação dentro do limite), onde
+fica até a altura de saída (calcular_dias_tecnicos).
+
+O plano fica em memória por fazenda. Movimentações, medições e cadastros só
+o marcam como desatualizado: invalidar_plano neste processo e, para os
+outros workers, a geração da fazenda que os gatilhos da migração 013 somam
+em fazenda_geracoes. O recálculo compara o estado novo com o do plano
+anterior e refaz a partir do primeiro dia em que um piquete ou lote
+alterado pesa numa decisão, reaproveitando os dias de antes.
+"""
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from simular_data import now as data_teste_now
+from services.conexao_db import get_db
+from services.manejo_service import (
+    TAXA_MAXIMA_LOTACAO,
+    calcular_dias_tecnicos,
+    calcular_peso_total_categoria,
+    calcular_ua_total,
+)
+from services.rotacao_service import calcular_dias_descanso_necessarios
+from services.simulacao_service import _consumo_lote, carregar_estado, simular
+
+
+# ========== CONFIG ==========
+HORIZONTE_DIAS = 60
+HORIZONTE_MAXIMO = 365
+PLANO_TTL = 15 * 60   # segundos; depois disso o estado é conferido de novo mesmo sem alteração
+PLANOS_MAX = 100      # fazendas com plano em memória (LRU)
+SEM_SAIDA = 10 ** 6   # lote sem data de saída prevista: fica o horizonte todo
+NUNCA = -10 ** 6      # piquete sem movimentação: descanso já cumprido
+
+CAMPOS_PIQUETE = ('h', 'ocupantes', 'consumo', 'livre_desde')
+CAMPOS_LOTE = ('lote_piquete', 'lote_saida', 'taxa', 'espera')
+
+_planos = OrderedDict()  # fazenda_id -> plano (contexto, registro diário, eventos, resultado)
+_geracoes = {}           # fazenda_id -> contador de invalidações (None: invalidação de todas)
+_lock = threading.Lock()
+_em_segundo_plano = [None]  # callback(fazenda_id) registrado pelo agendador
+
+
+# ========== ESTADO ==========
+def _dias_desde(data_iso, hoje):
+    try:
+        data = datetime.fromisoformat(data_iso.replace('Z', '+00:00').replace('+00:00', ''))
+    except (AttributeError, ValueError):
+        return None
+    return (hoje - data.date()).days
+
+
+def _carregar(fazenda_id, horizonte: int) -> dict:
+    """
+    Estado de hoje (o mesmo da simulação) mais o que o planejamento precisa:
+    lotes sem piquete, UA, descanso desde a última movimentação.
+    """
+    base = carregar_estado(fazenda_id, horizonte)
+    piquetes = base['piquetes']
+    hoje = base['hoje']
+
+    conn = get_db()
+    cursor = conn.cursor()
+    cursor.execute('''
+        SELECT id, nome, categoria, quantidade, peso_medio, consumo_base, piquete_atual_id,
+               data_entrada, dias_tecnicos, data_saida_prevista
+        FROM lotes
+        WHERE fazenda_id = ? AND ativo = 1 AND piquete_atual_id IS NULL
+    ''', (fazenda_id,))
+    sem_piquete = [dict(r) for r in cursor.fetchall()]
+    conn.close()
+
+    n = len(piquetes)
+    indice = {p['id']: j for j, p in enumerate(piquetes)}
+    lotes = sorted(base['lotes'] + sem_piquete, key=lambda l: l['id'])
+    m = len(lotes)
+
+    ocupantes = np.zeros(n, dtype=np.int64)
+    consumo = np.zeros(n, dtype=np.float64)
+    lote_piquete = np.full(m, -1, dtype=np.int64)
+    lote_saida = np.zeros(m, dtype=np.int64)
+    taxa = np.zeros(m, dtype=np.float64)
+    for i, lote in enumerate(lotes):
+        if lote.get('piquete_atual_id') is None:
+            continue
+        j = indice[lote['piquete_atual_id']]
+        lote_piquete[i] = j
+        lote_saida[i] = SEM_SAIDA if lote['dia_saida'] is None else lote['dia_saida']
+        taxa[i] = _consumo_lote(lote, piquetes[j])
+        ocupantes[j] += 1
+        consumo[j] += taxa[i]
+
+    livre_desde = np.zeros(n, dtype=np.int64)
+    for j, p in enumerate(piquetes):
+        if not ocupantes[j]:
+            dias = _dias_desde(p.get('ultima_mov'), hoje)
+            livre_desde[j] = NUNCA if dias is None else -dias
+
+    entrada, saida = base['altura_entrada'], base['altura_saida']
+    return {
+        'hoje': hoje,
+        'horizonte': horizonte,
+        'piquetes': piquetes,
+        'lotes': lotes,
+        'piquete_ids': np.array([p['id'] for p in piquetes], dtype=np.int64),
+        'lote_ids': np.array([l['id'] for l in lotes], dtype=np.int64),
+        'saida': saida,
+        'entrada': entrada,
+        'limite': base['limite'],
+        'crescimento': base['crescimento'],
+        'fatores': base['fatores'],
+        'bloqueado': np.array([bool(p.get('bloqueado')) for p in piquetes], dtype=bool),
+        'area': np.array([p.get('area') or 0 for p in piquetes], dtype=np.float64),
+        'descanso_min': np.array([
+            p['dias_descanso_min'] if p.get('dias_descanso_min') is not None
+            else calcular_dias_descanso_necessarios(p.get('capim'), entrada[j], saida[j])
+            for j, p in enumerate(piquetes)
+        ], dtype=np.int64),
+        'ua': np.array([
+            calcular_ua_total(calcular_peso_total_categoria(l.get('quantidade') or 0, l.get('categoria'),
+                                                            l.get('peso_medio')))
+            for l in lotes
+        ], dtype=np.float64),
+        # Atributos que mudam o consumo de um lote num piquete (_consumo_lote)
+        'assinatura_piquetes': [(p.get('capim'), p.get('possui_cocho'), p.get('percentual_suplementacao'))
+                                for p in piquetes],
+        'assinatura_lotes': [(l.get('quantidade'), l.get('categoria'), l.get('peso_medio'), l.get('consumo_base'))
+                             for l in lotes],
+        'inicial': {
+            'h': base['altura_inicial'],
+            'ocupantes': ocupantes,
+            'consumo': consumo,
+            'livre_desde': livre_desde,
+            'lote_piquete': lote_piquete,
+            'lote_saida': lote_saida,
+            'taxa': taxa,
+            'espera': np.zeros(m, dtype=np.int64),
+        },
+    }
+
+
+def _novo_registro(ctx) -> dict:
+    """Estado no início de cada dia (linha d, antes das saídas) e piquetes aptos por dia."""
+    dias = ctx['horizonte']
+    registro = {campo: np.empty((dias + 1,) + valor.shape, dtype=valor.dtype)
+                for campo, valor in ctx['inicial'].items()}
+    registro['aptos'] = np.zeros((dias, len(ctx['piquetes'])), dtype=bool)
+    registro['decidiu'] = np.zeros(dias, dtype=bool)
+    return registro
+
+
+# ========== DIA A DIA ==========
+def _executar(ctx, estado, registro, eventos, inicio: int, fim: int = None, decidir: bool = True) -> None:
+    """
+    Avança o estado do dia `inicio` até `fim` (padrão: horizonte): saídas,
+    entradas (se `decidir`) e um passo da simulação por dia. Grava cada dia
+    em `registro` e as entradas em `eventos`.
+    """
+    fim = ctx['horizonte'] if fim is None else fim
+    lotes, piquetes = ctx['lotes'], ctx['piquetes']
+    saida, entrada, area, ua = ctx['saida'], ctx['entrada'], ctx['area'], ctx['ua']
+    disponivel = ~ctx['bloqueado']
+    h = estado['h']
+    ocupantes, consumo, livre_desde = estado['ocupantes'], estado['consumo'], estado['livre_desde']
+    lote_piquete, lote_saida, taxa, espera = (estado[c] for c in CAMPOS_LOTE)
+
+    for d in range(inicio, fim):
+        for campo, valor in estado.items():
+            registro[campo][d] = valor
+
+        # Saídas do dia (atrasados saem no dia 0)
+        for i in np.flatnonzero((lote_piquete >= 0) & (lote_saida <= d)):
+            j = lote_piquete[i]
+            ocupantes[j] -= 1
+            consumo[j] = consumo[j] - taxa[i] if ocupantes[j] else 0.0
+            if not ocupantes[j]:
+                livre_desde[j] = d
+            lote_piquete[i] = -1
+            taxa[i] = 0.0
+
+        aptos = (ocupantes == 0) & disponivel & (d - livre_desde >= ctx['descanso_min']) & (h >= entrada)
+        registro['aptos'][d] = aptos
+        esperando = np.flatnonzero(lote_piquete < 0)
+        registro['decidiu'][d] = esperando.size > 0
+
+        # Entradas: maior lote primeiro, no apto com mais capim acima da entrada
+        if decidir and esperando.size:
+            livres = aptos.copy()
+            for i in sorted(esperando, key=lambda i: (-ua[i], i)):
+                candidatos = livres & (ua[i] <= TAXA_MAXIMA_LOTACAO * area)
+                if not candidatos.any():
+                    espera[i] += 1
+                    continue
+                j = int(np.argmax(np.where(candidatos, h - entrada, -np.inf)))
+                t = _consumo_lote(lotes[i], piquetes[j])
+                permanencia = max(1, calcular_dias_tecnicos(float(h[j]), float(saida[j]), t))
+                lote_piquete[i], lote_saida[i], taxa[i] = j, d + permanencia, t
+                ocupantes[j] += 1
+                consumo[j] += t
+                livres[j] = False
+                eventos.append({'dia': d, 'lote': int(i), 'piquete': j, 'saida': d + permanencia,
+                                'altura': float(h[j])})
+
+        h[:] = simular(h, saida, ctx['limite'], ctx['crescimento'], ctx['fatores'][d:d + 1],
+                       consumo[None], (ocupantes > 0)[None])[1]
+
+    for campo, valor in estado.items():
+        registro[campo][fim] = valor
+
+
+def _copiar_estado(estado) -> dict:
+    return {campo: valor.copy() for campo, valor in estado.items()}
+
+
+def _plano_completo(ctx) -> dict:
+    registro = _novo_registro(ctx)
+    eventos = []
+    _executar(ctx, _copiar_estado(ctx['inicial']), registro, eventos, 0)
+    return {'registro': registro, 'eventos': eventos, 'recalculo': 'completo', 'a_partir_do_dia': 0}
+
+
+# ========== RECÁLCULO INCREMENTAL ==========
+def _diferente(a, b):
+    """Comparação elemento a elemento em que NaN == NaN (altura sem estimativa)."""
+    diferente = a != b
+    if a.dtype.kind == 'f':
+        diferente &= ~(np.isnan(a) & np.isnan(b))
+    return diferente
+
+
+def _alterados(anterior, ctx):
+    """(piquetes, lotes) cujo estado de hoje ou atributos mudaram desde o plano anterior."""
+    piquetes = np.zeros(len(ctx['piquetes']), dtype=bool)
+    for campo in ('saida', 'entrada', 'limite', 'crescimento', 'bloqueado', 'area', 'descanso_min'):
+        piquetes |= _diferente(anterior[campo], ctx[campo])
+    piquetes |= _diferente(anterior['fatores'], ctx['fatores']).any(axis=0)
+    piquetes |= np.array([a != b for a, b in zip(anterior['assinatura_piquetes'], ctx['assinatura_piquetes'])],
+                         dtype=bool)
+    for campo in CAMPOS_PIQUETE:
+        piquetes |= _diferente(anterior['inicial'][campo], ctx['inicial'][campo])
+
+    lotes = _diferente(anterior['ua'], ctx['ua'])
+    lotes |= np.array([a != b for a, b in zip(anterior['assinatura_lotes'], ctx['assinatura_lotes'])], dtype=bool)
+    for campo in CAMPOS_LOTE:
+        lotes |= _diferente(anterior['inicial'][campo], ctx['inicial'][campo])
+
+    # O piquete de um lote alterado (antes e agora) também muda
+    for inicial in (anterior['inicial'], ctx['inicial']):
+        posicoes = inicial['lote_piquete'][lotes]
+        piquetes[posicoes[posicoes >= 0]] = True
+    return piquetes, lotes
+
+
+def _plano_incremental(anterior, ctx):
+    """
+    Reaproveita o plano anterior até o primeiro dia em que um piquete ou lote
+    alterado pode mudar uma decisão:
+      - saída ou espera de um lote alterado (no estado antigo ou no novo);
+      - dia com decisão em que um piquete alterado estava apto (antes ou agora).
+    Antes desse dia os alterados não participam de nenhuma decisão, então
+    evoluem sozinhos (trajetória sem decisões) e os demais ficam iguais.
+
+    Returns:
+        Plano novo, ou None se o plano anterior não serve (outro dia, outro
+        horizonte ou piquetes/lotes incluídos e removidos)
+    """
+    antigo = anterior['ctx']
+    if (antigo['hoje'] != ctx['hoje'] or antigo['horizonte'] != ctx['horizonte']
+            or not np.array_equal(antigo['piquete_ids'], ctx['piquete_ids'])
+            or not np.array_equal(antigo['lote_ids'], ctx['lote_ids'])):
+        return None
+
+    piquetes, lotes = _alterados(antigo, ctx)
+    if not piquetes.any() and not lotes.any():
+        return dict(anterior, recalculo='sem_alteracao', a_partir_do_dia=None)
+
+    dias = ctx['horizonte']
+    corte = dias
+    for inicial in (antigo['inicial'], ctx['inicial']):
+        proximo = np.where(inicial['lote_piquete'] < 0, 0, inicial['lote_saida'])[lotes]
+        if proximo.size:
+            corte = min(corte, int(proximo.min()))
+
+    sozinhos = _novo_registro(ctx)
+    _executar(ctx, _copiar_estado(ctx['inicial']), sozinhos, [], 0, fim=corte, decidir=False)
+    velho = anterior['registro']
+    for d in np.flatnonzero(velho['decidiu'][:corte]):
+        if (velho['aptos'][d] & piquetes).any() or (sozinhos['aptos'][d] & piquetes).any():
+            corte = int(d)
+            break
+
+    # Dias antes do corte: alterados seguem a trajetória sem decisões
+    registro = {campo: valor.copy() for campo, valor in velho.items()}
+    colunas_p, colunas_l = np.flatnonzero(piquetes), np.flatnonzero(lotes)
+    for campo in CAMPOS_PIQUETE:
+        registro[campo][:corte + 1, colunas_p] = sozinhos[campo][:corte + 1, colunas_p]
+    registro['aptos'][:corte, colunas_p] = sozinhos['aptos'][:corte, colunas_p]
+    for campo in CAMPOS_LOTE:
+        registro[campo][:corte + 1, colunas_l] = sozinhos[campo][:corte + 1, colunas_l]
+
+    estado = {campo: registro[campo][corte].copy() for campo in ctx['inicial']}
+    eventos = [e for e in anterior['eventos'] if e['dia'] < corte]
+    _executar(ctx, estado, registro, eventos, corte)
+    return {'registro': registro, 'eventos': eventos, 'recalculo': 'incremental', 'a_partir_do_dia': corte}
+
+
+# ========== RESULTADO ==========
+def _resultado(ctx, plano, ms) -> dict:
+    hoje, dias = ctx['hoje'], ctx['horizonte']
+    piquetes, lotes = ctx['piquetes'], ctx['lotes']
+    inicial, final = ctx['inicial'], plano['registro']
+
+    def _data(dia):
+        return None if dia >= SEM_SAIDA else (hoje + timedelta(days=int(dia))).isoformat()
+
+    atuais = []
+    for i in np.flatnonzero(inicial['lote_piquete'] >= 0):
+        piquete = piquetes[inicial['lote_piquete'][i]]
+        atuais.append({'lote_id': lotes[i]['id'], 'lote_nome': lotes[i]['nome'],
+                       'piquete_id': piquete['id'], 'piquete_nome': piquete['nome'],
+                       'saida': _data(max(0, inicial['lote_saida'][i] - 1))})
+
+    calendario = []
+    for e in plano['eventos']:
+        lote, piquete = lotes[e['lote']], piquetes[e['piquete']]
+        calendario.append({
+            'lote_id': lote['id'],
+            'lote_nome': lote['nome'],
+            'piquete_id': piquete['id'],
+            'piquete_nome': piquete['nome'],
+            'capim': piquete.get('capim'),
+            'entrada': _data(e['dia']),
+            'saida': _data(e['saida'] - 1),  # último dia no piquete
+            'dias': e['saida'] - e['dia'],
+            'altura_entrada': round(e['altura'], 1),
+        })
+
+    espera = final['espera'][dias]
+    sem_piquete = [{'lote_id': lotes[i]['id'], 'lote_nome': lotes[i]['nome'], 'dias_sem_piquete': int(espera[i])}
+                   for i in np.flatnonzero(espera > 0)]
+
+    return {
+        'inicio': hoje.isoformat(),
+        'horizonte': dias,
+        'ocupacao_atual': atuais,
+        'calendario': calendario,
+        'sem_piquete': sem_piquete,
+        'recalculo': {
+            'tipo': plano['recalculo'],
+            'a_partir_de': None if plano['a_partir_do_dia'] is None else _data(plano['a_partir_do_dia']),
+            'ms': round(ms, 1),
+        },
+    }
+
+
+# ========== CACHE ==========
+def definir_replanejamento_em_segundo_plano(callback) -> None:
+    """Registra quem recalcula planos fora da requisição (agendador); None desliga."""
+    _em_segundo_plano[0] = callback
+
+
+def invalidar_plano(fazenda_id=None) -> None:
+    """
+    Marca o plano da fazenda (ou de todas, sem argumento) como desatualizado e,
+    com o agendador ativo, enfileira o recálculo.
+    """
+    with _lock:
+        if fazenda_id is None:
+            _geracoes[None] = _geracoes.get(None, 0) + 1
+        alvos = list(_planos) if fazenda_id is None else [int(fazenda_id)]
+        for alvo in alvos:
+            _geracoes[alvo] = _geracoes.get(alvo, 0) + 1
+        alvos = [alvo for alvo in alvos if alvo in _planos]
+    callback = _em_segundo_plano[0]
+    if callback is not None:
+        for alvo in alvos:
+            callback(alvo)
+
+
+def _geracao_banco(fazenda_id) -> tuple:
+    """Gerações gravadas pelos gatilhos da migração 013 (de todas, da fazenda)."""
+    conn = get_db()
+    cursor = conn.cursor()
+    cursor.execute('SELECT fazenda_id, geracao FROM fazenda_geracoes WHERE fazenda_id IN (0, ?)', (fazenda_id,))
+    geracoes = {r['fazenda_id']: r['geracao'] for r in cursor.fetchall()}
+    conn.close()
+    return geracoes.get(0, 0), geracoes.get(fazenda_id, 0)
+
+
+def geracao(fazenda_id) -> tuple:
+    """
+    Versão do estado da fazenda: contadores de invalidação deste processo
+    (de todas, da fazenda) mais as gerações do banco, que mudam com qualquer
+    gravação, de qualquer worker. O plano e outros caches por fazenda
+    (sugestao_service) comparam com o valor de quando foram montados.
+    """
+    fazenda_id = int(fazenda_id)
+    banco = _geracao_banco(fazenda_id)
+    with _lock:
+        return (_geracoes.get(None, 0), _geracoes.get(fazenda_id, 0)) + banco
+
+
+def limpar_planos() -> None:
+    """Descarta todos os planos em memória (testes)."""
+    with _lock:
+        _planos.clear()
+        _geracoes.clear()
+
+
+def _em_dia(plano, horizonte, versao) -> bool:
+    return (plano['geracao'] == versao
+            and time.monotonic() - plano['criado_em'] < PLANO_TTL
+            and plano['ctx']['hoje'] == data_teste_now().date()
+            and (horizonte is None or plano['ctx']['horizonte'] == horizonte))
+
+
+def planejar(fazenda_id, horizonte: int = None) -> dict:
+    """
+    Recalcula o plano da fazenda (incremental quando o anterior serve) e guarda.
+
+    Args:
+        fazenda_id: Fazenda
+        horizonte: Dias à frente (padrão: o do plano em memória ou HORIZONTE_DIAS)
+
+    Returns:
+        Dict com ocupacao_atual, calendario (entradas planejadas), sem_piquete
+        (lotes que esperaram por falta de piquete apto) e recalculo
+    """
+    fazenda_id = int(fazenda_id)
+    versao = geracao(fazenda_id)  # antes de ler o estado: gravação durante a leitura remonta depois
+    with _lock:
+        anterior = _planos.get(fazenda_id)
+    if horizonte is None:
+        horizonte = anterior['ctx']['horizonte'] if anterior else HORIZONTE_DIAS
+
+    inicio = time.perf_counter()
+    ctx = _carregar(fazenda_id, horizonte)
+    plano = _plano_incremental(anterior, ctx) if anterior else None
+    if plano is None:
+        plano = _plano_completo(ctx)
+    plano.update(ctx=ctx, fazenda_id=fazenda_id, geracao=versao, criado_em=time.monotonic())
+    plano['resultado'] = _resultado(ctx, plano, (time.perf_counter() - inicio) * 1000)
+
+    with _lock:
+        _planos[fazenda_id] = plano
+        _planos.move_to_end(fazenda_id)
+        while len(_planos) > PLANOS_MAX:
+            _planos.popitem(last=False)
+    return plano['resultado']
+
+
+def obter_plano(fazenda_id, horizonte: int = HORIZONTE_DIAS) -> dict:
+    """Plano em memória se estiver em dia; senão recalcula (ver planejar)."""
+    fazenda_id = int(fazenda_id)
+    versao = geracao(fazenda_id)
+    with _lock:
+        plano = _planos.get(fazenda_id)
+        if plano is not None and _em_dia(plano, horizonte, versao):
+            _planos.move_to_end(fazenda_id)
+            return plano['resultado']
+    return planejar(fazenda_id, horizonte)
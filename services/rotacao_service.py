@@ -1,54 +1,20 @@
 # -*- coding: utf-8 -*-
 """Serviço de Rotação de Piquetes"""
-import sqlite3
-import os
 from datetime import datetime
 from simular_data import now as data_teste_now
-
-DB_PATH = os.path.join(os.path.dirname(__file__), "..", "pastagens.db")
-
-# Dados técnicos dos capins
-DADOS_CAPINS = {
-    'Marandu': {'crescimento_diario': 1.2, 'consumo_diario': 0.85, 'dias_tecnicos': 28},
-    'Piatã': {'crescimento_diario': 1.3, 'consumo_diario': 0.90, 'dias_tecnicos': 28},
-    'Xaraés': {'crescimento_diario': 1.6, 'consumo_diario': 0.95, 'dias_tecnicos': 35},
-    'Paiaguás': {'crescimento_diario': 1.2, 'consumo_diario': 0.85, 'dias_tecnicos': 28},
-    'Decumbens': {'crescimento_diario': 1.0, 'consumo_diario': 0.75, 'dias_tecnicos': 24},
-    'Humidicola': {'crescimento_diario': 0.8, 'consumo_diario': 0.70, 'dias_tecnicos': 24},
-    'MG-5': {'crescimento_diario': 1.6, 'consumo_diario': 0.95, 'dias_tecnicos': 35},
-    'Mombaça': {'crescimento_diario': 2.5, 'consumo_diario': 1.00, 'dias_tecnicos': 35},
-    'Tanzânia': {'crescimento_diario': 2.3, 'consumo_diario': 0.95, 'dias_tecnicos': 32},
-    'Zuri': {'crescimento_diario': 2.6, 'consumo_diario': 1.05, 'dias_tecnicos': 35},
-    'Massai': {'crescimento_diario': 1.8, 'consumo_diario': 0.90, 'dias_tecnicos': 28},
-    'Aruana': {'crescimento_diario': 1.7, 'consumo_diario': 0.85, 'dias_tecnicos': 28},
-    'Tifton 85': {'crescimento_diario': 2.0, 'consumo_diario': 0.70, 'dias_tecnicos': 21},
-    'Tifton 68': {'crescimento_diario': 2.0, 'consumo_diario': 0.70, 'dias_tecnicos': 21},
-    'Coastcross': {'crescimento_diario': 1.6, 'consumo_diario': 0.75, 'dias_tecnicos': 24},
-    'Jiggs': {'crescimento_diario': 1.9, 'consumo_diario': 0.72, 'dias_tecnicos': 22},
-    'Andropogon': {'crescimento_diario': 1.8, 'consumo_diario': 0.80, 'dias_tecnicos': 28},
-    'Capim Elefante': {'crescimento_diario': 3.5, 'consumo_diario': 1.10, 'dias_tecnicos': 40},
-    'Capiaçu': {'crescimento_diario': 4.0, 'consumo_diario': 1.15, 'dias_tecnicos': 42},
-    # compatibilidade
-    'Brachiaria': {'crescimento_diario': 1.2, 'consumo_diario': 0.85, 'dias_tecnicos': 28},
-    'Capim Aruana': {'crescimento_diario': 1.7, 'consumo_diario': 0.85, 'dias_tecnicos': 28},
-    'Natalino': {'crescimento_diario': 1.8, 'consumo_diario': 0.80, 'dias_tecnicos': 28},
-}
-
-
-def get_db():
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row
-    return conn
-
+from services.conexao_db import get_db
+from services.altura_service import calcular_alturas_estimadas
+from services import capim_service  # crescimento e dias técnicos por capim
 
 def calcular_dias_descanso_necessarios(capim, altura_entrada, altura_saida):
     """
     Calcula dias de descanso necessários para ir de altura_saida até altura_entrada.
     """
-    if not capim or capim not in DADOS_CAPINS:
+    dados = capim_service.obter(capim)
+    if dados is None:
         return 30  # Fallback genérico
     
-    crescimento = DADOS_CAPINS[capim]['crescimento_diario']
+    crescimento = dados.crescimento_diario
     altura_necessaria = altura_entrada - altura_saida
     
     if crescimento <= 0:
@@ -63,10 +29,11 @@ def calcular_dias_faltantes(capim, altura_entrada, altura_atual):
     Calcula dias necessários para atingir altura de entrada, considerando altura ATUAL.
     Se altura_atual >= altura_entrada: retorna 0 (já atingiu)
     """
-    if not capim or capim not in DADOS_CAPINS:
+    dados = capim_service.obter(capim)
+    if dados is None:
         return 0
     
-    crescimento = DADOS_CAPINS[capim]['crescimento_diario']
+    crescimento = dados.crescimento_diario
     
     if altura_atual is None:
         return 30  # Fallback
@@ -105,7 +72,7 @@ def calcular_prioridade_rotacao(fazenda_id):
     rows = cursor.fetchall()
     conn.close()
     
-    resultado = []
+    piquetes = []
     for row in rows:
         p = dict(row)
         
@@ -140,13 +107,15 @@ def calcular_prioridade_rotacao(fazenda_id):
             except Exception:
                 pass
         p['dias_ocupacao'] = dias_ocupacao_calc
-        
-        # Calcular altura_estimada APENAS se já teve medição (data_medicao existe)
-        if p.get('altura_estimada') is None and p.get('data_medicao'):
-            from database import calcular_altura_estimada
-            altura_calc, _ = calcular_altura_estimada(p)
-            p['altura_estimada'] = altura_calc
-        
+        piquetes.append((p, lotes_list))
+    
+    # Calcular altura_estimada APENAS se já teve medição (data_medicao existe)
+    sem_estimativa = [p for p, _ in piquetes if p.get('altura_estimada') is None and p.get('data_medicao')]
+    for p, (altura_calc, _) in zip(sem_estimativa, calcular_alturas_estimadas(sem_estimativa)):
+        p['altura_estimada'] = altura_calc
+    
+    resultado = []
+    for p, lotes_list in piquetes:
         # Calcular status
         status_info = calcular_status_piquete(p)
         
@@ -191,9 +160,9 @@ def calcular_status_piquete(piquete):
     bloqueado = piquete.get('bloqueado', 0)
     
     # Info de crescimento
-    crescimento = DADOS_CAPINS.get(capim, {}).get('crescimento_diario', 1.2) if capim else 1.2
+    crescimento = capim_service.crescimento_diario(capim)
     # Dias técnicos baseado no capim
-    dias_tecnicos = DADOS_CAPINS.get(capim, {}).get('dias_tecnicos', 30) if capim else 30
+    dias_tecnicos = capim_service.dias_tecnicos(capim)
     
     limite_maximo = 30  # Fallback máximo para alerta de ineficiência
     
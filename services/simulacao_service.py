@@ -0,0 +1,257 @@
+# -*- coding: utf-8 -*-
+"""
+Simulação da Fazenda (vários dias à frente)
+Carrega o estado atual uma vez (alturas de hoje, lotes e saídas previstas,
+clima) e avança todos os piquetes dia a dia com o plano atual: piquete com
+lote perde altura pelo consumo (calcular_altura_ocupacao), piquete vazio
+cresce com o fator climático do dia (calcular_altura_descanso) e cada lote
+sai em data_saida_prevista. Cada dia é um passo NumPy sobre todos os piquetes.
+"""
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from simular_data import now as data_teste_now
+from services import capim_service
+from services.conexao_db import get_db
+from services.altura_service import calcular_alturas_estimadas, dias_descanso_medicao
+from services.clima_service import calcular_fator_climatico, resolver_clima_piquete
+from services.clima_diario_service import fatores_por_dia
+from services.manejo_service import (
+    TAXA_MAXIMA_LOTACAO,
+    aplicar_suplementacao,
+    calcular_peso_total_categoria,
+    calcular_ua_total,
+    get_consumo_base,
+    get_consumo_relativo_categoria,
+)
+
+
+# ========== CONFIG ==========
+DIAS_PADRAO = 90
+DIAS_MAXIMO = 730
+
+
+# ========== MOTOR ==========
+def simular(altura_inicial, altura_saida, limite, crescimento, fatores, consumo, ocupado) -> np.ndarray:
+    """
+    Avança todos os piquetes dia a dia.
+
+    Args:
+        altura_inicial, altura_saida, limite, crescimento: Arrays (n,) por piquete
+            (limite = teto da rebrota; crescimento = cm/dia do capim)
+        fatores: (dias, n) fator climático de cada dia
+        consumo: (dias, n) cm/dia retirados pelos lotes presentes
+        ocupado: (dias, n) True nos dias com lote no piquete
+
+    Returns:
+        np.ndarray: (dias + 1, n) alturas no início de cada dia (linha 0 = hoje)
+    """
+    dias, n = consumo.shape
+    alturas = np.empty((dias + 1, n), dtype=np.float64)
+    alturas[0] = altura_inicial
+    rebrota_diaria = crescimento * fatores
+    for d in range(dias):
+        h = alturas[d]
+        # Pastejo: não passa da altura de saída nem sobe (calcular_altura_ocupacao)
+        pastejo = np.minimum(h, np.maximum(altura_saida, h - consumo[d]))
+        # Rebrota até o limite; acima dele (medição alta) a altura só se mantém
+        rebrota = np.where(h < limite, np.minimum(limite, h + rebrota_diaria[d]), h)
+        alturas[d + 1] = np.where(ocupado[d], pastejo, rebrota)
+    return alturas
+
+
+# ========== ESTADO ==========
+def _dias_ate_saida(lote, hoje):
+    """Dias de hoje até data_saida_prevista (ou entrada + dias técnicos); None se indefinido."""
+    saida = lote.get('data_saida_prevista')
+    try:
+        if saida:
+            if '/' in saida:
+                dia, mes, ano = saida.split('/')
+                saida = f'{ano}-{mes}-{dia}'
+            saida_dt = datetime.fromisoformat(saida.replace('Z', '+00:00').replace('+00:00', ''))
+        elif lote.get('data_entrada') and lote.get('dias_tecnicos'):
+            entrada = datetime.fromisoformat(lote['data_entrada'].replace('Z', '+00:00').replace('+00:00', ''))
+            saida_dt = entrada + timedelta(days=int(lote['dias_tecnicos']))
+        else:
+            return None
+    except (TypeError, ValueError):
+        return None
+    return (saida_dt.date() - hoje).days
+
+
+def _consumo_lote(lote, piquete) -> float:
+    """cm/dia que o lote retira do piquete (mesmo modelo de calcular_altura_estimada)."""
+    consumo = lote.get('consumo_base')
+    if consumo is None:
+        consumo = get_consumo_base(piquete.get('capim'))
+    percentual = piquete.get('percentual_suplementacao') or 0
+    if piquete.get('possui_cocho') and percentual > 0:
+        consumo = aplicar_suplementacao(consumo, percentual)
+
+    quantidade = lote.get('quantidade') or 0
+    area = piquete.get('area') or 0
+    if quantidade <= 0 or area <= 0:
+        return consumo  # modelo linear
+
+    categoria = lote.get('categoria')
+    peso_medio = lote.get('peso_medio')
+    peso_total = calcular_peso_total_categoria(quantidade, categoria, peso_medio)
+    ua_total = calcular_ua_total(peso_total) if peso_total > 0 else 0
+    fator_categoria = get_consumo_relativo_categoria(categoria) if not peso_medio and categoria else 1.0
+    return consumo * (min(ua_total / area, TAXA_MAXIMA_LOTACAO) / 2) * fator_categoria
+
+
+def carregar_estado(fazenda_id, dias: int) -> dict:
+    """
+    Lê piquetes, lotes e clima da fazenda uma vez e monta as matrizes do motor.
+
+    Returns:
+        Dict com piquetes, lotes (com dia_saida), hoje e os arrays de simular()
+    """
+    conn = get_db()
+    cursor = conn.cursor()
+    cursor.execute('SELECT * FROM piquetes WHERE fazenda_id = ? AND ativo = 1 ORDER BY nome, id', (fazenda_id,))
+    piquetes = [dict(r) for r in cursor.fetchall()]
+    cursor.execute('''
+        SELECT id, nome, categoria, quantidade, peso_medio, consumo_base, piquete_atual_id,
+               data_entrada, dias_tecnicos, data_saida_prevista
+        FROM lotes
+        WHERE fazenda_id = ? AND ativo = 1 AND piquete_atual_id IS NOT NULL
+        ORDER BY nome, id
+    ''', (fazenda_id,))
+    lotes = [dict(r) for r in cursor.fetchall()]
+    conn.close()
+
+    hoje = data_teste_now().date()
+    n = len(piquetes)
+    indice = {p['id']: j for j, p in enumerate(piquetes)}
+    lotes = [l for l in lotes if l['piquete_atual_id'] in indice]
+
+    # Alturas de hoje: mesma estimativa das listagens (lote de referência = primeiro do piquete)
+    primeiro = {}
+    for p in piquetes:
+        p['animais_no_piquete'] = 0
+    for lote in lotes:
+        piquete = piquetes[indice[lote['piquete_atual_id']]]
+        piquete['animais_no_piquete'] += lote['quantidade'] or 0
+        primeiro.setdefault(piquete['id'], lote)
+    referencia = [primeiro.get(p['id'], {}) for p in piquetes]
+    for p, descanso in zip(piquetes, dias_descanso_medicao(piquetes)):
+        p['dias_descanso'] = int(descanso)  # desde a medição, como listar_piquetes (não a coluna gravada)
+    cache_clima = {}
+    estimadas = calcular_alturas_estimadas(
+        piquetes,
+        categorias=[l.get('categoria') for l in referencia],
+        pesos_medios=[l.get('peso_medio') for l in referencia],
+        consumos_base=[l.get('consumo_base') for l in referencia],
+        cache_clima=cache_clima,
+    )
+    altura_inicial = np.array([altura for altura, _ in estimadas], dtype=np.float64)
+
+    altura_saida = np.array([p.get('altura_saida') or 15 for p in piquetes], dtype=np.float64)
+    altura_entrada = np.array([p.get('altura_entrada') or 25 for p in piquetes], dtype=np.float64)
+    capins = capim_service.registro()
+    crescimento = capins.crescimento[capins.indices([p.get('capim') for p in piquetes])]
+
+    # Clima: condição atual por piquete; série diária (com previsão) onde houver
+    climas = [resolver_clima_piquete(p, cache_clima) for p in piquetes]
+    fator_atual = np.array([calcular_fator_climatico(c[0]) for c in climas], dtype=np.float64)
+    fatores = np.tile(fator_atual, (dias, 1))
+    por_celula = {}
+    for j, (_, _, celula) in enumerate(climas):
+        if celula is not None:
+            por_celula.setdefault(celula, []).append(j)
+    for celula, colunas in por_celula.items():
+        serie = fatores_por_dia(celula[0], celula[1], hoje, dias)
+        com_dado = ~np.isnan(serie)
+        if com_dado.any():
+            colunas = np.array(colunas)
+            fatores[np.ix_(com_dado, colunas)] = serie[com_dado][:, None]
+
+    # Lotes: consumo diário e presença até o dia da saída (diferenças + soma acumulada)
+    consumo = np.zeros((dias + 1, n))
+    presenca = np.zeros((dias + 1, n), dtype=np.int64)
+    for lote in lotes:
+        j = indice[lote['piquete_atual_id']]
+        restantes = _dias_ate_saida(lote, hoje)
+        # Último dia no piquete é o da saída prevista; atrasado sai hoje
+        lote['dia_saida'] = None if restantes is None else max(0, restantes + 1)
+        fim = dias if lote['dia_saida'] is None else min(lote['dia_saida'], dias)
+        taxa = _consumo_lote(lote, piquetes[j])
+        consumo[0, j] += taxa
+        consumo[fim, j] -= taxa
+        presenca[0, j] += 1
+        presenca[fim, j] -= 1
+    consumo = np.cumsum(consumo, axis=0)[:dias]
+    ocupado = np.cumsum(presenca, axis=0)[:dias] > 0
+
+    return {
+        'hoje': hoje,
+        'piquetes': piquetes,
+        'lotes': lotes,
+        'altura_inicial': altura_inicial,
+        'altura_saida': altura_saida,
+        'altura_entrada': altura_entrada,
+        'limite': altura_entrada * 1.5,
+        'crescimento': crescimento,
+        'fatores': fatores,
+        'consumo': consumo,
+        'ocupado': ocupado,
+    }
+
+
+# ========== API ==========
+def simular_fazenda(fazenda_id, dias: int = DIAS_PADRAO) -> dict:
+    """
+    Projeta a fazenda `dias` dias à frente com o plano atual.
+
+    Returns:
+        Dict com datas (hoje + dias), alturas por piquete (uma por data),
+        dia_saida de cada lote (primeiro dia já sem ele; None = fica o
+        período todo) e, por dia, altura média, piquetes ocupados e piquetes
+        aptos (vazios e na altura de entrada)
+    """
+    estado = carregar_estado(fazenda_id, dias)
+    alturas = simular(
+        estado['altura_inicial'], estado['altura_saida'], estado['limite'],
+        estado['crescimento'], estado['fatores'], estado['consumo'], estado['ocupado'],
+    )
+
+    # Ocupação por data (a última data repete o último dia simulado)
+    ocupado = np.vstack([estado['ocupado'], estado['ocupado'][-1:]])
+    aptos = ~ocupado & (alturas >= estado['altura_entrada'])
+    hoje = estado['hoje']
+    n = len(estado['piquetes'])
+
+    return {
+        'inicio': hoje.isoformat(),
+        'dias': dias,
+        'datas': [(hoje + timedelta(days=d)).isoformat() for d in range(dias + 1)],
+        'piquetes': [
+            {
+                'id': p['id'],
+                'nome': p['nome'],
+                'capim': p.get('capim'),
+                'altura_entrada': float(estado['altura_entrada'][j]),
+                'alturas': serie,
+            }
+            for j, (p, serie) in enumerate(zip(estado['piquetes'], np.round(alturas, 1).T.tolist()))
+        ],
+        'lotes': [
+            {
+                'id': l['id'],
+                'nome': l['nome'],
+                'piquete_id': l['piquete_atual_id'],
+                'dia_saida': l['dia_saida'],
+                'data_saida': None if l['dia_saida'] is None else (hoje + timedelta(days=l['dia_saida'])).isoformat(),
+            }
+            for l in estado['lotes']
+        ],
+        'resumo': {
+            'altura_media': np.round(alturas.mean(axis=1), 1).tolist() if n else [None] * (dias + 1),
+            'piquetes_ocupados': ocupado.sum(axis=1).tolist(),
+            'piquetes_aptos': aptos.sum(axis=1).tolist(),
+        },
+    }
@@ -0,0 +1,260 @@
+# -*- coding: utf-8 -*-
+"""
+Sugestão de Piquetes (top-K por lote)
+Índice por fazenda com os piquetes livres (ativos, desbloqueados, com altura
+e sem lote) e, em arrays, tudo o que não depende do lote: status, prioridade,
+dias de descanso, área, capim e centroide.
+
+A ordem é a de sempre de sugerir_proximo_piquete: prioridade do status, depois
+dias de descanso. A cada consulta só entram o encaixe do lote (UA do lote x UA
+que a área suporta), que apenas desempata, e os filtros (capim, área mínima,
+distância máxima); os K melhores saem de um heap. O índice é refeito quando a
+versão da fazenda muda (planejamento_service.geracao: invalidar_plano neste
+processo ou a geração que os gatilhos da migração 013 gravam, de qualquer
+worker), quando o dia vira ou depois de INDICE_TTL.
+"""
+import heapq
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+from simular_data import now as data_teste_now
+from services.conexao_db import get_db
+from services.atribuicao_service import UA_HA_REFERENCIA, _centroide, _dias_desde, _distancias_km
+from services.manejo_service import TAXA_MAXIMA_LOTACAO, calcular_peso_total_categoria, calcular_ua_total
+from services import planejamento_service
+
+
+# ========== CONFIG ==========
+# Ordem: prioridade (200 novo, 100 apto, 90 altura alcançada, 10 recuperando),
+# dias de descanso e, só no empate, o encaixe do lote: 1 com a UA do lote igual
+# à capacidade do piquete, 0 a 100% de diferença, -1 a mais com UA/ha acima de
+# TAXA_MAXIMA_LOTACAO (fim do grupo, não da lista)
+DIAS_DESCANSO_PADRAO = 30
+ALTURA_ENTRADA_PADRAO = 25
+INDICE_TTL = 15 * 60          # segundos
+INDICES_MAX = 100             # fazendas com índice em memória (LRU)
+
+STATUS = ('APTO', 'APTO_ALCANCADA', 'RECUPERANDO')
+
+_indices = OrderedDict()  # fazenda_id -> índice
+_lock = threading.Lock()
+
+
+# ========== ÍNDICE ==========
+def _ler(fazenda_id):
+    conn = get_db()
+    cursor = conn.cursor()
+    cursor.execute('''
+        SELECT DISTINCT piquete_atual_id
+        FROM lotes
+        WHERE ativo = 1
+          AND piquete_atual_id IN (SELECT id FROM piquetes WHERE fazenda_id = ? AND ativo = 1)
+    ''', (fazenda_id,))
+    ocupados = {r['piquete_atual_id'] for r in cursor.fetchall()}
+
+    cursor.execute('''
+        SELECT p.id, p.nome, p.capim, p.area, p.geometria, p.altura_real_medida, p.altura_atual,
+               p.altura_entrada, p.dias_descanso_min, p.created_at,
+               COALESCE(p.ultima_mov, p.created_at) as ultima_mov
+        FROM piquetes p
+        WHERE p.fazenda_id = ?
+          AND p.bloqueado = 0
+          AND p.ativo = 1
+          AND (p.altura_real_medida IS NOT NULL OR p.altura_atual IS NOT NULL)
+        ORDER BY p.id
+    ''', (fazenda_id,))
+    piquetes = [dict(r) for r in cursor.fetchall() if r['id'] not in ocupados]
+
+    cursor.execute('SELECT latitude_sede, longitude_sede FROM fazendas WHERE id = ?', (fazenda_id,))
+    row = cursor.fetchone()
+    conn.close()
+
+    sede = None
+    if row and row['latitude_sede'] is not None and row['longitude_sede'] is not None:
+        sede = (row['latitude_sede'], row['longitude_sede'])
+    return piquetes, sede
+
+
+def _montar(fazenda_id) -> dict:
+    """Lê os piquetes livres da fazenda e calcula os arrays e a pontuação base."""
+    geracao = planejamento_service.geracao(fazenda_id)
+    piquetes, sede = _ler(fazenda_id)
+    agora = data_teste_now()
+
+    real = np.array([p['altura_real_medida'] is not None for p in piquetes], dtype=bool)
+    altura = np.array([p['altura_real_medida'] if p['altura_real_medida'] is not None else p['altura_atual']
+                       for p in piquetes], dtype=np.float64)
+    entrada = np.array([p['altura_entrada'] or ALTURA_ENTRADA_PADRAO for p in piquetes], dtype=np.float64)
+    dias_ideais = np.array([p['dias_descanso_min'] or DIAS_DESCANSO_PADRAO for p in piquetes], dtype=np.int64)
+    # Piquete novo: nunca movimentado (ultima_mov caiu no created_at)
+    novo = np.array([not p['ultima_mov'] or p['ultima_mov'] == p['created_at'] for p in piquetes], dtype=bool)
+    # Descanso conta da última movimentação; piquete novo fica com 0, como sempre
+    # (a ordem entre os novos é a do cadastro)
+    dias_descanso = np.array([0 if eh_novo else _dias_desde(p['ultima_mov'], agora) or 0
+                              for p, eh_novo in zip(piquetes, novo)], dtype=np.int64)
+    area = np.array([p['area'] or 0 for p in piquetes], dtype=np.float64)
+    centros = [_centroide(p['geometria']) or (np.nan, np.nan) for p in piquetes]
+
+    alcancada = altura >= entrada
+    descansado = dias_descanso >= dias_ideais
+    # Índice em STATUS e prioridade (mesma regra de sempre de sugerir_proximo_piquete)
+    status = np.where(alcancada & (novo | descansado), 0, np.where(alcancada, 1, 2))
+    prioridade = np.where(alcancada, np.where(novo, 200, np.where(descansado, 100, 90)), 10)
+
+    return {
+        'fazenda_id': fazenda_id,
+        'geracao': geracao,
+        'hoje': agora.date(),
+        'criado_em': time.monotonic(),
+        'piquetes': [{'id': p['id'], 'nome': p['nome'], 'capim': p['capim'],
+                      'altura_real_medida': p['altura_real_medida']} for p in piquetes],
+        'sede': sede,
+        'capim': np.array([p['capim'] or '' for p in piquetes], dtype=object),
+        'area': area,
+        'lat': np.array([c[0] for c in centros], dtype=np.float64),
+        'lon': np.array([c[1] for c in centros], dtype=np.float64),
+        'altura': altura,
+        'real': real,
+        'entrada': entrada,
+        'dias_descanso': dias_descanso,
+        'dias_ideais': dias_ideais,
+        'novo': novo,
+        'status': status,
+        'prioridade': prioridade,
+        # Chave de ordenação sem o lote (listas: o heap compara tuplas)
+        'ordem': list(zip(prioridade.tolist(), dias_descanso.tolist())),
+    }
+
+
+def _em_dia(indice) -> bool:
+    return (indice['geracao'] == planejamento_service.geracao(indice['fazenda_id'])
+            and time.monotonic() - indice['criado_em'] < INDICE_TTL
+            and indice['hoje'] == data_teste_now().date())
+
+
+def obter_indice(fazenda_id) -> dict:
+    """Índice da fazenda em memória; remonta se desatualizado."""
+    fazenda_id = int(fazenda_id)
+    with _lock:
+        indice = _indices.get(fazenda_id)
+        if indice is not None:
+            _indices.move_to_end(fazenda_id)
+    if indice is not None and _em_dia(indice):
+        return indice
+
+    indice = _montar(fazenda_id)
+    with _lock:
+        _indices[fazenda_id] = indice
+        _indices.move_to_end(fazenda_id)
+        while len(_indices) > INDICES_MAX:
+            _indices.popitem(last=False)
+    return indice
+
+
+def limpar() -> None:
+    """Descarta os índices em memória (testes trocam de banco)."""
+    with _lock:
+        _indices.clear()
+
+
+# ========== CONSULTA ==========
+def _lote(lote_id):
+    """UA do lote e geometria do piquete onde ele está (origem da distância)."""
+    conn = get_db()
+    cursor = conn.cursor()
+    cursor.execute('''
+        SELECT l.quantidade, l.categoria, l.peso_medio, p.geometria AS origem_geometria
+        FROM lotes l
+        LEFT JOIN piquetes p ON p.id = l.piquete_atual_id
+        WHERE l.id = ?
+    ''', (lote_id,))
+    row = cursor.fetchone()
+    conn.close()
+    return dict(row) if row else None
+
+
+def sugerir(fazenda_id, lote_id, k=None, capim=None, area_min=None, distancia_max=None) -> list:
+    """
+    Melhores piquetes livres para o lote, da maior para a menor pontuação.
+
+    Args:
+        fazenda_id: Fazenda
+        lote_id: Lote que vai mudar (UA para a capacidade, piquete atual para a distância)
+        k: Quantos devolver (padrão: todos)
+        capim: Só piquetes deste capim
+        area_min: Só piquetes com pelo menos esta área (ha)
+        distancia_max: Só piquetes a até esta distância (km) do piquete atual do lote
+            (ou da sede); piquetes sem geometria ficam de fora
+
+    Returns:
+        Lista de dicts (campos de sempre mais pontuacao, capacidade_ua e
+        distancia_km), na ordem de sempre (prioridade, dias de descanso);
+        pontuacao é o encaixe do lote em % (ver CONFIG), que desempata
+    """
+    indice = obter_indice(fazenda_id)
+    lote = _lote(lote_id) or {}
+    if not indice['piquetes']:
+        return []
+
+    ua = calcular_ua_total(calcular_peso_total_categoria(lote.get('quantidade') or 0, lote.get('categoria'),
+                                                         lote.get('peso_medio')))
+    area = indice['area']
+    capacidade = area * UA_HA_REFERENCIA
+    encaixe = np.zeros(len(area))
+    if ua > 0:
+        with np.errstate(divide='ignore', invalid='ignore'):
+            razao = np.where(capacidade > 0, ua / capacidade, np.inf)
+            lotacao = np.where(area > 0, ua / area, np.inf)
+        encaixe = 1.0 - np.minimum(np.abs(1.0 - razao), 1.0) - (lotacao > TAXA_MAXIMA_LOTACAO)
+
+    origem = _centroide(lote.get('origem_geometria')) or indice['sede']
+    if origem is not None:
+        distancia = _distancias_km(np.array([origem[0]]), np.array([origem[1]]), indice['lat'], indice['lon'])[0]
+        distancia[np.isnan(indice['lat'])] = np.nan
+    else:
+        distancia = np.full(len(area), np.nan)
+
+    candidatos = np.ones(len(area), dtype=bool)
+    if capim:
+        candidatos &= indice['capim'] == capim
+    if area_min is not None:
+        candidatos &= area >= area_min
+    if distancia_max is not None:
+        candidatos &= distancia <= distancia_max  # NaN (sem geometria/origem) nunca passa
+    posicoes = np.flatnonzero(candidatos).tolist()
+
+    ordem, desempate = indice['ordem'], encaixe.tolist()
+
+    def chave(j):
+        return ordem[j] + (desempate[j],)
+
+    if k is None or k >= len(posicoes):
+        melhores = sorted(posicoes, key=chave, reverse=True)
+    else:
+        melhores = heapq.nlargest(k, posicoes, key=chave)
+
+    resultado = []
+    for j in melhores:
+        p = indice['piquetes'][j]
+        resultado.append({
+            'id': p['id'],
+            'nome': p['nome'],
+            'capim': p['capim'],
+            'area': float(area[j]),
+            'dias_descanso': int(indice['dias_descanso'][j]),
+            'dias_ideais': int(indice['dias_ideais'][j]),
+            'altura_atual': float(indice['altura'][j]),
+            'altura_real_medida': p['altura_real_medida'],
+            'fonte_altura': 'real' if indice['real'][j] else 'estimada',
+            'altura_entrada': float(indice['entrada'][j]),
+            'status': STATUS[indice['status'][j]],
+            'prioridade': int(indice['prioridade'][j]),
+            'piquete_novo': bool(indice['novo'][j]),
+            'pontuacao': round(100 * desempate[j], 1),
+            'capacidade_ua': round(float(capacidade[j]), 2),
+            'distancia_km': None if np.isnan(distancia[j]) else round(float(distancia[j]), 2),
+        })
+    return resultado
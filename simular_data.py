@@ -3,57 +3,174 @@ Módulo de controle de data para testes do PastoFlow.
 Permite simular datas diferentes para testar contadores de crescimento/degradação.
 
 Uso:
-    from config_data_teste import now, setar_data
+    from simular_data import now, setar_data
     
     # Usar em todo lugar que usaria datetime.now()
     data_atual = now()
+
+O arquivo só é relido quando muda (mtime/tamanho). Dentro de uma requisição
+Flask (init_app) o "agora" é resolvido uma vez e congelado.
 """
 import json
 import os
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
 from datetime import datetime, date
 from pathlib import Path
 
 # Arquivo de configuração da data
 CONFIG_FILE = Path(__file__).parent / "data_teste_config.json"
 
+# Chave de sessão / header para data de teste por usuário ou por requisição
+SESSAO_CHAVE = 'data_teste'
+HEADER_DATA_TESTE = 'X-Data-Teste'
 
-def get_data_teste() -> datetime | None:
-    """
-    Retorna a data de teste configurada, ou None se usar data real.
-    
-    Returns:
-        datetime: Data configurada para teste
-        None: Usa datetime.now() normalmente
-    """
-    if not CONFIG_FILE.exists():
+# Cache do arquivo: só relê quando (mtime, tamanho) mudar
+_cache_arquivo = {'chave': None, 'data': None}
+_lock = threading.Lock()
+
+# Override em memória (tem prioridade sobre o arquivo); None = sem override
+_override_processo = {'ativo': False, 'data': None}
+
+# "Agora" congelado da requisição atual: (datetime, é_data_de_teste) — ver init_app / relogio_fixo
+_agora_requisicao: ContextVar = ContextVar('pastoflow_agora', default=None)
+
+
+def _ler_arquivo() -> datetime | None:
+    """Data do arquivo de configuração, relida só se o arquivo mudou."""
+    try:
+        st = os.stat(CONFIG_FILE)
+    except OSError:
+        _cache_arquivo['chave'] = None
+        _cache_arquivo['data'] = None
         return None
-    
+
+    chave = (st.st_mtime_ns, st.st_size)
+    if _cache_arquivo['chave'] == chave:
+        return _cache_arquivo['data']
+
+    data = None
     try:
         with open(CONFIG_FILE, 'r') as f:
             config = json.load(f)
-        
         data_str = config.get('data')
         if data_str:
-            return datetime.fromisoformat(data_str)
+            data = datetime.fromisoformat(data_str)
     except Exception as e:
         print(f"Erro ao ler config de data: {e}")
+
+    with _lock:
+        _cache_arquivo['chave'] = chave
+        _cache_arquivo['data'] = data
+    return data
+
+
+def get_data_teste() -> datetime | None:
+    """
+    Retorna a data de teste configurada, ou None se usar data real.
+
+    Ordem: override em memória (definir_override) > arquivo data_teste_config.json.
     
-    return None
+    Returns:
+        datetime: Data configurada para teste
+        None: Usa datetime.now() normalmente
+    """
+    if _override_processo['ativo']:
+        return _override_processo['data']
+    return _ler_arquivo()
+
+
+def definir_override(data: datetime | None) -> None:
+    """Define a data de teste só neste processo, sem tocar no arquivo."""
+    _override_processo['ativo'] = True
+    _override_processo['data'] = data
+
+
+def limpar_override() -> None:
+    """Remove o override em memória (volta a valer o arquivo)."""
+    _override_processo['ativo'] = False
+    _override_processo['data'] = None
 
 
 def now() -> datetime:
     """
     Retorna a data/hora atual, considerando configuração de teste.
+
+    Dentro de uma requisição (ou de relogio_fixo) o valor é resolvido uma vez
+    e reaproveitado por todas as chamadas.
     
     Returns:
         datetime: Data de teste se configurada, senão datetime.now()
     """
+    congelado = _agora_requisicao.get()
+    if congelado is not None:
+        return congelado[0]
     data_teste = get_data_teste()
     if data_teste is not None:
         return data_teste
     return datetime.now()
 
 
+def _resolver(data: datetime | None = None) -> tuple:
+    """(agora, é_data_de_teste) para congelar."""
+    if data is not None:
+        return (data, True)
+    data_teste = get_data_teste()
+    if data_teste is not None:
+        return (data_teste, True)
+    return (datetime.now(), False)
+
+
+@contextmanager
+def relogio_fixo(data: datetime | None = None):
+    """
+    Congela now() durante o bloco (scripts, jobs e testes).
+
+    Args:
+        data: Data a usar; None resolve a data atual (teste ou real) uma vez
+    """
+    token = _agora_requisicao.set(_resolver(data))
+    try:
+        yield _agora_requisicao.get()[0]
+    finally:
+        _agora_requisicao.reset(token)
+
+
+def _parse_data_teste(valor) -> datetime | None:
+    if not valor:
+        return None
+    try:
+        return datetime.fromisoformat(str(valor))
+    except ValueError:
+        return None
+
+
+def init_app(app):
+    """
+    Congela now() por requisição Flask.
+
+    Prioridade: header X-Data-Teste > session['data_teste'] (os dois só em
+    debug/testing) > override em memória > arquivo > relógio real.
+    """
+    from flask import g, request, session
+
+    @app.before_request
+    def _congelar_relogio():
+        data = None
+        if app.debug or app.testing:
+            data = _parse_data_teste(request.headers.get(HEADER_DATA_TESTE))
+            if data is None:
+                data = _parse_data_teste(session.get(SESSAO_CHAVE))
+        g._pastoflow_relogio = _agora_requisicao.set(_resolver(data))
+
+    @app.teardown_request
+    def _liberar_relogio(exc=None):
+        token = g.pop('_pastoflow_relogio', None)
+        if token is not None:
+            _agora_requisicao.reset(token)
+
+
 def today() -> date:
     """
     Retorna a data atual (sem hora), considerando configuração de teste.
@@ -78,6 +195,7 @@ def setar_data(data_str: str = None) -> dict:
         # Resetar para data real
         if CONFIG_FILE.exists():
             CONFIG_FILE.unlink()
+        _cache_arquivo['chave'] = None
         return {
             'status': 'ok',
             'modo': 'real',
@@ -102,6 +220,7 @@ def setar_data(data_str: str = None) -> dict:
     
     with open(CONFIG_FILE, 'w') as f:
         json.dump(config, f, indent=2)
+    _cache_arquivo['chave'] = None  # força releitura mesmo com mtime de baixa resolução
     
     return {
         'status': 'ok',
@@ -112,8 +231,12 @@ def setar_data(data_str: str = None) -> dict:
 
 
 def get_status() -> dict:
-    """Retorna o status atual do controle de data."""
-    data_teste = get_data_teste()
+    """Retorna o status atual do controle de data (o "agora" efetivo da requisição)."""
+    congelado = _agora_requisicao.get()
+    if congelado is not None:
+        data_teste = congelado[0] if congelado[1] else None
+    else:
+        data_teste = get_data_teste()
     
     if data_teste:
         return {
@@ -121,7 +244,7 @@ def get_status() -> dict:
             'data': data_teste.strftime('%Y-%m-%d'),
             'data_formatada': data_teste.strftime('%d/%m/%Y'),
             'dia_semana': data_teste.strftime('%A'),
-            'arquivo_existe': True
+            'arquivo_existe': CONFIG_FILE.exists()
         }
     else:
         hoje = datetime.now()
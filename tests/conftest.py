@@ -0,0 +1,142 @@
+"""
+Fixtures compartilhadas dos testes.
+
+O banco padrão (pastagens.db na raiz) nunca é tocado: PASTOFLOW_DB_PATH aponta
+para um arquivo temporário antes de qualquer import de database/app.
+"""
+import os
+import tempfile
+
+import pytest
+
+_TMP_DIR = tempfile.mkdtemp(prefix='pastoflow_testes_')
+os.environ.setdefault('PASTOFLOW_DB_PATH', os.path.join(_TMP_DIR, 'pastagens_testes.db'))
+os.environ.setdefault('PASTOFLOW_AUTO_MIGRATE', '1')  # import de app.py migra o banco temporário
+os.environ.setdefault('PASTOFLOW_PREFETCH_CLIMA', '0')  # agendador só nos testes que o iniciam
+
+
+@pytest.fixture
+def banco_temp(tmp_path):
+    """Banco SQLite vazio, com schema completo, isolado por teste."""
+    from services import conexao_db, capim_service, clima_service, planejamento_service, sugestao_service
+    import database
+
+    caminho_original = conexao_db.DB_PATH
+    caminho = str(tmp_path / 'pastagens.db')
+    conexao_db.configurar(db_path=caminho, reutilizar=True)
+    database.init_db()
+    # ids de fazenda e coordenadas se repetem entre bancos
+    database.invalidar_clima_fazenda()
+    clima_service.limpar_cache_memoria()
+    clima_service.reiniciar_disjuntor()
+    planejamento_service.limpar_planos()
+    database.limpar_status_pendentes()
+    database.limpar_alertas_pendentes()
+    capim_service.limpar()
+    sugestao_service.limpar()
+    yield caminho
+    conexao_db.configurar(db_path=caminho_original, reutilizar=True)
+    database.invalidar_clima_fazenda()
+    clima_service.limpar_cache_memoria()
+    planejamento_service.limpar_planos()
+    database.limpar_status_pendentes()
+    database.limpar_alertas_pendentes()
+    capim_service.limpar()
+    sugestao_service.limpar()
+
+
+class OpenMeteoLocal:
+    """
+    Servidor HTTP local que imita GET /v1/forecast do Open-Meteo.
+
+    chuva_diaria define daily.precipitation_sum (7 valores), chuva_por_lat
+    sobrescreve por latitude; status != 200 simula erro (falhar_se(latitudes)
+    decide por requisição); atraso segura a resposta (segundos); gotejar
+    manda o corpo em pedaços de 64 bytes com essa pausa entre eles.
+    """
+
+    def __init__(self):
+        self.requisicoes = []
+        self.chuva_diaria = [10.0] * 7
+        self.chuva_por_lat = {}
+        self.falhar_se = None
+        self.umidade = 70
+        self.status = 200
+        self.atraso = 0
+        self.gotejar = 0
+        self.url = None
+
+    def resposta(self, params):
+        """Um objeto por coordenada; lista quando latitude/longitude trazem várias (separadas por vírgula)."""
+        latitudes = [float(v) for v in params['latitude'][0].split(',')]
+        longitudes = [float(v) for v in params['longitude'][0].split(',')]
+        locais = [self.local(lat, lon) for lat, lon in zip(latitudes, longitudes)]
+        return locais[0] if len(locais) == 1 else locais
+
+    def local(self, lat, lon):
+        return {
+            'latitude': lat,
+            'longitude': lon,
+            'timezone': 'America/Sao_Paulo',
+            'current': {'temperature_2m': 27.5, 'relative_humidity_2m': self.umidade, 'precipitation': 0.0},
+            'daily': {
+                'time': [f'2026-03-0{i + 1}' for i in range(7)],
+                'precipitation_sum': list(self.chuva_por_lat.get(lat, self.chuva_diaria)),
+                'temperature_2m_max': [31.0] * 7,
+                'temperature_2m_min': [19.0] * 7,
+            },
+        }
+
+
+@pytest.fixture
+def open_meteo_local(monkeypatch):
+    """Sobe o servidor local e aponta clima_service.OPEN_METEO_URL para ele."""
+    import json
+    import threading
+    import time
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+    from urllib.parse import parse_qs, urlparse
+
+    from services import clima_service
+
+    estado = OpenMeteoLocal()
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            url = urlparse(self.path)
+            params = parse_qs(url.query)
+            estado.requisicoes.append(params)
+            if estado.atraso:
+                time.sleep(estado.atraso)
+            status = estado.status
+            if estado.falhar_se and estado.falhar_se([float(v) for v in params['latitude'][0].split(',')]):
+                status = 500
+            if url.path != '/v1/forecast' or status != 200:
+                self.send_response(404 if url.path != '/v1/forecast' else status)
+                self.end_headers()
+                return
+            corpo = json.dumps(estado.resposta(params)).encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(corpo)))
+            self.end_headers()
+            if not estado.gotejar:
+                self.wfile.write(corpo)
+                return
+            # Corpo aos poucos: nenhuma leitura isolada estoura o timeout do socket
+            for i in range(0, len(corpo), 64):
+                self.wfile.write(corpo[i:i + 64])
+                self.wfile.flush()
+                time.sleep(estado.gotejar)
+
+        def log_message(self, *args):
+            pass
+
+    servidor = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    thread = threading.Thread(target=servidor.serve_forever, daemon=True)
+    thread.start()
+    estado.url = f'http://127.0.0.1:{servidor.server_address[1]}/v1/forecast'
+    monkeypatch.setattr(clima_service, 'OPEN_METEO_URL', estado.url)
+    yield estado
+    servidor.shutdown()
+    servidor.server_close()
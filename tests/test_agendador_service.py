@@ -0,0 +1,211 @@
+"""
+Testes da pré-busca de clima em segundo plano (services/agendador_service.py),
+contra um servidor local que imita o Open-Meteo (fixture open_meteo_local).
+"""
+import time
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+
+@pytest.fixture
+def fazendas(banco_temp):
+    """Fazendas automáticas (duas na mesma célula), uma manual, uma sem coordenadas e uma inativa."""
+    from services import conexao_db
+
+    conn = conexao_db.get_db()
+    agora = datetime.now().isoformat()
+    linhas = [
+        ('Auto A', -15.6, -47.8, 'automatico', 1),
+        ('Auto A vizinha', -15.6001, -47.8001, 'automatico', 1),
+        ('Auto B', -21.2, -50.4, None, 1),
+        ('Manual', -10.0, -40.0, 'manual', 1),
+        ('Sem coordenadas', None, None, 'automatico', 1),
+        ('Inativa', -5.0, -35.0, 'automatico', 0),
+    ]
+    conn.executemany('''
+        INSERT INTO fazendas (usuario_id, nome, latitude_sede, longitude_sede, clima_modo, ativo, created_at, updated_at)
+        VALUES (2, ?, ?, ?, ?, ?, ?, ?)
+    ''', [linha + (agora, agora) for linha in linhas])
+    conn.commit()
+    conn.close()
+
+
+@pytest.fixture
+def agendador():
+    from services import agendador_service
+    yield agendador_service
+    agendador_service.parar()
+
+
+def _cache(lat, lon):
+    from services.clima_service import _get_cache
+    return _get_cache(lat, lon)
+
+
+# ========== COORDENADAS ==========
+class TestCoordenadas:
+    """Só fazendas ativas, automáticas e com coordenadas; uma por célula do cache."""
+
+    def test_filtra_e_deduplica(self, fazendas, agendador):
+        assert agendador.coordenadas_fazendas_automaticas() == [(-21.2, -50.4), (-15.6001, -47.8001)]
+
+
+# ========== VARREDURA ==========
+class TestAtualizarClima:
+    """Renova o que está sem cache ou perto de expirar."""
+
+    def test_primeira_varredura_busca_tudo(self, fazendas, agendador, open_meteo_local):
+        open_meteo_local.chuva_diaria = [10.0] * 7  # 70 mm em 7 dias -> chuvoso
+        resumo = agendador.atualizar_clima_fazendas()
+
+        assert resumo == {'coordenadas': 2, 'atualizadas': 2, 'falhas': 0, 'em_dia': 0}
+        assert len(open_meteo_local.requisicoes) == 1  # uma requisição para o lote
+        assert _cache(-15.6, -47.8)['condicao'] == 'chuvoso'
+        assert _cache(-21.2, -50.4)['condicao'] == 'chuvoso'
+
+    def test_cache_em_dia_nao_busca(self, fazendas, agendador, open_meteo_local):
+        agendador.atualizar_clima_fazendas()
+        open_meteo_local.requisicoes.clear()
+
+        resumo = agendador.atualizar_clima_fazendas()
+        assert resumo['em_dia'] == 2 and resumo['atualizadas'] == 0
+        assert open_meteo_local.requisicoes == []
+
+    def test_renova_antes_de_expirar(self, fazendas, agendador, open_meteo_local):
+        from services.clima_service import CACHE_TTL_HOURS
+
+        agendador.atualizar_clima_fazendas()
+        open_meteo_local.chuva_diaria = [0.0] * 7  # seca
+        resumo = agendador.atualizar_clima_fazendas(margem_minutos=CACHE_TTL_HOURS * 60 + 1)
+
+        assert resumo['atualizadas'] == 2
+        assert _cache(-15.6, -47.8)['condicao'] == 'seca'
+
+    def test_falha_da_api(self, fazendas, agendador, open_meteo_local):
+        open_meteo_local.status = 500
+        resumo = agendador.atualizar_clima_fazendas()
+        assert resumo['falhas'] == 2 and resumo['atualizadas'] == 0
+        assert _cache(-15.6, -47.8) is None
+
+    def test_pool_limitado(self, fazendas, agendador, open_meteo_local):
+        """Com um worker os lotes são sequenciais."""
+        open_meteo_local.atraso = 0.2
+        inicio = time.perf_counter()
+        agendador.atualizar_clima_fazendas(max_workers=1, tamanho_lote=1)
+        assert time.perf_counter() - inicio >= 0.4
+        assert len(open_meteo_local.requisicoes) == 2
+
+
+# ========== REQUISIÇÕES SÓ LEEM O CACHE ==========
+class TestSomenteCache:
+    """Com o agendador ativo, um miss não bloqueia a requisição."""
+
+    def test_miss_enfileira_e_responde_na_hora(self, banco_temp, agendador, open_meteo_local):
+        from services.clima_service import obter_clima_com_fallback
+
+        open_meteo_local.atraso = 0.5
+        agendador.iniciar(intervalo_minutos=60)
+
+        inicio = time.perf_counter()
+        clima = obter_clima_com_fallback(-19.9, -43.9)
+        assert time.perf_counter() - inicio < 0.3
+        assert clima['fonte'] == 'simulacao'
+
+        for _ in range(50):
+            if _cache(-19.9, -43.9):
+                break
+            time.sleep(0.05)
+        assert _cache(-19.9, -43.9)['fonte'] == 'cache'
+        assert obter_clima_com_fallback(-19.9, -43.9)['fonte'] == 'cache'
+
+    def test_iniciar_varre_fazendas(self, fazendas, agendador, open_meteo_local):
+        agendador.iniciar(intervalo_minutos=60)
+        for _ in range(50):
+            if _cache(-15.6, -47.8) and _cache(-21.2, -50.4):
+                break
+            time.sleep(0.05)
+        assert _cache(-15.6, -47.8) and _cache(-21.2, -50.4)
+
+    def test_parar_volta_a_buscar(self, banco_temp, agendador, open_meteo_local):
+        from services.clima_service import obter_clima_com_fallback
+
+        agendador.iniciar(intervalo_minutos=60)
+        agendador.parar()
+        assert not agendador.em_execucao()
+        assert obter_clima_com_fallback(-19.9, -43.9)['fonte'] == 'api'
+
+
+# ========== FLASK ==========
+class TestInitApp:
+    """PASTOFLOW_PREFETCH_CLIMA=0 não registra o agendador."""
+
+    def test_desligado_por_env(self, agendador, monkeypatch):
+        from flask import Flask
+
+        monkeypatch.setenv('PASTOFLOW_PREFETCH_CLIMA', '0')
+        app = Flask('teste')
+        agendador.init_app(app)
+        assert not app.before_request_funcs
+
+    def test_inicia_na_primeira_requisicao(self, banco_temp, agendador, monkeypatch, open_meteo_local):
+        from flask import Flask
+
+        monkeypatch.setenv('PASTOFLOW_PREFETCH_CLIMA', '1')
+        app = Flask('teste')
+        app.route('/')(lambda: 'ok')
+        agendador.init_app(app)
+        assert not agendador.em_execucao()
+        app.test_client().get('/')
+        assert agendador.em_execucao()
+
+
+# ========== EXECUÇÃO ÚNICA ==========
+class TestExecucaoUnica:
+    """Com vários processos só o dono da trava agenda as varreduras."""
+
+    @pytest.fixture
+    def sem_varredura_real(self, agendador, monkeypatch):
+        for nome in ('atualizar_clima_fazendas', 'purgar_clima_cache', 'gerar_alertas', 'atualizar_status_diario'):
+            monkeypatch.setattr(agendador, nome, lambda: None)
+        return agendador
+
+    def _travar_como_outro_processo(self, agendador):
+        import fcntl
+        arquivo = open(agendador._caminho_trava(), 'a')
+        fcntl.flock(arquivo, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        return arquivo
+
+    def test_sem_trava_nao_varre_e_assume_depois(self, banco_temp, sem_varredura_real):
+        agendador = sem_varredura_real
+        outro = self._travar_como_outro_processo(agendador)
+        try:
+            agendador.iniciar()
+            assert agendador._scheduler.get_job('alertas') is None
+            assert agendador._scheduler.get_job('assumir_varreduras') is not None
+            agendador._assumir_varreduras()
+            assert agendador._scheduler.get_job('alertas') is None  # o outro ainda está vivo
+        finally:
+            outro.close()  # o outro processo saiu
+        agendador._assumir_varreduras()
+        assert agendador._scheduler.get_job('alertas') is not None
+        assert agendador._scheduler.get_job('status_lotes_diario') is not None
+        assert agendador._scheduler.get_job('assumir_varreduras') is None
+
+    def test_desligado_nos_workers(self, banco_temp, sem_varredura_real, monkeypatch):
+        agendador = sem_varredura_real
+        monkeypatch.setenv('PASTOFLOW_AGENDADOR', '0')
+        agendador.iniciar()
+        assert agendador.em_execucao()
+        assert agendador._scheduler.get_jobs() == []
+        assert agendador._trava is None
+
+    def test_executor_dedicado_com_trava_ocupada(self, banco_temp, sem_varredura_real, capsys):
+        agendador = sem_varredura_real
+        outro = self._travar_como_outro_processo(agendador)
+        try:
+            assert agendador.main() == 1
+        finally:
+            outro.close()
+        assert 'Outro processo' in capsys.readouterr().out
+        assert not agendador.em_execucao()
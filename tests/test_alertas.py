@@ -0,0 +1,190 @@
+"""
+Testes da geração de alertas (database.py): fora da página da fazenda, na
+varredura do agendador e depois de movimentação ou medição, num único
+INSERT OR IGNORE deduplicado pelo índice único parcial (migração 011).
+"""
+import pytest
+
+
+@pytest.fixture
+def fazenda(banco_temp):
+    """Fazenda com um lote atrasado (saída prevista no passado) e um em dia."""
+    import database
+    from services import conexao_db
+
+    fazenda_id = database.criar_fazenda(2, 'Alertas', 100)
+    p1 = database.criar_piquete(fazenda_id, 'P1', area=5, capim='Marandu', altura_atual=30, data_medicao='2026-03-01')
+    p2 = database.criar_piquete(fazenda_id, 'P2', area=5, capim='Marandu', altura_atual=30, data_medicao='2026-03-01')
+    atrasado = database.criar_lote(fazenda_id, 'Atrasado', 'Vaca', 10, 450, piquete_id=p1)
+    em_dia = database.criar_lote(fazenda_id, 'Em dia', 'Vaca', 10, 450, piquete_id=p2)
+    conn = conexao_db.get_db()
+    conn.execute("UPDATE lotes SET data_saida_prevista = '01/01/2020' WHERE id = ?", (atrasado,))
+    conn.execute("UPDATE lotes SET data_saida_prevista = '01/01/2099' WHERE id = ?", (em_dia,))
+    conn.commit()
+    conn.close()
+    return {'id': fazenda_id, 'piquetes': (p1, p2), 'atrasado': atrasado, 'em_dia': em_dia}
+
+
+def _alertas(fazenda_id=None):
+    from services import conexao_db
+
+    conn = conexao_db.get_db()
+    if fazenda_id is None:
+        linhas = conn.execute("SELECT fazenda_id, lote_id FROM alertas WHERE tipo = 'ocupacao_tecnica'").fetchall()
+    else:
+        linhas = conn.execute("SELECT fazenda_id, lote_id FROM alertas WHERE tipo = 'ocupacao_tecnica' "
+                              "AND fazenda_id = ?", (fazenda_id,)).fetchall()
+    conn.close()
+    return sorted(tuple(r) for r in linhas)
+
+
+def _cliente(fazenda_id):
+    from app import app
+
+    app.config['TESTING'] = True
+    client = app.test_client()
+    with client.session_transaction() as sess:
+        sess['user_id'] = 2
+        sess['role'] = 'gerente'
+        sess['fazenda_id'] = fazenda_id
+    return client
+
+
+# ========== PÁGINA ==========
+class TestPaginaSoLe:
+    """GET /fazenda/<id> não grava alertas."""
+
+    def test_sem_escrita(self, fazenda):
+        from services import conexao_db
+
+        client = _cliente(fazenda['id'])
+        conn = conexao_db.get_db()
+        emitidos = []
+        conn.set_trace_callback(emitidos.append)
+        try:
+            assert client.get(f"/fazenda/{fazenda['id']}").status_code == 200
+        finally:
+            conn.set_trace_callback(None)
+            conn.close()
+        assert not [sql for sql in emitidos if 'INSERT INTO alertas' in sql]
+        assert _alertas() == []
+
+
+# ========== VARREDURA ==========
+class TestVarredura:
+    """Todas as fazendas, em lotes, sem duplicar alertas não lidos."""
+
+    def test_todas_as_fazendas_em_lotes(self, fazenda):
+        import database
+        from services import conexao_db
+
+        outra = database.criar_fazenda(2, 'Outra', 50)
+        piquete = database.criar_piquete(outra, 'Q1', area=3, capim='Marandu', altura_atual=30,
+                                         data_medicao='2026-03-01')
+        lote = database.criar_lote(outra, 'Atrasado 2', 'Vaca', 5, 450, piquete_id=piquete)
+        conn = conexao_db.get_db()
+        conn.execute("UPDATE lotes SET data_saida_prevista = '2020-01-01' WHERE id = ?", (lote,))
+        conn.commit()
+        conn.close()
+
+        resumo = database.varrer_alertas(tamanho_lote=1)
+        assert resumo == {'fazendas': 2, 'alertas': 2}
+        assert _alertas() == sorted([(fazenda['id'], fazenda['atrasado']), (outra, lote)])
+        assert database.varrer_alertas()['alertas'] == 0  # já existe alerta não lido
+
+    def test_job_agendado(self, banco_temp, monkeypatch):
+        from services import agendador_service
+
+        monkeypatch.setattr(agendador_service, 'atualizar_clima_fazendas', lambda: None)
+        monkeypatch.setattr(agendador_service, 'gerar_alertas', lambda: None)
+        agendador_service.iniciar()
+        try:
+            assert agendador_service._scheduler.get_job('alertas') is not None
+        finally:
+            agendador_service.parar()
+
+
+# ========== EVENTOS ==========
+class TestEventos:
+    """Movimentação e medição geram os alertas da fazenda na mesma requisição."""
+
+    def test_mover_gera_alertas(self, fazenda):
+        import database
+
+        destino = database.criar_piquete(fazenda['id'], 'P3', area=5, capim='Marandu', altura_atual=30,
+                                         data_medicao='2026-03-01')
+        resposta = _cliente(fazenda['id']).post(f"/api/lotes/{fazenda['em_dia']}/mover",
+                                                json={'piquete_destino_id': destino})
+        assert resposta.status_code == 200
+        assert _alertas(fazenda['id']) == [(fazenda['id'], fazenda['atrasado'])]
+
+    def test_medicao_marca_a_fazenda(self, fazenda):
+        import database
+
+        database.atualizar_piquete(fazenda['piquetes'][0], area=5, capim='Marandu', altura_atual=28.0,
+                                   data_medicao='2026-03-02')
+        assert database._alertas_pendentes == {fazenda['id']}
+        assert database.gerar_alertas_pendentes() == 1
+        assert database._alertas_pendentes == set()
+        assert database.gerar_alertas_pendentes() == 0
+
+
+# ========== INSERT ÚNICO ==========
+class TestInsertUnico:
+    """Um INSERT ... SELECT por chamada; o banco ignora o que já está pendente."""
+
+    def _inserts(self, funcao):
+        from services import conexao_db
+
+        conn = conexao_db.get_db()
+        emitidos = []
+        conn.set_trace_callback(emitidos.append)
+        try:
+            resultado = funcao()
+        finally:
+            conn.set_trace_callback(None)
+            conn.close()
+        return resultado, [sql for sql in emitidos if 'INTO alertas' in sql]
+
+    def test_uma_instrucao_idempotente(self, fazenda):
+        import database
+
+        criados, inserts = self._inserts(lambda: database.verificar_alertas_piquetes(fazenda['id']))
+        assert len(inserts) == 1 and 'INSERT OR IGNORE' in inserts[0]
+        assert criados == ['Alerta criado para P1: tempo técnico atingido']
+        resumo, inserts = self._inserts(database.varrer_alertas)
+        assert resumo == {'fazendas': 1, 'alertas': 0} and len(inserts) == 1
+        assert _alertas() == [(fazenda['id'], fazenda['atrasado'])]
+
+    def test_lido_libera_novo_alerta(self, fazenda):
+        import database
+        from services import conexao_db
+
+        database.verificar_alertas_piquetes(fazenda['id'])
+        conn = conexao_db.get_db()
+        conn.execute('UPDATE alertas SET lido = 1')
+        conn.commit()
+        conn.close()
+        assert len(database.verificar_alertas_piquetes(fazenda['id'])) == 1
+        assert len(_alertas()) == 2
+
+    @pytest.mark.parametrize('saida, alerta', [
+        ('15/03/2026', True),
+        ('16/03/2026', False),
+        ('2026-03-15', True),
+        ('2026-03-15T11:59:00', True),
+        ('2026-03-15T12:01:00', False),
+    ])
+    def test_datas_br_e_iso(self, fazenda, saida, alerta):
+        import database
+        from datetime import datetime
+        from services import conexao_db
+        from simular_data import relogio_fixo
+
+        conn = conexao_db.get_db()
+        conn.execute('UPDATE lotes SET data_saida_prevista = ? WHERE id = ?', (saida, fazenda['em_dia']))
+        conn.commit()
+        conn.close()
+        with relogio_fixo(datetime(2026, 3, 15, 12, 0, 0)):
+            database.verificar_alertas_piquetes(fazenda['id'])
+        assert ((fazenda['id'], fazenda['em_dia']) in _alertas()) is alerta
@@ -0,0 +1,143 @@
+"""
+Testes da estimativa de altura em lote (services/altura_service.py):
+propriedade de igualdade elemento a elemento com calcular_altura_estimada.
+"""
+import random
+from datetime import datetime, timedelta
+
+import pytest
+
+DATA_REF = datetime(2026, 3, 1, 12, 0, 0)
+CAPINS = ['Marandu', 'Mombaça', 'Tifton 85', 'Brachiaria', 'Capiaçu', 'Desconhecido', None]
+CATEGORIAS = ['Bezerro(a)', 'Vaca', 'Touro', 'Personalizado', 'Outra', None]
+
+
+def _talvez(rnd, valor, p=0.15):
+    return None if rnd.random() < p else valor
+
+
+def _piquete_aleatorio(rnd):
+    """Piquete com valores nas bordas (None, 0, empates de arredondamento, datas inválidas)."""
+    data_medicao = rnd.choice([
+        None,
+        (DATA_REF - timedelta(days=rnd.randint(0, 60))).strftime('%Y-%m-%d'),
+        (DATA_REF - timedelta(days=rnd.randint(0, 60), hours=rnd.randint(0, 23))).isoformat(),
+        (DATA_REF - timedelta(days=rnd.randint(0, 60))).isoformat() + 'Z',
+        (DATA_REF + timedelta(days=3)).strftime('%Y-%m-%d'),
+        'data inválida',
+    ])
+    return {
+        'fazenda_id': None,
+        'altura_real_medida': _talvez(rnd, rnd.choice([rnd.randint(5, 45), round(rnd.uniform(5, 45), 2),
+                                                        rnd.randint(50, 900) / 20]), p=0.3),
+        'data_medicao': data_medicao,
+        'estado': rnd.choice(['ocupado', 'ocupado', 'descanso', None]),
+        'dias_descanso': rnd.choice([None, 0, rnd.randint(0, 90)]),
+        'dias_ocupacao': rnd.choice([None, 0, -1, rnd.randint(0, 15)]),
+        'capim': rnd.choice(CAPINS),
+        'altura_saida': rnd.choice([None, 0, 10, 15, 12.5, 20.0]),
+        'altura_entrada': rnd.choice([None, 0, 25, 30.0, 35, 22.5]),
+        'animais_no_piquete': rnd.choice([None, 0, rnd.randint(1, 400)]),
+        'area': rnd.choice([None, 0, round(rnd.uniform(0.5, 20), 2)]),
+        'percentual_suplementacao': rnd.choice([None, 0, 0.2, 0.5, 0.9]),
+        'possui_cocho': rnd.choice([None, 0, 1]),
+        'condicao_climatica': rnd.choice([None, 'normal', 'seca', 'chuvoso', 'Chuvoso ']),
+    }
+
+
+def _escalar(piquetes, categorias, pesos, consumos):
+    from database import calcular_altura_estimada
+    return [
+        calcular_altura_estimada(p, categoria=c, peso_medio=w, consumo_base=b)
+        for p, c, w, b in zip(piquetes, categorias, pesos, consumos)
+    ]
+
+
+def _assert_iguais(obtido, esperado):
+    assert len(obtido) == len(esperado)
+    for i, ((a, fa), (e, fe)) in enumerate(zip(obtido, esperado)):
+        assert (a, fa) == (e, fe), (i, a, e)
+        assert type(a) is type(e), (i, a, e)
+
+
+# ========== PROPRIEDADE ==========
+class TestIgualdadeEscalar:
+    """Lote == escalar, elemento a elemento (valor, fonte e tipo)."""
+
+    @pytest.mark.parametrize('seed', range(20))
+    def test_piquetes_aleatorios(self, seed):
+        from services.altura_service import calcular_alturas_estimadas
+        from simular_data import relogio_fixo
+
+        rnd = random.Random(seed)
+        piquetes = [_piquete_aleatorio(rnd) for _ in range(300)]
+        # Negativos em descanso levantam erro (testado à parte)
+        for p in piquetes:
+            if p['estado'] != 'ocupado' and p['data_medicao'] and p['data_medicao'] > DATA_REF.isoformat():
+                p['data_medicao'] = None
+        categorias = [rnd.choice(CATEGORIAS) for _ in piquetes]
+        pesos = [rnd.choice([None, 0, 250, 480.5]) for _ in piquetes]
+        consumos = [rnd.choice([None, None, 1.1, 0.0]) for _ in piquetes]
+
+        with relogio_fixo(DATA_REF):
+            esperado = _escalar(piquetes, categorias, pesos, consumos)
+            obtido = calcular_alturas_estimadas(piquetes, categorias, pesos, consumos)
+        _assert_iguais(obtido, esperado)
+
+    def test_sem_argumentos_de_lote(self):
+        from services.altura_service import calcular_alturas_estimadas
+        from simular_data import relogio_fixo
+
+        rnd = random.Random(99)
+        piquetes = [_piquete_aleatorio(rnd) for _ in range(200)]
+        for p in piquetes:
+            p['dias_descanso'] = abs(p['dias_descanso'] or 0)
+            if p['data_medicao'] and p['data_medicao'] > DATA_REF.isoformat():
+                p['data_medicao'] = None
+        with relogio_fixo(DATA_REF):
+            esperado = _escalar(piquetes, [None] * 200, [None] * 200, [None] * 200)
+            obtido = calcular_alturas_estimadas(piquetes)
+        _assert_iguais(obtido, esperado)
+
+    def test_lista_vazia(self):
+        from services.altura_service import calcular_alturas_estimadas
+        assert calcular_alturas_estimadas([]) == []
+
+    def test_descanso_negativo_levanta_erro(self):
+        from services.altura_service import calcular_alturas_estimadas
+        from services.manejo_service import ManejoError
+        from database import calcular_altura_estimada
+
+        piquete = {'estado': 'descanso', 'dias_descanso': -2, 'capim': 'Marandu'}
+        with pytest.raises(ManejoError):
+            calcular_altura_estimada(piquete)
+        with pytest.raises(ManejoError):
+            calcular_alturas_estimadas([piquete])
+
+
+# ========== CLIMA DA FAZENDA ==========
+class TestClimaFazenda:
+    """Piquetes reais de fazendas com clima manual e automático (cache)."""
+
+    def test_piquetes_do_banco(self, banco_temp):
+        import database
+        from services import conexao_db
+        from services.altura_service import calcular_alturas_estimadas
+        from services.clima_service import _save_cache
+        from simular_data import relogio_fixo
+        from benchmarks.dados_sinteticos import popular_fazenda
+
+        conn = conexao_db.get_db()
+        popular_fazenda(conn, n_piquetes=80, n_lotes=20, data_ref=DATA_REF, seed=3)
+        popular_fazenda(conn, n_piquetes=80, n_lotes=20, data_ref=DATA_REF, seed=4,
+                        clima_modo='automatico', latitude=-16.0, longitude=-48.0)
+        conn.close()
+        _save_cache(-16.0, -48.0, 'seca', 0.6, {})
+
+        with relogio_fixo(DATA_REF):
+            piquetes = database.listar_piquetes()
+            for p in piquetes:
+                p['altura_estimada'] = None
+            esperado = [database.calcular_altura_estimada(p) for p in piquetes]
+            obtido = calcular_alturas_estimadas(piquetes)
+        _assert_iguais(obtido, esperado)
@@ -0,0 +1,212 @@
+"""
+Testes da atribuição lote -> piquete (services/atribuicao_service.py):
+emparelhamento ótimo contra força bruta e regras de custo sobre o banco.
+"""
+import itertools
+import json
+import random
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+DATA_REF = datetime(2026, 3, 1, 12, 0, 0)
+LAT, LON = -15.6, -47.8
+
+
+def _forca_bruta(custos):
+    n, m = custos.shape
+    if n <= m:
+        return min(sum(custos[i, p[i]] for i in range(n)) for p in itertools.permutations(range(m), n))
+    return min(sum(custos[p[j], j] for j in range(m)) for p in itertools.permutations(range(n), m))
+
+
+# ========== EMPARELHAMENTO ==========
+class TestResolverAtribuicao:
+    """resolver_atribuicao devolve o custo mínimo, sem repetir coluna."""
+
+    @pytest.mark.parametrize('seed', range(5))
+    def test_igual_forca_bruta(self, seed):
+        from services.atribuicao_service import resolver_atribuicao
+
+        rnd = random.Random(seed)
+        for _ in range(60):
+            n, m = rnd.randint(1, 5), rnd.randint(1, 6)
+            # Empates frequentes e custos negativos, como na matriz real
+            custos = np.array([[rnd.choice([rnd.uniform(-20, 100), rnd.randint(0, 3)]) for _ in range(m)]
+                               for _ in range(n)])
+            colunas = resolver_atribuicao(custos)
+            usadas = [int(j) for j in colunas if j >= 0]
+            assert len(usadas) == len(set(usadas)) == min(n, m)
+            obtido = sum(custos[i, j] for i, j in enumerate(colunas) if j >= 0)
+            assert obtido == pytest.approx(_forca_bruta(custos))
+
+    def test_poda_de_colunas(self):
+        """Com muito mais colunas que linhas, a poda não muda o ótimo."""
+        from services.atribuicao_service import resolver_atribuicao
+
+        rnd = np.random.default_rng(7)
+        custos = rnd.integers(0, 5, size=(3, 40)).astype(float)
+        colunas = resolver_atribuicao(custos)
+        assert custos[np.arange(3), colunas].sum() == pytest.approx(_forca_bruta(custos))
+
+    def test_vazio(self):
+        from services.atribuicao_service import resolver_atribuicao
+
+        assert resolver_atribuicao(np.zeros((0, 4))).tolist() == []
+        assert resolver_atribuicao(np.zeros((2, 0))).tolist() == [-1, -1]
+
+
+# ========== BANCO ==========
+def _poligono(lat, lon, lado=0.004):
+    coords = [[lon, lat], [lon + lado, lat], [lon + lado, lat + lado], [lon, lat + lado], [lon, lat]]
+    return json.dumps({'type': 'Polygon', 'coordinates': [coords]})
+
+
+@pytest.fixture
+def fazenda(banco_temp):
+    from services import conexao_db
+    from benchmarks.dados_sinteticos import popular_fazenda
+
+    conn = conexao_db.get_db()
+    fazenda_id = popular_fazenda(conn, n_piquetes=0, n_lotes=0, data_ref=DATA_REF, latitude=LAT, longitude=LON)
+    conn.close()
+    return fazenda_id
+
+
+def _piquete(fazenda_id, nome, altura, area=10.0, entrada=25, lat=LAT, lon=LON, bloqueado=0):
+    from services import conexao_db
+
+    conn = conexao_db.get_db()
+    cur = conn.cursor()
+    cur.execute('''
+        INSERT INTO piquetes (fazenda_id, nome, area, capim, geometria, altura_real_medida, data_medicao,
+                              altura_entrada, altura_saida, dias_descanso_min, ativo, bloqueado,
+                              created_at, updated_at)
+        VALUES (?, ?, ?, 'Marandu', ?, ?, ?, ?, 15, 30, 1, ?, ?, ?)
+    ''', (fazenda_id, nome, area, _poligono(lat, lon), altura, DATA_REF.strftime('%Y-%m-%d'), entrada,
+          bloqueado, (DATA_REF - timedelta(days=200)).isoformat(), DATA_REF.isoformat()))
+    conn.commit()
+    piquete_id = cur.lastrowid
+    conn.close()
+    return piquete_id
+
+
+def _lote(fazenda_id, nome, quantidade=20, piquete_id=None, status=None):
+    from services import conexao_db
+
+    conn = conexao_db.get_db()
+    cur = conn.cursor()
+    cur.execute('''
+        INSERT INTO lotes (fazenda_id, nome, categoria, quantidade, peso_medio, piquete_atual_id,
+                           status_calculado, ativo, created_at, updated_at)
+        VALUES (?, ?, 'Vaca', ?, 450, ?, ?, 1, ?, ?)
+    ''', (fazenda_id, nome, quantidade, piquete_id, status, DATA_REF.isoformat(), DATA_REF.isoformat()))
+    if piquete_id:
+        cur.execute("UPDATE piquetes SET estado = 'ocupado' WHERE id = ?", (piquete_id,))
+    conn.commit()
+    lote_id = cur.lastrowid
+    conn.close()
+    return lote_id
+
+
+def _atribuir(fazenda_id, lote_ids=None):
+    from simular_data import relogio_fixo
+    from services.atribuicao_service import atribuir_lotes
+
+    with relogio_fixo(DATA_REF):
+        return atribuir_lotes(fazenda_id, lote_ids)
+
+
+class TestAtribuirLotes:
+    """Custos de altura, capacidade e distância sobre dados do banco."""
+
+    def test_dois_lotes_nao_disputam_o_mesmo_piquete(self, fazenda):
+        melhor = _piquete(fazenda, 'Melhor', altura=40)
+        _piquete(fazenda, 'Bom', altura=35)
+        _piquete(fazenda, 'Baixo', altura=18)
+        _lote(fazenda, 'L1')
+        _lote(fazenda, 'L2')
+
+        resultado = _atribuir(fazenda)
+        ids = [a['piquete_id'] for a in resultado['atribuicoes']]
+        assert len(ids) == 2 and len(set(ids)) == 2
+        assert melhor in ids
+        assert resultado['piquetes_livres'] == 3
+        assert resultado['custo_total'] == pytest.approx(sum(a['custo'] for a in resultado['atribuicoes']), abs=0.05)
+
+    def test_padrao_sem_piquete_ou_retirar(self, fazenda):
+        origem = _piquete(fazenda, 'Origem', altura=20)
+        _piquete(fazenda, 'Livre', altura=30)
+        retirar = _lote(fazenda, 'Retirar', piquete_id=origem, status='RETIRAR')
+        _lote(fazenda, 'Ok', piquete_id=_piquete(fazenda, 'Outro', altura=30), status='OK')
+
+        resultado = _atribuir(fazenda)
+        assert [a['lote_id'] for a in resultado['atribuicoes']] == [retirar]
+        # Piquetes com lote não entram como destino
+        assert resultado['piquetes_livres'] == 1
+
+    def test_prefere_piquete_perto(self, fazenda):
+        origem = _piquete(fazenda, 'Origem', altura=20, lat=LAT, lon=LON)
+        perto = _piquete(fazenda, 'Perto', altura=30, lat=LAT, lon=LON + 0.01)
+        _piquete(fazenda, 'Longe', altura=30, lat=LAT, lon=LON + 0.2)
+        lote_id = _lote(fazenda, 'L1', piquete_id=origem)
+
+        atribuicao, = _atribuir(fazenda, [lote_id])['atribuicoes']
+        assert atribuicao['piquete_id'] == perto
+        assert 0.5 < atribuicao['distancia_km'] < 2
+
+    def test_lotacao_acima_do_limite_fica_sem_piquete(self, fazenda):
+        _piquete(fazenda, 'Pequeno', altura=30, area=1.0)
+        lote_id = _lote(fazenda, 'Grande', quantidade=50)  # 50 UA em 1 ha
+
+        resultado = _atribuir(fazenda)
+        assert resultado['atribuicoes'] == []
+        assert resultado['sem_piquete'][0]['lote_id'] == lote_id
+
+    def test_mais_lotes_que_piquetes(self, fazenda):
+        _piquete(fazenda, 'Unico', altura=30)
+        _piquete(fazenda, 'Bloqueado', altura=40, bloqueado=1)
+        for i in range(3):
+            _lote(fazenda, f'L{i}')
+
+        resultado = _atribuir(fazenda)
+        assert len(resultado['atribuicoes']) == 1
+        assert {s['motivo'] for s in resultado['sem_piquete']} == {'Sem piquete livre'}
+
+    def test_endpoint(self, fazenda):
+        from app import app
+
+        _piquete(fazenda, 'P1', altura=30)
+        lote_id = _lote(fazenda, 'L1')
+        app.config['TESTING'] = True
+        client = app.test_client()
+        assert client.get('/api/rotacao/atribuicao').status_code == 401
+        with client.session_transaction() as sess:
+            sess['user_id'] = 2
+            sess['fazenda_id'] = fazenda
+        dados = client.get(f'/api/rotacao/atribuicao?lote_ids={lote_id}').get_json()
+        assert dados['atribuicoes'][0]['lote_id'] == lote_id
+        assert set(dados['atribuicoes'][0]['custos']) == {'altura', 'descanso', 'capacidade', 'distancia'}
+        assert client.get('/api/rotacao/atribuicao?lote_ids=x').status_code == 400
+        assert client.get('/api/rotacao/atribuicao?fazenda_id=abc').status_code == 400
+
+    def test_fazenda_de_outro_usuario(self, fazenda):
+        """?fazenda_id= de fazenda sem acesso: 403 (admin acessa todas)."""
+        import database
+        from app import app
+
+        alheia = database.criar_fazenda(3, 'Alheia', 10)
+        app.config['TESTING'] = True
+        client = app.test_client()
+        with client.session_transaction() as sess:
+            sess['user_id'] = 2
+            sess['role'] = 'gerente'
+            sess['fazenda_id'] = fazenda
+        for url in ('/api/rotacao/atribuicao', '/api/rotacao/simular', '/api/rotacao/calendario',
+                    '/api/piquetes/capacidade'):
+            assert client.get(f'{url}?fazenda_id={alheia}').status_code == 403
+            assert client.get(f'{url}?fazenda_id={fazenda}').status_code == 200
+        with client.session_transaction() as sess:
+            sess['role'] = 'admin'
+        assert client.get(f'/api/rotacao/atribuicao?fazenda_id={alheia}').status_code == 200
@@ -0,0 +1,153 @@
+"""
+Testes da capacidade de suporte (services/capacidade_service.py): cálculo
+vetorizado, gravação em piquetes, recálculo por medição e consulta.
+"""
+import pytest
+
+# altura, altura_saida, area, capim, cocho, suplementação, dias_ocupacao
+PIQUETES = [
+    (35.0, 15, 4.0, 'Marandu', 0, 0, 10),
+    (35.0, 15, 4.0, 'Marandu', 1, 0.4, 3),
+    (12.0, 15, 4.0, 'Mombaça', 0, 0, 3),
+    (30.0, 15, 0.5, 'Tifton 85', 0, 0, 1),
+]
+
+
+@pytest.fixture
+def fazenda(banco_temp):
+    import database
+
+    fazenda_id = database.criar_fazenda(2, 'Capacidade', 100)
+    ids = []
+    for i, (altura, saida, area, capim, cocho, sup, dias) in enumerate(PIQUETES):
+        ids.append(database.criar_piquete(fazenda_id, f'P{i}', area=area, capim=capim, altura_saida=saida,
+                                          dias_ocupacao=dias, altura_atual=altura, data_medicao='2026-03-01',
+                                          possui_cocho=cocho, percentual_suplementacao=sup))
+    return fazenda_id, ids
+
+
+def _coluna(piquete_id, coluna):
+    from services import conexao_db
+
+    conn = conexao_db.get_db()
+    valor = conn.execute(f'SELECT {coluna} FROM piquetes WHERE id = ?', (piquete_id,)).fetchone()[0]
+    conn.close()
+    return valor
+
+
+# ========== CÁLCULO ==========
+class TestCalculo:
+    """UA·dia = (altura - saída) x área x 2 / (consumo base x fator)."""
+
+    def test_estoque_em_ua_dias(self, fazenda):
+        from services import capim_service
+
+        _, ids = fazenda
+        marandu = capim_service.consumo_base('Marandu')
+        assert _coluna(ids[0], 'capacidade_ua_dias') == pytest.approx(20 * 4.0 * 2 / marandu, abs=1e-3)
+        # Suplementação de 40%: o pasto dura 1/0.6 vezes mais
+        assert _coluna(ids[1], 'capacidade_ua_dias') == pytest.approx(20 * 4.0 * 2 / (marandu * 0.6), abs=1e-3)
+        # Abaixo da altura de saída: nada a pastejar
+        assert _coluna(ids[2], 'capacidade_ua_dias') == 0
+
+    def test_capacidade_animal_nos_dias_de_ocupacao(self, fazenda):
+        from services.manejo_service import TAXA_MAXIMA_LOTACAO
+
+        _, ids = fazenda
+        assert _coluna(ids[0], 'capacidade_animal') == pytest.approx(_coluna(ids[0], 'capacidade_ua_dias') / 10,
+                                                                     abs=0.01)
+        # Ocupação de 1 dia em área pequena: limitada a TAXA_MAXIMA_LOTACAO UA/ha
+        assert _coluna(ids[3], 'capacidade_animal') == pytest.approx(TAXA_MAXIMA_LOTACAO * 0.5)
+
+    def test_mesmo_consumo_de_mover_lote(self, fazenda):
+        """dias_tecnicos de mover_lote = estoque / UA do lote."""
+        import database
+
+        fazenda_id, ids = fazenda
+        lote_id = database.criar_lote(fazenda_id, 'L1', 'Vaca', 10, 500)
+        resultado = database.mover_lote(lote_id, ids[1], usuario_id=2)
+        ua = 10 * 500 / 450
+        assert resultado['dias_tecnicos'] == int(_coluna(ids[1], 'capacidade_ua_dias') / ua)
+        assert resultado['capacidade'] == {'ua_lote': round(ua, 2), 'excede': False,
+                                           'ua_sustentavel': _coluna(ids[1], 'capacidade_animal')}
+
+        grande = database.criar_lote(fazenda_id, 'L2', 'Vaca', 200, 500)
+        assert database.mover_lote(grande, ids[0], usuario_id=2)['capacidade']['excede'] is True
+
+
+# ========== ATUALIZAÇÃO ==========
+class TestAtualizacao:
+    """Medição e cadastro de capim regravam; piquetes sem cálculo são preenchidos na consulta."""
+
+    def test_medicao_recalcula(self, fazenda):
+        import database
+
+        _, ids = fazenda
+        antes = _coluna(ids[0], 'capacidade_ua_dias')
+        database.atualizar_piquete(ids[0], area=4.0, capim='Marandu', altura_saida=15, dias_ocupacao=10,
+                                   altura_atual=25.0, data_medicao='2026-03-02')
+        assert _coluna(ids[0], 'capacidade_ua_dias') == pytest.approx(antes / 2, abs=1e-3)
+
+    def test_capim_recalcula(self, fazenda):
+        import database
+        from services import conexao_db
+
+        _, ids = fazenda
+        conn = conexao_db.get_db()
+        capim_id = conn.execute("SELECT id FROM capins WHERE nome = 'Tifton 85'").fetchone()[0]
+        conn.close()
+        antes = _coluna(ids[3], 'capacidade_ua_dias')
+        database.salvar_capim('Tifton 85', consumo_base=1.4, id=capim_id)  # padrão 0.70
+        assert _coluna(ids[3], 'capacidade_ua_dias') == pytest.approx(antes / 2, abs=1e-3)
+
+    def test_pendentes_preenchidos_na_consulta(self, banco_temp):
+        from services import conexao_db
+        from services.capacidade_service import capacidade_fazenda
+        from benchmarks.dados_sinteticos import popular_fazenda
+
+        conn = conexao_db.get_db()
+        fazenda_id = popular_fazenda(conn, n_piquetes=50, n_lotes=0, n_movimentacoes=0)
+        assert conn.execute('SELECT COUNT(*) FROM piquetes WHERE fazenda_id = ? AND capacidade_ua_dias IS NULL',
+                            (fazenda_id,)).fetchone()[0] == 50
+        conn.close()
+
+        assert len(capacidade_fazenda(fazenda_id)) == 50
+        conn = conexao_db.get_db()
+        assert conn.execute('SELECT COUNT(*) FROM piquetes WHERE fazenda_id = ? AND capacidade_ua_dias IS NULL',
+                            (fazenda_id,)).fetchone()[0] == 0
+        conn.close()
+
+
+# ========== CONSULTA ==========
+class TestConsulta:
+    """Dias e categoria escolhidos na consulta."""
+
+    def test_dias_e_cabecas(self, fazenda):
+        from services.capacidade_service import capacidade_fazenda
+
+        fazenda_id, ids = fazenda
+        por_id = {p['id']: p for p in capacidade_fazenda(fazenda_id, categoria='Vaca', dias=10)}
+        p0 = por_id[ids[0]]
+        assert p0['dias'] == 10
+        assert p0['ua_sustentavel'] == pytest.approx(p0['ua_dias'] / 10, abs=0.01)
+        assert p0['cabecas'] == int(p0['ua_sustentavel'] * 450 / 500)
+        assert por_id[ids[2]]['cabecas'] == 0
+        sem_peso = capacidade_fazenda(fazenda_id)
+        assert all(p['cabecas'] is None for p in sem_peso)
+        assert {p['id']: p['dias'] for p in sem_peso}[ids[3]] == 1
+
+    def test_endpoint(self, fazenda):
+        from app import app
+
+        fazenda_id, ids = fazenda
+        app.config['TESTING'] = True
+        client = app.test_client()
+        assert client.get('/api/piquetes/capacidade').status_code == 401
+        with client.session_transaction() as sess:
+            sess['user_id'] = 2
+            sess['fazenda_id'] = fazenda_id
+        resposta = client.get('/api/piquetes/capacidade?categoria=Touro&dias=4')
+        assert resposta.status_code == 200
+        assert [p['id'] for p in resposta.get_json()] == ids
+        assert client.get('/api/piquetes/capacidade?categoria=Cavalo').status_code == 400
+        assert client.get('/api/piquetes/capacidade?dias=0').status_code == 400
@@ -0,0 +1,163 @@
+"""
+Testes do registro de capins (services/capim_service.py): padrões técnicos,
+tabela capins por cima e recarga quando o cadastro muda.
+"""
+import pytest
+
+
+# ========== REGISTRO ==========
+class TestRegistro:
+    """Um registro imutável, carregado uma vez."""
+
+    def test_padroes(self, banco_temp):
+        from services import capim_service
+        from services.manejo_service import calcular_crescimento_diario, get_consumo_base
+
+        assert calcular_crescimento_diario('Mombaça') == 2.5
+        assert get_consumo_base('Tifton 85') == 0.70
+        assert capim_service.dias_tecnicos('Xaraés') == 35
+        # Desconhecido ou vazio: padrão
+        for nome in ('Inexistente', None, ''):
+            assert calcular_crescimento_diario(nome) == capim_service.CRESCIMENTO_PADRAO
+            assert get_consumo_base(nome) == capim_service.CONSUMO_PADRAO
+            assert capim_service.dias_tecnicos(nome) == capim_service.DIAS_TECNICOS_PADRAO
+            assert capim_service.obter(nome) is None
+
+    def test_sementes_fora_de_escala_ignoradas(self, banco_temp):
+        """As sementes de 005 (crescimento 60, 80...) não estão em cm/dia."""
+        from services import capim_service
+
+        assert capim_service.crescimento_diario('Brachiaria') == 1.2
+        assert capim_service.obter('Mombaça').tempo_descanso == 45  # demais colunas vêm da tabela
+
+    def test_imutavel(self, banco_temp):
+        from services import capim_service
+
+        registro = capim_service.registro()
+        with pytest.raises(AttributeError):
+            registro.obter('Marandu').crescimento_diario = 9
+        with pytest.raises(AttributeError):
+            registro.ids = {}
+        with pytest.raises(ValueError):
+            registro.crescimento[1] = 9
+
+    def test_arrays_por_id(self, banco_temp):
+        from services import capim_service
+
+        registro = capim_service.registro()
+        nomes = ['Marandu', 'Inexistente', 'Zuri', None]
+        ids = registro.indices(nomes)
+        assert ids[1] == ids[3] == 0
+        assert registro.crescimento[ids].tolist() == [capim_service.crescimento_diario(n) for n in nomes]
+        assert registro.consumo[ids].tolist() == [capim_service.consumo_base(n) for n in nomes]
+
+    def test_consulta_sem_banco(self, banco_temp):
+        """Depois da carga, as consultas não vão ao banco."""
+        from services import capim_service, conexao_db
+
+        capim_service.registro()
+        conn = conexao_db.get_db()
+        consultas = []
+        conn.set_trace_callback(consultas.append)
+        try:
+            for _ in range(100):
+                capim_service.crescimento_diario('Marandu')
+                capim_service.consumo_base('Piatã')
+        finally:
+            conn.set_trace_callback(None)
+            conn.close()
+        assert consultas == []
+
+    def test_gravacao_de_outro_worker(self, banco_temp, monkeypatch):
+        """Sem recarregar() local, a mudança na tabela aparece na próxima conferência de versão."""
+        from services import capim_service, conexao_db
+
+        assert capim_service.crescimento_diario('Marandu') == 1.2
+        conn = conexao_db.get_db()
+        conn.execute("INSERT INTO capins (nome, crescimento_diario, created_at, updated_at) "
+                     "VALUES ('Marandu', 2.2, '2026-03-01', '2026-03-01')")
+        conn.commit()
+        conn.close()
+        assert capim_service.crescimento_diario('Marandu') == 1.2  # ainda dentro do intervalo
+        monkeypatch.setattr(capim_service, 'VERIFICACAO_SEGUNDOS', 0)
+        assert capim_service.crescimento_diario('Marandu') == 2.2
+        registro = capim_service.registro()
+        assert capim_service.registro() is registro  # versão igual: não remonta
+
+
+# ========== CADASTRO ==========
+class TestCadastro:
+    """salvar_capim grava na tabela e recarrega o registro."""
+
+    def test_sobrescreve_e_acrescenta(self, banco_temp):
+        import database
+        from services import capim_service
+        from services.manejo_service import calcular_crescimento_diario
+
+        antes = capim_service.registro()
+        database.salvar_capim('Marandu', crescimento_diario=2.0, consumo_base=0.9)
+        database.salvar_capim('Capim Novo', crescimento_diario=1.5)
+        assert capim_service.registro() is not antes
+        assert calcular_crescimento_diario('Marandu') == 2.0
+        assert capim_service.consumo_base('Marandu') == 0.9
+        assert capim_service.dias_tecnicos('Marandu') == 28  # sem valor na tabela: padrão
+        assert capim_service.obter('Capim Novo').crescimento_diario == 1.5
+        assert capim_service.consumo_base('Capim Novo') == capim_service.CONSUMO_PADRAO
+
+    def test_validacoes(self, banco_temp):
+        import database
+
+        with pytest.raises(ValueError):
+            database.salvar_capim('')
+        with pytest.raises(ValueError):
+            database.salvar_capim('X', crescimento_diario=60)
+        database.salvar_capim('Y')
+        with pytest.raises(ValueError):
+            database.salvar_capim('Y')  # nome único (009)
+        with pytest.raises(ValueError):
+            database.salvar_capim('Z', id=9999)
+
+    def test_endpoint(self, banco_temp):
+        from app import app
+        from services import capim_service
+
+        app.config['TESTING'] = True
+        client = app.test_client()
+        assert client.post('/api/capins', json={'nome': 'A'}).status_code == 401
+        with client.session_transaction() as sess:
+            sess['user_id'] = 2
+            sess['role'] = 'operador'
+        assert client.post('/api/capins', json={'nome': 'A'}).status_code == 403
+        with client.session_transaction() as sess:
+            sess['role'] = 'gerente'
+        resposta = client.post('/api/capins', json={'nome': 'A', 'crescimento_diario': 3.0})
+        assert resposta.status_code == 200
+        capim_id = resposta.get_json()['id']
+        assert capim_service.crescimento_diario('A') == 3.0
+        assert client.put(f'/api/capins/{capim_id}', json={'nome': 'A', 'crescimento_diario': 2.2}).status_code == 200
+        assert capim_service.crescimento_diario('A') == 2.2
+        assert client.put(f'/api/capins/{capim_id}', json={'nome': 'A', 'dias_tecnicos': -1}).status_code == 400
+
+    def test_endpoint_texto_e_put_parcial(self, banco_temp):
+        """Números como texto são convertidos (ou 400); PUT só altera os campos enviados."""
+        from app import app
+        from services import capim_service
+
+        app.config['TESTING'] = True
+        client = app.test_client()
+        with client.session_transaction() as sess:
+            sess['user_id'] = 2
+            sess['role'] = 'gerente'
+        resposta = client.post('/api/capins', json={'nome': 'B', 'crescimento_diario': '1.5', 'consumo_base': '0.8'})
+        assert resposta.status_code == 200
+        capim_id = resposta.get_json()['id']
+        assert capim_service.crescimento_diario('B') == 1.5
+        assert client.post('/api/capins', json={'nome': 'C', 'crescimento_diario': 'abc'}).status_code == 400
+        assert client.post('/api/capins', json={'nome': 'C', 'dias_tecnicos': [1]}).status_code == 400
+
+        assert client.put(f'/api/capins/{capim_id}', json={'dias_tecnicos': '20'}).status_code == 200
+        assert capim_service.crescimento_diario('B') == 1.5
+        assert capim_service.consumo_base('B') == 0.8
+        assert capim_service.dias_tecnicos('B') == 20
+        assert client.put(f'/api/capins/{capim_id}', json={'consumo_base': None}).status_code == 200
+        assert capim_service.consumo_base('B') == capim_service.CONSUMO_PADRAO
@@ -0,0 +1,142 @@
+"""
+Testes do cache de clima em dois níveis (services/clima_service.py):
+memória (LRU + validade) na frente do clima_cache, e single-flight na API.
+"""
+import threading
+import time
+
+import pytest
+
+LAT, LON = -16.0, -48.0
+
+
+@pytest.fixture
+def clima(banco_temp):
+    from services import clima_service
+    clima_service.metricas_cache(zerar=True)
+    return clima_service
+
+
+def _selects(funcao):
+    from services import conexao_db
+
+    conn = conexao_db.get_db()
+    consultas = []
+    conn.set_trace_callback(consultas.append)
+    try:
+        resultado = funcao()
+    finally:
+        conn.set_trace_callback(None)
+        conn.close()
+    return resultado, [sql for sql in consultas if sql.lstrip().upper().startswith('SELECT')]
+
+
+def _api_lenta(monkeypatch, clima, chamadas, falhar=False, espera=0.2):
+    def obter_clima_real(lat, lon, timeout=None, prazo=None):
+        chamadas.append((lat, lon))
+        time.sleep(espera)
+        if falhar:
+            raise OSError('sem rede')
+        return {'condicao': 'chuvoso', 'fator': 1.2, 'fonte': 'api', 'latitude': lat, 'longitude': lon, 'payload': {}}
+
+    monkeypatch.setattr(clima, 'obter_clima_real', obter_clima_real)
+
+
+# ========== NÍVEIS ==========
+class TestNiveis:
+    """Memória primeiro, depois SQLite."""
+
+    def test_memoria_nao_consulta_sqlite(self, clima):
+        clima._save_cache(LAT, LON, 'seca', 0.6, {})
+        resultado, selects = _selects(lambda: clima.obter_clima_com_fallback(LAT, LON))
+        assert resultado['condicao'] == 'seca' and resultado['fonte'] == 'cache'
+        assert selects == []
+        assert clima.metricas_cache()['memoria_hits'] == 1
+
+    def test_sqlite_preenche_memoria(self, clima):
+        clima._save_cache(LAT, LON, 'seca', 0.6, {})
+        clima.limpar_cache_memoria()
+
+        _, selects = _selects(lambda: clima.obter_clima_com_fallback(LAT, LON))
+        assert len(selects) == 1
+        _, selects = _selects(lambda: clima.obter_clima_com_fallback(LAT, LON))
+        assert selects == []
+
+        metricas = clima.metricas_cache()
+        assert (metricas['memoria_hits'], metricas['memoria_misses']) == (1, 1)
+        assert metricas['sqlite_hits'] == 1
+        assert metricas['memoria_taxa_acerto'] == 0.5
+
+    def test_resultado_e_copia(self, clima):
+        clima._save_cache(LAT, LON, 'seca', 0.6, {})
+        clima.obter_clima_com_fallback(LAT, LON)['condicao'] = 'alterado'
+        assert clima.obter_clima_com_fallback(LAT, LON)['condicao'] == 'seca'
+
+    def test_lru_limitado(self, clima, monkeypatch):
+        monkeypatch.setattr(clima, 'MEMORIA_MAX_ENTRADAS', 2)
+        for i in range(3):
+            clima._save_cache(LAT - i, LON, 'normal', 1.0, {})
+        assert clima.metricas_cache()['memoria_entradas'] == 2
+
+
+# ========== SINGLE-FLIGHT ==========
+class TestSingleFlight:
+    """Uma chamada à API por coordenada, mesmo com requisições simultâneas."""
+
+    def _simultaneas(self, clima, n=8):
+        resultados = []
+        threads = [
+            threading.Thread(target=lambda: resultados.append(clima.obter_clima_com_fallback(LAT, LON + 0.0001)))
+            for _ in range(n)
+        ]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        return resultados
+
+    def test_uma_chamada(self, clima, monkeypatch):
+        chamadas = []
+        _api_lenta(monkeypatch, clima, chamadas)
+        resultados = self._simultaneas(clima)
+
+        assert len(chamadas) == 1
+        assert [r['condicao'] for r in resultados] == ['chuvoso'] * 8
+        assert clima.metricas_cache()['api_chamadas'] == 1
+        # A próxima já vem da memória
+        assert clima.obter_clima_com_fallback(LAT, LON)['fonte'] == 'cache'
+
+    def test_falha_compartilhada(self, clima, monkeypatch):
+        chamadas = []
+        _api_lenta(monkeypatch, clima, chamadas, falhar=True)
+        resultados = self._simultaneas(clima)
+
+        assert len(chamadas) == 1
+        assert {r['fonte'] for r in resultados} == {'simulacao'}
+        metricas = clima.metricas_cache()
+        assert metricas['api_erros'] == 1
+        assert metricas['coalescidas'] + metricas['api_chamadas'] <= 8
+
+
+# ========== ENDPOINT ==========
+class TestEndpointMetricas:
+    """/api/clima/metricas só para admin."""
+
+    def test_admin(self, clima):
+        from app import app
+        app.config['TESTING'] = True
+        client = app.test_client()
+        with client.session_transaction() as sess:
+            sess['user_id'] = 1
+            sess['role'] = 'admin'
+        dados = client.get('/api/clima/metricas').get_json()
+        assert {'memoria_taxa_acerto', 'sqlite_taxa_acerto', 'api_chamadas', 'coalescidas'} <= set(dados)
+
+    def test_gerente_proibido(self, clima):
+        from app import app
+        app.config['TESTING'] = True
+        client = app.test_client()
+        with client.session_transaction() as sess:
+            sess['user_id'] = 2
+            sess['role'] = 'gerente'
+        assert client.get('/api/clima/metricas').status_code == 403
@@ -0,0 +1,220 @@
+"""
+Testes da série diária de clima (services/clima_diario_service.py):
+somas acumuladas, integral do fator e uso em calcular_altura_descanso.
+"""
+import random
+from datetime import date, datetime, timedelta
+
+import numpy as np
+import pytest
+
+LAT, LON = -16.0, -48.0
+DATA_REF = datetime(2026, 3, 1, 12, 0, 0)
+SECA, NORMAL, CHUVOSO = 0.6, 1.0, 1.2
+
+
+def _payload(inicio, chuvas, tmin=18.0, tmax=31.0):
+    """Payload do Open-Meteo com daily.* a partir de inicio (None em chuvas = sem dado)."""
+    return {'daily': {
+        'time': [(inicio + timedelta(days=i)).isoformat() for i in range(len(chuvas))],
+        'precipitation_sum': list(chuvas),
+        'temperature_2m_min': [tmin] * len(chuvas),
+        'temperature_2m_max': [tmax] * len(chuvas),
+    }}
+
+
+def _fatores_ingenuos(serie):
+    """Fator de cada dia pela janela de 7 dias, dia a dia (referência)."""
+    fatores = {}
+    for dia in serie:
+        janela = [serie[d] for d in serie if dia - timedelta(days=6) <= d <= dia]
+        chuva_7d = sum(janela) * 7 / len(janela)
+        fatores[dia] = CHUVOSO if chuva_7d >= 35 else SECA if chuva_7d <= 10 else NORMAL
+    return fatores
+
+
+@pytest.fixture
+def serie(banco_temp):
+    from services import clima_diario_service
+    return clima_diario_service
+
+
+# ========== GRAVAÇÃO ==========
+class TestGravacao:
+    """Dias do payload viram linhas com fator e acumulados."""
+
+    def test_linhas_e_fatores(self, serie):
+        from services import conexao_db
+
+        inicio = date(2026, 2, 1)
+        chuvas = [0, 0, 0, 0, 0, 0, 0, 8, 8, 8, 8, 8, 8, 8]
+        assert serie.salvar_series([(LAT, LON, _payload(inicio, chuvas))]) == 14
+
+        conn = conexao_db.get_db()
+        linhas = conn.execute('SELECT * FROM clima_diario ORDER BY data').fetchall()
+        conn.close()
+        # Janela de 7 dias: 8, 16, 24, 32 mm... (seca <= 10 < normal < 35 <= chuvoso)
+        assert [r['fator'] for r in linhas] == [SECA] * 8 + [NORMAL] * 3 + [CHUVOSO] * 3
+        assert [r['dias_acumulados'] for r in linhas] == list(range(1, 15))
+        assert linhas[-1]['fator_acumulado'] == pytest.approx(sum(r['fator'] for r in linhas))
+        assert (linhas[0]['temp_min'], linhas[0]['temp_max']) == (18.0, 31.0)
+
+    def test_cursor_do_chamador_sem_commit(self, serie):
+        """Com o cursor de quem abriu a transação, o commit (ou rollback) fica com ele."""
+        from services import conexao_db
+
+        conn = conexao_db.get_db()
+        conn.execute("INSERT INTO clima_cache (lat, lon, provider, condicao, fator, payload_json, fetched_at, "
+                     "expires_at) VALUES (1, 1, 'x', 'normal', 1, '{}', '2026-01-01', '2026-01-02')")
+        assert serie.salvar_series([(LAT, LON, _payload(date(2026, 2, 1), [5] * 3))], conn.cursor()) == 3
+        assert conn.in_transaction
+        conn.rollback()
+        assert conn.execute('SELECT COUNT(*) FROM clima_diario').fetchone()[0] == 0
+        assert conn.execute('SELECT COUNT(*) FROM clima_cache').fetchone()[0] == 0
+        conn.close()
+
+    def test_sem_daily_ignora(self, serie):
+        assert serie.salvar_series([(LAT, LON, {}), (LAT, LON, {'daily': {'time': ['x']}})]) == 0
+
+    def test_mesma_celula(self, serie):
+        inicio = date(2026, 2, 1)
+        serie.salvar_series([(LAT + 0.03, LON - 0.02, _payload(inicio, [50] * 3))])
+        assert serie.fator_integrado(LAT, LON, inicio, 3, NORMAL) == (pytest.approx(3 * CHUVOSO), 3)
+
+    def test_regravar_recalcula_seguintes(self, serie):
+        inicio = date(2026, 2, 1)
+        serie.salvar_series([(LAT, LON, _payload(inicio, [0] * 10))])
+        serie.salvar_series([(LAT, LON, _payload(inicio + timedelta(days=2), [40] * 3))])
+
+        dias = {inicio + timedelta(days=i): 0.0 for i in range(10)}
+        dias.update({inicio + timedelta(days=i): 40.0 for i in range(2, 5)})
+        esperado = _fatores_ingenuos(dias)
+        for i in range(10):
+            soma, _ = serie.fator_integrado(LAT, LON, inicio + timedelta(days=i), 1, NORMAL)
+            assert soma == pytest.approx(esperado[inicio + timedelta(days=i)])
+
+
+# ========== INTEGRAL ==========
+class TestIntegral:
+    """Soma dos fatores em qualquer intervalo = soma dia a dia."""
+
+    @pytest.mark.parametrize('seed', range(5))
+    def test_intervalos_aleatorios(self, serie, seed):
+        rnd = random.Random(seed)
+        inicio = date(2025, 6, 1)
+        dias = {}
+        # Várias buscas sobrepostas, com buracos entre elas
+        for _ in range(12):
+            desde = inicio + timedelta(days=rnd.randint(0, 120))
+            chuvas = [rnd.choice([0.0, 0.5, 2.0, 6.0, 12.0]) for _ in range(7)]
+            serie.salvar_series([(LAT, LON, _payload(desde, chuvas))])
+            dias.update({desde + timedelta(days=i): c for i, c in enumerate(chuvas)})
+        fatores = _fatores_ingenuos(dict(sorted(dias.items())))
+
+        for _ in range(50):
+            a = inicio + timedelta(days=rnd.randint(-10, 130))
+            n = rnd.randint(0, 60)
+            padrao = rnd.choice([SECA, NORMAL, CHUVOSO])
+            esperado = sum(fatores.get(a + timedelta(days=i), padrao) for i in range(n))
+            com_dado = sum(1 for i in range(n) if a + timedelta(days=i) in fatores)
+            soma, obtido = serie.fator_integrado(LAT, LON, a, n, padrao)
+            assert obtido == com_dado
+            assert soma == pytest.approx(esperado)
+
+    def test_duas_consultas(self, serie):
+        from services import conexao_db
+
+        inicio = date(2025, 1, 1)
+        for semana in range(52):
+            serie.salvar_series([(LAT, LON, _payload(inicio + timedelta(days=7 * semana), [3.0] * 7))])
+
+        conn = conexao_db.get_db()
+        consultas = []
+        conn.set_trace_callback(consultas.append)
+        try:
+            serie.fator_integrado(LAT, LON, inicio, 360, NORMAL)
+        finally:
+            conn.set_trace_callback(None)
+            conn.close()
+        assert len([c for c in consultas if c.lstrip().upper().startswith('SELECT')]) == 2
+
+    def test_lote_igual_escalar(self, serie):
+        rnd = random.Random(3)
+        inicio = date(2026, 1, 1)
+        celulas = [(LAT, LON), (LAT - 1, LON), (LAT - 2, LON)]
+        for lat, lon in celulas[:2]:
+            serie.salvar_series([(lat, lon, _payload(inicio, [rnd.choice([0, 3, 9]) for _ in range(40)]))])
+
+        ate = date(2026, 2, 15)
+        itens = [(rnd.choice(celulas), rnd.randint(0, 45), rnd.choice([SECA, NORMAL, CHUVOSO])) for _ in range(200)]
+        inicios = np.array([ate.toordinal() - d for _, d, _ in itens], dtype=np.int64)
+        somas, com_dado = serie.fator_integrado_lote(
+            [c for c, _, _ in itens], inicios, np.array([d for _, d, _ in itens], dtype=np.int64),
+            np.array([f for _, _, f in itens]), ate)
+
+        for (celula, d, f), soma, n in zip(itens, somas.tolist(), com_dado.tolist()):
+            assert (soma, n) == serie.fator_integrado(*celula, ate - timedelta(days=d), d, f)
+
+
+# ========== ALTURA ==========
+class TestAlturaDescanso:
+    """calcular_altura_descanso com data de início."""
+
+    def test_sem_serie_igual_ao_antigo(self, serie):
+        from services.manejo_service import calcular_altura_descanso
+
+        antigo = calcular_altura_descanso(15, 20, 'Mombaça', 'seca', altura_entrada=90)
+        novo = calcular_altura_descanso(15, 20, 'Mombaça', 'seca', altura_entrada=90,
+                                        data_inicio=date(2026, 2, 1), latitude=LAT, longitude=LON)
+        assert novo == antigo
+
+    def test_usa_fatores_reais(self, serie):
+        from services.manejo_service import calcular_altura_descanso, calcular_crescimento_diario
+
+        inicio = date(2026, 2, 1)
+        serie.salvar_series([(LAT, LON, _payload(inicio, [50] * 10))])  # 10 dias chuvosos
+        detalhe = calcular_altura_descanso(15, 20, 'Mombaça', 'seca', altura_entrada=90, detalhar=True,
+                                           data_inicio=inicio, latitude=LAT, longitude=LON)
+        esperado = 15 + calcular_crescimento_diario('Mombaça') * (10 * CHUVOSO + 10 * SECA)
+        assert detalhe['altura'] == round(esperado, 1)
+        assert detalhe['dias_com_serie'] == 10
+        assert detalhe['fator_climatico'] == pytest.approx((CHUVOSO + SECA) / 2)
+
+
+class TestEstimativaFazenda:
+    """Piquetes de fazenda automática usam a série; lote == escalar."""
+
+    def test_escalar_e_lote(self, serie):
+        import database
+        from services import conexao_db
+        from services.altura_service import calcular_alturas_estimadas
+        from services.clima_service import _save_cache
+        from simular_data import relogio_fixo
+        from benchmarks.dados_sinteticos import popular_fazenda
+
+        conn = conexao_db.get_db()
+        popular_fazenda(conn, n_piquetes=60, n_lotes=15, data_ref=DATA_REF, seed=5,
+                        clima_modo='automatico', latitude=LAT, longitude=LON)
+        conn.execute("UPDATE piquetes SET estado = 'descanso' WHERE id % 2 = 0")
+        conn.commit()
+        conn.close()
+        _save_cache(LAT, LON, 'seca', SECA, {})
+        rnd = random.Random(1)
+        serie.salvar_series([(LAT, LON, _payload(DATA_REF.date() - timedelta(days=45),
+                                                 [rnd.choice([0, 4, 9]) for _ in range(40)]))])
+
+        with relogio_fixo(DATA_REF):
+            piquetes = database.listar_piquetes()
+            for p in piquetes:
+                p['altura_estimada'] = None
+            esperado = [database.calcular_altura_estimada(p) for p in piquetes]
+            obtido = calcular_alturas_estimadas(piquetes)
+
+            sem_serie = []
+            for p in piquetes:
+                copia = dict(p, condicao_climatica='seca')  # manual no piquete: sem série
+                sem_serie.append(database.calcular_altura_estimada(copia))
+
+        assert obtido == esperado
+        assert [type(a) for a, _ in obtido] == [type(a) for a, _ in esperado]
+        assert any(a != b for (a, _), (b, _) in zip(esperado, sem_serie))
@@ -0,0 +1,164 @@
+"""
+Testes do disjuntor (circuit breaker) e do orçamento de latência das chamadas
+ao Open-Meteo (services/clima_service.py), contra o servidor local.
+"""
+import time
+
+import pytest
+
+LAT, LON = -16.0, -48.0
+
+
+@pytest.fixture
+def clima(banco_temp, open_meteo_local, monkeypatch):
+    from services import clima_service
+    monkeypatch.setattr(clima_service, 'DISJUNTOR_FALHAS', 3)
+    monkeypatch.setattr(clima_service, 'SERVIR_EXPIRADO', False)
+    clima_service.definir_busca_em_segundo_plano(None)
+    clima_service.metricas_cache(zerar=True)
+    return clima_service
+
+
+def _falhar(clima, n):
+    """n misses em células diferentes, com a API devolvendo erro."""
+    return [clima.obter_clima_com_fallback(LAT - i, LON) for i in range(n)]
+
+
+# ========== ABERTURA ==========
+class TestAbertura:
+    """Falhas seguidas abrem o circuito; aberto, ninguém chama a API."""
+
+    def test_abre_apos_falhas_seguidas(self, clima, open_meteo_local):
+        open_meteo_local.status = 500
+        _falhar(clima, 2)
+        assert clima.metricas_cache()['disjuntor']['estado'] == 'fechado'
+        _falhar(clima, 3)
+        disjuntor = clima.metricas_cache()['disjuntor']
+        assert disjuntor['estado'] == 'aberto' and disjuntor['aberturas'] == 1
+        assert disjuntor['reabre_em_segundos'] > 0
+
+    def test_aberto_vai_direto_para_simulacao(self, clima, open_meteo_local):
+        open_meteo_local.status = 500
+        _falhar(clima, 3)
+        feitas = len(open_meteo_local.requisicoes)
+
+        resultado = clima.obter_clima_com_fallback(LAT + 1, LON)
+        assert resultado['fonte'] == 'simulacao'
+        assert len(open_meteo_local.requisicoes) == feitas
+        assert clima.metricas_cache()['disjuntor_rejeitadas'] == 1
+
+    def test_sucesso_zera_falhas(self, clima, open_meteo_local):
+        open_meteo_local.status = 500
+        _falhar(clima, 2)
+        open_meteo_local.status = 200
+        clima.obter_clima_com_fallback(LAT + 1, LON)
+        open_meteo_local.status = 500
+        _falhar(clima, 2)
+        assert clima.metricas_cache()['disjuntor']['estado'] == 'fechado'
+
+    def test_lote_pula_com_circuito_aberto(self, clima, open_meteo_local):
+        open_meteo_local.status = 500
+        _falhar(clima, 3)
+        feitas = len(open_meteo_local.requisicoes)
+
+        assert clima.obter_clima_lote([(LAT + 1, LON), (LAT + 2, LON)]) == [None, None]
+        assert len(open_meteo_local.requisicoes) == feitas
+
+
+# ========== MEIO-ABERTO ==========
+class TestMeioAberto:
+    """Passado o tempo de espera, uma sonda decide se o circuito fecha."""
+
+    def test_sonda_com_sucesso_fecha(self, clima, open_meteo_local, monkeypatch):
+        monkeypatch.setattr(clima, 'DISJUNTOR_ABERTO_SEGUNDOS', 0.1)
+        open_meteo_local.status = 500
+        _falhar(clima, 3)
+        time.sleep(0.15)
+
+        open_meteo_local.status = 200
+        assert clima.obter_clima_com_fallback(LAT + 1, LON)['fonte'] == 'api'
+        assert clima.metricas_cache()['disjuntor']['estado'] == 'fechado'
+
+    def test_sonda_com_falha_reabre(self, clima, open_meteo_local, monkeypatch):
+        monkeypatch.setattr(clima, 'DISJUNTOR_ABERTO_SEGUNDOS', 0.1)
+        open_meteo_local.status = 500
+        _falhar(clima, 3)
+        time.sleep(0.15)
+
+        clima.obter_clima_com_fallback(LAT + 1, LON)
+        disjuntor = clima.metricas_cache()['disjuntor']
+        assert disjuntor['estado'] == 'aberto' and disjuntor['aberturas'] == 2
+
+    def test_uma_sonda_por_vez(self, clima, monkeypatch):
+        monkeypatch.setattr(clima, 'DISJUNTOR_ABERTO_SEGUNDOS', 0)
+        for _ in range(3):
+            clima._disjuntor.falha()
+        assert clima._disjuntor.permitir() is True
+        assert clima._disjuntor.permitir() is False
+        clima._disjuntor.sucesso()
+        assert clima._disjuntor.permitir() is True
+
+
+# ========== ORÇAMENTO ==========
+class TestOrcamento:
+    """A requisição não espera a API além de ORCAMENTO_REQUISICAO_SEGUNDOS."""
+
+    def test_api_lenta_cai_na_simulacao(self, clima, open_meteo_local, monkeypatch):
+        monkeypatch.setattr(clima, 'ORCAMENTO_REQUISICAO_SEGUNDOS', 0.2)
+        open_meteo_local.atraso = 1.0
+
+        inicio = time.perf_counter()
+        resultado = clima.obter_clima_com_fallback(LAT, LON)
+        assert time.perf_counter() - inicio < 0.8
+        assert resultado['fonte'] == 'simulacao'
+
+        latencia = clima.metricas_cache()['latencia_api']
+        assert (latencia['total'], latencia['erros']) == (1, 1)
+        assert latencia['faixas_ms']['250'] == 1
+
+    def test_resposta_gotejada_respeita_prazo(self, clima, open_meteo_local, monkeypatch):
+        # Cada pedaço chega bem antes do timeout do socket; só o prazo total corta
+        monkeypatch.setattr(clima, 'ORCAMENTO_REQUISICAO_SEGUNDOS', 0.3)
+        open_meteo_local.gotejar = 0.15
+
+        inicio = time.perf_counter()
+        resultado = clima.obter_clima_com_fallback(LAT, LON)
+        assert time.perf_counter() - inicio < 0.8
+        assert resultado['fonte'] == 'simulacao'
+        assert clima.metricas_cache()['latencia_api']['erros'] == 1
+
+    def test_lote_para_no_prazo(self, clima, open_meteo_local):
+        open_meteo_local.atraso = 0.3
+        coords = [(LAT - i, LON) for i in range(3)]
+
+        resultado = clima.obter_clima_lote(coords, tamanho_lote=1, prazo=time.monotonic() + 0.4)
+        assert resultado[0] is not None
+        assert resultado[1:] == [None, None]
+        assert len(open_meteo_local.requisicoes) == 2
+
+
+# ========== MÉTRICAS ==========
+class TestMetricas:
+    """Histograma de latência e estado do disjuntor em metricas_cache."""
+
+    def test_histograma(self, clima, open_meteo_local):
+        clima.obter_clima_com_fallback(LAT, LON)
+        clima.obter_clima_lote([(LAT + 1, LON), (LAT + 2, LON)])
+
+        latencia = clima.metricas_cache(zerar=True)['latencia_api']
+        assert latencia['total'] == 2 and latencia['erros'] == 0
+        assert sum(latencia['faixas_ms'].values()) == 2
+        assert list(latencia['faixas_ms'])[-1] == '+inf'
+        assert latencia['media_ms'] <= latencia['max_ms']
+        assert clima.metricas_cache()['latencia_api']['total'] == 0
+
+    def test_endpoint(self, clima):
+        from app import app
+        app.config['TESTING'] = True
+        client = app.test_client()
+        with client.session_transaction() as sess:
+            sess['user_id'] = 1
+            sess['role'] = 'admin'
+        dados = client.get('/api/clima/metricas').get_json()
+        assert dados['disjuntor']['estado'] == 'fechado'
+        assert {'faixas_ms', 'total', 'erros', 'media_ms', 'max_ms'} <= set(dados['latencia_api'])
@@ -0,0 +1,107 @@
+"""
+Testes do cache de condição climática por fazenda (services/clima_service.py)
+"""
+import pytest
+
+
+@pytest.fixture
+def fazenda_manual(banco_temp):
+    """Fazenda em modo manual ('seca') com alguns piquetes em descanso."""
+    import database
+    from services import conexao_db
+    from benchmarks.dados_sinteticos import popular_fazenda
+
+    conn = conexao_db.get_db()
+    fazenda_id = popular_fazenda(conn, n_piquetes=10, n_lotes=0, seed=5)
+    conn.execute("UPDATE fazendas SET condicao_climatica_manual = 'seca' WHERE id = ?", (fazenda_id,))
+    conn.commit()
+    conn.close()
+    database.invalidar_clima_fazenda()
+    return fazenda_id
+
+
+def _consultas_fazendas(funcao):
+    """Quantos SELECTs em fazendas a função emitiu."""
+    from services import conexao_db
+
+    conn = conexao_db.get_db()
+    consultas = []
+    conn.set_trace_callback(consultas.append)
+    try:
+        funcao()
+    finally:
+        conn.set_trace_callback(None)
+        conn.close()
+    return sum(1 for sql in consultas if 'FROM fazendas' in sql)
+
+
+def _resolver(fazenda_id):
+    from services import clima_service
+    return clima_service.resolver_clima_piquete({'fazenda_id': fazenda_id})[:2]
+
+
+# ========== CACHE ==========
+class TestCacheClimaFazenda:
+    """Uma resolução por fazenda por TTL."""
+
+    def test_resolve_uma_vez(self, fazenda_manual):
+        import database
+
+        def varias_listagens():
+            for _ in range(5):
+                database.listar_piquetes(fazenda_manual)
+                assert _resolver(fazenda_manual) == ('seca', 'manual_fazenda')
+
+        assert _consultas_fazendas(varias_listagens) == 1
+
+    def test_expira_pelo_ttl(self, fazenda_manual, monkeypatch):
+        from services import clima_service
+
+        monkeypatch.setattr(clima_service, 'CLIMA_FAZENDA_TTL', 0)
+        assert _consultas_fazendas(lambda: [_resolver(fazenda_manual) for _ in range(3)]) == 3
+
+    def test_limite_de_fazendas(self, fazenda_manual, monkeypatch):
+        from services import clima_service
+
+        monkeypatch.setattr(clima_service, 'CLIMA_FAZENDA_MAX', 2)
+        for fazenda_id in (fazenda_manual, 900, 901, 902):
+            _resolver(fazenda_id)
+        assert list(clima_service._clima_fazenda) == [901, 902]
+
+    def test_coordenadas_do_piquete_nao_usam_cache(self, fazenda_manual):
+        from services import clima_service
+
+        piquete = {'fazenda_id': fazenda_manual, 'fazenda_latitude': -15.6, 'fazenda_longitude': -47.8}
+        clima_service.resolver_clima_piquete(piquete)
+        assert fazenda_manual not in clima_service._clima_fazenda
+
+
+# ========== INVALIDAÇÃO ==========
+class TestInvalidacao:
+    """atualizar_fazenda descarta o valor em cache."""
+
+    def test_atualizar_fazenda_muda_condicao(self, fazenda_manual):
+        import database
+
+        assert _resolver(fazenda_manual) == ('seca', 'manual_fazenda')
+        fazenda = database.get_fazenda(fazenda_manual)
+        database.atualizar_fazenda(fazenda_manual, nome=fazenda['nome'], area=fazenda['area'],
+                                   latitude_sede=fazenda['latitude_sede'],
+                                   longitude_sede=fazenda['longitude_sede'],
+                                   clima_modo='manual', condicao_climatica_manual='chuvoso')
+        assert _resolver(fazenda_manual) == ('chuvoso', 'manual_fazenda')
+
+    def test_resolucao_em_andamento_nao_grava_valor_antigo(self, fazenda_manual, monkeypatch):
+        """Invalidação durante a resolução: o resultado antigo não entra no cache."""
+        from services import clima_service
+
+        original = clima_service._calcular_condicao_climatica_fazenda
+
+        def lento(*args):
+            resultado = original(*args)
+            clima_service.invalidar_clima_fazenda(fazenda_manual)
+            return resultado
+
+        monkeypatch.setattr(clima_service, '_calcular_condicao_climatica_fazenda', lento)
+        _resolver(fazenda_manual)
+        assert fazenda_manual not in clima_service._clima_fazenda
@@ -0,0 +1,78 @@
+"""
+Testes da grade do cache de clima (clima_service._celula / GRADE_GRAUS):
+coordenadas na mesma célula compartilham entrada e busca na API.
+"""
+import pytest
+
+
+@pytest.fixture
+def clima(banco_temp, open_meteo_local):
+    from services import clima_service
+    clima_service.metricas_cache(zerar=True)
+    return clima_service
+
+
+# ========== CÉLULA ==========
+class TestCelula:
+    """Ponto da grade mais próximo."""
+
+    def test_padrao(self):
+        from services.clima_service import GRADE_GRAUS, _celula
+        assert GRADE_GRAUS == 0.1
+        assert _celula(-16.04, -48.26) == (-16.0, -48.3)
+        assert _celula(-16.0, -48.0) == (-16.0, -48.0)
+        assert _celula(-15.96, -47.951) == (-16.0, -48.0)
+
+    def test_configuravel(self, monkeypatch):
+        from services import clima_service
+        monkeypatch.setattr(clima_service, 'GRADE_GRAUS', 0.25)
+        assert clima_service._celula(-16.1, -48.13) == (-16.0, -48.25)
+        monkeypatch.setattr(clima_service, 'GRADE_GRAUS', 0.001)
+        assert clima_service._celula(-16.12345, -48.0004) == (-16.123, -48.0)
+
+
+# ========== COMPARTILHAMENTO ==========
+class TestCompartilhamento:
+    """Fazendas vizinhas usam a mesma entrada e a mesma chamada."""
+
+    def test_vizinhas_uma_chamada(self, clima, open_meteo_local):
+        primeira = clima.obter_clima_com_fallback(-16.02, -48.03)
+        vizinha = clima.obter_clima_com_fallback(-15.98, -47.97)
+
+        assert primeira['fonte'] == 'api' and vizinha['fonte'] == 'cache'
+        assert len(open_meteo_local.requisicoes) == 1
+        # A API é consultada no ponto da célula, não na sede de quem pediu primeiro
+        assert open_meteo_local.requisicoes[0]['latitude'] == ['-16.0']
+        assert open_meteo_local.requisicoes[0]['longitude'] == ['-48.0']
+
+    def test_celulas_diferentes(self, clima, open_meteo_local):
+        clima.obter_clima_com_fallback(-16.0, -48.0)
+        clima.obter_clima_com_fallback(-16.1, -48.0)
+        assert len(open_meteo_local.requisicoes) == 2
+
+    def test_uma_linha_por_celula(self, clima):
+        from services import conexao_db
+
+        for dlat in (-0.04, 0.0, 0.03):
+            clima._save_cache(-16.0 + dlat, -48.0, 'seca', 0.6, {})
+        conn = conexao_db.get_db()
+        linhas = conn.execute('SELECT lat, lon FROM clima_cache').fetchall()
+        conn.close()
+        assert [tuple(r) for r in linhas] == [(-16.0, -48.0)]
+
+
+# ========== ÍNDICE ==========
+class TestIndice:
+    """A chave da célula é a do índice único."""
+
+    def test_lookup_usa_indice(self, clima):
+        from services import conexao_db
+
+        clima._save_cache(-16.0, -48.0, 'seca', 0.6, {})
+        conn = conexao_db.get_db()
+        plano = conn.execute('''
+            EXPLAIN QUERY PLAN
+            SELECT * FROM clima_cache WHERE lat = ? AND lon = ? AND provider = ? AND expires_at > ?
+        ''', (-16.0, -48.0, 'open-meteo', '')).fetchall()
+        conn.close()
+        assert any('idx_clima_cache_chave' in r[-1] for r in plano)
@@ -0,0 +1,99 @@
+"""
+Testes da busca em lote no Open-Meteo (clima_service.obter_clima_lote),
+contra o servidor local (fixture open_meteo_local).
+"""
+import pytest
+
+
+@pytest.fixture
+def clima(banco_temp, open_meteo_local):
+    from services import clima_service
+    clima_service.metricas_cache(zerar=True)
+    return clima_service
+
+
+def _coordenadas(n):
+    """n coordenadas em células distintas da grade (GRADE_GRAUS = 0.1), latitude variando primeiro."""
+    return [(round(-10.0 - (i % 50) * 0.1, 3), round(-45.0 - (i // 50) * 0.1, 3)) for i in range(n)]
+
+
+def _linhas_cache():
+    from services import conexao_db
+    conn = conexao_db.get_db()
+    total = conn.execute('SELECT COUNT(*) FROM clima_cache').fetchone()[0]
+    conn.close()
+    return total
+
+
+# ========== REQUISIÇÕES ==========
+class TestRequisicoes:
+    """Poucas requisições para muitas coordenadas."""
+
+    def test_2000_fazendas_em_20_requisicoes(self, clima, open_meteo_local):
+        coords = _coordenadas(2000)
+        resultados = clima.obter_clima_lote(coords)
+
+        assert len(open_meteo_local.requisicoes) == 20
+        assert all(r and r['fonte'] == 'api' for r in resultados)
+        assert _linhas_cache() == 2000
+        assert clima.metricas_cache()['api_chamadas'] == 20
+
+    def test_tamanho_do_lote(self, clima, open_meteo_local):
+        clima.obter_clima_lote(_coordenadas(25), tamanho_lote=10)
+        tamanhos = [len(p['latitude'][0].split(',')) for p in open_meteo_local.requisicoes]
+        assert tamanhos == [10, 10, 5]
+
+    def test_uma_coordenada(self, clima, open_meteo_local):
+        """Com uma coordenada a API devolve um objeto, não uma lista."""
+        [real] = clima.obter_clima_lote([(-16.0, -48.0)])
+        assert real['latitude'] == -16.0 and real['condicao'] == 'chuvoso'
+
+    def test_repetidas_buscadas_uma_vez(self, clima, open_meteo_local):
+        coords = [(-16.0, -48.0), (-16.0001, -48.0001), (-17.0, -48.0)]
+        resultados = clima.obter_clima_lote(coords)
+        assert open_meteo_local.requisicoes[0]['latitude'] == ['-16.0,-17.0']
+        assert resultados[0] is resultados[1] and resultados[2]['latitude'] == -17.0
+
+    def test_vazio(self, clima, open_meteo_local):
+        assert clima.obter_clima_lote([]) == []
+        assert open_meteo_local.requisicoes == []
+
+
+# ========== CLASSIFICAÇÃO ==========
+class TestClassificacao:
+    """Cada coordenada do lote recebe a própria condição."""
+
+    def test_condicao_por_coordenada(self, clima, open_meteo_local):
+        coords = _coordenadas(30)
+        open_meteo_local.chuva_por_lat = {lat: [0.0] * 7 for lat, _ in coords[::3]}
+        resultados = clima.obter_clima_lote(coords, tamanho_lote=7)
+
+        esperado = ['seca' if i % 3 == 0 else 'chuvoso' for i in range(30)]
+        assert [r['condicao'] for r in resultados] == esperado
+        clima.limpar_cache_memoria()
+        assert [clima._get_cache(lat, lon)['condicao'] for lat, lon in coords] == esperado
+
+    def test_grava_memoria(self, clima, open_meteo_local):
+        clima.obter_clima_lote(_coordenadas(5))
+        assert clima.obter_clima_com_fallback(*_coordenadas(5)[2])['fonte'] == 'cache'
+        assert clima.metricas_cache()['memoria_hits'] == 1
+
+
+# ========== FALHAS ==========
+class TestFalhas:
+    """Falha de um lote não derruba os outros."""
+
+    def test_lote_com_erro(self, clima, open_meteo_local):
+        coords = _coordenadas(30)
+        falha = coords[10][0]
+        open_meteo_local.falhar_se = lambda latitudes: falha in latitudes
+        resultados = clima.obter_clima_lote(coords, tamanho_lote=10)
+
+        assert [r is None for r in resultados] == [10 <= i < 20 for i in range(30)]
+        assert _linhas_cache() == 20
+        assert clima.metricas_cache()['api_erros'] == 1
+
+    def test_resposta_desalinhada(self, clima, open_meteo_local, monkeypatch):
+        monkeypatch.setattr(open_meteo_local, 'resposta', lambda params: [{}, {}])
+        assert clima.obter_clima_lote(_coordenadas(3)) == [None] * 3
+        assert _linhas_cache() == 0
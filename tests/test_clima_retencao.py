@@ -0,0 +1,127 @@
+"""
+Testes da retenção do clima_cache (services/clima_service.py): upsert por
+coordenada, payload reduzido e purga/compactação.
+"""
+import random
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+LAT, LON = -16.0, -48.0
+
+
+@pytest.fixture
+def clima(banco_temp):
+    from services import clima_service
+    return clima_service
+
+
+def _linhas(sql='SELECT * FROM clima_cache', params=()):
+    from services import conexao_db
+    conn = conexao_db.get_db()
+    linhas = [dict(r) for r in conn.execute(sql, params).fetchall()]
+    conn.close()
+    return linhas
+
+
+def _envelhecer(horas, lat=LAT, lon=LON):
+    """Move fetched_at/expires_at da coordenada horas para trás."""
+    from services import conexao_db
+    buscado = datetime.now(timezone.utc) - timedelta(hours=horas)
+    conn = conexao_db.get_db()
+    conn.execute('UPDATE clima_cache SET fetched_at = ?, expires_at = ? WHERE lat = ? AND lon = ?',
+                 (buscado.isoformat(), (buscado + timedelta(hours=3)).isoformat(), lat, lon))
+    conn.commit()
+    conn.close()
+
+
+# ========== UPSERT ==========
+class TestUpsert:
+    """Uma linha por (lat, lon, provider), sempre com a busca mais recente."""
+
+    def test_regravar_substitui(self, clima):
+        clima._save_cache(LAT, LON, 'seca', 0.6, {})
+        clima._save_cache(LAT + 0.0001, LON, 'chuvoso', 1.2, {})  # mesma célula arredondada
+        clima._save_cache(LAT, LON, 'normal', 1.0, {}, provider='outro')
+
+        linhas = _linhas('SELECT condicao, provider FROM clima_cache ORDER BY provider')
+        assert linhas == [{'condicao': 'chuvoso', 'provider': 'open-meteo'},
+                          {'condicao': 'normal', 'provider': 'outro'}]
+        clima.limpar_cache_memoria()
+        assert clima._get_cache(LAT, LON)['condicao'] == 'chuvoso'
+
+    def test_expirada_volta_a_valer_apos_regravar(self, clima):
+        clima._save_cache(LAT, LON, 'seca', 0.6, {})
+        _envelhecer(5)
+        assert clima._get_cache(LAT, LON) is None
+        clima._save_cache(LAT, LON, 'normal', 1.0, {})
+        assert clima._get_cache(LAT, LON)['condicao'] == 'normal'
+        assert len(_linhas()) == 1
+
+
+# ========== PAYLOAD ==========
+class TestPayloadReduzido:
+    """O cache guarda só o que a classificação usa."""
+
+    def test_campos(self, clima):
+        payload = {
+            'latitude': LAT,
+            'current': {'temperature_2m': 30, 'relative_humidity_2m': 50, 'precipitation': 0},
+            'daily': {'time': ['2026-03-01'] * 8, 'precipitation_sum': [2] * 8, 'temperature_2m_max': [33] * 8},
+        }
+        entrada = clima._save_cache(LAT, LON, 'seca', 0.6, payload)
+        esperado = {'current': {'relative_humidity_2m': 50}, 'daily': {'precipitation_sum': [2] * 7}}
+        assert entrada['payload'] == esperado
+        clima.limpar_cache_memoria()
+        assert clima._get_cache(LAT, LON)['payload'] == esperado
+
+    @pytest.mark.parametrize('seed', range(5))
+    def test_mesma_condicao(self, clima, seed):
+        rnd = random.Random(seed)
+        for _ in range(200):
+            payload = {
+                'current': rnd.choice([{}, None, {'relative_humidity_2m': rnd.choice([None, 40, 70])}]),
+                'daily': rnd.choice([{}, None, {'precipitation_sum': [rnd.uniform(0, 12) for _ in range(rnd.randint(0, 9))]}]),
+            }
+            reduzido = clima._resumir_payload(payload)
+            assert clima._inferir_condicao_por_open_meteo(reduzido) == clima._inferir_condicao_por_open_meteo(payload)
+
+
+# ========== PURGA ==========
+class TestPurga:
+    """Remove coordenadas abandonadas e compacta quando vale a pena."""
+
+    def test_remove_so_antigas(self, clima):
+        clima._save_cache(LAT, LON, 'seca', 0.6, {})
+        clima._save_cache(LAT - 1, LON, 'seca', 0.6, {})
+        _envelhecer(30, lat=LAT - 1)
+
+        resumo = clima.purgar_cache(max_horas=24, vacuum=False)
+        assert resumo == {'removidas': 1, 'vacuum': False}
+        assert [r['lat'] for r in _linhas()] == [LAT]
+
+    def test_vacuum_com_muitas_paginas_livres(self, clima):
+        from services import conexao_db
+
+        grande = {'current': {}, 'daily': {'precipitation_sum': [1.0] * 7}}
+        for i in range(3000):
+            clima._save_cache(-10.0 - (i % 60) * 0.1, LON - (i // 60) * 0.1, 'normal', 1.0, grande)
+        conn = conexao_db.get_db()
+        conn.execute("UPDATE clima_cache SET fetched_at = '2000-01-01T00:00:00+00:00'")
+        conn.commit()
+        antes = conn.execute('PRAGMA page_count').fetchone()[0]
+        conn.close()
+
+        resumo = clima.purgar_cache(max_horas=24)
+        assert resumo == {'removidas': 3000, 'vacuum': True}
+        conn = conexao_db.get_db()
+        depois = conn.execute('PRAGMA page_count').fetchone()[0]
+        conn.close()
+        assert depois < antes
+
+    def test_job_do_agendador(self, clima):
+        from services import agendador_service
+
+        clima._save_cache(LAT, LON, 'seca', 0.6, {})
+        _envelhecer(48)
+        assert agendador_service.purgar_clima_cache()['removidas'] == 1
@@ -0,0 +1,152 @@
+"""
+Testes do modo stale-while-revalidate de obter_clima_com_fallback
+(services/clima_service.py), contra o servidor local do Open-Meteo.
+"""
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+LAT, LON = -16.0, -48.0
+
+
+@pytest.fixture
+def clima(banco_temp, open_meteo_local):
+    from services import clima_service
+    clima_service.metricas_cache(zerar=True)
+    clima_service.definir_busca_em_segundo_plano(None)
+    return clima_service
+
+
+def _gravar(clima, horas_atras, condicao='seca', lat=LAT, lon=LON):
+    """Linha no clima_cache buscada há horas_atras (expirada se > CACHE_TTL_HOURS)."""
+    from services import conexao_db
+
+    buscado = datetime.now(timezone.utc) - timedelta(hours=horas_atras)
+    conn = conexao_db.get_db()
+    conn.execute('''
+        INSERT INTO clima_cache (lat, lon, provider, condicao, fator, payload_json, fetched_at, expires_at)
+        VALUES (?, ?, 'open-meteo', ?, ?, '{}', ?, ?)
+    ''', (lat, lon, condicao, clima.calcular_fator_climatico(condicao), buscado.isoformat(),
+          (buscado + timedelta(hours=clima.CACHE_TTL_HOURS)).isoformat()))
+    conn.commit()
+    conn.close()
+
+
+def _esperar(condicao, segundos=3.0):
+    fim = time.monotonic() + segundos
+    while time.monotonic() < fim:
+        if condicao():
+            return True
+        time.sleep(0.02)
+    return False
+
+
+# ========== EXPIRADO RECENTE ==========
+class TestServirExpirado:
+    """Entrada expirada volta na hora e é renovada em segundo plano."""
+
+    def test_devolve_stale_sem_esperar_api(self, clima, open_meteo_local):
+        _gravar(clima, horas_atras=5)
+        open_meteo_local.atraso = 0.5
+        open_meteo_local.chuva_diaria = [10.0] * 7
+
+        inicio = time.perf_counter()
+        resultado = clima.obter_clima_com_fallback(LAT, LON)
+        assert time.perf_counter() - inicio < 0.3
+        assert resultado['fonte'] == 'stale' and resultado['condicao'] == 'seca'
+        assert 5 * 3600 - 60 <= resultado['idade_segundos'] <= 5 * 3600 + 60
+
+        assert _esperar(lambda: clima._get_cache(LAT, LON) is not None)
+        renovado = clima.obter_clima_com_fallback(LAT, LON)
+        assert renovado['fonte'] == 'cache' and renovado['condicao'] == 'chuvoso'
+        assert clima.metricas_cache()['stale_servidos'] == 1
+
+    def test_uma_renovacao_por_coordenada(self, clima, open_meteo_local):
+        _gravar(clima, horas_atras=5)
+        open_meteo_local.atraso = 0.3
+
+        resultados = []
+        threads = [threading.Thread(target=lambda: resultados.append(clima.obter_clima_com_fallback(LAT, LON)))
+                   for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        assert {r['fonte'] for r in resultados} == {'stale'}
+        assert _esperar(lambda: clima._get_cache(LAT, LON) is not None)
+        assert len(open_meteo_local.requisicoes) == 1
+
+    def test_renovacao_falha_mantem_stale(self, clima, open_meteo_local):
+        _gravar(clima, horas_atras=5)
+        open_meteo_local.status = 500
+
+        assert clima.obter_clima_com_fallback(LAT, LON)['fonte'] == 'stale'
+        assert _esperar(lambda: clima.metricas_cache()['api_erros'] == 1)
+        assert _esperar(lambda: not clima._revalidando)
+        assert clima.obter_clima_com_fallback(LAT, LON)['fonte'] == 'stale'
+
+    def test_usa_agendador_quando_ativo(self, clima, open_meteo_local):
+        _gravar(clima, horas_atras=5)
+        enfileiradas = []
+        clima.definir_busca_em_segundo_plano(lambda lat, lon: enfileiradas.append((lat, lon)))
+        try:
+            assert clima.obter_clima_com_fallback(LAT, LON)['fonte'] == 'stale'
+        finally:
+            clima.definir_busca_em_segundo_plano(None)
+        assert enfileiradas == [(LAT, LON)]
+        assert open_meteo_local.requisicoes == []
+
+
+# ========== LIMITE DE IDADE ==========
+class TestLimite:
+    """Além de STALE_MAX_HORAS (ou com o modo desligado) segue o fluxo antigo."""
+
+    def test_antigo_demais_vai_para_api(self, clima, monkeypatch):
+        monkeypatch.setattr(clima, 'STALE_MAX_HORAS', 24)
+        _gravar(clima, horas_atras=30)
+        assert clima.obter_clima_com_fallback(LAT, LON)['fonte'] == 'api'
+
+    def test_antigo_demais_sem_api_simula(self, clima, open_meteo_local, monkeypatch):
+        monkeypatch.setattr(clima, 'STALE_MAX_HORAS', 24)
+        open_meteo_local.status = 500
+        _gravar(clima, horas_atras=30)
+        assert clima.obter_clima_com_fallback(LAT, LON)['fonte'] == 'simulacao'
+
+    def test_desligado(self, clima):
+        _gravar(clima, horas_atras=5)
+        assert clima.obter_clima_com_fallback(LAT, LON, servir_expirado=False)['fonte'] == 'api'
+
+    def test_outra_coordenada_nao_conta(self, clima):
+        _gravar(clima, horas_atras=5, lat=LAT - 1)
+        assert clima.obter_clima_com_fallback(LAT, LON)['fonte'] == 'api'
+
+
+# ========== ENDPOINT ==========
+class TestEndpoint:
+    """/api/clima/condicao-atual informa a idade do dado stale."""
+
+    def test_idade_na_resposta(self, clima):
+        from services import conexao_db
+
+        conn = conexao_db.get_db()
+        conn.execute('''
+            INSERT INTO fazendas (usuario_id, nome, latitude_sede, longitude_sede, clima_modo, ativo)
+            VALUES (2, 'Stale', ?, ?, 'automatico', 1)
+        ''', (LAT, LON))
+        fazenda_id = conn.execute('SELECT last_insert_rowid()').fetchone()[0]
+        conn.commit()
+        conn.close()
+        _gravar(clima, horas_atras=4)
+
+        from app import app
+        app.config['TESTING'] = True
+        client = app.test_client()
+        with client.session_transaction() as sess:
+            sess['user_id'] = 2
+            sess['role'] = 'gerente'
+        dados = client.get(f'/api/clima/condicao-atual?fazenda_id={fazenda_id}').get_json()
+        assert dados['fonte'] == 'stale'
+        assert dados['idade_segundos'] >= 4 * 3600 - 60
@@ -0,0 +1,112 @@
+"""
+Testes da camada de conexão compartilhada (services/conexao_db.py)
+"""
+import threading
+
+import pytest
+from flask import Flask
+
+
+@pytest.fixture
+def conexao(banco_temp):
+    from services import conexao_db
+    conexao_db.liberar_conexao()
+    yield conexao_db
+    conexao_db.liberar_conexao()
+
+
+# ========== REUSO ==========
+class TestReuso:
+    """Uma conexão por thread / por requisição."""
+
+    def test_mesma_conexao_na_thread(self, conexao):
+        """Chamadas seguidas na mesma thread recebem a mesma conexão."""
+        c1 = conexao.get_db()
+        c2 = conexao.get_db()
+        assert c1 is c2
+
+    def test_close_nao_fecha(self, conexao):
+        """close() devolve o empréstimo mas a conexão continua utilizável."""
+        conn = conexao.get_db()
+        conn.close()
+        assert conexao.get_db().execute('SELECT 1').fetchone()[0] == 1
+
+    def test_threads_diferentes(self, conexao):
+        """Threads distintas não compartilham conexão."""
+        principal = conexao.get_db()
+        conexoes = []
+
+        def worker():
+            conexoes.append(conexao.get_db())
+            conexao.liberar_conexao()
+
+        t = threading.Thread(target=worker)
+        t.start()
+        t.join()
+        assert conexoes[0] is not principal
+
+    def test_requisicao_devolve_ao_pool(self, conexao):
+        """Requisições seguidas reaproveitam a conexão do pool."""
+        app = Flask(__name__)
+        conexao.init_app(app)
+        conexao.estatisticas(zerar=True)
+
+        for _ in range(5):
+            with app.test_request_context('/'):
+                c1 = conexao.get_db()
+                c2 = conexao.get_db()
+                assert c1 is c2
+                c1.close()
+                c2.close()
+
+        assert conexao.estatisticas()['conexoes_abertas'] <= 1
+
+
+# ========== PRAGMAS ==========
+class TestPragmas:
+    """Perfil de PRAGMAs aplicado na criação da conexão."""
+
+    def test_wal(self, conexao):
+        assert conexao.get_db().execute('PRAGMA journal_mode').fetchone()[0] == 'wal'
+
+    def test_busy_timeout(self, conexao):
+        assert conexao.get_db().execute('PRAGMA busy_timeout').fetchone()[0] == 5000
+
+    def test_temp_store_memoria(self, conexao):
+        assert conexao.get_db().execute('PRAGMA temp_store').fetchone()[0] == 2
+
+
+# ========== TRANSAÇÕES ==========
+class TestTransacoes:
+    """close() mantém a semântica de fechar uma conexão nova."""
+
+    def test_close_final_desfaz_pendente(self, conexao):
+        """Último close() sem commit desfaz a escrita."""
+        conn = conexao.get_db()
+        conn.execute("INSERT INTO capins (nome) VALUES ('Teste')")
+        conn.close()
+        total = conexao.get_db().execute("SELECT COUNT(*) FROM capins WHERE nome = 'Teste'").fetchone()[0]
+        assert total == 0
+
+    def test_close_aninhado_preserva_pendente(self, conexao):
+        """close() de um helper interno não desfaz a escrita do chamador."""
+        externo = conexao.get_db()
+        externo.execute("INSERT INTO capins (nome) VALUES ('Teste')")
+        interno = conexao.get_db()
+        interno.close()
+        externo.commit()
+        externo.close()
+        total = conexao.get_db().execute("SELECT COUNT(*) FROM capins WHERE nome = 'Teste'").fetchone()[0]
+        assert total == 1
+
+    def test_modo_legado(self, conexao):
+        """reutilizar=False volta a abrir uma conexão nova por chamada."""
+        conexao.configurar(reutilizar=False)
+        try:
+            c1 = conexao.get_db()
+            c2 = conexao.get_db()
+            assert c1 is not c2
+            c1.close()
+            c2.close()
+        finally:
+            conexao.configurar(reutilizar=True)
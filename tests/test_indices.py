@@ -0,0 +1,233 @@
+"""
+Regressão de planos de consulta: as consultas quentes de database.py e
+services/rotacao_service.py não podem voltar a fazer SCAN completo nas
+tabelas principais.
+
+As consultas são capturadas de verdade (set_trace_callback) enquanto as
+funções rodam sobre um banco sintético grande, e cada uma passa por
+EXPLAIN QUERY PLAN.
+"""
+import re
+
+import pytest
+
+# Tabelas que crescem com o uso; usuarios/capins/fazendas são pequenas e ficam de fora
+TABELAS_QUENTES = {'piquetes', 'lotes', 'movimentacoes', 'alertas', 'lotacao_historico', 'clima_cache'}
+N_FAZENDAS = 20
+
+
+@pytest.fixture(scope='module')
+def banco_grande(tmp_path_factory):
+    from services import conexao_db, clima_service
+    from services.clima_service import _save_cache
+    from benchmarks.dados_sinteticos import popular_fazenda
+    import database
+
+    caminho_original = conexao_db.DB_PATH
+    conexao_db.configurar(db_path=str(tmp_path_factory.mktemp('indices') / 'grande.db'), reutilizar=True)
+    database.init_db()
+    database.invalidar_clima_fazenda()
+    clima_service.limpar_cache_memoria()
+
+    conn = conexao_db.get_db()
+    fazendas = [
+        popular_fazenda(conn, n_piquetes=150, n_lotes=60, n_movimentacoes=500, seed=i,
+                        latitude=-15.0 - i * 0.1, longitude=-47.0 - i * 0.1)
+        for i in range(N_FAZENDAS)
+    ]
+    for i in range(N_FAZENDAS * 50):
+        _save_cache(-10.0 - (i % 50) * 0.1, -45.0 - (i // 50) * 0.1, 'normal', 1.0, {})
+    conn.execute('ANALYZE')
+    conn.commit()
+    conn.close()
+
+    yield fazendas[N_FAZENDAS // 2]
+    conexao_db.configurar(db_path=caminho_original, reutilizar=True)
+    database.invalidar_clima_fazenda()
+    clima_service.limpar_cache_memoria()
+
+
+def _capturar_sql(funcao):
+    """Executa a função e devolve os SELECTs e INSERT ... SELECT emitidos (com parâmetros já expandidos)."""
+    from services import conexao_db
+
+    conn = conexao_db.get_db()
+    capturadas = []
+    conn.set_trace_callback(capturadas.append)
+    try:
+        funcao()
+    finally:
+        conn.set_trace_callback(None)
+        conn.close()
+    return [sql for sql in capturadas if re.match(r'\s*(SELECT|INSERT\b.*\bSELECT)\b', sql, re.IGNORECASE | re.DOTALL)]
+
+
+def _scans_completos(sql):
+    """Linhas do plano com SCAN sem índice em tabela quente (aliases resolvidos)."""
+    from services import conexao_db
+
+    aliases = {}
+    for tabela, alias in re.findall(r'(?:FROM|JOIN)\s+(\w+)(?:\s+(?:AS\s+)?(\w+))?', sql, re.IGNORECASE):
+        aliases[tabela] = tabela
+        if alias and alias.upper() not in ('WHERE', 'LEFT', 'JOIN', 'ON', 'GROUP', 'ORDER', 'INNER', 'LIMIT'):
+            aliases[alias] = tabela
+
+    conn = conexao_db.get_db()
+    plano = [row[3] for row in conn.execute('EXPLAIN QUERY PLAN ' + sql)]
+    conn.close()
+
+    ruins = []
+    for detalhe in plano:
+        m = re.match(r'SCAN (\w+)', detalhe)
+        if m and 'USING' not in detalhe and aliases.get(m.group(1), m.group(1)) in TABELAS_QUENTES:
+            ruins.append(detalhe)
+    return ruins
+
+
+def _assert_sem_scan(funcao):
+    consultas = _capturar_sql(funcao)
+    assert consultas, 'nenhuma consulta capturada'
+    problemas = {' '.join(sql.split())[:160]: r for sql in consultas for r in [_scans_completos(sql)] if r}
+    assert not problemas, problemas
+
+
+# ========== SCHEMA ==========
+class TestIndicesCriados:
+    """A migração de índices cria o pacote completo."""
+
+    def test_indices_existem(self, banco_grande):
+        from services import conexao_db
+        import migrations
+
+        conn = conexao_db.get_db()
+        nomes = {r[0] for r in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+        conn.close()
+        modulo = {nome: mod for _, nome, mod in migrations.listar_migracoes()}['indices']
+        esperados = {nome for nome, _, _ in modulo.INDICES}
+        # 006 troca o índice de histórico do clima_cache pelo único (upsert)
+        esperados = esperados - {'idx_clima_cache_coord'} | {'idx_clima_cache_chave'}
+        # 011 troca o índice de alertas pendentes pelo único (INSERT OR IGNORE)
+        esperados = esperados - {'idx_alertas_pendentes'} | {'idx_alertas_pendentes_unico'}
+        assert esperados <= nomes
+
+
+# ========== DATABASE.PY ==========
+class TestPlanosDatabase:
+    """Consultas por fazenda usam índice."""
+
+    @pytest.mark.parametrize('nome', [
+        'listar_piquetes',
+        'listar_lotes',
+        'listar_piquetes_disponiveis',
+        'verificar_alertas_piquetes',
+        'listar_piquetes_apto',
+        'get_estatisticas_lotes',
+        'calcular_lotacao_fazenda',
+        'listar_piquetes_baixa_lotacao',
+        'listar_lotes_baixa_lotacao',
+        'contar_alertas_nao_lidos',
+        'listar_movimentacoes',
+    ])
+    def test_funcao_por_fazenda(self, banco_grande, nome):
+        import database
+        funcao = getattr(database, nome)
+        _assert_sem_scan(lambda: funcao(banco_grande))
+
+    def test_relatorio_estatisticas(self, banco_grande):
+        import database
+        _assert_sem_scan(lambda: database.relatorio_estatisticas(fazenda_id=banco_grande))
+
+    def test_listar_alertas(self, banco_grande):
+        import database
+        _assert_sem_scan(lambda: database.listar_alertas(banco_grande))
+        _assert_sem_scan(lambda: database.listar_alertas(banco_grande, apenas_nao_lidos=True))
+
+    def test_sugerir_proximo_piquete(self, banco_grande):
+        from services import conexao_db, sugestao_service
+        import database
+
+        conn = conexao_db.get_db()
+        lote_id = conn.execute('SELECT id FROM lotes WHERE fazenda_id = ? AND ativo = 1 LIMIT 1',
+                               (banco_grande,)).fetchone()[0]
+        conn.close()
+        sugestao_service.limpar()  # montagem do índice + consulta do lote
+        _assert_sem_scan(lambda: database.sugerir_proximo_piquete(banco_grande, lote_id))
+        _assert_sem_scan(lambda: database.sugerir_proximo_piquete(banco_grande, lote_id, k=5))
+
+    def test_ultima_mov_sem_historico(self, banco_grande):
+        """Sugestão e aptos leem piquetes.ultima_* (008) sem tocar em movimentacoes."""
+        from services import conexao_db
+        import database
+
+        conn = conexao_db.get_db()
+        lote_id = conn.execute('SELECT id FROM lotes WHERE fazenda_id = ? AND ativo = 1 LIMIT 1',
+                               (banco_grande,)).fetchone()[0]
+        conn.close()
+        for funcao in (lambda: database.sugerir_proximo_piquete(banco_grande, lote_id),
+                       lambda: database.listar_piquetes_apto(banco_grande)):
+            consultas = _capturar_sql(funcao)
+            assert consultas and not [sql for sql in consultas if 'movimentacoes' in sql]
+
+    def test_status_pendentes(self, banco_grande):
+        from services import conexao_db
+        import database
+
+        conn = conexao_db.get_db()
+        lote_id, piquete_id = conn.execute('''
+            SELECT id, piquete_atual_id FROM lotes
+            WHERE fazenda_id = ? AND ativo = 1 AND piquete_atual_id IS NOT NULL LIMIT 1
+        ''', (banco_grande,)).fetchone()
+        conn.close()
+        database.marcar_status_pendente(lote_ids=[lote_id], piquete_ids=[piquete_id])
+        _assert_sem_scan(database.recalcular_status_pendentes)
+
+    def test_get_piquete_e_lote(self, banco_grande):
+        from services import conexao_db
+        import database
+
+        conn = conexao_db.get_db()
+        piquete_id, lote_id = conn.execute('''
+            SELECT piquete_atual_id, id FROM lotes
+            WHERE fazenda_id = ? AND ativo = 1 AND piquete_atual_id IS NOT NULL LIMIT 1
+        ''', (banco_grande,)).fetchone()
+        conn.close()
+        _assert_sem_scan(lambda: database.get_piquete(piquete_id))
+        _assert_sem_scan(lambda: database.get_lote(lote_id))
+
+
+# ========== ROTACAO / CLIMA ==========
+class TestPlanosServicos:
+    """Consultas dos serviços usam índice."""
+
+    @pytest.mark.parametrize('nome', ['calcular_prioridade_rotacao', 'plano_rotacao', 'verificar_passou_ponto'])
+    def test_rotacao(self, banco_grande, nome):
+        from services import rotacao_service
+        funcao = getattr(rotacao_service, nome)
+        _assert_sem_scan(lambda: funcao(banco_grande))
+
+    def test_atribuicao(self, banco_grande):
+        from services import conexao_db
+        from services.atribuicao_service import atribuir_lotes
+
+        conn = conexao_db.get_db()
+        lote_ids = [r[0] for r in conn.execute('SELECT id FROM lotes WHERE fazenda_id = ? AND ativo = 1',
+                                               (banco_grande,))]
+        conn.close()
+        _assert_sem_scan(lambda: atribuir_lotes(banco_grande, lote_ids))
+
+    def test_simulacao(self, banco_grande):
+        from services.simulacao_service import simular_fazenda
+        _assert_sem_scan(lambda: simular_fazenda(banco_grande, 30))
+
+    def test_planejamento(self, banco_grande):
+        from services.planejamento_service import planejar
+        _assert_sem_scan(lambda: planejar(banco_grande, 30))
+
+    def test_capacidade(self, banco_grande):
+        from services.capacidade_service import atualizar_capacidade, capacidade_fazenda
+        _assert_sem_scan(lambda: atualizar_capacidade(banco_grande))
+        _assert_sem_scan(lambda: capacidade_fazenda(banco_grande, categoria='Vaca', dias=5))
+
+    def test_clima_cache(self, banco_grande):
+        from services.clima_service import _get_cache
+        _assert_sem_scan(lambda: _get_cache(-10.25, -45.25))
@@ -0,0 +1,166 @@
+"""
+Testes de listar_lotes (database.py): saída idêntica à implementação antiga
+(get_piquete por lote) e número de consultas constante.
+"""
+from datetime import datetime
+
+import pytest
+
+DATA_REF = datetime(2026, 3, 1, 12, 0, 0)
+
+
+def _listar_lotes_legado(fazenda_id=None, status_filtro=None, categoria_filtro=None):
+    """Cópia da implementação anterior, usada como referência de equivalência."""
+    from database import (get_db, get_piquete, calcular_dias_no_piquete, calcular_altura_estimada,
+                          calcular_status_lote, data_teste_now)
+
+    conn = get_db()
+    cursor = conn.cursor()
+
+    query = '''
+        SELECT l.*, p.nome as piquete_nome, p.capim, p.area as piquete_area,
+               p.altura_real_medida, p.altura_estimada,
+               p.altura_entrada, p.altura_saida, p.dias_ocupacao,
+               p.bloqueado as piquete_bloqueado
+        FROM lotes l
+        LEFT JOIN piquetes p ON l.piquete_atual_id = p.id
+        WHERE l.ativo = 1
+    '''
+    params = []
+    if fazenda_id:
+        query += ' AND l.fazenda_id = ?'
+        params.append(fazenda_id)
+    if status_filtro:
+        if status_filtro == 'AGUARDANDO_ALOCACAO':
+            query += ' AND l.piquete_atual_id IS NULL'
+        else:
+            query += ' AND l.status_calculado = ?'
+            params.append(status_filtro)
+    if categoria_filtro:
+        query += ' AND l.categoria = ?'
+        params.append(categoria_filtro)
+    query += ' ORDER BY l.nome'
+
+    cursor.execute(query, params)
+    rows = cursor.fetchall()
+    conn.close()
+
+    lotes = []
+    for row in rows:
+        lote = dict(row)
+        lote['dias_no_piquete'] = calcular_dias_no_piquete(lote)
+        if lote.get('piquete_atual_id'):
+            piquete_info = get_piquete(lote['piquete_atual_id'])
+            if piquete_info:
+                lote['data_medicao'] = piquete_info.get('data_medicao')
+                lote['capim'] = piquete_info.get('capim')
+                lote['altura_entrada'] = piquete_info.get('altura_entrada')
+                lote['altura_saida'] = piquete_info.get('altura_saida')
+                lote['estado'] = piquete_info.get('estado')
+                lote['dias_ocupacao'] = piquete_info.get('dias_ocupacao')
+                lote['animais_no_piquete'] = lote.get('quantidade', 0) or 0
+                lote['area'] = piquete_info.get('area')
+                data_medicao = lote.get('data_medicao')
+                if data_medicao:
+                    try:
+                        if 'T' in data_medicao:
+                            medicao_dt = datetime.fromisoformat(data_medicao.replace('Z', '+00:00').replace('+00:00', ''))
+                        else:
+                            medicao_dt = datetime.fromisoformat(data_medicao)
+                        lote['dias_descanso'] = (data_teste_now() - medicao_dt).days
+                    except:
+                        lote['dias_descanso'] = 0
+                else:
+                    lote['dias_descanso'] = 0
+                altura_est, fonte = calcular_altura_estimada(
+                    lote,
+                    categoria=lote.get('categoria'),
+                    peso_medio=lote.get('peso_medio'),
+                    consumo_base=lote.get('consumo_base')
+                )
+                lote['altura_estimada'] = altura_est
+                lote['altura_real_medida'] = piquete_info.get('altura_real_medida')
+        lote['status_info'] = calcular_status_lote(lote)
+        lotes.append(lote)
+    return lotes
+
+
+@pytest.fixture
+def fazendas(banco_temp):
+    """Uma fazenda com clima manual e outra automática (clima já em cache, sem rede)."""
+    from services import conexao_db
+    from services.clima_service import _save_cache
+    from benchmarks.dados_sinteticos import popular_fazenda
+
+    conn = conexao_db.get_db()
+    manual = popular_fazenda(conn, n_piquetes=40, n_lotes=30, data_ref=DATA_REF, seed=1)
+    automatica = popular_fazenda(conn, n_piquetes=40, n_lotes=30, data_ref=DATA_REF, seed=2,
+                                 clima_modo='automatico', latitude=-16.0, longitude=-48.0)
+    _save_cache(-16.0, -48.0, 'chuvoso', 1.3, {})
+
+    # Cobrir os demais ramos: piquete em descanso, data ISO, sem data prevista e piquete inexistente
+    conn.execute('''
+        UPDATE piquetes SET estado = 'descanso'
+        WHERE id IN (SELECT piquete_atual_id FROM lotes WHERE piquete_atual_id IS NOT NULL AND id % 3 = 0)
+    ''')
+    conn.execute("UPDATE lotes SET data_saida_prevista = '2026-03-02T00:00:00' WHERE id % 5 = 0")
+    conn.execute('UPDATE lotes SET data_saida_prevista = NULL WHERE id % 7 = 0')
+    conn.execute('UPDATE lotes SET piquete_atual_id = 999999 WHERE id = (SELECT MAX(id) FROM lotes)')
+    conn.commit()
+    conn.close()
+    return manual, automatica
+
+
+# ========== EQUIVALÊNCIA ==========
+class TestEquivalencia:
+    """Mesma saída (valores e ordem das chaves) da versão antiga."""
+
+    @pytest.mark.parametrize('filtros', [
+        {},
+        {'status_filtro': 'AGUARDANDO_ALOCACAO'},
+        {'status_filtro': 'OK'},
+        {'categoria_filtro': 'Vaca'},
+    ])
+    def test_mesma_saida(self, fazendas, filtros):
+        import database
+        from simular_data import relogio_fixo
+
+        for fazenda_id in (*fazendas, None):
+            with relogio_fixo(DATA_REF):
+                esperado = _listar_lotes_legado(fazenda_id, **filtros)
+                obtido = database.listar_lotes(fazenda_id, **filtros)
+            assert [list(l.items()) for l in obtido] == [list(l.items()) for l in esperado]
+
+    def test_ramos_cobertos(self, fazendas):
+        import database
+        from simular_data import relogio_fixo
+
+        with relogio_fixo(DATA_REF):
+            lotes = database.listar_lotes()
+        assert {l.get('estado') for l in lotes} >= {'ocupado', 'descanso', None}
+        assert {l['status_info']['status'] for l in lotes} >= {'AGUARDANDO_ALOCACAO', 'RETIRAR', 'EM_OCUPACAO'}
+
+
+# ========== CONSULTAS ==========
+class TestConsultas:
+    """Número de consultas não depende do número de lotes."""
+
+    def test_consultas_constantes(self, fazendas):
+        import database
+        from services import capim_service, conexao_db
+        from simular_data import relogio_fixo
+
+        capim_service.registro()  # carregado uma vez por processo, fora da contagem
+        conn = conexao_db.get_db()
+        consultas = []
+        conn.set_trace_callback(consultas.append)
+        try:
+            with relogio_fixo(DATA_REF):
+                for fazenda_id in fazendas:
+                    database.listar_lotes(fazenda_id)
+        finally:
+            conn.set_trace_callback(None)
+            conn.close()
+        selects = [sql for sql in consultas if sql.lstrip().upper().startswith('SELECT')]
+        # manual: lotes + config da fazenda; automática: lotes + config + clima_cache
+        assert len(selects) <= 5
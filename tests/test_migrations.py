@@ -0,0 +1,305 @@
+"""
+Testes do executor de migrações (migrations/__init__.py)
+"""
+import pytest
+
+
+@pytest.fixture
+def banco_vazio(tmp_path):
+    """Banco sem nenhuma tabela (nem schema_version)."""
+    from services import conexao_db
+
+    caminho_original = conexao_db.DB_PATH
+    caminho = str(tmp_path / 'vazio.db')
+    conexao_db.configurar(db_path=caminho, reutilizar=True)
+    yield caminho
+    conexao_db.configurar(db_path=caminho_original, reutilizar=True)
+
+
+def _versoes(conn):
+    return [r[0] for r in conn.execute('SELECT versao FROM schema_version ORDER BY versao')]
+
+
+# ========== DESCOBERTA ==========
+class TestDescoberta:
+    """Módulos NNN_nome.py em ordem."""
+
+    def test_ordem_e_upgrade(self):
+        import migrations
+        lista = migrations.listar_migracoes()
+        versoes = [v for v, _, _ in lista]
+        assert versoes == sorted(versoes)
+        assert len(set(versoes)) == len(versoes)
+        assert all(callable(getattr(mod, 'upgrade', None)) for _, _, mod in lista)
+        assert migrations.versao_alvo() == versoes[-1]
+
+
+# ========== APLICAÇÃO ==========
+class TestMigrar:
+    """Aplicação das pendentes."""
+
+    def test_banco_novo_fica_completo(self, banco_vazio):
+        import migrations
+        from services import conexao_db
+
+        aplicadas = migrations.migrar()
+        conn = conexao_db.get_db()
+        assert aplicadas == _versoes(conn)
+        assert migrations.versao_atual(conn) == migrations.versao_alvo()
+        assert {'data_saida_prevista', 'dias_tecnicos'} <= migrations.colunas(conn, 'lotes')
+        assert 'perm_lotes' in migrations.colunas(conn, 'usuarios')
+        assert conn.execute("SELECT COUNT(*) FROM usuarios WHERE username IN ('admin', 'gerente')").fetchone()[0] == 2
+        conn.close()
+
+    def test_segunda_execucao_nao_faz_nada(self, banco_vazio):
+        import migrations
+        migrations.migrar()
+        assert migrations.migrar() == []
+
+    def test_ate_versao(self, banco_vazio):
+        import migrations
+        assert migrations.migrar(ate=2) == [1, 2]
+        assert migrations.migrar() == [v for v, _, _ in migrations.listar_migracoes() if v > 2]
+
+    def test_banco_legado_sem_schema_version(self, banco_vazio):
+        """Banco criado pelo init_db antigo (tabelas sem colunas novas) é migrado sem perder dados."""
+        import migrations
+        from services import conexao_db
+
+        conn = conexao_db.get_db()
+        conn.execute('CREATE TABLE usuarios (id INTEGER PRIMARY KEY AUTOINCREMENT, username TEXT UNIQUE NOT NULL, '
+                     'password_hash TEXT NOT NULL, nome TEXT, role TEXT, ativo INTEGER DEFAULT 1, '
+                     'created_at TEXT, updated_at TEXT)')
+        conn.execute("INSERT INTO usuarios (username, password_hash, role) VALUES ('joao', 'x', 'gerente')")
+        conn.execute('CREATE TABLE lotes (id INTEGER PRIMARY KEY AUTOINCREMENT, fazenda_id INTEGER, nome TEXT NOT NULL, '
+                     'quantidade INTEGER DEFAULT 0, piquete_atual_id INTEGER, ativo INTEGER DEFAULT 1)')
+        conn.commit()
+        conn.close()
+
+        migrations.migrar()
+
+        conn = conexao_db.get_db()
+        assert conn.execute("SELECT role FROM usuarios WHERE username = 'joao'").fetchone()[0] == 'gerente'
+        assert {'email', 'max_fazendas'} <= migrations.colunas(conn, 'usuarios')
+        assert 'dias_tecnicos' in migrations.colunas(conn, 'lotes')
+        conn.close()
+
+    def test_clima_cache_uma_linha_por_coordenada(self, banco_vazio):
+        """006 mantém a busca mais recente de cada coordenada, com payload reduzido."""
+        import json
+        import migrations
+        from services import conexao_db
+
+        migrations.migrar(ate=5)
+        conn = conexao_db.get_db()
+        payload = json.dumps({'current': {'relative_humidity_2m': 60, 'temperature_2m': 30},
+                              'daily': {'precipitation_sum': [1] * 7, 'time': ['x'] * 7}})
+        conn.executemany('''
+            INSERT INTO clima_cache (lat, lon, provider, condicao, fator, payload_json, fetched_at, expires_at)
+            VALUES (?, ?, 'open-meteo', ?, 1.0, ?, ?, ?)
+        ''', [
+            (-16.0, -48.0, 'seca', payload, '2026-03-01T00:00:00+00:00', '2026-03-01T03:00:00+00:00'),
+            (-16.0, -48.0, 'chuvoso', payload, '2026-03-02T00:00:00+00:00', '2026-03-02T03:00:00+00:00'),
+            (-16.0, -48.0, 'normal', 'inválido', '2026-02-28T00:00:00+00:00', '2026-02-28T03:00:00+00:00'),
+            (-17.0, -48.0, 'normal', None, '2026-03-01T00:00:00+00:00', '2026-03-01T03:00:00+00:00'),
+        ])
+        conn.commit()
+        conn.close()
+
+        migrations.migrar()
+        conn = conexao_db.get_db()
+        linhas = conn.execute('SELECT lat, condicao, payload_json FROM clima_cache ORDER BY lat').fetchall()
+        nomes = {r[0] for r in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+        conn.close()
+
+        assert [(r[0], r[1]) for r in linhas] == [(-17.0, 'normal'), (-16.0, 'chuvoso')]
+        assert json.loads(linhas[1][2]) == {'current': {'relative_humidity_2m': 60},
+                                            'daily': {'precipitation_sum': [1] * 7}}
+        assert 'idx_clima_cache_chave' in nomes and 'idx_clima_cache_coord' not in nomes
+
+    def test_ultima_movimentacao_backfill_e_gatilhos(self, banco_vazio):
+        """008 preenche ultima_entrada/ultima_saida/ultima_mov e os gatilhos as mantêm."""
+        import migrations
+        from services import conexao_db
+
+        migrations.migrar(ate=7)
+        conn = conexao_db.get_db()
+        conn.executemany("INSERT INTO piquetes (id, fazenda_id, nome) VALUES (?, 1, ?)",
+                         [(1, 'A'), (2, 'B'), (3, 'C')])
+        conn.executemany('''
+            INSERT INTO movimentacoes (lote_id, piquete_origem_id, piquete_destino_id, data_movimentacao, tipo)
+            VALUES (1, ?, ?, ?, ?)
+        ''', [
+            (None, 1, '2026-01-01T08:00:00', 'movimentacao'),
+            (1, 2, '2026-01-10T08:00:00', 'movimentacao'),
+            (2, None, '2026-01-20T08:00:00', 'saida'),
+        ])
+        conn.commit()
+        conn.close()
+
+        migrations.migrar()
+        conn = conexao_db.get_db()
+        sql = 'SELECT ultima_entrada, ultima_saida, ultima_mov FROM piquetes WHERE id = ?'
+        assert tuple(conn.execute(sql, (1,)).fetchone()) == (
+            '2026-01-01T08:00:00', '2026-01-10T08:00:00', '2026-01-10T08:00:00')
+        assert tuple(conn.execute(sql, (2,)).fetchone()) == (
+            '2026-01-10T08:00:00', '2026-01-20T08:00:00', '2026-01-20T08:00:00')
+        assert tuple(conn.execute(sql, (3,)).fetchone()) == (None, None, None)
+
+        # INSERT: entrada no C; uma data retroativa no A não volta a coluna
+        conn.execute("INSERT INTO movimentacoes (lote_id, piquete_destino_id, data_movimentacao, tipo) "
+                     "VALUES (1, 3, '2026-02-01T08:00:00', 'movimentacao')")
+        conn.execute("INSERT INTO movimentacoes (lote_id, piquete_destino_id, data_movimentacao, tipo) "
+                     "VALUES (1, 1, '2025-12-01T08:00:00', 'movimentacao')")
+        assert tuple(conn.execute(sql, (3,)).fetchone()) == ('2026-02-01T08:00:00', None, '2026-02-01T08:00:00')
+        assert conn.execute(sql, (1,)).fetchone()[0] == '2026-01-01T08:00:00'
+
+        # DELETE: recalcula a partir do histórico restante
+        conn.execute("DELETE FROM movimentacoes WHERE tipo = 'saida'")
+        assert tuple(conn.execute(sql, (2,)).fetchone()) == ('2026-01-10T08:00:00', None, '2026-01-10T08:00:00')
+
+        # UPDATE (012): data corrigida para trás e piquete de destino trocado (C -> B)
+        conn.execute("UPDATE movimentacoes SET data_movimentacao = '2026-01-05T08:00:00' "
+                     "WHERE piquete_origem_id = 1 AND piquete_destino_id = 2")
+        assert tuple(conn.execute(sql, (1,)).fetchone()) == (
+            '2026-01-01T08:00:00', '2026-01-05T08:00:00', '2026-01-05T08:00:00')
+        assert conn.execute(sql, (2,)).fetchone()[0] == '2026-01-05T08:00:00'
+        conn.execute("UPDATE movimentacoes SET piquete_destino_id = 2 WHERE piquete_destino_id = 3")
+        assert tuple(conn.execute(sql, (3,)).fetchone()) == (None, None, None)
+        assert tuple(conn.execute(sql, (2,)).fetchone()) == ('2026-02-01T08:00:00', None, '2026-02-01T08:00:00')
+        conn.close()
+
+    def test_capins_nome_unico(self, banco_vazio):
+        """009 mantém o capim mais recente de cada nome e cria o índice único."""
+        import sqlite3
+        import migrations
+        from services import conexao_db
+
+        migrations.migrar(ate=8)
+        conn = conexao_db.get_db()
+        conn.execute("INSERT INTO capins (nome, crescimento_diario) VALUES ('Mombaça', 2.4)")
+        conn.commit()
+        conn.close()
+
+        migrations.migrar()
+        conn = conexao_db.get_db()
+        linhas = conn.execute("SELECT crescimento_diario FROM capins WHERE nome = 'Mombaça'").fetchall()
+        assert [r[0] for r in linhas] == [2.4]
+        assert {'consumo_base', 'dias_tecnicos'} <= migrations.colunas(conn, 'capins')
+        with pytest.raises(sqlite3.IntegrityError):
+            conn.execute("INSERT INTO capins (nome) VALUES ('Mombaça')")
+        conn.close()
+
+    def test_alertas_pendentes_unicos(self, banco_vazio):
+        """011 deixa um alerta não lido por (fazenda, lote, tipo) e cria o índice único parcial."""
+        import sqlite3
+        import migrations
+        from services import conexao_db
+
+        migrations.migrar(ate=10)
+        conn = conexao_db.get_db()
+        for lido in (0, 0, 0, 1):
+            conn.execute("INSERT INTO alertas (fazenda_id, lote_id, tipo, lido) VALUES (1, 7, 'ocupacao_tecnica', ?)",
+                         (lido,))
+        conn.execute("INSERT INTO alertas (fazenda_id, lote_id, tipo) VALUES (1, 8, 'ocupacao_tecnica')")
+        conn.commit()
+        conn.close()
+
+        migrations.migrar()
+        conn = conexao_db.get_db()
+        pendentes = conn.execute("SELECT id, lote_id FROM alertas WHERE lido = 0 ORDER BY id").fetchall()
+        assert [tuple(r) for r in pendentes] == [(3, 7), (5, 8)]  # fica o mais recente
+        with pytest.raises(sqlite3.IntegrityError):
+            conn.execute("INSERT INTO alertas (fazenda_id, lote_id, tipo) VALUES (1, 7, 'ocupacao_tecnica')")
+        # Lidos não contam: o histórico pode repetir
+        conn.execute("INSERT INTO alertas (fazenda_id, lote_id, tipo, lido) VALUES (1, 7, 'ocupacao_tecnica', 1)")
+        conn.close()
+
+    def test_geracoes_fazenda(self, banco_vazio):
+        """013: gravações que mudam plano/sugestão somam na geração da fazenda; as demais não."""
+        import migrations
+        from services import conexao_db
+
+        migrations.migrar()
+        conn = conexao_db.get_db()
+
+        def geracoes():
+            return dict(conn.execute('SELECT fazenda_id, geracao FROM fazenda_geracoes').fetchall())
+
+        conn.execute("INSERT INTO piquetes (id, fazenda_id, nome) VALUES (1, 1, 'P1')")
+        conn.execute("INSERT INTO piquetes (id, fazenda_id, nome) VALUES (2, NULL, 'Sem fazenda')")
+        conn.execute("INSERT INTO lotes (id, fazenda_id, nome) VALUES (1, 2, 'L1')")
+        assert geracoes() == {1: 1, 2: 1}
+
+        conn.execute("UPDATE lotes SET status_calculado = 'APTO', updated_at = 'x' WHERE id = 1")
+        conn.execute('UPDATE piquetes SET capacidade_ua_dias = 10 WHERE id = 1')
+        assert geracoes() == {1: 1, 2: 1}
+
+        conn.execute('UPDATE lotes SET piquete_atual_id = 1 WHERE id = 1')
+        conn.execute("INSERT INTO movimentacoes (lote_id, piquete_destino_id, data_movimentacao) "
+                     "VALUES (1, 1, '2026-03-01')")  # ultima_mov (008) muda o piquete
+        conn.execute("INSERT INTO capins (nome) VALUES ('Novo')")
+        assert geracoes() == {0: 1, 1: 2, 2: 2}
+
+        conn.execute('UPDATE lotes SET fazenda_id = 1 WHERE id = 1')  # as duas fazendas mudam
+        assert geracoes() == {0: 1, 1: 3, 2: 3}
+        conn.close()
+
+    def test_falha_desfaz_migracao(self, banco_vazio, monkeypatch):
+        """Erro no meio de uma migração não registra a versão nem deixa DDL parcial."""
+        import migrations
+
+        migrations.migrar(ate=4)
+        _, _, seeds = migrations.listar_migracoes()[4]
+
+        def quebrada(conn):
+            conn.execute('CREATE TABLE tabela_parcial (id INTEGER)')
+            raise RuntimeError('falhou')
+
+        monkeypatch.setattr(seeds, 'upgrade', quebrada)
+        with pytest.raises(RuntimeError):
+            migrations.migrar()
+
+        from services import conexao_db
+        conn = conexao_db.get_db()
+        assert migrations.versao_atual(conn) == 4
+        assert not conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'tabela_parcial'").fetchone()
+        conn.close()
+
+
+# ========== BOOT ==========
+class TestGarantirSchema:
+    """Verificação de boot do app."""
+
+    def test_em_dia_uma_consulta(self, banco_vazio):
+        import migrations
+        from services import conexao_db
+
+        migrations.migrar()
+        conn = conexao_db.get_db()
+        consultas = []
+        conn.set_trace_callback(consultas.append)
+        try:
+            migrations.garantir_schema()
+        finally:
+            conn.set_trace_callback(None)
+            conn.close()
+        assert len(consultas) == 1
+
+    def test_pendente_sem_auto_falha(self, banco_vazio, monkeypatch):
+        import migrations
+        monkeypatch.delenv('PASTOFLOW_AUTO_MIGRATE', raising=False)
+        with pytest.raises(migrations.SchemaDesatualizado):
+            migrations.garantir_schema()
+
+    def test_pendente_com_auto_migra(self, banco_vazio, monkeypatch):
+        import migrations
+        monkeypatch.setenv('PASTOFLOW_AUTO_MIGRATE', '1')
+        assert migrations.garantir_schema() == migrations.versao_alvo()
+
+    def test_cli_status(self, banco_vazio, capsys):
+        from migrations.__main__ import main
+        assert main(['status']) == 1
+        assert main(['upgrade']) == 0
+        assert main(['status']) == 0
+        assert '[x] 001_schema_inicial' in capsys.readouterr().out
@@ -0,0 +1,314 @@
+"""
+Testes do calendário de rotação (services/planejamento_service.py): regras
+das entradas, recálculo incremental igual ao completo e plano em memória.
+"""
+import json
+import random
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+DATA_REF = datetime(2026, 3, 1, 12, 0, 0)
+LAT, LON = -15.6, -47.8
+
+
+def _poligono(lat, lon, lado=0.004):
+    coords = [[lon, lat], [lon + lado, lat], [lon + lado, lat + lado], [lon, lat + lado], [lon, lat]]
+    return json.dumps({'type': 'Polygon', 'coordinates': [coords]})
+
+
+@pytest.fixture
+def fazenda(banco_temp):
+    from services import conexao_db
+    from benchmarks.dados_sinteticos import popular_fazenda
+
+    conn = conexao_db.get_db()
+    fazenda_id = popular_fazenda(conn, n_piquetes=0, n_lotes=0, data_ref=DATA_REF, latitude=LAT, longitude=LON)
+    conn.execute("UPDATE fazendas SET clima_modo = 'manual', condicao_climatica_manual = 'normal' WHERE id = ?",
+                 (fazenda_id,))
+    conn.commit()
+    conn.close()
+    return fazenda_id
+
+
+def _piquete(fazenda_id, nome, altura, area=10.0, descanso_min=30, bloqueado=0, saiu_ha_dias=None):
+    from services import conexao_db
+
+    conn = conexao_db.get_db()
+    cur = conn.cursor()
+    cur.execute('''
+        INSERT INTO piquetes (fazenda_id, nome, area, capim, geometria, altura_real_medida, data_medicao,
+                              altura_entrada, altura_saida, dias_descanso_min, ativo, bloqueado,
+                              created_at, updated_at)
+        VALUES (?, ?, ?, 'Marandu', ?, ?, ?, 25, 15, ?, 1, ?, ?, ?)
+    ''', (fazenda_id, nome, area, _poligono(LAT, LON), altura, DATA_REF.strftime('%Y-%m-%d'), descanso_min,
+          bloqueado, DATA_REF.isoformat(), DATA_REF.isoformat()))
+    piquete_id = cur.lastrowid
+    if saiu_ha_dias is not None:
+        cur.execute('''
+            INSERT INTO movimentacoes (lote_id, piquete_origem_id, data_movimentacao, tipo, created_at)
+            VALUES (0, ?, ?, 'saida', ?)
+        ''', (piquete_id, (DATA_REF - timedelta(days=saiu_ha_dias)).isoformat(), DATA_REF.isoformat()))
+    conn.commit()
+    conn.close()
+    return piquete_id
+
+
+def _lote(fazenda_id, nome, quantidade=20, piquete_id=None, saida_em_dias=None):
+    from services import conexao_db
+
+    saida = (DATA_REF + timedelta(days=saida_em_dias)).strftime('%d/%m/%Y') if saida_em_dias is not None else None
+    conn = conexao_db.get_db()
+    cur = conn.cursor()
+    cur.execute('''
+        INSERT INTO lotes (fazenda_id, nome, categoria, quantidade, peso_medio, piquete_atual_id, data_entrada,
+                           data_saida_prevista, ativo, created_at, updated_at)
+        VALUES (?, ?, 'Vaca', ?, 450, ?, ?, ?, 1, ?, ?)
+    ''', (fazenda_id, nome, quantidade, piquete_id, DATA_REF.isoformat() if piquete_id else None, saida,
+          DATA_REF.isoformat(), DATA_REF.isoformat()))
+    if piquete_id:
+        cur.execute("UPDATE piquetes SET estado = 'ocupado' WHERE id = ?", (piquete_id,))
+    conn.commit()
+    lote_id = cur.lastrowid
+    conn.close()
+    return lote_id
+
+
+def _obter(fazenda_id, horizonte=60):
+    from simular_data import relogio_fixo
+    from services.planejamento_service import obter_plano
+
+    with relogio_fixo(DATA_REF):
+        return obter_plano(fazenda_id, horizonte)
+
+
+# ========== REGRAS ==========
+class TestCalendario:
+    """Entradas respeitam altura, descanso, bloqueio e lotação."""
+
+    def test_entra_no_mais_alto_e_fica_ate_a_saida(self, fazenda):
+        alto = _piquete(fazenda, 'Alto', altura=40)
+        baixo = _piquete(fazenda, 'Baixo', altura=18)
+        lote_id = _lote(fazenda, 'L1')  # 20 UA em 10 ha: 0,85 cm/dia
+
+        primeira, segunda = _obter(fazenda)['calendario'][:2]
+        assert (primeira['lote_id'], primeira['piquete_id']) == (lote_id, alto)
+        assert primeira['entrada'] == '2026-03-01'
+        assert primeira['dias'] == int((40 - 15) / 0.85)
+        # Na saída, o piquete baixo já rebrotou e recebe o lote
+        assert segunda['piquete_id'] == baixo
+        assert segunda['entrada'] == (DATA_REF + timedelta(days=primeira['dias'])).date().isoformat()
+        assert segunda['altura_entrada'] == pytest.approx(25 * 1.5)
+
+    def test_descanso_minimo(self, fazenda):
+        _piquete(fazenda, 'Livre', altura=40)
+        recente = _piquete(fazenda, 'Recente', altura=45, saiu_ha_dias=5)
+        _lote(fazenda, 'Grande', quantidade=10)  # fica mais de 25 dias no livre
+        pequeno = _lote(fazenda, 'Pequeno', quantidade=5)
+
+        plano = _obter(fazenda)
+        entrada = next(e for e in plano['calendario'] if e['lote_id'] == pequeno)
+        assert (entrada['piquete_id'], entrada['entrada']) == (recente, '2026-03-26')
+        assert {'lote_id': pequeno, 'lote_nome': 'Pequeno', 'dias_sem_piquete': 25} in plano['sem_piquete']
+
+    def test_bloqueado_e_lotacao(self, fazenda):
+        _piquete(fazenda, 'Bloqueado', altura=50, bloqueado=1)
+        _piquete(fazenda, 'Pequeno', altura=40, area=2.0)
+        lote_id = _lote(fazenda, 'Grande', quantidade=40)  # 20 UA/ha no pequeno
+
+        plano = _obter(fazenda, horizonte=10)
+        assert plano['calendario'] == []
+        assert plano['sem_piquete'][0] == {'lote_id': lote_id, 'lote_nome': 'Grande', 'dias_sem_piquete': 10}
+
+    def test_lote_atual_sai_na_data_prevista(self, fazenda):
+        origem = _piquete(fazenda, 'Origem', altura=30)
+        destino = _piquete(fazenda, 'Destino', altura=35)
+        lote_id = _lote(fazenda, 'L1', piquete_id=origem, saida_em_dias=4)
+
+        plano = _obter(fazenda)
+        assert plano['ocupacao_atual'] == [{'lote_id': lote_id, 'lote_nome': 'L1', 'piquete_id': origem,
+                                            'piquete_nome': 'Origem', 'saida': '2026-03-05'}]
+        assert (plano['calendario'][0]['piquete_id'], plano['calendario'][0]['entrada']) == (destino, '2026-03-06')
+
+
+# ========== INCREMENTAL ==========
+def _comparar_com_completo(fazenda_id):
+    from services import planejamento_service
+
+    plano = planejamento_service._planos[fazenda_id]
+    completo = planejamento_service._plano_completo(plano['ctx'])
+    assert plano['eventos'] == completo['eventos']
+    for campo, valores in completo['registro'].items():
+        assert np.array_equal(plano['registro'][campo], valores, equal_nan=valores.dtype.kind == 'f'), campo
+
+
+class TestIncremental:
+    """O recálculo a partir do corte dá o mesmo plano que recalcular tudo."""
+
+    @pytest.mark.parametrize('seed', range(2))
+    def test_igual_ao_completo(self, banco_temp, seed):
+        from services import conexao_db, planejamento_service
+        from benchmarks.dados_sinteticos import popular_fazenda
+
+        conn = conexao_db.get_db()
+        fazenda_id = popular_fazenda(conn, n_piquetes=60, n_lotes=25, n_movimentacoes=60, data_ref=DATA_REF,
+                                     seed=seed)
+        conn.commit()
+        piquete_ids = [r[0] for r in conn.execute('SELECT id FROM piquetes WHERE fazenda_id = ?', (fazenda_id,))]
+        lote_ids = [r[0] for r in conn.execute('SELECT id FROM lotes WHERE fazenda_id = ?', (fazenda_id,))]
+        conn.close()
+        _obter(fazenda_id)
+
+        rnd = random.Random(seed)
+        tipos = set()
+        for _ in range(15):
+            conn = conexao_db.get_db()
+            sorteio = rnd.random()
+            if sorteio < 0.5:
+                conn.execute('UPDATE piquetes SET altura_real_medida = ?, data_medicao = ? WHERE id = ?',
+                             (round(rnd.uniform(10, 45), 1), '2026-03-01', rnd.choice(piquete_ids)))
+            elif sorteio < 0.8:
+                conn.execute('UPDATE lotes SET piquete_atual_id = ?, data_saida_prevista = ? WHERE id = ?',
+                             (rnd.choice(piquete_ids), f'{rnd.randint(1, 28):02d}/03/2026', rnd.choice(lote_ids)))
+            else:
+                conn.execute('UPDATE lotes SET quantidade = ? WHERE id = ?', (rnd.randint(5, 100), rnd.choice(lote_ids)))
+            conn.commit()
+            conn.close()
+            planejamento_service.invalidar_plano(fazenda_id)
+
+            tipos.add(_obter(fazenda_id)['recalculo']['tipo'])
+            _comparar_com_completo(fazenda_id)
+        assert 'incremental' in tipos and tipos <= {'incremental', 'sem_alteracao'}
+
+    def test_reaproveita_dias_antes_do_corte(self, fazenda):
+        import database
+        from simular_data import relogio_fixo
+
+        _piquete(fazenda, 'Alto', altura=40)
+        baixo = _piquete(fazenda, 'Baixo', altura=18)
+        _lote(fazenda, 'L1')
+        assert _obter(fazenda)['recalculo']['tipo'] == 'completo'
+
+        # Baixo só pesa numa decisão quando o lote sai do Alto
+        with relogio_fixo(DATA_REF):
+            database.atualizar_piquete(baixo, nome='Baixo', area=10.0, capim='Marandu', altura_entrada=25,
+                                       altura_saida=15, altura_atual=20.0, data_medicao='2026-03-01')
+        plano = _obter(fazenda)
+        assert plano['recalculo']['tipo'] == 'incremental'
+        assert plano['recalculo']['a_partir_de'] == plano['calendario'][1]['entrada']
+        _comparar_com_completo(fazenda)
+
+    def test_sem_alteracao(self, fazenda):
+        from services import planejamento_service
+
+        _piquete(fazenda, 'P1', altura=30)
+        _lote(fazenda, 'L1')
+        _obter(fazenda)
+        planejamento_service.invalidar_plano(fazenda)
+        assert _obter(fazenda)['recalculo']['tipo'] == 'sem_alteracao'
+
+
+# ========== CACHE ==========
+class TestCache:
+    """Plano em memória até uma alteração; recálculo no agendador."""
+
+    def test_reusa_ate_alteracao(self, fazenda):
+        import database
+
+        piquete_id = _piquete(fazenda, 'P1', altura=30)
+        primeiro = _obter(fazenda)
+        assert _obter(fazenda) is primeiro
+        assert _obter(fazenda, horizonte=30) is not primeiro
+
+        database.criar_lote(fazenda, 'Novo', categoria='Vaca', quantidade=10, peso_medio=450)
+        novo = _obter(fazenda, horizonte=30)
+        assert novo['recalculo']['tipo'] == 'completo'  # lote novo: plano anterior não serve
+        assert novo['calendario'][0]['piquete_id'] == piquete_id
+
+    def test_gravacao_de_outro_worker(self, fazenda):
+        """Outra conexão (outro worker) grava: a geração do banco muda e o plano é refeito."""
+        import sqlite3
+        from services import conexao_db
+
+        baixo = _piquete(fazenda, 'Baixo', altura=20)
+        alto = _piquete(fazenda, 'Alto', altura=30)
+        _lote(fazenda, 'L1')
+        primeiro = _obter(fazenda)
+        assert primeiro['calendario'][0]['piquete_id'] == alto
+
+        outro = sqlite3.connect(conexao_db.DB_PATH)
+        outro.execute("UPDATE lotes SET status_calculado = 'X' WHERE fazenda_id = ?", (fazenda,))
+        outro.commit()
+        assert _obter(fazenda) is primeiro  # coluna que o plano não lê
+
+        outro.execute('UPDATE piquetes SET altura_real_medida = 40 WHERE id = ?', (baixo,))
+        outro.commit()
+        outro.close()
+        novo = _obter(fazenda)
+        assert novo is not primeiro
+        assert novo['calendario'][0]['piquete_id'] == baixo
+
+    def test_agendador_recalcula(self, fazenda, open_meteo_local):
+        """O executor do agendador não vê relogio_fixo: aqui tudo usa a data real."""
+        import database
+        from services import agendador_service, planejamento_service
+
+        _piquete(fazenda, 'P1', altura=30)
+        lote_id = _lote(fazenda, 'L1')
+        planejamento_service.obter_plano(fazenda)
+        agendador_service.iniciar()
+        try:
+            database.atualizar_lote(lote_id, nome='L1', categoria='Vaca', quantidade=25, peso_medio=450)
+            prazo = time.time() + 5
+            while time.time() < prazo:
+                plano = planejamento_service._planos[fazenda]
+                if plano['geracao'] == planejamento_service.geracao(fazenda):
+                    break
+                time.sleep(0.02)
+            assert plano['geracao'] == planejamento_service.geracao(fazenda)
+            assert planejamento_service.obter_plano(fazenda) is plano['resultado']
+        finally:
+            agendador_service.parar()
+
+    def test_mover_e_sair_atualizam_ultima_mov(self, fazenda):
+        """mover_lote e /sair registram a movimentação; piquetes.ultima_* acompanham."""
+        import database
+        from app import app
+
+        origem = _piquete(fazenda, 'P1', altura=30)
+        destino = _piquete(fazenda, 'P2', altura=30)
+        lote_id = _lote(fazenda, 'L1', piquete_id=origem)
+        database.mover_lote(lote_id, destino, usuario_id=2)
+        p1, p2 = database.get_piquete(origem), database.get_piquete(destino)
+        assert p1['ultima_saida'] and p1['ultima_mov'] == p1['ultima_saida'] and p1['ultima_entrada'] is None
+        assert p2['ultima_entrada'] == p1['ultima_saida'] and p2['ultima_saida'] is None
+
+        assert _obter(fazenda)['ocupacao_atual']
+        app.config['TESTING'] = True
+        client = app.test_client()
+        with client.session_transaction() as sess:
+            sess['user_id'] = 2
+            sess['role'] = 'gerente'
+            sess['fazenda_id'] = fazenda
+        assert client.post(f'/api/lotes/{lote_id}/sair').status_code == 200
+        p2 = database.get_piquete(destino)
+        assert p2['ultima_saida'] >= p2['ultima_entrada'] and p2['ultima_mov'] == p2['ultima_saida']
+        assert _obter(fazenda)['ocupacao_atual'] == []  # /sair também invalida o plano
+
+    def test_endpoint(self, fazenda):
+        from app import app
+
+        _piquete(fazenda, 'P1', altura=30)
+        _lote(fazenda, 'L1')
+        app.config['TESTING'] = True
+        client = app.test_client()
+        assert client.get('/api/rotacao/calendario').status_code == 401
+        with client.session_transaction() as sess:
+            sess['user_id'] = 2
+            sess['fazenda_id'] = fazenda
+        dados = client.get('/api/rotacao/calendario?horizonte=20').get_json()
+        assert dados['horizonte'] == 20 and len(dados['calendario']) == 1
+        assert client.get('/api/rotacao/calendario?horizonte=0').status_code == 400
+        assert client.get('/api/rotacao/calendario?horizonte=x').status_code == 400
@@ -0,0 +1,235 @@
+"""
+Testes da simulação da fazenda (services/simulacao_service.py): motor
+vetorizado contra um laço escalar e projeção a partir do banco.
+"""
+import json
+import random
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+DATA_REF = datetime(2026, 3, 1, 12, 0, 0)
+LAT, LON = -15.6, -47.8
+
+
+def _simular_escalar(h0, saida, limite, crescimento, fatores, consumo, ocupado):
+    """Um piquete por vez, um dia por vez."""
+    dias, n = consumo.shape
+    alturas = np.empty((dias + 1, n))
+    for j in range(n):
+        h = h0[j]
+        alturas[0, j] = h
+        for d in range(dias):
+            if ocupado[d, j]:
+                h = min(h, max(saida[j], h - consumo[d, j]))
+            elif h < limite[j]:
+                h = min(limite[j], h + crescimento[j] * fatores[d, j])
+            alturas[d + 1, j] = h
+    return alturas
+
+
+# ========== MOTOR ==========
+class TestMotor:
+    """simular() é o mesmo laço dia a dia, vetorizado por piquete."""
+
+    @pytest.mark.parametrize('seed', range(3))
+    def test_igual_escalar(self, seed):
+        from services.simulacao_service import simular
+
+        rnd = random.Random(seed)
+        n, dias = 40, 60
+        saida = np.array([rnd.choice([10, 15, 20]) for _ in range(n)], dtype=float)
+        limite = np.array([rnd.choice([20, 25, 30, 35]) * 1.5 for _ in range(n)])
+        h0 = np.array([rnd.uniform(5, 60) for _ in range(n)])
+        crescimento = np.array([rnd.choice([0.8, 1.2, 2.5]) for _ in range(n)])
+        fatores = np.array([[rnd.choice([0.6, 1.0, 1.2]) for _ in range(n)] for _ in range(dias)])
+        saidas = [rnd.randint(0, dias + 5) if rnd.random() < 0.5 else 0 for _ in range(n)]
+        ocupado = np.array([[d < saidas[j] for j in range(n)] for d in range(dias)])
+        consumo = np.where(ocupado, np.array([rnd.uniform(0, 3) for _ in range(n)]), 0.0)
+
+        obtido = simular(h0, saida, limite, crescimento, fatores, consumo, ocupado)
+        esperado = _simular_escalar(h0, saida, limite, crescimento, fatores, consumo, ocupado)
+        np.testing.assert_allclose(obtido, esperado)
+
+    def test_sem_piquetes(self):
+        from services.simulacao_service import simular
+
+        vazio = np.zeros(0)
+        alturas = simular(vazio, vazio, vazio, vazio, np.zeros((5, 0)), np.zeros((5, 0)), np.zeros((5, 0), bool))
+        assert alturas.shape == (6, 0)
+
+
+# ========== FAZENDA ==========
+def _poligono(lat, lon, lado=0.004):
+    coords = [[lon, lat], [lon + lado, lat], [lon + lado, lat + lado], [lon, lat + lado], [lon, lat]]
+    return json.dumps({'type': 'Polygon', 'coordinates': [coords]})
+
+
+@pytest.fixture
+def fazenda(banco_temp):
+    from services import conexao_db
+    from benchmarks.dados_sinteticos import popular_fazenda
+
+    conn = conexao_db.get_db()
+    fazenda_id = popular_fazenda(conn, n_piquetes=0, n_lotes=0, data_ref=DATA_REF, latitude=LAT, longitude=LON)
+    conn.execute("UPDATE fazendas SET clima_modo = 'manual', condicao_climatica_manual = 'normal' WHERE id = ?",
+                 (fazenda_id,))
+    conn.commit()
+    conn.close()
+    return fazenda_id
+
+
+def _piquete(fazenda_id, nome, altura, area=10.0, capim='Marandu', estado=None):
+    from services import conexao_db
+
+    conn = conexao_db.get_db()
+    cur = conn.cursor()
+    cur.execute('''
+        INSERT INTO piquetes (fazenda_id, nome, area, capim, geometria, altura_real_medida, data_medicao,
+                              altura_entrada, altura_saida, estado, ativo, bloqueado, created_at, updated_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?, 25, 15, ?, 1, 0, ?, ?)
+    ''', (fazenda_id, nome, area, capim, _poligono(LAT, LON), altura, DATA_REF.strftime('%Y-%m-%d'), estado,
+          DATA_REF.isoformat(), DATA_REF.isoformat()))
+    conn.commit()
+    piquete_id = cur.lastrowid
+    conn.close()
+    return piquete_id
+
+
+def _lote(fazenda_id, piquete_id, quantidade, saida_em_dias):
+    from services import conexao_db
+
+    saida = (DATA_REF + timedelta(days=saida_em_dias)).strftime('%d/%m/%Y')
+    conn = conexao_db.get_db()
+    cur = conn.cursor()
+    cur.execute('''
+        INSERT INTO lotes (fazenda_id, nome, categoria, quantidade, peso_medio, piquete_atual_id, data_entrada,
+                           dias_tecnicos, data_saida_prevista, ativo, created_at, updated_at)
+        VALUES (?, 'L1', 'Vaca', ?, 450, ?, ?, 10, ?, 1, ?, ?)
+    ''', (fazenda_id, quantidade, piquete_id, DATA_REF.isoformat(), saida, DATA_REF.isoformat(),
+          DATA_REF.isoformat()))
+    conn.execute("UPDATE piquetes SET estado = 'ocupado' WHERE id = ?", (piquete_id,))
+    conn.commit()
+    conn.close()
+
+
+def _simular(fazenda_id, dias):
+    from simular_data import relogio_fixo
+    from services.simulacao_service import simular_fazenda
+
+    with relogio_fixo(DATA_REF):
+        return simular_fazenda(fazenda_id, dias)
+
+
+class TestSimularFazenda:
+    """Projeção com o plano atual: consumo até a saída, depois rebrota."""
+
+    def test_descanso_igual_calcular_altura_descanso(self, fazenda):
+        from services.manejo_service import calcular_altura_descanso
+
+        _piquete(fazenda, 'Vazio', altura=16.0)
+        resultado = _simular(fazenda, 30)
+        alturas = resultado['piquetes'][0]['alturas']
+        assert len(alturas) == len(resultado['datas']) == 31
+        for dia in (1, 5, 20, 30):
+            assert alturas[dia] == pytest.approx(
+                calcular_altura_descanso(16.0, dia, 'Marandu', 'normal', altura_entrada=25), abs=0.051)
+
+    def test_ocupacao_igual_calcular_altura_ocupacao(self, fazenda):
+        from services.manejo_service import calcular_altura_ocupacao, get_consumo_base
+
+        piquete_id = _piquete(fazenda, 'Ocupado', altura=40.0, area=20.0)
+        _lote(fazenda, piquete_id, quantidade=40, saida_em_dias=5)
+        resultado = _simular(fazenda, 20)
+        alturas = resultado['piquetes'][0]['alturas']
+
+        # Até o último dia (saída prevista = dia 5) o lote consome; a tolerância
+        # cobre o arredondamento do NumPy (meio para o par) contra round()
+        for dia in range(1, 7):
+            assert alturas[dia] == pytest.approx(calcular_altura_ocupacao(
+                40.0, 15, dia, get_consumo_base('Marandu'), 40, 20.0, 'Vaca', 450), abs=0.11)
+        # Depois rebrota
+        assert alturas[7] > alturas[6]
+        assert resultado['lotes'][0]['dia_saida'] == 6
+        assert resultado['lotes'][0]['data_saida'] == '2026-03-07'
+        assert resultado['resumo']['piquetes_ocupados'][:7] == [1] * 6 + [0]
+
+    def test_lote_atrasado_sai_hoje(self, fazenda):
+        piquete_id = _piquete(fazenda, 'Atrasado', altura=30.0)
+        _lote(fazenda, piquete_id, quantidade=20, saida_em_dias=-3)
+        resultado = _simular(fazenda, 5)
+        assert resultado['lotes'][0]['dia_saida'] == 0
+        assert resultado['resumo']['piquetes_ocupados'] == [0] * 6
+
+    def test_aptos_por_dia(self, fazenda):
+        _piquete(fazenda, 'Quase', altura=24.0)
+        resultado = _simular(fazenda, 3)
+        assert resultado['resumo']['piquetes_aptos'] == [0, 1, 1, 1]
+
+    def test_dia_zero_igual_listagem(self, fazenda):
+        """Sem medição real, o dia 0 usa a mesma estimativa (e dias_descanso) de listar_piquetes."""
+        import database
+        from services import conexao_db
+        from simular_data import relogio_fixo
+
+        medido_ha_dias = _piquete(fazenda, 'Estimado', altura=None)
+        sem_medicao = _piquete(fazenda, 'Sem medição', altura=None)
+        ocupado = _piquete(fazenda, 'Ocupado', altura=None)
+        _lote(fazenda, ocupado, quantidade=30, saida_em_dias=10)
+        conn = conexao_db.get_db()
+        # dias_descanso gravado desatualizado: a estimativa conta a partir de data_medicao
+        conn.execute("UPDATE piquetes SET altura_atual = 18, dias_descanso = 90, dias_ocupacao = 4, "
+                     "data_medicao = ? WHERE fazenda_id = ?",
+                     ((DATA_REF - timedelta(days=12)).strftime('%Y-%m-%d'), fazenda))
+        conn.execute('UPDATE piquetes SET data_medicao = NULL WHERE id = ?', (sem_medicao,))
+        conn.commit()
+        conn.close()
+
+        resultado = _simular(fazenda, 2)
+        with relogio_fixo(DATA_REF):
+            listados = {p['id']: p['altura_estimada'] for p in database.listar_piquetes(fazenda)}
+        dia_zero = {p['id']: p['alturas'][0] for p in resultado['piquetes']}
+        assert set(dia_zero) == {medido_ha_dias, sem_medicao, ocupado}
+        for piquete_id, altura in dia_zero.items():
+            assert altura == pytest.approx(listados[piquete_id], abs=0.051)
+        assert dia_zero[medido_ha_dias] != dia_zero[sem_medicao]
+
+    def test_serie_diaria_da_previsao(self, fazenda):
+        """Dias com série (previsão gravada em clima_diario) usam o fator do dia."""
+        from services import conexao_db, clima_service
+        from services.manejo_service import calcular_crescimento_diario
+
+        conn = conexao_db.get_db()
+        conn.execute("UPDATE fazendas SET clima_modo = 'automatico' WHERE id = ?", (fazenda,))
+        conn.executemany('''
+            INSERT INTO clima_diario (lat, lon, data, precipitacao, fator, fator_acumulado, dias_acumulados,
+                                      atualizado_em)
+            VALUES (?, ?, ?, 50, 1.2, 0, 0, ?)
+        ''', [(*clima_service._celula(LAT, LON), (DATA_REF + timedelta(days=d)).date().isoformat(),
+               DATA_REF.isoformat()) for d in range(2)])
+        conn.commit()
+        conn.close()
+        clima_service._save_cache(LAT, LON, 'seca', 0.6, {})
+
+        _piquete(fazenda, 'Serie', altura=15.0)
+        alturas = _simular(fazenda, 4)['piquetes'][0]['alturas']
+        c = calcular_crescimento_diario('Marandu')
+        passos = np.round(np.diff(alturas), 2).tolist()
+        assert passos == pytest.approx([c * 1.2, c * 1.2, c * 0.6, c * 0.6], abs=0.11)
+
+    def test_endpoint(self, fazenda):
+        from app import app
+
+        _piquete(fazenda, 'P1', altura=20.0)
+        app.config['TESTING'] = True
+        client = app.test_client()
+        assert client.get('/api/rotacao/simular').status_code == 401
+        with client.session_transaction() as sess:
+            sess['user_id'] = 2
+            sess['fazenda_id'] = fazenda
+        dados = client.get('/api/rotacao/simular?dias=10').get_json()
+        assert dados['dias'] == 10 and len(dados['piquetes'][0]['alturas']) == 11
+        assert client.get('/api/rotacao/simular').get_json()['dias'] == 90
+        assert client.get('/api/rotacao/simular?dias=0').status_code == 400
+        assert client.get('/api/rotacao/simular?dias=abc').status_code == 400
@@ -0,0 +1,140 @@
+"""
+Testes do relógio de data de teste (simular_data.py)
+"""
+import json
+from datetime import datetime
+
+import pytest
+
+
+@pytest.fixture
+def relogio(tmp_path, monkeypatch):
+    """simular_data apontando para um arquivo de configuração temporário."""
+    import simular_data
+
+    monkeypatch.setattr(simular_data, 'CONFIG_FILE', tmp_path / 'data_teste_config.json')
+    simular_data.limpar_override()
+    simular_data._cache_arquivo['chave'] = None
+    yield simular_data
+    simular_data.limpar_override()
+    simular_data._cache_arquivo['chave'] = None
+
+
+def _contar_leituras(monkeypatch, simular_data):
+    leituras = []
+    original = simular_data.json.load
+
+    def load(f):
+        leituras.append(1)
+        return original(f)
+
+    monkeypatch.setattr(simular_data.json, 'load', load)
+    return leituras
+
+
+# ========== CACHE DO ARQUIVO ==========
+class TestCacheArquivo:
+    """Arquivo só é relido quando muda."""
+
+    def test_sem_arquivo_usa_data_real(self, relogio):
+        antes = datetime.now()
+        assert antes <= relogio.now() <= datetime.now()
+
+    def test_le_uma_vez(self, relogio, monkeypatch):
+        relogio.setar_data('2026-03-10')
+        leituras = _contar_leituras(monkeypatch, relogio)
+        for _ in range(100):
+            assert relogio.now() == datetime(2026, 3, 10)
+        assert len(leituras) == 1
+
+    def test_arquivo_alterado_e_relido(self, relogio):
+        relogio.setar_data('2026-03-10')
+        assert relogio.now() == datetime(2026, 3, 10)
+        relogio.CONFIG_FILE.write_text(json.dumps({'data': '2026-04-01T00:00:00', 'modo': 'teste', 'x': 1}))
+        assert relogio.now() == datetime(2026, 4, 1)
+
+    def test_reset_apaga_arquivo(self, relogio):
+        relogio.setar_data('2026-03-10')
+        relogio.now()
+        relogio.setar_data(None)
+        assert relogio.get_data_teste() is None
+
+
+# ========== OVERRIDE / CONGELAMENTO ==========
+class TestOverride:
+    """Override em memória e relógio congelado."""
+
+    def test_override_tem_prioridade(self, relogio):
+        relogio.setar_data('2026-03-10')
+        relogio.definir_override(datetime(2025, 1, 1))
+        assert relogio.now() == datetime(2025, 1, 1)
+        relogio.limpar_override()
+        assert relogio.now() == datetime(2026, 3, 10)
+
+    def test_relogio_fixo_congela_data_real(self, relogio):
+        with relogio.relogio_fixo() as agora:
+            assert relogio.now() is agora
+            assert relogio.now() is agora
+            assert relogio.get_status()['modo'] == 'real'
+        assert relogio.now() is not agora
+
+    def test_relogio_fixo_com_data(self, relogio):
+        with relogio.relogio_fixo(datetime(2026, 5, 5)):
+            assert relogio.now() == datetime(2026, 5, 5)
+            assert relogio.get_status()['data'] == '2026-05-05'
+        assert relogio.get_data_teste() is None
+
+
+# ========== FLASK ==========
+class TestPorRequisicao:
+    """Data resolvida uma vez por requisição e injetável por sessão/header."""
+
+    @pytest.fixture
+    def client(self, relogio):
+        from app import app
+        app.config['TESTING'] = True
+        client = app.test_client()
+        with client.session_transaction() as sess:
+            sess['user_id'] = 2
+            sess['role'] = 'gerente'
+        return client
+
+    def test_uma_leitura_por_requisicao(self, client, relogio, monkeypatch):
+        from app import app
+        relogio.setar_data('2026-03-10')
+        relogio._cache_arquivo['chave'] = None
+        leituras = _contar_leituras(monkeypatch, relogio)
+        with app.test_request_context('/'):
+            app.preprocess_request()
+            for _ in range(50):
+                relogio.now()
+            app.do_teardown_request()
+        assert len(leituras) == 1
+
+    def test_data_por_sessao(self, client):
+        assert client.get('/api/data-teste').get_json()['modo'] == 'real'
+        resp = client.post('/api/data-teste', json={'data': '2026-07-01'})
+        assert resp.status_code == 200
+        status = client.get('/api/data-teste').get_json()
+        assert status['modo'] == 'teste' and status['data'] == '2026-07-01'
+        client.post('/api/data-teste', json={'data': None})
+        assert client.get('/api/data-teste').get_json()['modo'] == 'real'
+
+    def test_producao_recusa(self, client):
+        """Fora de debug/testing a data da sessão não é aceita nem usada."""
+        from app import app
+        app.config['TESTING'] = False
+        try:
+            with client.session_transaction() as sess:
+                sess['data_teste'] = '2026-07-01'
+            assert client.post('/api/data-teste', json={'data': '2026-07-01'}).status_code == 403
+            assert client.get('/api/data-teste').get_json()['modo'] == 'real'
+        finally:
+            app.config['TESTING'] = True
+
+    def test_data_invalida(self, client):
+        assert client.post('/api/data-teste', json={'data': '01/07/2026'}).status_code == 400
+
+    def test_data_por_header(self, client):
+        status = client.get('/api/data-teste', headers={'X-Data-Teste': '2026-08-15'}).get_json()
+        assert status['data'] == '2026-08-15'
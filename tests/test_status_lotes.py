@@ -0,0 +1,189 @@
+"""
+Testes do recálculo incremental de status dos lotes (database.py):
+marcação por evento, executemany só do que mudou e varredura diária.
+"""
+from datetime import datetime, timedelta
+
+import pytest
+
+DATA_REF = datetime(2026, 3, 1, 12, 0, 0)
+
+
+@pytest.fixture
+def fazenda(banco_temp):
+    from services import conexao_db
+    from benchmarks.dados_sinteticos import popular_fazenda
+
+    conn = conexao_db.get_db()
+    fazenda_id = popular_fazenda(conn, n_piquetes=60, n_lotes=40, n_movimentacoes=0, data_ref=DATA_REF)
+    conn.close()
+    return fazenda_id
+
+
+def _status(fazenda_id):
+    from services import conexao_db
+
+    conn = conexao_db.get_db()
+    linhas = conn.execute('SELECT id, status_calculado FROM lotes WHERE fazenda_id = ? AND ativo = 1',
+                          (fazenda_id,)).fetchall()
+    conn.close()
+    return {r['id']: r['status_calculado'] for r in linhas}
+
+
+def _updates(funcao):
+    """Executa a função e conta os UPDATE lotes emitidos."""
+    from services import conexao_db
+
+    conn = conexao_db.get_db()
+    emitidos = []
+    conn.set_trace_callback(emitidos.append)
+    try:
+        resultado = funcao()
+    finally:
+        conn.set_trace_callback(None)
+        conn.close()
+    return resultado, sum(1 for sql in emitidos if sql.lstrip().upper().startswith('UPDATE LOTES'))
+
+
+def _lote_com_piquete(fazenda_id):
+    from services import conexao_db
+
+    conn = conexao_db.get_db()
+    linha = conn.execute('''
+        SELECT id, piquete_atual_id FROM lotes
+        WHERE fazenda_id = ? AND ativo = 1 AND piquete_atual_id IS NOT NULL ORDER BY id LIMIT 1
+    ''', (fazenda_id,)).fetchone()
+    conn.close()
+    return linha['id'], linha['piquete_atual_id']
+
+
+# ========== VARREDURA COMPLETA ==========
+class TestAtualizarStatusLotes:
+    """Varredura da fazenda grava só os status que mudaram."""
+
+    def test_segunda_varredura_nao_grava(self, fazenda):
+        import database
+        from simular_data import relogio_fixo
+
+        with relogio_fixo(DATA_REF):
+            alterados, updates = _updates(lambda: database.atualizar_status_lotes(fazenda))
+            assert alterados == updates == len(_status(fazenda))  # todos saem do 'OK' inicial
+            assert _updates(lambda: database.atualizar_status_lotes(fazenda)) == (0, 0)
+
+    def test_igual_ao_calculo_por_lote(self, fazenda):
+        """Lotes com saída prevista (ou sem piquete) têm o mesmo status que listar_lotes mostra."""
+        import database
+        from simular_data import relogio_fixo
+
+        with relogio_fixo(DATA_REF):
+            database.atualizar_status_lotes(fazenda)
+            esperado = {l['id']: l['status_info']['status'] for l in database.listar_lotes(fazenda)
+                        if l['piquete_atual_id'] is None or (l['data_saida_prevista'] and l['dias_tecnicos'])}
+        assert esperado
+        status = _status(fazenda)
+        assert {i: status[i] for i in esperado} == esperado
+
+
+# ========== PENDENTES ==========
+class TestPendentes:
+    """Eventos marcam lotes/piquetes; o recálculo lê e grava só esses."""
+
+    def test_so_marcados(self, fazenda):
+        import database
+        from simular_data import relogio_fixo
+
+        lote_id, piquete_id = _lote_com_piquete(fazenda)
+        with relogio_fixo(DATA_REF):
+            database.marcar_status_pendente(lote_ids=[lote_id])
+            alterados, updates = _updates(database.recalcular_status_pendentes)
+        status = _status(fazenda)
+        assert alterados == 1 and updates == 1
+        assert status[lote_id] != 'OK'
+        assert sum(1 for s in status.values() if s == 'OK') == len(status) - 1
+        assert database.recalcular_status_pendentes() == 0  # fila esvaziada
+
+    def test_piquete_marca_seus_lotes(self, fazenda):
+        import database
+        from services import conexao_db
+        from simular_data import relogio_fixo
+
+        lote_id, piquete_id = _lote_com_piquete(fazenda)
+        with relogio_fixo(DATA_REF):
+            database.atualizar_status_lotes(fazenda)
+            conn = conexao_db.get_db()
+            conn.execute("UPDATE lotes SET status_calculado = 'OK' WHERE piquete_atual_id = ?", (piquete_id,))
+            conn.commit()
+            conn.close()
+            database.marcar_status_pendente(piquete_ids=[piquete_id])
+            assert database.recalcular_status_pendentes() >= 1
+        assert _status(fazenda)[lote_id] != 'OK'
+
+    def test_mover_endpoint_recalcula_so_o_lote(self, fazenda):
+        from app import app
+        from services import conexao_db
+
+        lote_id, _ = _lote_com_piquete(fazenda)
+        conn = conexao_db.get_db()
+        destino = conn.execute('''
+            SELECT id FROM piquetes WHERE fazenda_id = ? AND ativo = 1
+              AND id NOT IN (SELECT piquete_atual_id FROM lotes WHERE piquete_atual_id IS NOT NULL)
+            ORDER BY id LIMIT 1
+        ''', (fazenda,)).fetchone()['id']
+        conn.close()
+
+        app.config['TESTING'] = True
+        client = app.test_client()
+        with client.session_transaction() as sess:
+            sess['user_id'] = 2
+            sess['role'] = 'gerente'
+            sess['fazenda_id'] = fazenda
+        resposta = client.post(f'/api/lotes/{lote_id}/mover', json={'piquete_destino_id': destino})
+        assert resposta.status_code == 200
+        status = _status(fazenda)
+        assert status[lote_id] != 'OK'
+        assert sum(1 for s in status.values() if s == 'OK') == len(status) - 1
+
+    def test_medicao_marca_o_piquete(self, fazenda):
+        import database
+
+        lote_id, piquete_id = _lote_com_piquete(fazenda)
+        database.atualizar_piquete(piquete_id, area=5.0, capim='Marandu', altura_entrada=25, altura_saida=15,
+                                   dias_ocupacao=3, altura_atual=30.0, data_medicao='2026-03-01')
+        assert database._status_pendentes_piquetes == {piquete_id}
+        assert database.recalcular_status_pendentes() >= 1
+
+
+# ========== VARREDURA DIÁRIA ==========
+class TestVarreduraDiaria:
+    """Transições só de data ficam para o job da meia-noite."""
+
+    def test_atencao_vira_retirar(self, fazenda):
+        import database
+        from services import conexao_db
+        from simular_data import relogio_fixo
+
+        lote_id, _ = _lote_com_piquete(fazenda)
+        amanha = (DATA_REF + timedelta(days=1)).strftime('%d/%m/%Y')
+        conn = conexao_db.get_db()
+        conn.execute('UPDATE lotes SET data_saida_prevista = ?, dias_tecnicos = 5 WHERE id = ?', (amanha, lote_id))
+        conn.commit()
+        conn.close()
+
+        with relogio_fixo(DATA_REF):
+            database.varrer_status_lotes()
+        assert _status(fazenda)[lote_id] == 'ATENCAO'
+        with relogio_fixo(DATA_REF + timedelta(days=2)):
+            resumo = database.varrer_status_lotes()
+        assert resumo['fazendas'] >= 1 and resumo['alterados'] >= 1
+        assert _status(fazenda)[lote_id] == 'RETIRAR'
+
+    def test_job_agendado(self, banco_temp, monkeypatch):
+        from services import agendador_service
+
+        monkeypatch.setattr(agendador_service, 'atualizar_clima_fazendas', lambda: None)
+        agendador_service.iniciar()
+        try:
+            job = agendador_service._scheduler.get_job('status_lotes_diario')
+            assert job is not None and job.next_run_time.hour == agendador_service.STATUS_HORA
+        finally:
+            agendador_service.parar()
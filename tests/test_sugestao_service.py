@@ -0,0 +1,220 @@
+"""
+Testes da sugestão de piquetes (services/sugestao_service.py): índice por
+fazenda, top-K com heap, filtros e remontagem quando a fazenda muda.
+"""
+from datetime import datetime
+
+import pytest
+
+DATA_REF = datetime(2026, 3, 1, 12, 0, 0)
+
+
+@pytest.fixture
+def fazenda(banco_temp):
+    from services import conexao_db
+    from benchmarks.dados_sinteticos import popular_fazenda
+
+    conn = conexao_db.get_db()
+    fazenda_id = popular_fazenda(conn, n_piquetes=120, n_lotes=30, n_movimentacoes=200, data_ref=DATA_REF)
+    lote_id = conn.execute('''
+        SELECT id FROM lotes WHERE fazenda_id = ? AND ativo = 1 AND piquete_atual_id IS NOT NULL
+        ORDER BY id LIMIT 1
+    ''', (fazenda_id,)).fetchone()['id']
+    conn.close()
+    return fazenda_id, lote_id
+
+
+def _selects(funcao):
+    """Executa a função e devolve os SELECTs emitidos."""
+    from services import conexao_db
+
+    conn = conexao_db.get_db()
+    emitidos = []
+    conn.set_trace_callback(emitidos.append)
+    try:
+        resultado = funcao()
+    finally:
+        conn.set_trace_callback(None)
+        conn.close()
+    return resultado, [sql for sql in emitidos if sql.lstrip().upper().startswith('SELECT')]
+
+
+def _ordem_anterior(fazenda_id):
+    """Regra e ordenação de sugerir_proximo_piquete antes do índice (lista completa)."""
+    from services import conexao_db
+    from simular_data import now as data_teste_now
+
+    conn = conexao_db.get_db()
+    ocupados = {r[0] for r in conn.execute('SELECT DISTINCT piquete_atual_id FROM lotes WHERE ativo = 1')}
+    linhas = conn.execute('''
+        SELECT p.*, COALESCE(p.ultima_mov, p.created_at) AS ultima_mov FROM piquetes p
+        WHERE p.fazenda_id = ? AND p.bloqueado = 0 AND p.ativo = 1
+          AND (p.altura_real_medida IS NOT NULL OR p.altura_atual IS NOT NULL)
+    ''', (fazenda_id,)).fetchall()
+    conn.close()
+
+    piquetes = []
+    for p in map(dict, linhas):
+        if p['id'] in ocupados:
+            continue
+        altura = p['altura_real_medida'] if p['altura_real_medida'] is not None else p['altura_atual']
+        novo = not (p['ultima_mov'] and p['ultima_mov'] != p['created_at'])
+        dias = (data_teste_now() - datetime.fromisoformat(p['ultima_mov'])).days if p['ultima_mov'] else 0
+        if altura >= (p['altura_entrada'] or 25):
+            prioridade = 200 if novo else (100 if dias >= (p['dias_descanso_min'] or 30) else 90)
+        else:
+            prioridade = 10
+        piquetes.append({'id': p['id'], 'prioridade': prioridade, 'dias_descanso': dias})
+    piquetes.sort(key=lambda x: (-x['prioridade'], -x['dias_descanso']))
+    return piquetes
+
+
+# ========== TOP-K ==========
+class TestTopK:
+    """Os K primeiros do heap são o começo da lista completa."""
+
+    def test_k_igual_ao_inicio_da_lista(self, fazenda):
+        import database
+        from simular_data import relogio_fixo
+
+        fazenda_id, lote_id = fazenda
+        with relogio_fixo(DATA_REF):
+            todos = database.sugerir_proximo_piquete(fazenda_id, lote_id)
+            top = database.sugerir_proximo_piquete(fazenda_id, lote_id, k=5)
+        assert len(todos) > 5
+        assert [p['id'] for p in top] == [p['id'] for p in todos[:5]]
+        chaves = [(p['prioridade'], p['dias_descanso'], p['pontuacao']) for p in todos]
+        assert chaves == sorted(chaves, reverse=True)
+
+    def test_status_domina(self, fazenda):
+        """Novos, depois aptos, depois altura alcançada, depois em recuperação."""
+        import database
+        from simular_data import relogio_fixo
+
+        fazenda_id, lote_id = fazenda
+        with relogio_fixo(DATA_REF):
+            todos = database.sugerir_proximo_piquete(fazenda_id, lote_id)
+        prioridades = [p['prioridade'] for p in todos]
+        assert prioridades == sorted(prioridades, reverse=True)
+        assert {p['status'] for p in todos} <= {'APTO', 'APTO_ALCANCADA', 'RECUPERANDO'}
+
+    def test_capacidade_do_lote(self, fazenda):
+        """Área que não suporta o lote (UA/ha acima do limite) vai para o fim do seu grupo (status, descanso)."""
+        import database
+        from services import conexao_db
+        from services.manejo_service import TAXA_MAXIMA_LOTACAO
+        from simular_data import relogio_fixo
+
+        fazenda_id, lote_id = fazenda
+        conn = conexao_db.get_db()
+        conn.execute("UPDATE lotes SET quantidade = 60, categoria = 'Boi Gordo', peso_medio = 520 WHERE id = ?",
+                     (lote_id,))
+        conn.commit()
+        conn.close()
+        with relogio_fixo(DATA_REF):
+            todos = database.sugerir_proximo_piquete(fazenda_id, lote_id)
+        excedido = [p['capacidade_ua'] / 2.0 < 60 * 520 / 450 / TAXA_MAXIMA_LOTACAO for p in todos]
+        assert any(excedido) and not all(excedido)
+        assert all(p['pontuacao'] < 0 for p, e in zip(todos, excedido) if e)
+        for (a, excedido_a), (b, excedido_b) in zip(zip(todos, excedido), zip(todos[1:], excedido[1:])):
+            if (a['prioridade'], a['dias_descanso']) == (b['prioridade'], b['dias_descanso']):
+                assert not (excedido_a and not excedido_b)
+
+    def test_ordem_de_sempre(self, fazenda):
+        """Sem filtros, a ordem é a do sugerir_proximo_piquete anterior ao índice."""
+        import database
+        from services import conexao_db
+        from simular_data import relogio_fixo
+
+        fazenda_id, lote_id = fazenda
+        conn = conexao_db.get_db()
+        sem_ua = conn.execute("INSERT INTO lotes (fazenda_id, nome, quantidade, ativo) VALUES (?, 'Sem UA', 0, 1)",
+                              (fazenda_id,)).lastrowid
+        conn.commit()
+        conn.close()
+        with relogio_fixo(DATA_REF):
+            todos = database.sugerir_proximo_piquete(fazenda_id, lote_id)
+            sem_desempate = database.sugerir_proximo_piquete(fazenda_id, sem_ua)
+            anterior = _ordem_anterior(fazenda_id)
+
+        assert [(p['prioridade'], p['dias_descanso']) for p in todos] == \
+            [(p['prioridade'], p['dias_descanso']) for p in anterior]
+        assert sorted(p['id'] for p in todos) == sorted(p['id'] for p in anterior)
+        # Sem UA não há desempate por capacidade: a mesma lista, piquete a piquete
+        assert [p['id'] for p in sem_desempate] == [p['id'] for p in anterior]
+
+
+# ========== FILTROS ==========
+class TestFiltros:
+    """capim, area_min e distancia_max restringem os candidatos antes do heap."""
+
+    def test_filtros(self, fazenda):
+        import database
+        from simular_data import relogio_fixo
+
+        fazenda_id, lote_id = fazenda
+        with relogio_fixo(DATA_REF):
+            todos = database.sugerir_proximo_piquete(fazenda_id, lote_id)
+            marandu = database.sugerir_proximo_piquete(fazenda_id, lote_id, capim='Marandu')
+            grandes = database.sugerir_proximo_piquete(fazenda_id, lote_id, area_min=10)
+            perto = database.sugerir_proximo_piquete(fazenda_id, lote_id, k=3, distancia_max=0.8)
+        assert marandu and [p['id'] for p in marandu] == [p['id'] for p in todos if p['capim'] == 'Marandu']
+        assert grandes and all(p['area'] >= 10 for p in grandes)
+        assert len(grandes) < len(todos)
+        assert perto and len(perto) <= 3 and all(p['distancia_km'] <= 0.8 for p in perto)
+        assert [p['id'] for p in perto] == [p['id'] for p in todos if p['distancia_km'] <= 0.8][:3]
+
+
+# ========== ÍNDICE ==========
+class TestIndice:
+    """Montado uma vez; movimentação remonta."""
+
+    def test_reaproveita_e_remonta(self, fazenda):
+        import database
+        from simular_data import relogio_fixo
+
+        fazenda_id, lote_id = fazenda
+        with relogio_fixo(DATA_REF):
+            primeira, _ = _selects(lambda: database.sugerir_proximo_piquete(fazenda_id, lote_id, k=3))
+            _, consultas = _selects(lambda: database.sugerir_proximo_piquete(fazenda_id, lote_id, k=3))
+            # Só a geração da fazenda e o lote
+            assert len(consultas) == 2 and 'fazenda_geracoes' in consultas[0] and 'FROM lotes l' in consultas[1]
+
+            destino = primeira[0]['id']
+            database.mover_lote(lote_id, destino, usuario_id=2)
+            depois, consultas = _selects(lambda: database.sugerir_proximo_piquete(fazenda_id, lote_id))
+        assert len(consultas) > 1
+        assert destino not in [p['id'] for p in depois]
+
+    def test_gravacao_de_outro_worker(self, fazenda):
+        """Bloqueio gravado por outra conexão (sem invalidar_plano) remonta o índice."""
+        import sqlite3
+        import database
+        from services import conexao_db
+        from simular_data import relogio_fixo
+
+        fazenda_id, lote_id = fazenda
+        with relogio_fixo(DATA_REF):
+            primeiro = database.sugerir_proximo_piquete(fazenda_id, lote_id, k=1)[0]['id']
+            outro = sqlite3.connect(conexao_db.DB_PATH)
+            outro.execute('UPDATE piquetes SET bloqueado = 1 WHERE id = ?', (primeiro,))
+            outro.commit()
+            outro.close()
+            depois = database.sugerir_proximo_piquete(fazenda_id, lote_id)
+        assert depois and primeiro not in [p['id'] for p in depois]
+
+    def test_endpoint(self, fazenda):
+        from app import app
+
+        fazenda_id, lote_id = fazenda
+        app.config['TESTING'] = True
+        client = app.test_client()
+        with client.session_transaction() as sess:
+            sess['user_id'] = 2
+            sess['fazenda_id'] = fazenda_id
+        resposta = client.get(f'/api/lotes/{lote_id}/sugerir-piquetes?k=4&area_min=2')
+        assert resposta.status_code == 200
+        dados = resposta.get_json()
+        assert len(dados) == 4 and all(p['area'] >= 2 for p in dados)
+        assert client.get(f'/api/lotes/{lote_id}/sugerir-piquetes?k=0').status_code == 400
+        assert client.get(f'/api/lotes/{lote_id}/sugerir-piquetes?distancia_max=x').status_code == 400